@@ -8,8 +8,8 @@
 👨‍💼 ADAPTADO PARA: CCB Alerta Bot
 """
 
-from .microsoft_auth import MicrosoftAuth
+from .microsoft_auth import MicrosoftAuth, MicrosoftAuthAsync, obter_auth_compartilhado, encerrar_auth_compartilhado, obter_metricas_token
 
 __version__ = "1.0.0"
 __author__ = "Adaptado para CCB Alerta Bot"
-__all__ = ["MicrosoftAuth"]
+__all__ = ["MicrosoftAuth", "MicrosoftAuthAsync", "obter_auth_compartilhado", "encerrar_auth_compartilhado", "obter_metricas_token"]
@@ -5,12 +5,15 @@ Token exclusivo: /Alerta/token_ccb.json
 
 import os
 import json
-import requests
+import asyncio
 import logging
+import threading
 from typing import Optional, Dict, Any
 from datetime import datetime, timedelta
 from cryptography.fernet import Fernet
 
+from utils import http_client
+
 class MicrosoftAuthUnified:
     def __init__(self, client_id: str = None, client_secret: str = None, tenant_id: str = None):
         self.client_id = client_id or os.getenv("MICROSOFT_CLIENT_ID")
@@ -38,6 +41,18 @@ class MicrosoftAuthUnified:
         self._tokens = None
         self._token_expiry = None
         
+        # Uma renovação/carregamento por vez (demais chamadas esperam e reaproveitam)
+        self._lock_tokens = threading.RLock()
+        self._renovador: Optional[threading.Thread] = None
+        self._parar_renovador = threading.Event()
+        self.margem_renovacao_segundos = int(os.getenv("MICROSOFT_TOKEN_REFRESH_MARGIN_SECONDS", "600"))
+        self._metricas_token = {
+            "renovacoes_proativas": 0,
+            "renovacoes_sob_demanda": 0,
+            "falhas_renovacao": 0,
+            "ultima_renovacao": None,
+        }
+        
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
         self.logger.info("🔐 Microsoft Auth CCB iniciado")
@@ -64,7 +79,8 @@ class MicrosoftAuthUnified:
             raise
     
     def _get_shared_token_url(self) -> str:
-        return f"https://graph.microsoft.com/v1.0/me/drive/items/{self.alerta_folder_id}:/{self.shared_token_filename}:/content"
+        base_url = os.getenv("ONEDRIVE_BASE_URL", "https://graph.microsoft.com/v1.0").rstrip("/")
+        return f"{base_url}/me/drive/items/{self.alerta_folder_id}:/{self.shared_token_filename}:/content"
     
     def _load_from_onedrive_shared(self) -> Optional[Dict[str, Any]]:
         try:
@@ -82,7 +98,7 @@ class MicrosoftAuthUnified:
             url = self._get_shared_token_url()
             self.logger.info(f"📥 Carregando token CCB da pasta Alerta...")
             
-            response = requests.get(url, headers=headers, timeout=30)
+            response = http_client.get(url, endpoint="graph.token", headers=headers, timeout=30)
             
             if response.status_code == 200:
                 token_data = response.json()
@@ -112,20 +128,14 @@ class MicrosoftAuthUnified:
                 'Content-Type': 'application/json'
             }
             
-            encrypted_data = {
-                "access_token": self._encrypt_data(token_data["access_token"]),
-                "refresh_token": self._encrypt_data(token_data["refresh_token"]),
-                "expires_on": token_data.get("expires_on"),
-                "encrypted": True,
-                "updated_at": datetime.now().isoformat(),
-                "sistema": "CCB"
-            }
+            encrypted_data = self._montar_token_criptografado(token_data)
             
             url = self._get_shared_token_url()
             self.logger.info(f"💾 Salvando token CCB na pasta Alerta...")
             
-            response = requests.put(
+            response = http_client.put(
                 url, 
+                endpoint="graph.token",
                 headers=headers, 
                 data=json.dumps(encrypted_data),
                 timeout=30
@@ -142,7 +152,22 @@ class MicrosoftAuthUnified:
             self.logger.error(f"❌ Erro salvar token CCB: {e}")
             return False
     
+    def _montar_token_criptografado(self, token_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "access_token": self._encrypt_data(token_data["access_token"]),
+            "refresh_token": self._encrypt_data(token_data["refresh_token"]),
+            "expires_on": token_data.get("expires_on"),
+            "encrypted": True,
+            "updated_at": datetime.now().isoformat(),
+            "sistema": "CCB"
+        }
+    
     def load_tokens(self) -> bool:
+        with self._lock_tokens:
+            self._token_expiry = None
+            return self._load_tokens()
+    
+    def _load_tokens(self) -> bool:
         self.logger.info("🔍 Iniciando carregamento tokens CCB...")
         
         # 1. Environment variables criptografadas
@@ -209,7 +234,7 @@ class MicrosoftAuthUnified:
         self.logger.warning("⚠️  Nenhum token CCB encontrado")
         return False
     
-    def save_tokens(self, access_token: str, refresh_token: str, expires_in: int = 3600):
+    def _aplicar_tokens(self, access_token: str, refresh_token: str, expires_in: int = 3600) -> Dict[str, Any]:
         expires_on = int(datetime.now().timestamp()) + expires_in
         
         token_data = {
@@ -220,9 +245,23 @@ class MicrosoftAuthUnified:
         
         self._tokens = token_data.copy()
         self._token_expiry = datetime.fromtimestamp(expires_on)
+        return token_data
+    
+    def save_tokens(self, access_token: str, refresh_token: str, expires_in: int = 3600,
+                    em_segundo_plano: bool = False):
+        token_data = self._aplicar_tokens(access_token, refresh_token, expires_in)
         
         self.logger.info(f"💾 Salvando tokens CCB: {self.mask_token(refresh_token)}")
         
+        if em_segundo_plano:
+            # O token novo já está em memória: quem pediu não espera o PUT no OneDrive
+            threading.Thread(
+                target=self._persistir_tokens, args=(token_data,), name="token-ccb-save", daemon=True
+            ).start()
+            return
+        self._persistir_tokens(token_data)
+    
+    def _persistir_tokens(self, token_data: Dict[str, Any]):
         onedrive_saved = self._save_to_onedrive_shared(token_data)
         
         if onedrive_saved:
@@ -230,6 +269,14 @@ class MicrosoftAuthUnified:
         else:
             self.logger.warning("⚠️  OneDrive CCB falhou")
     
+    def segundos_para_expirar(self) -> Optional[float]:
+        if not self._tokens:
+            return None
+        expires_on = self._tokens.get("expires_on")
+        if not expires_on:
+            return None
+        return expires_on - datetime.now().timestamp()
+    
     def is_token_valid(self) -> bool:
         if not self._tokens:
             return False
@@ -243,7 +290,25 @@ class MicrosoftAuthUnified:
         
         return datetime.now() < (self._token_expiry - timedelta(minutes=5))
     
-    def refresh_access_token(self) -> bool:
+    def refresh_access_token(self, proativa: bool = False, tokens_vistos: Optional[Dict[str, Any]] = None) -> bool:
+        # tokens_vistos: tokens que o chamador viu expirados (padrão: os atuais)
+        tokens_antes = self._tokens if tokens_vistos is None else tokens_vistos
+        with self._lock_tokens:
+            # Outra thread renovou enquanto esperávamos o lock: reaproveitar
+            if self._tokens is not tokens_antes:
+                return bool(self._tokens)
+            
+            sucesso = self._refresh_access_token(proativa)
+            
+            chave = "renovacoes_proativas" if proativa else "renovacoes_sob_demanda"
+            if sucesso:
+                self._metricas_token[chave] += 1
+                self._metricas_token["ultima_renovacao"] = datetime.now()
+            else:
+                self._metricas_token["falhas_renovacao"] += 1
+            return sucesso
+    
+    def _refresh_access_token(self, proativa: bool) -> bool:
         if not self._tokens or not self._tokens.get("refresh_token"):
             self.logger.error("❌ Refresh token CCB não disponível")
             return False
@@ -251,21 +316,10 @@ class MicrosoftAuthUnified:
         self.logger.info(f"🔄 Renovando token CCB: {self.mask_token(self._tokens['refresh_token'])}")
         
         try:
-            # CORREÇÃO: Usar mesmo padrão do hotmail_refresh.py que funciona
-            data = {
-                'client_id': self.client_id,
-                'grant_type': 'refresh_token',
-                'refresh_token': self._tokens["refresh_token"],
-                'scope': 'https://graph.microsoft.com/.default offline_access'
-            }
-            
-            # Se client_secret existir, adicionar (para apps confidenciais)
-            if self.client_secret:
-                data['client_secret'] = self.client_secret
-            
-            response = requests.post(
-                f'https://login.microsoftonline.com/{self.tenant_id}/oauth2/v2.0/token',
-                data=data,
+            response = http_client.post(
+                self._url_renovacao(),
+                endpoint="login.token",
+                data=self._dados_renovacao(),
                 timeout=30
             )
             
@@ -275,7 +329,8 @@ class MicrosoftAuthUnified:
                 self.save_tokens(
                     token_response['access_token'],
                     token_response.get('refresh_token', self._tokens["refresh_token"]),
-                    token_response.get('expires_in', 3600)
+                    token_response.get('expires_in', 3600),
+                    em_segundo_plano=not proativa
                 )
                 
                 self.logger.info(f"✅ Token CCB renovado: {self.mask_token(token_response['access_token'])}")
@@ -289,11 +344,34 @@ class MicrosoftAuthUnified:
             self.logger.error(f"❌ Erro renovação CCB: {e}")
             return False
     
+    def _url_renovacao(self) -> str:
+        return f'https://login.microsoftonline.com/{self.tenant_id}/oauth2/v2.0/token'
+    
+    def _dados_renovacao(self) -> Dict[str, str]:
+        # CORREÇÃO: Usar mesmo padrão do hotmail_refresh.py que funciona
+        data = {
+            'client_id': self.client_id,
+            'grant_type': 'refresh_token',
+            'refresh_token': self._tokens["refresh_token"],
+            'scope': 'https://graph.microsoft.com/.default offline_access'
+        }
+        
+        # Se client_secret existir, adicionar (para apps confidenciais)
+        if self.client_secret:
+            data['client_secret'] = self.client_secret
+        return data
+    
     @property
     def access_token(self) -> Optional[str]:
-        if not self._tokens:
-            if not self.load_tokens():
-                return None
+        # Caminho rápido: token em memória e válido, sem lock nem rede
+        tokens = self._tokens
+        if tokens and self.is_token_valid():
+            return tokens.get("access_token")
+        
+        if not tokens:
+            with self._lock_tokens:
+                if not self._tokens and not self.load_tokens():
+                    return None
         
         if not self.is_token_valid():
             if not self.refresh_access_token():
@@ -351,6 +429,56 @@ class MicrosoftAuthUnified:
             return self.refresh_access_token()
         return True
     
+    # ==================== RENOVAÇÃO PROATIVA ====================
+    
+    def _loop_renovacao(self):
+        falhas = 0
+        while True:
+            restante = self.segundos_para_expirar()
+            if restante is None:
+                espera = 60
+            elif falhas:
+                espera = min(30 * 2 ** (falhas - 1), 600)
+            else:
+                espera = max(1, restante - self.margem_renovacao_segundos)
+            
+            if self._parar_renovador.wait(espera):
+                return
+            
+            restante = self.segundos_para_expirar()
+            if restante is not None and restante > self.margem_renovacao_segundos:
+                continue  # já renovado sob demanda
+            
+            if not self._tokens and not self.load_tokens():
+                falhas += 1
+                continue
+            
+            if self.refresh_access_token(proativa=True):
+                falhas = 0
+            else:
+                falhas += 1
+                self.logger.warning(f"⚠️  Renovação proativa CCB falhou ({falhas}x) - nova tentativa em breve")
+    
+    def iniciar_renovacao_automatica(self):
+        """Renova o token em segundo plano antes de expirar (idempotente)"""
+        if self._renovador and self._renovador.is_alive():
+            return
+        self._parar_renovador.clear()
+        self._renovador = threading.Thread(target=self._loop_renovacao, name="token-ccb-refresh", daemon=True)
+        self._renovador.start()
+        self.logger.info(f"⏱️ Renovação automática do token CCB ativa ({self.margem_renovacao_segundos}s antes de expirar)")
+    
+    def parar_renovacao_automatica(self):
+        self._parar_renovador.set()
+        if self._renovador:
+            self._renovador.join(timeout=5)
+    
+    def metricas_token(self) -> dict:
+        metricas = dict(self._metricas_token)
+        metricas["segundos_para_expirar"] = self.segundos_para_expirar()
+        metricas["renovacao_automatica"] = bool(self._renovador and self._renovador.is_alive())
+        return metricas
+    
     def get_microsoft_token(self) -> dict:
         if not self._tokens:
             if not self.load_tokens():
@@ -364,3 +492,109 @@ class MicrosoftAuthUnified:
 # Compatibilidade
 class MicrosoftAuth(MicrosoftAuthUnified):
     pass
+
+
+_auth_compartilhado: Optional[MicrosoftAuth] = None
+_auth_compartilhado_lock = threading.Lock()
+
+
+def obter_auth_compartilhado() -> MicrosoftAuth:
+    """
+    Provedor de token único do processo
+    
+    Todos os módulos (config, banco, OneDrive, handlers) usam a mesma
+    instância: os tokens são carregados do OneDrive uma vez, ficam em
+    memória e são renovados em segundo plano antes de expirar.
+    
+    Raises:
+        ValueError: configuração Microsoft incompleta (ver MicrosoftAuthUnified)
+    """
+    global _auth_compartilhado
+    
+    with _auth_compartilhado_lock:
+        if _auth_compartilhado is None:
+            _auth_compartilhado = MicrosoftAuth()
+            _auth_compartilhado.iniciar_renovacao_automatica()
+        return _auth_compartilhado
+
+
+def obter_metricas_token() -> dict:
+    """Renovações do token compartilhado para o /health ({} se ainda não criado)"""
+    if _auth_compartilhado is None:
+        return {}
+    return _auth_compartilhado.metricas_token()
+
+
+def encerrar_auth_compartilhado():
+    """Para a renovação automática (shutdown)"""
+    global _auth_compartilhado
+    
+    with _auth_compartilhado_lock:
+        if _auth_compartilhado is not None:
+            _auth_compartilhado.parar_renovacao_automatica()
+            _auth_compartilhado = None
+
+
+class MicrosoftAuthAsync:
+    """
+    Variante assíncrona do MicrosoftAuth para uso no event loop do bot
+    
+    Compartilha os tokens com a instância síncrona (usada pelas threads de
+    sincronização); a renovação roda fora do event loop pelo mesmo caminho
+    da instância síncrona e é feita uma única vez mesmo com várias
+    corrotinas e a thread de renovação pedindo o token ao mesmo tempo.
+    """
+    
+    def __init__(self, auth: Optional[MicrosoftAuthUnified] = None):
+        self.sync = auth or obter_auth_compartilhado()
+        self.logger = self.sync.logger
+        self._lock_renovacao: Optional[asyncio.Lock] = None
+    
+    def __getattr__(self, nome):
+        # Operações sem I/O (status, validade, mask_token...) vêm da instância síncrona
+        return getattr(self.sync, nome)
+    
+    async def load_tokens(self) -> bool:
+        # Carregamento acontece uma vez no startup: roda fora do event loop
+        return await asyncio.to_thread(self.sync.load_tokens)
+    
+    async def refresh_access_token(self) -> bool:
+        if self._lock_renovacao is None:
+            self._lock_renovacao = asyncio.Lock()
+        
+        async with self._lock_renovacao:
+            # Outra corrotina pode ter renovado enquanto esperávamos
+            if self.sync.is_token_valid():
+                return True
+            
+            # Mesmo caminho (e lock) da thread de renovação: só uma renovação
+            # por token expirado no processo, com o PUT do token_ccb.json em
+            # segundo plano e as métricas atualizadas sob o lock
+            return await asyncio.to_thread(
+                self.sync.refresh_access_token, False, self.sync._tokens
+            )
+    
+    async def obter_access_token(self) -> Optional[str]:
+        if not self.sync._tokens:
+            if not await self.load_tokens():
+                return None
+        
+        if not self.sync.is_token_valid():
+            if not await self.refresh_access_token():
+                return None
+        
+        return self.sync._tokens.get("access_token")
+    
+    async def obter_headers_autenticados(self) -> dict:
+        token = await self.obter_access_token()
+        if not token:
+            raise Exception("Token de acesso não disponível")
+        return {
+            'Authorization': f'Bearer {token}',
+            'Content-Type': 'application/json'
+        }
+    
+    async def tentar_renovar_se_necessario(self) -> bool:
+        if not self.sync.is_token_valid():
+            return await self.refresh_access_token()
+        return True
@@ -0,0 +1,977 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmarks do banco de dados SQLite do CCB Alerta Bot
+Uso: python benchmark_database.py [wal] [event_loop] [handlers] [startup] [cache] [lgpd] [periodo] [estatisticas] [compressao] [vacuum]
+
+Roda sobre arquivos temporários - não toca no banco real nem no OneDrive.
+Assim como teste_database.py, exige TELEGRAM_BOT_TOKEN definido (config.py).
+"""
+
+import argparse
+import functools
+import logging
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+# Configurar logging
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger("DatabaseBenchmark")
+
+# Adicionar o diretório atual ao path para importações
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+def percentis(amostras):
+    """Retorna p50/p95/p99/max (ms) de uma lista de latências em segundos"""
+    if not amostras:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+
+    ordenadas = sorted(amostras)
+    def p(q):
+        return ordenadas[min(len(ordenadas) - 1, int(q * len(ordenadas)))] * 1000
+
+    return {"p50": p(0.50), "p95": p(0.95), "p99": p(0.99), "max": ordenadas[-1] * 1000}
+
+# ============================================
+# WAL x ROLLBACK JOURNAL
+# ============================================
+
+def _rodar_leitura_durante_escrita(wal, duracao, leitores, linhas_iniciais):
+    """Mede latência de leitura com um escritor commitando continuamente"""
+    from utils.database.connection_pool import SQLiteConnectionPool
+    from utils.database.database import configurar_conexao
+
+    pasta = tempfile.mkdtemp(prefix="ccb_bench_wal_")
+    db_path = os.path.join(pasta, "bench.db")
+
+    pool = SQLiteConnectionPool(
+        db_path,
+        max_leitores=leitores,
+        configurar_conexao=functools.partial(configurar_conexao, wal=wal)
+    )
+
+    try:
+        conn = pool.obter_conexao()
+        try:
+            conn.execute('''
+            CREATE TABLE responsaveis (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                codigo_casa TEXT NOT NULL,
+                nome TEXT NOT NULL,
+                funcao TEXT NOT NULL,
+                user_id INTEGER NOT NULL
+            )
+            ''')
+            conn.execute('CREATE INDEX idx_codigo_casa ON responsaveis(codigo_casa)')
+            conn.executemany(
+                "INSERT INTO responsaveis (codigo_casa, nome, funcao, user_id) VALUES (?, ?, ?, ?)",
+                [(f"BR21-{i % 40:04d}", f"Nome {i}", "Cooperador", i) for i in range(linhas_iniciais)]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+        parar = threading.Event()
+        latencias = []
+        latencias_lock = threading.Lock()
+        escritas = [0]
+
+        def escritor():
+            i = linhas_iniciais
+            while not parar.is_set():
+                conn = pool.obter_conexao()
+                try:
+                    conn.execute(
+                        "INSERT INTO responsaveis (codigo_casa, nome, funcao, user_id) VALUES (?, ?, ?, ?)",
+                        (f"BR21-{i % 40:04d}", f"Nome {i}", "Cooperador", i)
+                    )
+                    conn.commit()
+                finally:
+                    conn.close()
+                escritas[0] += 1
+                i += 1
+
+        def leitor(n):
+            locais = []
+            while not parar.is_set():
+                inicio = time.perf_counter()
+                conn = pool.obter_conexao(somente_leitura=True)
+                try:
+                    conn.execute(
+                        "SELECT * FROM responsaveis WHERE codigo_casa = ? ORDER BY nome",
+                        (f"BR21-{n % 40:04d}",)
+                    ).fetchall()
+                finally:
+                    conn.close()
+                locais.append(time.perf_counter() - inicio)
+                n += 1
+            with latencias_lock:
+                latencias.extend(locais)
+
+        threads = [threading.Thread(target=escritor)]
+        threads += [threading.Thread(target=leitor, args=(i,)) for i in range(leitores)]
+        for t in threads:
+            t.start()
+        time.sleep(duracao)
+        parar.set()
+        for t in threads:
+            t.join()
+
+        resultado = percentis(latencias)
+        resultado["leituras_s"] = len(latencias) / duracao
+        resultado["escritas_s"] = escritas[0] / duracao
+        return resultado
+
+    finally:
+        pool.fechar()
+        shutil.rmtree(pasta, ignore_errors=True)
+
+def benchmark_wal(duracao=5.0, leitores=4, linhas_iniciais=5000):
+    """Compara latência de leitura concorrente a escritas: rollback journal x WAL"""
+    logger.info("=" * 60)
+    logger.info(f"LEITURAS DURANTE ESCRITAS ({leitores} leitores, {duracao:.0f}s por modo)")
+    logger.info("=" * 60)
+
+    for wal in (False, True):
+        nome = "WAL" if wal else "DELETE (padrão)"
+        r = _rodar_leitura_durante_escrita(wal, duracao, leitores, linhas_iniciais)
+        logger.info(
+            f"{nome:16s} leitura p50={r['p50']:.2f}ms p95={r['p95']:.2f}ms "
+            f"p99={r['p99']:.2f}ms max={r['max']:.2f}ms | "
+            f"{r['leituras_s']:.0f} leituras/s, {r['escritas_s']:.0f} escritas/s"
+        )
+
+# ============================================
+# EVENT LOOP x GRAPH LENTO
+# ============================================
+
+def _medir_atraso_loop(carga, preparar=None, intervalo=0.01):
+    """Roda `carga` (corrotina) e mede o atraso dos ticks de um timer no mesmo loop"""
+    import asyncio
+
+    async def rodar():
+        atrasos = []
+        parar = asyncio.Event()
+        if preparar:
+            await preparar()
+
+        async def ticker():
+            loop = asyncio.get_running_loop()
+            while not parar.is_set():
+                esperado = loop.time() + intervalo
+                await asyncio.sleep(intervalo)
+                atrasos.append(max(0.0, loop.time() - esperado))
+
+        tarefa = asyncio.create_task(ticker())
+        await asyncio.sleep(intervalo * 2)
+        inicio = time.perf_counter()
+        await carga()
+        duracao = time.perf_counter() - inicio
+        parar.set()
+        await tarefa
+        return atrasos, duracao
+
+    atrasos, duracao = asyncio.run(rodar())
+    resultado = percentis(atrasos)
+    resultado["duracao"] = duracao
+    return resultado
+
+def benchmark_event_loop(requisicoes=10, atraso_graph=0.2):
+    """Atraso do event loop com Graph lento: cliente síncrono x assíncrono"""
+    import asyncio
+    from teste_onedrive import ServidorGraphLocal, AuthAsyncFalsa, criar_manager
+    from utils.onedrive_manager_async import OneDriveManagerAsync
+    from utils import http_client
+
+    logger.info("=" * 60)
+    logger.info(f"EVENT LOOP COM GRAPH LENTO ({requisicoes} consultas, {atraso_graph * 1000:.0f}ms cada)")
+    logger.info("=" * 60)
+
+    servidor = ServidorGraphLocal().iniciar()
+    try:
+        servidor.gravar("alertas_bot.db", b"x" * 1024)
+        servidor.atraso_segundos = atraso_graph
+        manager = criar_manager(servidor)
+        manager_async = OneDriveManagerAsync(manager, AuthAsyncFalsa())
+
+        async def carga_sincrona():
+            # Como um handler chamando o gerenciador síncrono diretamente
+            for _ in range(requisicoes):
+                manager.obter_metadados_database()
+
+        async def carga_assincrona():
+            await asyncio.gather(*[manager_async.obter_metadados_database() for _ in range(requisicoes)])
+            await http_client.fechar_cliente_async()
+
+        async def preparar():
+            # Criação do cliente (contexto TLS) acontece uma vez por processo
+            http_client.obter_cliente_async()
+
+        for nome, carga in (("síncrono", carga_sincrona), ("assíncrono", carga_assincrona)):
+            r = _medir_atraso_loop(carga, preparar)
+            logger.info(
+                f"{nome:11s} atraso do loop p50={r['p50']:.1f}ms p99={r['p99']:.1f}ms "
+                f"max={r['max']:.1f}ms | total {r['duracao']:.2f}s"
+            )
+    finally:
+        servidor.parar()
+
+# ============================================
+# HANDLERS CONCORRENTES (CARGA)
+# ============================================
+
+class _MensagemFalsa:
+    async def reply_text(self, *args, **kwargs):
+        pass
+
+class _QueryFalsa(_MensagemFalsa):
+    def __init__(self, usuario, data):
+        self.from_user = usuario
+        self.data = data
+        self.message = _MensagemFalsa()
+
+    async def answer(self, *args, **kwargs):
+        pass
+
+    async def edit_message_text(self, *args, **kwargs):
+        pass
+
+def _update_falso(user_id, callback_data=None):
+    """Update mínimo com o que os handlers usam (usuário, mensagem, callback)"""
+    from types import SimpleNamespace
+
+    usuario = SimpleNamespace(id=user_id, first_name="Teste", username=None)
+    query = _QueryFalsa(usuario, callback_data) if callback_data else None
+    return SimpleNamespace(effective_user=usuario, message=_MensagemFalsa(), callback_query=query)
+
+def benchmark_handlers(usuarios=300, latencia_io_ms=2.0):
+    """Latência dos handlers com centenas de updates simultâneos: banco síncrono x assíncrono"""
+    import asyncio
+    from types import SimpleNamespace
+    from utils.database import database, async_database
+    from handlers import cadastro, commands, lgpd
+
+    logger.info("=" * 60)
+    logger.info(f"HANDLERS CONCORRENTES ({usuarios} usuários, +{latencia_io_ms:.0f}ms de I/O por operação)")
+    logger.info("=" * 60)
+
+    pasta = tempfile.mkdtemp(prefix="ccb_bench_handlers_")
+    os.environ["RENDER_DISK_PATH"] = pasta
+    database.init_database()
+
+    modulos = (cadastro, commands, lgpd)
+    nomes = ("verificar_consentimento_lgpd", "registrar_consentimento_lgpd",
+             "verificar_admin", "obter_cadastros_por_user_id")
+    originais = {(m, n): getattr(m, n) for m in modulos for n in nomes if hasattr(m, n)}
+
+    def com_latencia(funcao):
+        # Disco persistente do Render: cada operação paga alguns ms de I/O
+        def wrapper(*args, **kwargs):
+            time.sleep(latencia_io_ms / 1000)
+            return funcao(*args, **kwargs)
+        return wrapper
+
+    def instalar(modo):
+        for (modulo, nome) in originais:
+            funcao = com_latencia(getattr(database, nome))
+            if modo == "síncrono":
+                # Comportamento anterior: chamada bloqueante dentro da corrotina
+                async def bloqueante(*args, _f=funcao, **kwargs):
+                    return _f(*args, **kwargs)
+                setattr(modulo, nome, bloqueante)
+            else:
+                setattr(modulo, nome, async_database._assincrona(funcao))
+
+    async def usuario(user_id, latencias, chegada):
+        context = SimpleNamespace(user_data={})
+        etapas = (
+            (cadastro.iniciar_cadastro_etapas, _update_falso(user_id)),
+            (cadastro.processar_aceite_lgpd, _update_falso(user_id, "aceitar_lgpd_cadastro_auto")),
+            (commands.mostrar_ajuda, _update_falso(user_id)),
+            (lgpd.remover_dados, _update_falso(user_id)),
+        )
+        # Latência = da chegada do update (todos juntos / fim da etapa anterior) até a resposta,
+        # incluindo a espera pelo event loop ocupado com outros handlers
+        for handler, update in etapas:
+            await handler(update, context)
+            fim = time.perf_counter()
+            latencias.append(fim - chegada)
+            chegada = fim
+
+    async def rodar(base):
+        latencias = []
+        inicio = time.perf_counter()
+        await asyncio.gather(*[usuario(base + i, latencias, inicio) for i in range(usuarios)])
+        return latencias, time.perf_counter() - inicio
+
+    try:
+        for indice, modo in enumerate(("síncrono", "assíncrono")):
+            instalar(modo)
+            latencias, duracao = asyncio.run(rodar(10_000_000 * (indice + 1)))
+            r = percentis(latencias)
+            logger.info(
+                f"{modo:11s} handler p50={r['p50']:.1f}ms p99={r['p99']:.1f}ms max={r['max']:.1f}ms | "
+                f"{len(latencias)} updates em {duracao:.2f}s ({len(latencias) / duracao:.0f}/s)"
+            )
+    finally:
+        for (modulo, nome), funcao in originais.items():
+            setattr(modulo, nome, funcao)
+        async_database.fechar_executor()
+        database.fechar_pool()
+        shutil.rmtree(pasta, ignore_errors=True)
+
+# ============================================
+# STARTUP (IMPORT E PRIMEIRO UPDATE)
+# ============================================
+
+_SCRIPT_STARTUP = """
+import asyncio, json, sys, time
+from types import SimpleNamespace
+inicio = time.perf_counter()
+import bot
+importado = time.perf_counter()
+from config import inicializar_sistema
+inicializar_sistema(em_segundo_plano=sys.argv[1] == "etapas")
+iniciado = time.perf_counter()
+
+from handlers import commands
+class Mensagem:
+    async def reply_text(self, *args, **kwargs):
+        pass
+update = SimpleNamespace(effective_user=SimpleNamespace(id=1), message=Mensagem())
+asyncio.run(commands.mostrar_ajuda(update, SimpleNamespace(user_data={})))
+primeiro = time.perf_counter()
+
+from utils.database import obter_status_inicializacao
+while obter_status_inicializacao()["duracao_segundos"] is None:
+    time.sleep(0.01)
+pronto = time.perf_counter()
+print(json.dumps({"importacao": importado - inicio, "inicializacao": iniciado - importado,
+                  "primeiro_update": primeiro - inicio, "onedrive_pronto": pronto - inicio}))
+"""
+
+def benchmark_startup(atraso_graph=0.3):
+    """Tempo de import e até o primeiro update: startup bloqueante x em etapas"""
+    import json
+    import subprocess
+    from cryptography.fernet import Fernet
+    from teste_onedrive import ServidorGraphLocal, PASTA_ID
+
+    logger.info("=" * 60)
+    logger.info(f"STARTUP COM ONEDRIVE ({atraso_graph * 1000:.0f}ms por chamada ao Graph)")
+    logger.info("=" * 60)
+
+    servidor = ServidorGraphLocal().iniciar()
+    pasta = tempfile.mkdtemp(prefix="ccb_bench_startup_")
+    try:
+        servidor.atraso_segundos = atraso_graph
+        ambiente = dict(
+            os.environ,
+            ONEDRIVE_DATABASE_ENABLED="true",
+            MICROSOFT_CLIENT_ID="cliente-bench",
+            ENCRYPTION_KEY=Fernet.generate_key().decode(),
+            ONEDRIVE_ALERTA_ID=PASTA_ID,
+            ONEDRIVE_BASE_URL=servidor.base_url,
+            MICROSOFT_ACCESS_TOKEN="token-bench",
+            MICROSOFT_REFRESH_TOKEN="refresh-bench",
+            MICROSOFT_TOKEN_EXPIRES=str(int(time.time()) + 3600),
+            RENDER_DISK_PATH=pasta,
+            ONEDRIVE_CACHE_DIR=os.path.join(pasta, "storage"),
+        )
+
+        # Cada modo roda duas vezes: sem cache local (primeiro deploy) e com cache
+        for modo in ("bloqueante", "etapas"):
+            shutil.rmtree(os.path.join(pasta, "storage"), ignore_errors=True)
+            for rodada in ("sem cache", "com cache"):
+                saida = subprocess.run(
+                    [sys.executable, "-c", _SCRIPT_STARTUP, modo], env=ambiente,
+                    cwd=os.path.dirname(os.path.abspath(__file__)),
+                    capture_output=True, text=True, timeout=300
+                )
+                if saida.returncode != 0:
+                    logger.error(f"❌ {modo}/{rodada}: {saida.stderr[-500:]}")
+                    continue
+                r = json.loads(saida.stdout.strip().splitlines()[-1])
+                logger.info(
+                    f"{modo:10s} {rodada:9s} import={r['importacao'] * 1000:.0f}ms "
+                    f"init={r['inicializacao'] * 1000:.0f}ms primeiro update={r['primeiro_update'] * 1000:.0f}ms "
+                    f"OneDrive pronto={r['onedrive_pronto'] * 1000:.0f}ms"
+                )
+    finally:
+        servidor.parar()
+        shutil.rmtree(pasta, ignore_errors=True)
+
+# ============================================
+# CACHE EM MEMÓRIA DE RESPONSÁVEIS
+# ============================================
+
+def benchmark_cache_responsaveis(registros=2000, leituras=500):
+    """Leituras de responsáveis: consulta SQL x projeção em memória"""
+    from utils.database import database
+
+    logger.info("=" * 60)
+    logger.info(f"CACHE DE RESPONSÁVEIS ({registros} registros, {leituras} leituras por consulta)")
+    logger.info("=" * 60)
+
+    pasta = tempfile.mkdtemp(prefix="ccb_bench_cache_")
+    os.environ["RENDER_DISK_PATH"] = pasta
+    cache = database._cache_responsaveis or database.CacheResponsaveis(database._carregar_responsaveis)
+    try:
+        database.init_database()
+        conn = database.get_connection()
+        try:
+            conn.executemany(
+                "INSERT INTO responsaveis (codigo_casa, nome, funcao, user_id, username, data_cadastro, ultima_atualizacao) "
+                "VALUES (?, ?, ?, ?, ?, '01/01/2025 00:00:00', '01/01/2025 00:00:00')",
+                [(f"BR21-{i % 300:04d}", f"Nome {i}", "Cooperador", 1000 + i // 2, f"user{i}")
+                 for i in range(registros)]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+        consultas = {
+            "listar_todos": lambda i: database.listar_todos_responsaveis(),
+            "por_codigo": lambda i: database.buscar_responsaveis_por_codigo(f"BR21-{i % 300:04d}"),
+            "por_user_id": lambda i: database.obter_cadastros_por_user_id(1000 + i % (registros // 2)),
+        }
+        for nome, consulta in consultas.items():
+            resultados = {}
+            for modo, instancia in (("SQL", None), ("cache", cache)):
+                database._cache_responsaveis = instancia
+                consulta(0)  # aquecimento (reconstrução do cache)
+                amostras = []
+                for i in range(leituras):
+                    inicio = time.perf_counter()
+                    resultados.setdefault(modo, []).append(consulta(i))
+                    amostras.append(time.perf_counter() - inicio)
+                r = percentis(amostras)
+                logger.info(f"{nome:12s} {modo:5s} p50={r['p50']:.3f}ms p99={r['p99']:.3f}ms")
+            if resultados["SQL"] != resultados["cache"]:
+                logger.error(f"❌ {nome}: resultados do cache diferem da consulta SQL")
+
+        m = cache.metricas()
+        logger.info(
+            f"Métricas: {m['acertos']} acertos, {m['faltas']} faltas, "
+            f"reconstrução {m['ultima_reconstrucao_ms']}ms ({m['registros']} registros)"
+        )
+    finally:
+        database._cache_responsaveis = cache if database._cache_responsaveis_habilitado else None
+        database.fechar_pool()
+        shutil.rmtree(pasta, ignore_errors=True)
+
+# ============================================
+# CACHE DE CONSENTIMENTOS LGPD
+# ============================================
+
+def benchmark_lgpd(usuarios=2000, duracao=2.0):
+    """Verificações de consentimento por segundo: consulta SQL x cache em memória"""
+    import asyncio
+    from utils.database import database, async_database
+
+    logger.info("=" * 60)
+    logger.info(f"CONSENTIMENTO LGPD ({usuarios} usuários, metade com consentimento)")
+    logger.info("=" * 60)
+
+    pasta = tempfile.mkdtemp(prefix="ccb_bench_lgpd_")
+    os.environ["RENDER_DISK_PATH"] = pasta
+    cache = database._cache_lgpd or database.CacheConsentimento(
+        database._carregar_consentimentos, database._consultar_consentimento
+    )
+    try:
+        database.init_database()
+        conn = database.get_connection()
+        try:
+            conn.executemany(
+                "INSERT INTO consentimento_lgpd (user_id, data_consentimento) VALUES (?, '01/01/2025 00:00:00')",
+                [(user_id,) for user_id in range(0, usuarios, 2)]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+        def medir_sincrono():
+            verificacoes = 0
+            fim = time.perf_counter() + duracao
+            while time.perf_counter() < fim:
+                for user_id in range(usuarios):
+                    if database.verificar_consentimento_lgpd(user_id) != (user_id % 2 == 0):
+                        raise AssertionError(f"Consentimento incorreto para {user_id}")
+                verificacoes += usuarios
+            return verificacoes
+
+        async def medir_assincrono():
+            verificacoes = 0
+            fim = time.perf_counter() + duracao
+            while time.perf_counter() < fim:
+                await asyncio.gather(*[async_database.verificar_consentimento_lgpd(u) for u in range(100)])
+                verificacoes += 100
+            return verificacoes
+
+        for modo in ("SQL", "cache"):
+            database._cache_lgpd = cache if modo == "cache" else None
+            if modo == "cache":
+                cache.invalidar()
+                cache.precarregar()
+            inicio = time.perf_counter()
+            sincronas = medir_sincrono()
+            taxa_sincrona = sincronas / (time.perf_counter() - inicio)
+            inicio = time.perf_counter()
+            assincronas = asyncio.run(medir_assincrono())
+            taxa_assincrona = assincronas / (time.perf_counter() - inicio)
+            logger.info(
+                f"{modo:5s} síncrono {taxa_sincrona:>10,.0f}/s | handlers (async) {taxa_assincrona:>10,.0f}/s"
+            )
+
+        m = cache.metricas()
+        logger.info(
+            f"Métricas: {m['acertos_positivos']} positivos, {m['acertos_negativos']} negativos, "
+            f"{m['faltas']} faltas, pré-carga {m['ultima_precarga_ms']}ms"
+        )
+    finally:
+        database._cache_lgpd = cache if database._cache_lgpd_habilitado else None
+        async_database.fechar_executor()
+        database.fechar_pool()
+        shutil.rmtree(pasta, ignore_errors=True)
+
+# ============================================
+# CONSULTAS POR PERÍODO EM ALERTAS
+# ============================================
+
+def _gerar_alertas(conn, alertas, casas):
+    """Dois anos de alertas sintéticos (sem data_envio_ts); retorna o gerador aleatório usado"""
+    import random
+    from datetime import datetime, timedelta
+
+    aleatorio = random.Random(42)
+    base = datetime(2024, 1, 1)
+    inicio = time.perf_counter()
+    conn.executemany(
+        "INSERT INTO alertas_enviados (codigo_casa, tipo_alerta, mensagem, data_envio, user_id) "
+        "VALUES (?, ?, 'alerta', ?, ?)",
+        ((f"BR21-{aleatorio.randrange(casas):04d}", aleatorio.choice(("Consumo", "Vazamento", "Conta")),
+          (base + timedelta(seconds=aleatorio.randrange(730 * 86400))).strftime("%d/%m/%Y %H:%M:%S"),
+          aleatorio.randrange(5000))
+         for _ in range(alertas))
+    )
+    logger.info(f"Carga: {alertas:,} alertas em {time.perf_counter() - inicio:.1f}s")
+    return aleatorio
+
+def benchmark_periodo(alertas=1_000_000, casas=500, consultas=200):
+    """Alertas por casa/período: datas em texto (substr, sem índice) x data_envio_ts indexado"""
+    from datetime import datetime
+    from utils.database import database, migrations
+
+    logger.info("=" * 60)
+    logger.info(f"ALERTAS POR PERÍODO ({alertas:,} alertas, {casas} casas, {consultas} consultas)")
+    logger.info("=" * 60)
+
+    pasta = tempfile.mkdtemp(prefix="ccb_bench_periodo_")
+    os.environ["RENDER_DISK_PATH"] = pasta
+    try:
+        # Banco da versão anterior (schema v2, alertas só com data em texto) fora do pool:
+        # mede as migrações v3/v4 e a separação do histórico feita pelo init_database
+        conn = sqlite3.connect(database.get_db_path())
+        try:
+            for migracao in migrations.MIGRACOES[:2]:
+                migracao.aplicar(conn)
+            conn.execute("PRAGMA user_version = 2")
+            aleatorio = _gerar_alertas(conn, alertas, casas)
+            conn.commit()
+
+            relatorio = migrations.aplicar_migracoes(conn)
+            for passo in relatorio["passos"]:
+                logger.info(f"Migração v{passo['versao']}: {passo['linhas']:,} linhas em {passo['segundos']:.1f}s")
+        finally:
+            conn.close()
+
+        inicio = time.perf_counter()
+        database.init_database()
+        logger.info(f"init_database (separação do histórico): {time.perf_counter() - inicio:.1f}s")
+
+        casas_consultadas = [f"BR21-{aleatorio.randrange(casas):04d}" for _ in range(consultas)]
+        meses = [(2024 + i % 2, 1 + i % 12) for i in range(consultas)]
+
+        def ultimos_texto(i):
+            # Ordenação anterior: texto dd/mm/YYYY (errada entre meses e sem índice)
+            conn = database.get_connection(somente_leitura=True)
+            try:
+                return conn.execute(
+                    "SELECT * FROM alertas_enviados WHERE codigo_casa = ? ORDER BY data_envio DESC LIMIT 20",
+                    (casas_consultadas[i],)
+                ).fetchall()
+            finally:
+                conn.close()
+
+        def mes_texto(i):
+            ano, mes = meses[i]
+            conn = database.get_connection(somente_leitura=True)
+            try:
+                return conn.execute(
+                    "SELECT * FROM alertas_enviados WHERE codigo_casa = ? "
+                    "AND substr(data_envio, 7, 4) || '-' || substr(data_envio, 4, 2) = ?",
+                    (casas_consultadas[i], f"{ano}-{mes:02d}")
+                ).fetchall()
+            finally:
+                conn.close()
+
+        def mes_indexado(i):
+            ano, mes = meses[i]
+            fim = datetime(ano + mes // 12, mes % 12 + 1, 1)
+            return database.listar_alertas_por_periodo(
+                datetime(ano, mes, 1), fim, codigo_casa=casas_consultadas[i], limite=None
+            )
+
+        cenarios = (
+            ("últimos 20", ultimos_texto, lambda i: database.listar_alertas_enviados(
+                codigo_casa=casas_consultadas[i], limite=20)),
+            ("mês da casa", mes_texto, mes_indexado),
+        )
+        for nome, texto, indexado in cenarios:
+            for modo, consulta in (("texto", texto), ("epoch", indexado)):
+                amostras = []
+                for i in range(consultas):
+                    inicio = time.perf_counter()
+                    consulta(i)
+                    amostras.append(time.perf_counter() - inicio)
+                r = percentis(amostras)
+                logger.info(f"{nome:12s} {modo:5s} p50={r['p50']:.3f}ms p99={r['p99']:.3f}ms")
+
+        # Mesmo conjunto de alertas nas duas formas (fora das medições)
+        for i in range(min(consultas, 20)):
+            if {linha['id'] for linha in mes_texto(i)} != {alerta['id'] for alerta in mes_indexado(i)}:
+                logger.error(f"❌ Período divergente para {casas_consultadas[i]} {meses[i]}")
+    finally:
+        database.fechar_pool()
+        shutil.rmtree(pasta, ignore_errors=True)
+
+# ============================================
+# ESTATÍSTICAS DE ALERTAS
+# ============================================
+
+def benchmark_estatisticas(alertas=1_000_000, casas=500, consultas=20):
+    """obter_estatisticas_alertas: três GROUP BY sobre o histórico x tabelas de resumo"""
+    from utils.database import database
+
+    logger.info("=" * 60)
+    logger.info(f"ESTATÍSTICAS DE ALERTAS ({alertas:,} alertas, {casas} casas, {consultas} consultas)")
+    logger.info("=" * 60)
+
+    pasta = tempfile.mkdtemp(prefix="ccb_bench_estatisticas_")
+    os.environ["RENDER_DISK_PATH"] = pasta
+    try:
+        database.init_database()
+        conn = database.get_connection()
+        try:
+            # Carga com os triggers do resumo ativos: custo incremental por alerta
+            _gerar_alertas(conn, alertas, casas)
+            conn.commit()
+        finally:
+            conn.close()
+
+        def varredura():
+            # Consultas da versão anterior de obter_estatisticas_alertas
+            conn = database.get_connection(somente_leitura=True)
+            try:
+                total = conn.execute("SELECT COUNT(*) FROM alertas_enviados").fetchone()[0]
+                por_tipo = dict(conn.execute(
+                    "SELECT tipo_alerta, COUNT(*) AS contagem FROM alertas_enviados "
+                    "GROUP BY tipo_alerta ORDER BY contagem DESC"
+                ).fetchall())
+                por_periodo = dict(conn.execute(
+                    "SELECT substr(data_envio, 7, 4) || '-' || substr(data_envio, 4, 2) AS mes_ano, COUNT(*) "
+                    "FROM alertas_enviados GROUP BY mes_ano ORDER BY mes_ano DESC"
+                ).fetchall())
+                return {'total': total, 'por_tipo': por_tipo, 'por_periodo': por_periodo}
+            finally:
+                conn.close()
+
+        resultados = {}
+        for modo, consulta in (("GROUP BY", varredura), ("resumo", database.obter_estatisticas_alertas)):
+            amostras = []
+            for _ in range(consultas):
+                inicio = time.perf_counter()
+                resultados[modo] = consulta()
+                amostras.append(time.perf_counter() - inicio)
+            r = percentis(amostras)
+            logger.info(f"{modo:8s} p50={r['p50']:.3f}ms p99={r['p99']:.3f}ms")
+
+        resumo = {chave: resultados["resumo"][chave] for chave in resultados["GROUP BY"]}
+        if resumo != resultados["GROUP BY"]:
+            logger.error("❌ Estatísticas do resumo diferem da varredura completa")
+
+        inicio = time.perf_counter()
+        database.reconstruir_estatisticas_alertas(verificar=True)
+        logger.info(f"Verificação de consistência: {(time.perf_counter() - inicio) * 1000:.0f}ms")
+    finally:
+        database.fechar_pool()
+        shutil.rmtree(pasta, ignore_errors=True)
+
+# ============================================
+# COMPRESSÃO NO TRANSPORTE DO ONEDRIVE
+# ============================================
+
+def benchmark_compressao(responsaveis=20000, alertas=200_000, largura_banda_mbps=20.0):
+    """Bytes transferidos e tempo de sync (upload + download) por algoritmo/nível"""
+    from utils import compressao
+    from utils.database import database, historico
+    from teste_onedrive import ServidorGraphLocal, criar_manager
+
+    logger.info("=" * 60)
+    logger.info(
+        f"COMPRESSÃO NO TRANSPORTE ({responsaveis:,} responsáveis, {alertas:,} alertas, "
+        f"link de {largura_banda_mbps:g} Mbps)"
+    )
+    logger.info("=" * 60)
+
+    servidor = ServidorGraphLocal().iniciar()
+    pasta = tempfile.mkdtemp(prefix="ccb_bench_compressao_")
+    os.environ["RENDER_DISK_PATH"] = pasta
+    try:
+        database.init_database()
+        conn = database.get_connection()
+        try:
+            conn.executemany(
+                "INSERT INTO responsaveis (codigo_casa, nome, funcao, user_id, username, data_cadastro, "
+                "ultima_atualizacao, codigo_norm, nome_norm) "
+                "VALUES (?, ?, ?, ?, ?, '01/01/2025 00:00:00', '01/01/2025 00:00:00', ?, ?)",
+                [(f"BR21-{i % 900:04d}", f"Responsável {i}", "Cooperador", 1000 + i, f"user{i}",
+                  f"br21-{i % 900:04d}", f"responsável {i}") for i in range(responsaveis)]
+            )
+            _gerar_alertas(conn, alertas, 900)
+            conn.commit()
+        finally:
+            conn.close()
+        database.fechar_pool()
+
+        principal = database.get_db_path()
+        arquivos = (("principal", principal), ("histórico", historico.caminho_historico(principal)))
+        destino = os.path.join(pasta, "baixado.db")
+
+        manager = criar_manager(servidor)
+        configuracoes = [(None, None), ("gzip", 1), ("gzip", 6), ("gzip", 9)]
+        if compressao.zstd_disponivel():
+            configuracoes += [("zstd", 1), ("zstd", 3), ("zstd", 10)]
+        else:
+            logger.info("zstd indisponível (pip install zstandard) - só gzip")
+
+        for algoritmo, nivel in configuracoes:
+            manager.compressao_upload, manager.nivel_compressao = algoritmo, nivel
+            rotulo = f"{algoritmo}-{nivel}" if algoritmo else "bruto"
+            for nome, caminho in arquivos:
+                original = os.path.getsize(caminho)
+
+                inicio = time.perf_counter()
+                if not manager.upload_arquivo(caminho, "bench.db", comprimir=True):
+                    logger.error(f"❌ Upload {rotulo}/{nome} falhou")
+                    continue
+                envio = time.perf_counter() - inicio
+                transferidos = len(servidor.arquivos["bench.db"])
+
+                inicio = time.perf_counter()
+                manager.download_arquivo("bench.db", destino)
+                recebimento = time.perf_counter() - inicio
+                if os.path.getsize(destino) != original:
+                    logger.error(f"❌ Download {rotulo}/{nome} com tamanho divergente")
+
+                # Servidor local: tempo medido é só CPU/disco; o link entra pela estimativa
+                rede = 2 * transferidos * 8 / (largura_banda_mbps * 1_000_000)
+                logger.info(
+                    f"{rotulo:7s} {nome:9s} {original / 1024:8.0f}KB → {transferidos / 1024:7.0f}KB "
+                    f"({original / transferidos:4.1f}x) upload={envio * 1000:5.0f}ms "
+                    f"download={recebimento * 1000:5.0f}ms sync estimado={envio + recebimento + rede:5.2f}s"
+                )
+    finally:
+        database.fechar_pool()
+        servidor.parar()
+        shutil.rmtree(pasta, ignore_errors=True)
+
+# ============================================
+# COMPACTAÇÃO INCREMENTAL (AUTO_VACUUM)
+# ============================================
+
+def benchmark_vacuum(responsaveis=100_000, fracao_removida=0.5):
+    """Snapshot enviado após remoções: sem compactação x incremental_vacuum x VACUUM completo"""
+    from utils.database import database
+
+    logger.info("=" * 60)
+    logger.info(f"COMPACTAÇÃO INCREMENTAL ({responsaveis:,} responsáveis, {fracao_removida:.0%} removidos)")
+    logger.info("=" * 60)
+
+    pasta = tempfile.mkdtemp(prefix="ccb_bench_vacuum_")
+    os.environ["RENDER_DISK_PATH"] = pasta
+    try:
+        database.init_database()
+        database.parar_agendador_vacuum()  # compactação só quando medida
+        usuarios = 1000
+        conn = database.get_connection()
+        try:
+            conn.executemany(
+                "INSERT INTO responsaveis (codigo_casa, nome, funcao, user_id, username, data_cadastro, "
+                "ultima_atualizacao, codigo_norm, nome_norm) "
+                "VALUES (?, ?, 'Cooperador', ?, ?, '01/01/2025 00:00:00', '01/01/2025 00:00:00', ?, ?)",
+                [(f"BR21-{i % 900:04d}", f"Responsável {i}", i % usuarios, f"user{i}",
+                  f"br21-{i % 900:04d}", f"responsável {i}") for i in range(responsaveis)]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+        inicio = time.perf_counter()
+        for user_id in range(int(usuarios * fracao_removida)):
+            database.remover_cadastros_por_user_id(user_id)
+        logger.info(f"Remoções: {int(usuarios * fracao_removida)} usuários em {time.perf_counter() - inicio:.1f}s")
+
+        def snapshot():
+            destino = os.path.join(pasta, "snapshot.db")
+            database.criar_snapshot_consistente(destino)
+            return os.path.getsize(destino)
+
+        espaco = database.obter_metricas_espaco()["esquemas"]["main"]
+        logger.info(
+            f"sem compactação  snapshot={snapshot() / 1024:7.0f}KB "
+            f"({espaco['razao_livre']:.0%} páginas livres, {espaco['bytes_dados'] / 1024:.0f}KB em uso)"
+        )
+
+        copia = os.path.join(pasta, "copia.db")
+        database.criar_snapshot_consistente(copia)
+
+        inicio = time.perf_counter()
+        database.compactar_banco(forcar=True)
+        duracao = time.perf_counter() - inicio
+        logger.info(f"incremental      snapshot={snapshot() / 1024:7.0f}KB em {duracao * 1000:.0f}ms")
+
+        conn = sqlite3.connect(copia)
+        try:
+            inicio = time.perf_counter()
+            conn.execute("VACUUM")
+            logger.info(
+                f"VACUUM completo  arquivo={os.path.getsize(copia) / 1024:7.0f}KB "
+                f"em {(time.perf_counter() - inicio) * 1000:.0f}ms"
+            )
+        finally:
+            conn.close()
+    finally:
+        database.fechar_pool()
+        shutil.rmtree(pasta, ignore_errors=True)
+
+# ============================================
+# REPLICAÇÃO POR WAL
+# ============================================
+
+def benchmark_replicacao(tamanhos=(2000, 20000, 100000), escritas=30):
+    """Bytes enviados por cadastro: banco inteiro (modo arquivo) x segmento do WAL (modo wal)"""
+    from utils import compressao
+    from utils.database import database
+    from utils.database.wal_sync import ReplicadorWAL, ArmazenamentoLocal, SUBPASTA_REMOTA
+
+    logger.info("=" * 60)
+    logger.info(f"REPLICAÇÃO POR WAL ({escritas} cadastros por tamanho de banco)")
+    logger.info("=" * 60)
+
+    modo_original = (database._wal_habilitado, database._replicacao_wal)
+    database._wal_habilitado = database._replicacao_wal = True
+    try:
+        for responsaveis in tamanhos:
+            pasta = tempfile.mkdtemp(prefix="ccb_bench_replicacao_")
+            os.environ["RENDER_DISK_PATH"] = pasta
+            replicador = None
+            try:
+                database.init_database()
+                database.parar_agendador_vacuum()
+                conn = database.get_connection()
+                try:
+                    conn.executemany(
+                        "INSERT INTO responsaveis (codigo_casa, nome, funcao, user_id, username, data_cadastro, "
+                        "ultima_atualizacao, codigo_norm, nome_norm) "
+                        "VALUES (?, ?, 'Cooperador', ?, ?, '01/01/2025 00:00:00', '01/01/2025 00:00:00', ?, ?)",
+                        [(f"BR21-{i % 900:04d}", f"Responsável {i}", 1000 + i, f"user{i}",
+                          f"br21-{i % 900:04d}", f"responsável {i}") for i in range(responsaveis)]
+                    )
+                    conn.commit()
+                finally:
+                    conn.close()
+
+                remoto = os.path.join(pasta, "remoto")
+                replicador = ReplicadorWAL(ArmazenamentoLocal(remoto), database.get_connection, database.get_db_path)
+                replicador.enviar_pendentes()
+
+                snapshot = os.path.join(pasta, "snapshot.db")
+                comprimido = os.path.join(pasta, "comprimido")
+                arquivo, arquivo_gzip, wal, wal_gzip = [], [], [], []
+                tempo_arquivo = tempo_wal = 0.0
+
+                for i in range(escritas):
+                    database.salvar_responsavel(f"BR99-{i:04d}", f"Novo {i}", "Cooperador", 90000 + i, f"novo{i}")
+
+                    inicio = time.perf_counter()
+                    database.criar_snapshot_consistente(snapshot)
+                    tempo_arquivo += time.perf_counter() - inicio
+                    arquivo.append(os.path.getsize(snapshot))
+                    arquivo_gzip.append(compressao.comprimir_arquivo(snapshot, comprimido, "gzip", 1))
+
+                    enviados = replicador.metricas()["bytes_enviados"]
+                    inicio = time.perf_counter()
+                    replicador.enviar_pendentes()
+                    tempo_wal += time.perf_counter() - inicio
+                    wal.append(replicador.metricas()["bytes_enviados"] - enviados)
+                    segmento = max(os.listdir(os.path.join(remoto, SUBPASTA_REMOTA)), key=lambda nome: nome.split("_")[1])
+                    wal_gzip.append(compressao.comprimir_arquivo(
+                        os.path.join(remoto, SUBPASTA_REMOTA, segmento), comprimido, "gzip", 1
+                    ))
+
+                    if i % 10 == 9:
+                        replicador.checkpoint()
+
+                logger.info(
+                    f"{responsaveis:7,} responsáveis  arquivo={sum(arquivo) / escritas / 1024:7.0f}KB "
+                    f"(gzip {sum(arquivo_gzip) / escritas / 1024:5.0f}KB, {tempo_arquivo / escritas * 1000:4.0f}ms)  "
+                    f"wal={sum(wal) / escritas / 1024:5.1f}KB (gzip {sum(wal_gzip) / escritas / 1024:4.1f}KB, "
+                    f"{tempo_wal / escritas * 1000:4.1f}ms) por cadastro"
+                )
+            finally:
+                if replicador:
+                    replicador.fechar()
+                database.fechar_pool()
+                shutil.rmtree(pasta, ignore_errors=True)
+    finally:
+        database._wal_habilitado, database._replicacao_wal = modo_original
+
+BENCHMARKS = {
+    "wal": benchmark_wal,
+    "event_loop": benchmark_event_loop,
+    "handlers": benchmark_handlers,
+    "startup": benchmark_startup,
+    "cache": benchmark_cache_responsaveis,
+    "lgpd": benchmark_lgpd,
+    "periodo": benchmark_periodo,
+    "estatisticas": benchmark_estatisticas,
+    "compressao": benchmark_compressao,
+    "vacuum": benchmark_vacuum,
+    "replicacao": benchmark_replicacao,
+}
+
+def main():
+    """Executa os benchmarks selecionados (todos por padrão)"""
+    parser = argparse.ArgumentParser(description="Benchmarks do banco de dados")
+    parser.add_argument("benchmarks", nargs="*", help=f"Opções: {', '.join(BENCHMARKS)}")
+    args = parser.parse_args()
+
+    desconhecidos = [nome for nome in args.benchmarks if nome not in BENCHMARKS]
+    if desconhecidos:
+        parser.error(f"Benchmark desconhecido: {', '.join(desconhecidos)}")
+
+    for nome in args.benchmarks or list(BENCHMARKS):
+        BENCHMARKS[nome]()
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@ CCB Alerta Bot - VERSÃO CORRIGIDA COM MELHORIAS + COMANDOS GLOBAIS
 🌐 NOVO: Comandos /add_global e /list_global para admins
 """
 
+import asyncio
 import logging
 import os
 from datetime import datetime
@@ -25,6 +26,7 @@ from handlers.admin import registrar_handlers_admin
 from handlers.mensagens import registrar_handlers_mensagens
 from handlers.error import registrar_error_handler
 from handlers.lgpd import registrar_handlers_lgpd
+from utils.database.async_database import verificar_admin, get_admin_ids
 
 # Configurar logging
 logging.basicConfig(
@@ -37,15 +39,22 @@ logger = logging.getLogger("CCB-Alerta-Bot")
 # SISTEMA DE HEALTH CHECK E ALERTAS ADMIN
 # ================================================================================================
 
-def get_admin_ids():
-    """Obter IDs dos administradores da variável ADMIN_IDS"""
-    admin_ids_str = os.getenv("ADMIN_IDS", "")
-    return [admin_id.strip() for admin_id in admin_ids_str.split(',') if admin_id.strip()]
-
 def check_database_health():
     """Verificar saúde do banco de dados"""
     try:
         import sqlite3
+        
+        # Startup em etapas: sem cache local o banco aguarda o download inicial
+        from utils.database import obter_status_inicializacao
+        startup = obter_status_inicializacao()
+        if not startup["pronto"]:
+            inicio = startup["inicio"]
+            return {
+                "status": "⚠️",
+                "message": f"Inicializando ({startup['estado']})",
+                "details": f"Startup iniciado às {inicio:%H:%M:%S}" if inicio else ""
+            }
+        
         # Tentar acessar database local (prioridade: Render path -> local fallback)
         db_paths = [
             "/opt/render/project/disk/shared_data/alertas_bot.db",  # Render
@@ -74,10 +83,77 @@ def check_database_health():
         
         conn.close()
         
+        details = f"Database: {os.path.basename(db_path)}"
+        if startup["duracao_segundos"] is not None:
+            details += f"\nStartup: {startup['estado']} em {startup['duracao_segundos']:.1f}s"
+        elif startup["inicio"]:
+            details += f"\nStartup: {startup['estado']} (cache local em uso)"
+        
+        # Contenção do pool de conexões persistentes
+        from utils.database import obter_estatisticas_pool
+        pool_stats = obter_estatisticas_pool()
+        if pool_stats:
+            details += (
+                f"\nPool: {pool_stats['checkouts']} checkouts, "
+                f"{pool_stats['esperas']} esperas ({pool_stats['espera_media_ms']}ms), "
+                f"hit {pool_stats['taxa_acerto']:.0%}"
+            )
+        
+        # Cache em memória de responsáveis (leituras sem SQL)
+        from utils.database import obter_metricas_cache_responsaveis
+        cache_stats = obter_metricas_cache_responsaveis()
+        if cache_stats:
+            details += (
+                f"\nCache: {cache_stats['registros']} registros, hit {cache_stats['taxa_acerto']:.0%}, "
+                f"{cache_stats['reconstrucoes']} reconstruções ({cache_stats['ultima_reconstrucao_ms']}ms)"
+            )
+        
+        from utils.database import obter_metricas_registro_admins
+        admins_stats = obter_metricas_registro_admins()
+        if admins_stats["admins"] is not None:
+            details += f"\nAdmins: {admins_stats['admins']} em memória ({admins_stats['admins_ambiente']} via ADMIN_IDS)"
+        
+        from utils.database import obter_metricas_cache_lgpd
+        lgpd_stats = obter_metricas_cache_lgpd()
+        if lgpd_stats:
+            details += (
+                f"\nLGPD: {lgpd_stats['positivos']} consentimentos em memória, "
+                f"hit {lgpd_stats['taxa_acerto']:.0%}{' (pré-carregado)' if lgpd_stats['completo'] else ''}"
+            )
+        
+        from utils.database import obter_versao_schema
+        schema = obter_versao_schema()
+        details += f"\nSchema: v{schema['versao']}"
+        if schema['versao'] != schema['atual']:
+            details += f" (código na v{schema['atual']})"
+        
+        # Cadastros que colidiram no índice único (mantidos com sufixo #id)
+        from utils.database import listar_conflitos_cadastro
+        conflitos = listar_conflitos_cadastro()
+        if conflitos:
+            details += f"\nConflitos de cadastro: {len(conflitos)} para revisão"
+            for conflito in conflitos[:5]:
+                details += (
+                    f"\n  ID {conflito['id']} ({conflito['codigo_casa']} - {conflito['nome']}) "
+                    f"duplica ID {conflito['id_original']}"
+                )
+        
+        # Arquivo x dados vivos (páginas livres são enviadas em todo upload)
+        from utils.database import obter_metricas_espaco
+        espaco = obter_metricas_espaco()
+        for esquema, dados in espaco["esquemas"].items():
+            details += (
+                f"\nEspaço {esquema}: {dados['bytes_arquivo'] / 1024:.0f} KB, "
+                f"{dados['bytes_dados'] / 1024:.0f} KB em uso ({dados['razao_livre']:.0%} livre, "
+                f"auto_vacuum {dados['auto_vacuum']})"
+            )
+        if espaco["compactacoes"]:
+            details += f"\nCompactação: {espaco['compactacoes']}x, {espaco['bytes_liberados'] / 1024:.0f} KB liberados"
+        
         return {
             "status": "✅", 
             "message": f"{total_responsaveis} responsáveis, {total_lgpd} LGPD",
-            "details": f"Database: {os.path.basename(db_path)}"
+            "details": details
         }
         
     except Exception as e:
@@ -100,24 +176,121 @@ def check_onedrive_health():
         if not alerta_id:
             return {"status": "❌", "message": "ALERTA_ID não configurado", "details": ""}
             
+        details = f"Client: {client_id[:10]}..., Alerta: {alerta_id[:10]}..."
+        
+        # Atualização do cache local em segundo plano
+        from utils.database import obter_status_atualizacao_onedrive
+        refresh = obter_status_atualizacao_onedrive()
+        if refresh:
+            idade = refresh["idade_segundos"]
+            duracao = refresh["ultima_duracao_segundos"]
+            details += f"\nRefresh: há {int(idade)}s" if idade is not None else "\nRefresh: nunca"
+            if duracao is not None:
+                details += f" (duração {duracao:.2f}s)"
+            details += f", {refresh['ultimo_resultado']}"
+        
+        # Fila de upload com debounce
+        from utils.database import obter_metricas_upload_onedrive
+        upload = obter_metricas_upload_onedrive()
+        if upload:
+            details += (
+                f"\nUploads: {upload['uploads']} enviados, {upload['enfileirados']} enfileirados, "
+                f"{upload['coalescidos']} coalescidos, {upload['falhas']} falhas"
+                f"{', pendente' if upload['pendente'] else ''}"
+            )
+        
+        # Histórico de alertas (arquivo e fila de upload próprios)
+        from utils.database import obter_metricas_upload_historico
+        upload_historico = obter_metricas_upload_historico()
+        if upload_historico:
+            details += (
+                f"\nHistórico: {upload_historico['uploads']} envios, "
+                f"{upload_historico['coalescidos']} alertas agrupados, {upload_historico['falhas']} falhas"
+                f"{', pendente' if upload_historico['pendente'] else ''}"
+            )
+        
+        # Download condicional (eTag/cTag)
+        from utils.database import obter_metricas_download_onedrive
+        download = obter_metricas_download_onedrive()
+        if download:
+            details += (
+                f"\nDownloads: {download['completos']} completos, {download['inalterados']} pulados "
+                f"(inalterados), {download['bytes_baixados'] / 1024:.0f} KB baixados"
+            )
+        
+        # Sync delta (lotes de alterações)
+        from utils.database import obter_metricas_delta_onedrive
+        delta = obter_metricas_delta_onedrive()
+        if delta:
+            details += (
+                f"\nDelta: {delta['lotes_enviados']} lotes ({delta['alteracoes_enviadas']} alterações), "
+                f"{delta['compactacoes']} snapshots, {delta['bytes_enviados'] / 1024:.0f} KB enviados"
+            )
+        
+        # Replicação por WAL (segmentos + bases)
+        from utils.database import obter_metricas_wal_onedrive
+        wal = obter_metricas_wal_onedrive()
+        if wal:
+            details += (
+                f"\nWAL: {wal['segmentos_enviados']} segmentos ({wal['frames_enviados']} frames, "
+                f"{wal['bytes_enviados'] / 1024:.0f} KB), {wal['bases_enviadas']} bases, "
+                f"{wal['reinicios_inesperados']} recomeços inesperados, seq {wal['ultimo_seq']}"
+            )
+        
+        # Conflitos de upload entre instâncias (mescla linha a linha)
+        from utils.database import obter_metricas_conflito_onedrive
+        conflito = obter_metricas_conflito_onedrive()
+        if conflito:
+            details += (
+                f"\nConflitos: {conflito['conflitos']} uploads recusados, {conflito['mesclagens']} mesclas "
+                f"({conflito['linhas_mescladas']} linhas), {conflito['falhas']} não resolvidos"
+            )
+        
+        # Latência HTTP por endpoint (Graph/Telegram)
+        from utils.http_client import obter_metricas_http
+        for endpoint, http in sorted(obter_metricas_http().items()):
+            details += (
+                f"\nHTTP {endpoint}: {http['chamadas']} chamadas, média {http['media_ms']:.0f}ms, "
+                f"p95 ≤ {http['p95_ms']}ms, {http['retentativas']} retentativas, {http['erros']} erros"
+            )
+        
+        # Token Microsoft (renovação em segundo plano)
+        from auth.microsoft_auth import obter_metricas_token
+        token = obter_metricas_token()
+        if token:
+            restante = token["segundos_para_expirar"]
+            details += (
+                f"\nToken: expira em {int(restante // 60)}min" if restante is not None else "\nToken: sem validade"
+            )
+            details += (
+                f", {token['renovacoes_proativas']} renovações proativas, "
+                f"{token['renovacoes_sob_demanda']} sob demanda, {token['falhas_renovacao']} falhas"
+            )
+        
+        if refresh and refresh["falhas_consecutivas"] >= 3:
+            return {
+                "status": "⚠️",
+                "message": f"Refresh falhando ({refresh['falhas_consecutivas']}x)",
+                "details": details
+            }
+        
         # Se todas as variáveis existem
         return {
             "status": "✅", 
             "message": "Configurações OK",
-            "details": f"Client: {client_id[:10]}..., Alerta: {alerta_id[:10]}..."
+            "details": details
         }
         
     except Exception as e:
         return {"status": "❌", "message": f"Erro: {str(e)[:50]}", "details": str(e)}
 
-def check_telegram_health():
+def check_telegram_health(admin_ids):
     """Verificar saúde do Telegram Bot"""
     try:
         bot_token = TOKEN
         if not bot_token:
             return {"status": "❌", "message": "BOT_TOKEN não configurado", "details": ""}
             
-        admin_ids = get_admin_ids()
         if not admin_ids:
             return {"status": "⚠️", "message": "Nenhum admin configurado", "details": "ADMIN_IDS vazio"}
             
@@ -133,20 +306,19 @@ def check_telegram_health():
 async def health_command(update, context):
     """Comando /health - Diagnóstico completo para admins"""
     user_id = str(update.effective_user.id)
-    admin_ids = get_admin_ids()
     
     # Verificar se é admin
-    if user_id not in admin_ids:
+    if not await verificar_admin(update.effective_user.id):
         await update.message.reply_text("❌ Comando disponível apenas para administradores.")
         return
     
     # Mostrar que está processando
     await update.message.reply_text("🔍 Executando diagnóstico completo do sistema...")
     
-    # Executar checks
-    db_health = check_database_health()
-    onedrive_health = check_onedrive_health()
-    telegram_health = check_telegram_health()
+    # Executar checks (leem o banco e métricas: fora do event loop)
+    db_health = await asyncio.to_thread(check_database_health)
+    onedrive_health = await asyncio.to_thread(check_onedrive_health)
+    telegram_health = check_telegram_health(await get_admin_ids())
     
     # Determinar status geral
     all_statuses = [db_health["status"], onedrive_health["status"], telegram_health["status"]]
@@ -198,10 +370,9 @@ Telegram: {telegram_health["details"]}
 async def admin_help_command(update, context):
     """Comando /admin_help - Lista todos os comandos administrativos"""
     user_id = str(update.effective_user.id)
-    admin_ids = get_admin_ids()
     
     # Verificar se é admin
-    if user_id not in admin_ids:
+    if not await verificar_admin(update.effective_user.id):
         await update.message.reply_text("❌ Comando disponível apenas para administradores.")
         return
     
@@ -257,10 +428,7 @@ def _get_total_igrejas():
 
 async def restart_command(update, context):
     """Comando /restart - Placeholder para reiniciar componentes"""
-    user_id = str(update.effective_user.id)
-    admin_ids = get_admin_ids()
-    
-    if user_id not in admin_ids:
+    if not await verificar_admin(update.effective_user.id):
         await update.message.reply_text("❌ Comando disponível apenas para administradores.")
         return
     
@@ -276,31 +444,39 @@ async def restart_command(update, context):
     )
 
 async def sync_command(update, context):
-    """Comando /sync - Placeholder para forçar sincronização"""
-    user_id = str(update.effective_user.id)
-    admin_ids = get_admin_ids()
-    
-    if user_id not in admin_ids:
+    """Comando /sync - Forçar sincronização com o OneDrive"""
+    if not await verificar_admin(update.effective_user.id):
         await update.message.reply_text("❌ Comando disponível apenas para administradores.")
         return
     
-    await update.message.reply_text(
-        "🔄 **Comando /sync**\n\n"
-        "⚠️ Este comando forçaria sincronização OneDrive.\n\n"
-        "🔧 **Funcionalidades:**\n"
-        "• Sincronizar database local → OneDrive\n"
-        "• Verificar integridade dos dados\n"
-        "• Resolver conflitos de sincronização\n\n"
-        "📞 Contate o desenvolvedor para implementação completa.",
-        parse_mode='Markdown'
-    )
+    from utils.database import sincronizar_agora_onedrive, obter_onedrive_async
+    
+    manager_async = obter_onedrive_async()
+    if not manager_async:
+        await update.message.reply_text("📁 OneDrive não está ativo - dados apenas no storage local.")
+        return
+    
+    await update.message.reply_text("🔄 Sincronizando com o OneDrive...")
+    
+    # Upload pela fila (thread própria) e consulta ao Graph sem bloquear o event loop
+    enviado = await asyncio.to_thread(sincronizar_agora_onedrive, 60)
+    metadados = await manager_async.obter_metadados_database()
+    
+    linhas = ["🔄 **Sincronização OneDrive**\n"]
+    linhas.append(f"📤 Upload: {'✅ concluído' if enviado else '❌ não concluído (nova tentativa automática)'}")
+    if metadados:
+        linhas.append(f"📄 Remoto: {metadados.get('size', 0)} bytes")
+        linhas.append(f"🕐 Modificado: {metadados.get('lastModifiedDateTime', 'N/A')}")
+    elif metadados == {}:
+        linhas.append("📄 Remoto: arquivo ainda não existe")
+    else:
+        linhas.append("📄 Remoto: ❌ não foi possível consultar")
+    
+    await update.message.reply_text("\n".join(linhas), parse_mode='Markdown')
 
 async def test_command(update, context):
     """Comando /test - Testar componentes básicos"""
-    user_id = str(update.effective_user.id)
-    admin_ids = get_admin_ids()
-    
-    if user_id not in admin_ids:
+    if not await verificar_admin(update.effective_user.id):
         await update.message.reply_text("❌ Comando disponível apenas para administradores.")
         return
     
@@ -314,11 +490,11 @@ async def test_command(update, context):
     tests.append(f"🔑 CLIENT_ID: {'✅' if client_id else '❌'}")
     
     # Teste 2: Database
-    db_health = check_database_health()
+    db_health = await asyncio.to_thread(check_database_health)
     tests.append(f"💾 Database: {db_health['status']}")
     
     # Teste 3: ADMIN_IDS
-    admin_count = len(get_admin_ids())
+    admin_count = len(await get_admin_ids())
     tests.append(f"👥 Admins: {'✅' if admin_count > 0 else '❌'} ({admin_count})")
     
     # Teste 4: Bot Token
@@ -358,6 +534,30 @@ def configurar_logs():
     logger.addHandler(file_handler)
     logger.info("Sistema de logs configurado")
 
+async def encerrar_recursos(application):
+    """Libera recursos do banco ao encerrar o bot (post_shutdown)"""
+    from utils.database import (
+        parar_atualizador_onedrive, finalizar_sincronizacao_onedrive,
+        parar_agendador_checkpoint, parar_agendador_vacuum, fechar_pool
+    )
+    
+    from utils.database.async_database import fechar_executor
+    fechar_executor()
+    
+    parar_atualizador_onedrive()
+    finalizar_sincronizacao_onedrive()
+    parar_agendador_vacuum()
+    parar_agendador_checkpoint()
+    fechar_pool()
+    
+    from utils.http_client import fechar_sessao, fechar_cliente_async
+    fechar_sessao()
+    
+    from auth.microsoft_auth import encerrar_auth_compartilhado
+    encerrar_auth_compartilhado()
+    await fechar_cliente_async()
+    logger.info("🔒 Recursos do banco de dados liberados")
+
 def main():
     """Função principal - VERSÃO CORRIGIDA COM COMANDOS GLOBAIS"""
     logger.info("=" * 50)
@@ -375,7 +575,7 @@ def main():
     
     try:
         # Criar a aplicação
-        application = Application.builder().token(TOKEN).build()
+        application = Application.builder().token(TOKEN).post_shutdown(encerrar_recursos).build()
         
         # Registrar handlers na ordem correta (ConversationHandler PRIMEIRO)
         registrar_comandos_basicos(application)
@@ -412,8 +612,9 @@ def main():
         else:
             logger.warning("⚠️ Comandos de cadastro global não disponíveis")
         
-        # Log das configurações importantes
-        admin_ids = get_admin_ids()
+        # Log das configurações importantes (sem ler o banco: o bootstrap pode estar em andamento)
+        from utils.database import obter_ids_admins_sem_banco
+        admin_ids = [str(admin_id) for admin_id in sorted(obter_ids_admins_sem_banco())]
         logger.info(f"👥 Administradores configurados: {len(admin_ids)}")
         if admin_ids:
             logger.info(f"   IDs: {', '.join(admin_ids)}")
@@ -459,7 +660,8 @@ def main():
         
         # Tentar notificar admins sobre falha crítica
         try:
-            admin_ids = get_admin_ids()
+            from utils.database import obter_ids_admins_sem_banco
+            admin_ids = obter_ids_admins_sem_banco()
             if admin_ids:
                 logger.info(f"Tentando notificar {len(admin_ids)} admins sobre falha crítica...")
                 # Aqui poderia implementar notificação de emergência
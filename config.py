@@ -161,30 +161,31 @@ def verificar_diretorios():
     
     logger.info(f"Diretórios locais verificados: {DATA_DIR}")
 
-def inicializar_sistema():
+def inicializar_sistema(em_segundo_plano=True):
     """
     Inicializa todos os componentes do sistema
     ATUALIZADO: Suporte a OneDrive + fallback local
-    """
-    global ADMIN_IDS, DATABASE_PATH
     
+    Com OneDrive, a integração (token, pastas, download inicial) roda em
+    segundo plano: o bot começa a atender com o cache local e o progresso
+    aparece no /health. em_segundo_plano=False mantém o startup bloqueante.
+    """
     # Garantir que os diretórios existem antes de inicializar
     verificar_diretorios()  
     
-    # NOVO: Inicializar OneDriveManager se habilitado
-    if ONEDRIVE_DATABASE_ENABLED and MICROSOFT_CLIENT_ID:
+    onedrive = bool(ONEDRIVE_DATABASE_ENABLED and MICROSOFT_CLIENT_ID)
+    if onedrive:
         logger.info("🌐 Inicializando integração OneDrive...")
-        try:
-            from utils.database.database import inicializar_onedrive_manager
-            inicializar_onedrive_manager()
-            logger.info("✅ OneDrive integrado com sucesso")
-        except Exception as e:
-            logger.error(f"❌ Erro inicializando OneDrive: {e}")
-            logger.info("📁 Continuando com storage local")
     else:
         logger.info("📁 OneDrive desabilitado - usando storage local")
     
-    # Importar funções de database após inicialização OneDrive
+    from utils.database import iniciar_banco
+    iniciar_banco(onedrive, _inicializar_banco_e_admins, em_segundo_plano=em_segundo_plano)
+
+def _inicializar_banco_e_admins():
+    """Cria tabelas e administradores padrão (após o download inicial do OneDrive)"""
+    global ADMIN_IDS, DATABASE_PATH
+    
     from utils.database import init_database, listar_admins, inicializar_admins_padrao
     
     # Inicializar banco de dados (OneDrive ou local)
@@ -247,8 +248,8 @@ def validar_configuracao_onedrive():
     
     if ONEDRIVE_DATABASE_ENABLED and MICROSOFT_CLIENT_ID:
         try:
-            from auth.microsoft_auth import MicrosoftAuth
-            auth = MicrosoftAuth()
+            from auth.microsoft_auth import obter_auth_compartilhado
+            auth = obter_auth_compartilhado()
             status['token_disponivel'] = bool(auth.access_token)
             status['pronto_para_uso'] = status['token_disponivel']
         except Exception as e:
@@ -256,10 +257,5 @@ def validar_configuracao_onedrive():
     
     return status
 
-# Log final das configurações
+# Log final das configurações (sem I/O: o token é validado no startup em segundo plano)
 logger.info("🔧 Configurações carregadas com sucesso")
-
-# Se OneDrive habilitado, mostrar status
-if ONEDRIVE_DATABASE_ENABLED:
-    status_onedrive = validar_configuracao_onedrive()
-    logger.info(f"🌐 Status OneDrive: {'✅ Pronto' if status_onedrive['pronto_para_uso'] else '⚠️ Configuração incompleta'}")
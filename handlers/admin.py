@@ -16,8 +16,9 @@ from telegram.ext import CommandHandler, CallbackQueryHandler, ContextTypes
 from config import ADMIN_IDS, DATA_DIR
 try:
     # Primeiro tenta importar diretamente
-    from utils import verificar_admin, adicionar_admin, fazer_backup_planilha
-    from utils.database import (
+    from utils import fazer_backup_planilha
+    from utils.database.async_database import (
+        verificar_admin, adicionar_admin,
         listar_todos_responsaveis, buscar_responsaveis_por_codigo,
         buscar_responsavel_por_id, remover_responsavel_especifico,
         editar_responsavel, limpar_todos_responsaveis, get_db_path,
@@ -28,8 +29,9 @@ except ImportError:
     import sys
     # Adicionar diretório pai ao path
     sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-    from utils import verificar_admin, adicionar_admin, fazer_backup_planilha
-    from utils.database import (
+    from utils import fazer_backup_planilha
+    from utils.database.async_database import (
+        verificar_admin, adicionar_admin,
         listar_todos_responsaveis, buscar_responsaveis_por_codigo,
         buscar_responsavel_por_id, remover_responsavel_especifico,
         editar_responsavel, limpar_todos_responsaveis, get_db_path,
@@ -46,7 +48,7 @@ SELECIONAR_ACAO, CONFIRMAR_EXCLUSAO = range(2)
 async def exportar_planilha(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Exporta os dados do banco para planilhas e envia como arquivos"""
     # Verificar se o usuário é administrador
-    if not verificar_admin(update.effective_user.id):
+    if not await verificar_admin(update.effective_user.id):
         await update.message.reply_text(
             "A Paz de Deus!\n\n"
             "⚠️ *Acesso Negado*\n\n"
@@ -58,7 +60,7 @@ async def exportar_planilha(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     try:
         # Obter todos os responsáveis do banco de dados
-        responsaveis = listar_todos_responsaveis()
+        responsaveis = await listar_todos_responsaveis()
         
         if not responsaveis:
             await update.message.reply_text(
@@ -70,7 +72,7 @@ async def exportar_planilha(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
         
         # Enviar informações sobre o banco de dados
-        db_path = get_db_path()
+        db_path = await get_db_path()
         
         await update.message.reply_text(
             "🔍 *Analisando banco de dados...*\n\n"
@@ -203,7 +205,7 @@ async def exportar_planilha(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def listar_cadastros(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Lista todos os cadastros (apenas para administradores)"""
     # Verificar se o usuário é administrador
-    if not verificar_admin(update.effective_user.id):
+    if not await verificar_admin(update.effective_user.id):
         await update.message.reply_text(
             " *A Paz de Deus!*\n\n"
             "⚠️ *Acesso Negado*\n\n"
@@ -230,10 +232,10 @@ async def listar_cadastros(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Obter todos os cadastros do banco de dados
         if filtro_igreja:
             # Se houver filtro de igreja, buscar apenas por código
-            responsaveis = buscar_responsaveis_por_codigo(filtro_igreja)
+            responsaveis = await buscar_responsaveis_por_codigo(filtro_igreja)
         else:
             # Caso contrário, buscar todos
-            responsaveis = listar_todos_responsaveis()
+            responsaveis = await listar_todos_responsaveis()
         
         if not responsaveis:
             await update.message.reply_text(
@@ -341,7 +343,7 @@ async def listar_cadastros(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def limpar_cadastros(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Remove todos os cadastros (apenas para administradores)"""
     # Verificar se o usuário é administrador
-    if not verificar_admin(update.effective_user.id):
+    if not await verificar_admin(update.effective_user.id):
         await update.message.reply_text(
             "*A Paz de Deus!*\n\n"
             "⚠️ *Acesso Negado*\n\n"
@@ -376,7 +378,7 @@ async def processar_callback_admin(update: Update, context: ContextTypes.DEFAULT
     await query.answer()
     
     # Verificar se o usuário é administrador
-    if not verificar_admin(update.effective_user.id):
+    if not await verificar_admin(update.effective_user.id):
         await query.edit_message_text(
             "*A Paz de Deus!*\n\n"
             "⚠️ *Acesso Negado*\n\n"
@@ -389,10 +391,10 @@ async def processar_callback_admin(update: Update, context: ContextTypes.DEFAULT
     if query.data == "confirmar_limpar":
         try:
             # Fazer backup antes de limpar
-            backup_file = fazer_backup_banco()
+            backup_file = await fazer_backup_banco()
             
             # Limpar todos os registros
-            sucesso = limpar_todos_responsaveis()
+            sucesso = await limpar_todos_responsaveis()
             
             if sucesso:
                 await query.edit_message_text(
@@ -430,7 +432,7 @@ async def processar_callback_admin(update: Update, context: ContextTypes.DEFAULT
 async def adicionar_admin_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Adiciona um novo administrador (apenas para administradores)"""
     # Verificar se o usuário é administrador
-    if not verificar_admin(update.effective_user.id):
+    if not await verificar_admin(update.effective_user.id):
         await update.message.reply_text(
             "*A Paz de Deus!*\n\n"
             "⚠️ *Acesso Negado*\n\n"
@@ -457,7 +459,7 @@ async def adicionar_admin_cmd(update: Update, context: ContextTypes.DEFAULT_TYPE
     novo_admin_id = int(args[0])
     
     # Adicionar como administrador
-    sucesso, status = adicionar_admin(novo_admin_id)
+    sucesso, status = await adicionar_admin(novo_admin_id)
     
     if not sucesso and status == "já é admin":
         await update.message.reply_text(
@@ -490,7 +492,7 @@ async def editar_buscar(update: Update, context: ContextTypes.DEFAULT_TYPE):
     Exemplo: /editar_buscar João
     """
     # Verificar se o usuário é administrador
-    if not verificar_admin(update.effective_user.id):
+    if not await verificar_admin(update.effective_user.id):
         await update.message.reply_text(
             "A Paz de Deus!\n\n"
             "⚠️ *Acesso Negado*\n\n"
@@ -518,7 +520,7 @@ async def editar_buscar(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     try:
         # Buscar todos os responsáveis
-        todos_responsaveis = listar_todos_responsaveis()
+        todos_responsaveis = await listar_todos_responsaveis()
         
         if not todos_responsaveis:
             await update.message.reply_text(
@@ -592,7 +594,7 @@ async def editar_cadastro(update: Update, context: ContextTypes.DEFAULT_TYPE):
     Exemplo: /editar BR21-0001 Nome "João da Silva"
     """
     # Verificar se o usuário é administrador
-    if not verificar_admin(update.effective_user.id):
+    if not await verificar_admin(update.effective_user.id):
         await update.message.reply_text(
             "A Paz de Deus!\n\n"
             "⚠️ *Acesso Negado*\n\n"
@@ -649,7 +651,7 @@ async def editar_cadastro(update: Update, context: ContextTypes.DEFAULT_TYPE):
         campo_db = mapeamento_campos[campo.lower()]
         
         # Buscar responsáveis com o código informado
-        responsaveis = buscar_responsaveis_por_codigo(codigo)
+        responsaveis = await buscar_responsaveis_por_codigo(codigo)
         
         if not responsaveis:
             await update.message.reply_text(
@@ -682,7 +684,7 @@ async def editar_cadastro(update: Update, context: ContextTypes.DEFAULT_TYPE):
         responsavel = responsaveis[0]
         
         # Fazer backup antes de modificar
-        fazer_backup_banco()
+        await fazer_backup_banco()
         
         # Obter valor antigo para mostrar na confirmação
         valor_antigo = responsavel[campo_db]
@@ -697,7 +699,7 @@ async def editar_cadastro(update: Update, context: ContextTypes.DEFAULT_TYPE):
         campos_atualizacao['ultima_atualizacao'] = data_formatada
         
         # Atualizar cadastro
-        sucesso = editar_responsavel(responsavel['id'], campos_atualizacao)
+        sucesso = await editar_responsavel(responsavel['id'], campos_atualizacao)
         
         if not sucesso:
             await update.message.reply_text(
@@ -747,7 +749,7 @@ async def excluir_id(update: Update, context: ContextTypes.DEFAULT_TYPE):
     Exemplo: /excluir_id 3
     """
     # Verificar se o usuário é administrador
-    if not verificar_admin(update.effective_user.id):
+    if not await verificar_admin(update.effective_user.id):
         await update.message.reply_text(
             "A Paz de Deus!\n\n"
             "⚠️ *Acesso Negado*\n\n"
@@ -840,7 +842,7 @@ async def processar_callback_exclusao(update: Update, context: ContextTypes.DEFA
     await query.answer()
     
     # Verificar se o usuário é administrador
-    if not verificar_admin(update.effective_user.id):
+    if not await verificar_admin(update.effective_user.id):
         await query.edit_message_text(
             "A Paz de Deus!\n\n"
             "⚠️ *Acesso Negado*\n\n"
@@ -880,10 +882,10 @@ async def processar_callback_exclusao(update: Update, context: ContextTypes.DEFA
         
         try:
             # Fazer backup antes de modificar
-            fazer_backup_banco()
+            await fazer_backup_banco()
             
             # Excluir o cadastro utilizando seu ID
-            sucesso, total = remover_responsavel_especifico(
+            sucesso, total = await remover_responsavel_especifico(
                 cadastro['codigo'], 
                 cadastro['nome'],
                 cadastro['funcao']
@@ -947,7 +949,7 @@ async def excluir_cadastro(update: Update, context: ContextTypes.DEFAULT_TYPE):
     Exemplo: /excluir BR21-0001 "João da Silva"
     """
     # Verificar se o usuário é administrador
-    if not verificar_admin(update.effective_user.id):
+    if not await verificar_admin(update.effective_user.id):
         await update.message.reply_text(
             "A Paz de Deus!\n\n"
             "⚠️ *Acesso Negado*\n\n"
@@ -979,7 +981,7 @@ async def excluir_cadastro(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     try:
         # Buscar responsáveis com o código informado
-        responsaveis = buscar_responsaveis_por_codigo(codigo)
+        responsaveis = await buscar_responsaveis_por_codigo(codigo)
         
         if not responsaveis:
             await update.message.reply_text(
@@ -1005,7 +1007,7 @@ async def excluir_cadastro(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return
         
         # Fazer backup antes de modificar
-        fazer_backup_banco()
+        await fazer_backup_banco()
         
         # Obter nome da igreja para a mensagem de confirmação
         nome_igreja = "Desconhecida"
@@ -1017,7 +1019,7 @@ async def excluir_cadastro(update: Update, context: ContextTypes.DEFAULT_TYPE):
             pass
         
         # Excluir cadastro
-        sucesso, total = remover_responsavel_especifico(codigo, nome)
+        sucesso, total = await remover_responsavel_especifico(codigo, nome)
         
         if not sucesso or total == 0:
             await update.message.reply_text(
@@ -6,15 +6,13 @@
 🚨 Integração com sistema de verificação OneDrive
 """
 
+import asyncio
 import os
 import sqlite3
 from datetime import datetime
 from telegram.ext import CommandHandler
 
-def get_admin_ids():
-    """Obter IDs dos administradores"""
-    admin_ids_str = os.getenv("ADMIN_IDS", "")
-    return [admin_id.strip() for admin_id in admin_ids_str.split(',') if admin_id.strip()]
+from utils.database.async_database import verificar_admin, get_admin_ids
 
 def check_database_health():
     """Verificar saúde do banco de dados"""
@@ -75,14 +73,13 @@ def check_onedrive_health():
     except Exception as e:
         return {"status": "❌", "message": f"Erro: {str(e)[:50]}", "details": str(e)}
 
-def check_telegram_health():
+def check_telegram_health(admin_ids):
     """Verificar saúde do Telegram Bot"""
     try:
         bot_token = os.getenv("TELEGRAM_BOT_TOKEN")
         if not bot_token:
             return {"status": "❌", "message": "BOT_TOKEN não configurado", "details": ""}
             
-        admin_ids = get_admin_ids()
         if not admin_ids:
             return {"status": "⚠️", "message": "Nenhum admin configurado", "details": "ADMIN_IDS vazio"}
             
@@ -98,10 +95,9 @@ def check_telegram_health():
 async def health_command(update, context):
     """Comando /health - Diagnóstico completo para admins"""
     user_id = str(update.effective_user.id)
-    admin_ids = get_admin_ids()
     
     # Verificar se é admin
-    if user_id not in admin_ids:
+    if not await verificar_admin(update.effective_user.id):
         await update.message.reply_text("❌ Comando disponível apenas para administradores.")
         return
     
@@ -109,9 +105,9 @@ async def health_command(update, context):
     await update.message.reply_text("🔍 Executando diagnóstico completo do sistema...")
     
     # Executar checks
-    db_health = check_database_health()
+    db_health = await asyncio.to_thread(check_database_health)
     onedrive_health = check_onedrive_health()
-    telegram_health = check_telegram_health()
+    telegram_health = check_telegram_health(await get_admin_ids())
     
     # Determinar status geral
     all_statuses = [db_health["status"], onedrive_health["status"], telegram_health["status"]]
@@ -160,10 +156,7 @@ Telegram: {telegram_health["details"]}
 
 async def restart_command(update, context):
     """Comando /restart - Reiniciar componentes (placeholder)"""
-    user_id = str(update.effective_user.id)
-    admin_ids = get_admin_ids()
-    
-    if user_id not in admin_ids:
+    if not await verificar_admin(update.effective_user.id):
         await update.message.reply_text("❌ Comando disponível apenas para administradores.")
         return
     
@@ -180,10 +173,7 @@ async def restart_command(update, context):
 
 async def sync_command(update, context):
     """Comando /sync - Forçar sincronização (placeholder)"""
-    user_id = str(update.effective_user.id)
-    admin_ids = get_admin_ids()
-    
-    if user_id not in admin_ids:
+    if not await verificar_admin(update.effective_user.id):
         await update.message.reply_text("❌ Comando disponível apenas para administradores.")
         return
     
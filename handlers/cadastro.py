@@ -22,23 +22,25 @@ from telegram.ext import (
 
 # Imports do sistema
 try:
-    from utils.database import (
+    from utils.database.async_database import (
         verificar_cadastro_existente,
         salvar_responsavel,
         obter_cadastros_por_user_id,
         verificar_consentimento_lgpd,
-        registrar_consentimento_lgpd
+        registrar_consentimento_lgpd,
+        get_admin_ids
     )
 except ImportError:
     import sys
     import os
     sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-    from utils.database import (
+    from utils.database.async_database import (
         verificar_cadastro_existente,
         salvar_responsavel,
         obter_cadastros_por_user_id,
         verificar_consentimento_lgpd,
-        registrar_consentimento_lgpd
+        registrar_consentimento_lgpd,
+        get_admin_ids
     )
 
 from handlers.data import (
@@ -58,11 +60,6 @@ ESTADO_AGUARDANDO_FUNCAO = "aguardando_funcao"
 # SISTEMA DE ALERTAS ONEDRIVE - INTEGRAÇÃO
 # ================================================================================================
 
-def get_admin_ids():
-    """Obter IDs dos administradores da variável ADMIN_IDS"""
-    admin_ids_str = os.getenv("ADMIN_IDS", "")
-    return [admin_id.strip() for admin_id in admin_ids_str.split(',') if admin_id.strip()]
-
 async def send_telegram_to_admin(admin_id, message, context):
     """Enviar mensagem Telegram para admin específico"""
     try:
@@ -78,7 +75,7 @@ async def send_telegram_to_admin(admin_id, message, context):
 
 async def alert_onedrive_failure(error_details, context):
     """Alertar todos os admins sobre falha do OneDrive"""
-    admin_ids = get_admin_ids()
+    admin_ids = await get_admin_ids()
     if not admin_ids:
         logger.error("❌ Nenhum admin configurado para alertas OneDrive")
         return False
@@ -114,7 +111,7 @@ _Cadastros serão rejeitados até normalização_
 
 async def alert_onedrive_recovery(context):
     """Alertar recuperação do OneDrive"""
-    admin_ids = get_admin_ids()
+    admin_ids = await get_admin_ids()
     if not admin_ids:
         return False
         
@@ -251,7 +248,7 @@ async def iniciar_cadastro_etapas(update: Update, context: ContextTypes.DEFAULT_
     user_id = update.effective_user.id
     
     # Verificar LGPD
-    usuario_aceitou_lgpd = verificar_consentimento_lgpd(user_id)
+    usuario_aceitou_lgpd = await verificar_consentimento_lgpd(user_id)
     
     if not usuario_aceitou_lgpd:
         # Exibir LGPD
@@ -292,7 +289,7 @@ async def processar_aceite_lgpd(update: Update, context: ContextTypes.DEFAULT_TY
     
     if query.data == "aceitar_lgpd_cadastro_auto":
         # Salvar consentimento
-        registrar_consentimento_lgpd(query.from_user.id)
+        await registrar_consentimento_lgpd(query.from_user.id)
         
         # Inicializar contexto
         context.user_data['cadastro'] = {
@@ -757,7 +754,7 @@ async def confirmar_cadastro(update: Update, context: ContextTypes.DEFAULT_TYPE)
     
     try:
         # Salvar no banco (compatível Sistema BRK)
-        sucesso, status = salvar_responsavel(
+        sucesso, status = await salvar_responsavel(
             dados['codigo'], 
             dados['nome'], 
             dados['funcao'], 
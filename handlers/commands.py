@@ -9,7 +9,7 @@ from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKe
 from telegram.ext import CommandHandler, ContextTypes, CallbackQueryHandler
 
 # Usar a importação direta do módulo database para evitar problemas
-from utils.database import verificar_admin
+from utils.database.async_database import verificar_admin
 
 async def mensagem_boas_vindas(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Responde a qualquer mensagem com uma saudação e instruções"""
@@ -113,7 +113,7 @@ async def mostrar_id(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def mostrar_ajuda(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Exibe a lista de comandos disponíveis"""
     # Verificar se é administrador para mostrar comandos administrativos
-    is_admin = verificar_admin(update.effective_user.id)
+    is_admin = await verificar_admin(update.effective_user.id)
     
     # Mensagem básica de ajuda para todos os usuários
     mensagem_ajuda = (
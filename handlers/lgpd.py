@@ -12,7 +12,7 @@ import pytz
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import CommandHandler, ContextTypes, CallbackQueryHandler
 
-from utils.database import (
+from utils.database.async_database import (
     obter_cadastros_por_user_id,
     remover_cadastros_por_user_id,
     fazer_backup_banco
@@ -28,7 +28,7 @@ async def remover_dados(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     try:
         # Obter cadastros do usuário do banco de dados
-        cadastros = obter_cadastros_por_user_id(user_id)
+        cadastros = await obter_cadastros_por_user_id(user_id)
         
         if not cadastros or len(cadastros) == 0:
             await update.message.reply_text(
@@ -105,7 +105,7 @@ async def processar_callback_remocao(update: Update, context: ContextTypes.DEFAU
         logger.info(f"Processando remoção de dados do usuário ID {user_id}")
         try:
             # Obter cadastros do usuário para registro em log
-            cadastros = obter_cadastros_por_user_id(user_id)
+            cadastros = await obter_cadastros_por_user_id(user_id)
             total_cadastros = len(cadastros)
             
             # Registrar dados sendo removidos (para log)
@@ -113,11 +113,11 @@ async def processar_callback_remocao(update: Update, context: ContextTypes.DEFAU
                 logger.info(f"Removendo cadastro: {cadastro['codigo_casa']} - {cadastro['nome']} ({cadastro['funcao']})")
             
             # Fazer backup antes da remoção
-            backup_file = fazer_backup_banco()
+            backup_file = await fazer_backup_banco()
             logger.info(f"Backup criado antes da remoção: {backup_file}")
             
             # Remover os dados do usuário
-            removidos = remover_cadastros_por_user_id(user_id)
+            removidos = await remover_cadastros_por_user_id(user_id)
             
             # Limpar indicador de aceite da LGPD
             if 'aceitou_lgpd' in context.user_data:
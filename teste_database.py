@@ -8,7 +8,7 @@ Script para testar a configuração e operação do banco de dados SQLite
 import logging
 import os
 import sys
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
 # Configurar logging
 logging.basicConfig(
@@ -34,7 +34,8 @@ def main():
             verificar_admin, adicionar_admin, listar_admins,
             registrar_consentimento_lgpd, verificar_consentimento_lgpd,
             registrar_alerta_enviado, listar_alertas_enviados,
-            obter_estatisticas_alertas
+            listar_alertas_por_periodo, obter_estatisticas_alertas,
+            obter_metricas_espaco
         )
         logger.info("✅ Módulo de banco de dados importado com sucesso")
     except ImportError as e:
@@ -161,6 +162,10 @@ def main():
     alertas = listar_alertas_enviados(user_id_teste)
     logger.info(f"📊 Alertas encontrados para o usuário {user_id_teste}: {len(alertas)}")
     
+    # Alertas das últimas 24h (índice codigo_casa, data_envio_ts)
+    recentes = listar_alertas_por_periodo(datetime.now(timezone.utc) - timedelta(days=1), codigo_casa=codigo_teste)
+    logger.info(f"📊 Alertas nas últimas 24h para {codigo_teste}: {len(recentes)}")
+    
     # Estatísticas de alertas
     stats = obter_estatisticas_alertas()
     logger.info(f"📊 Estatísticas de alertas:")
@@ -168,6 +173,16 @@ def main():
     logger.info(f"   Por tipo: {stats['por_tipo']}")
     logger.info(f"   Por período: {stats['por_periodo']}")
     
+    # Espaço em disco: arquivo x dados vivos (auto_vacuum incremental)
+    espaco = obter_metricas_espaco()
+    for esquema, dados in espaco['esquemas'].items():
+        logger.info(
+            f"📊 Espaço {esquema}: {dados['bytes_arquivo']} bytes, {dados['bytes_dados']} em uso, "
+            f"auto_vacuum {dados['auto_vacuum']}"
+        )
+    if espaco['esquemas'].get('main', {}).get('auto_vacuum') != "INCREMENTAL":
+        logger.error("❌ Banco principal sem auto_vacuum incremental")
+    
     # Conclusão
     logger.info("\n" + "=" * 60)
     logger.info("✅ TESTE CONCLUÍDO COM SUCESSO!")
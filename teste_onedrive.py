@@ -0,0 +1,1063 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Script para testar o OneDriveManager contra um servidor Graph local
+Uso: python teste_onedrive.py
+
+Sobe um servidor HTTP que emula os endpoints do Microsoft Graph usados pelo
+bot (upload simples, upload session, metadados, download, listagem e remoção)
+- não acessa a Microsoft.
+Assim como teste_database.py, exige TELEGRAM_BOT_TOKEN definido (config.py).
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlsplit
+
+# Configurar logging
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger("OneDriveTest")
+
+# Adicionar o diretório atual ao path para importações
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Backoff curto: as falhas injetadas não devem deixar o teste lento
+os.environ.setdefault("HTTP_RETRY_BACKOFF_SECONDS", "0.01")
+
+PASTA_ID = "PASTA-ALERTA"
+
+# ============================================
+# SERVIDOR GRAPH LOCAL
+# ============================================
+
+class _ServidorHTTP(ThreadingHTTPServer):
+    # Fila de conexões maior que o padrão (5): clientes concorrentes não esperam SYN retry
+    request_queue_size = 64
+
+
+class ServidorGraphLocal:
+    """
+    Emulação mínima do Graph para arquivos dentro da pasta Alerta
+
+    `falhar_chunks` recebe os números (1, 2, ...) dos PUTs de chunk que
+    devem falhar: ímpares são recebidos e gravados mas respondem 500
+    (resposta perdida), pares são descartados antes de gravar (chunk perdido).
+
+    `respostas_forcadas` recebe (status, headers) devolvidos, em ordem, às
+    próximas requisições antes de qualquer tratamento (ex: 429 + Retry-After).
+
+    `atraso_segundos` atrasa todas as respostas (Graph lento).
+
+    Uploads condicionais seguem o Graph: If-Match com eTag diferente do
+    atual responde 412 e conflictBehavior=fail com o arquivo já existente
+    responde 409 (conferidos no PUT, na criação da sessão e ao gravar o
+    último chunk).
+    """
+
+    def __init__(self):
+        self.arquivos = {}
+        self.versoes = {}
+        self.sessoes = {}
+        self.falhar_chunks = set()
+        self.respostas_forcadas = []
+        self.atraso_segundos = 0
+        self.requisicoes = []
+        self._chunks_recebidos = 0
+        self._lock = threading.Lock()
+
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                servidor._tratar(self, "GET")
+
+            def do_PUT(self):
+                servidor._tratar(self, "PUT")
+
+            def do_POST(self):
+                servidor._tratar(self, "POST")
+
+            def do_DELETE(self):
+                servidor._tratar(self, "DELETE")
+
+        self._http = _ServidorHTTP(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self._http.server_address[1]}"
+        self._thread = threading.Thread(target=self._http.serve_forever, daemon=True)
+
+    def iniciar(self):
+        self._thread.start()
+        return self
+
+    def parar(self):
+        self._http.shutdown()
+        self._http.server_close()
+
+    # ------------------------------------------------------------------
+
+    def _responder(self, handler, status, corpo=None, bruto=None):
+        dados = bruto if bruto is not None else (json.dumps(corpo).encode() if corpo is not None else b"")
+        handler.send_response(status)
+        handler.send_header("Content-Length", str(len(dados)))
+        if bruto is None:
+            handler.send_header("Content-Type", "application/json")
+        handler.end_headers()
+        handler.wfile.write(dados)
+
+    def _ler_corpo(self, handler):
+        tamanho = int(handler.headers.get("Content-Length") or 0)
+        return handler.rfile.read(tamanho) if tamanho else b""
+
+    def gravar(self, nome, dados):
+        """Grava um arquivo no "OneDrive" (nova versão: novo eTag/cTag)"""
+        with self._lock:
+            self.arquivos[nome] = bytes(dados)
+            self.versoes[nome] = self.versoes.get(nome, 0) + 1
+
+    def _conflito(self, nome, condicao):
+        """Status 412/409 se a condição do upload não vale mais (chamar com o lock)"""
+        if condicao.get("if_match") is not None:
+            if nome not in self.arquivos or self._item(nome)["eTag"] != condicao["if_match"]:
+                return 412
+        if condicao.get("comportamento") == "fail" and nome in self.arquivos:
+            return 409
+        return None
+
+    def _gravar_se(self, nome, dados, condicao):
+        """Confere a condição e grava na mesma seção crítica (dois uploads concorrentes)"""
+        with self._lock:
+            status = self._conflito(nome, condicao)
+            if status:
+                return status, {"error": {"code": "resourceModified" if status == 412 else "nameAlreadyExists"}}
+            self.arquivos[nome] = bytes(dados)
+            self.versoes[nome] = self.versoes.get(nome, 0) + 1
+            return 201, self._item(nome)
+
+    def _item(self, nome):
+        versao = self.versoes[nome]
+        return {
+            "id": f"ITEM-{nome}",
+            "name": nome,
+            "size": len(self.arquivos[nome]),
+            "eTag": f'"{{ITEM-{nome}}},{versao}"',
+            "cTag": f'"c:{{ITEM-{nome}}},{versao}"',
+            "lastModifiedDateTime": f"2025-01-01T00:00:{versao % 60:02d}Z",
+        }
+
+    def _tratar(self, handler, metodo):
+        caminho = handler.path.split("?")[0]
+        parametros = parse_qs(urlsplit(handler.path).query)
+        with self._lock:
+            self.requisicoes.append((metodo, caminho))
+            forcada = self.respostas_forcadas.pop(0) if self.respostas_forcadas else None
+
+        if self.atraso_segundos:
+            time.sleep(self.atraso_segundos)
+
+        if forcada:
+            status, cabecalhos = forcada
+            self._ler_corpo(handler)
+            handler.send_response(status)
+            for nome, valor in cabecalhos.items():
+                handler.send_header(nome, valor)
+            handler.send_header("Content-Length", "0")
+            handler.end_headers()
+            return
+
+        item = re.match(rf"^/me/drive/items/{PASTA_ID}:/([^:]+):/(content|createUploadSession)$", caminho)
+        metadados = re.match(rf"^/me/drive/items/{PASTA_ID}:/([^:]+)$", caminho)
+        filhos = re.match(rf"^/me/drive/items/{PASTA_ID}:/([^:/]+):/children$", caminho)
+        sessao = re.match(r"^/upload/(\d+)$", caminho)
+
+        if metadados and metodo in ("GET", "DELETE"):
+            nome = metadados.group(1)
+            if nome not in self.arquivos:
+                return self._responder(handler, 404, {"error": {"code": "itemNotFound"}})
+            if metodo == "DELETE":
+                with self._lock:
+                    del self.arquivos[nome]
+                return self._responder(handler, 204)
+            return self._responder(handler, 200, self._item(nome))
+
+        if filhos and metodo == "GET":
+            prefixo = filhos.group(1) + "/"
+            itens = [
+                dict(self._item(nome), name=nome[len(prefixo):])
+                for nome in sorted(self.arquivos) if nome.startswith(prefixo)
+            ]
+            return self._responder(handler, 200, {"value": itens})
+
+        if item and item.group(2) == "content":
+            nome = item.group(1)
+            if metodo == "PUT":
+                condicao = {
+                    "if_match": handler.headers.get("If-Match"),
+                    "comportamento": parametros.get("@microsoft.graph.conflictBehavior", ["replace"])[0],
+                }
+                status, corpo = self._gravar_se(nome, self._ler_corpo(handler), condicao)
+                return self._responder(handler, status, corpo)
+            if metodo == "GET":
+                if nome not in self.arquivos:
+                    return self._responder(handler, 404, {"error": {"code": "itemNotFound"}})
+                return self._responder(handler, 200, bruto=self.arquivos[nome])
+
+        if item and item.group(2) == "createUploadSession" and metodo == "POST":
+            corpo = json.loads(self._ler_corpo(handler) or b"{}")
+            condicao = {
+                "if_match": handler.headers.get("If-Match"),
+                "comportamento": corpo.get("item", {}).get("@microsoft.graph.conflictBehavior", "replace"),
+            }
+            with self._lock:
+                status = self._conflito(item.group(1), condicao)
+                if status:
+                    return self._responder(handler, status, {"error": {"code": "resourceModified"}})
+                sessao_id = str(len(self.sessoes) + 1)
+                self.sessoes[sessao_id] = {
+                    "nome": item.group(1), "dados": bytearray(), "total": None, "condicao": condicao
+                }
+            return self._responder(handler, 200, {"uploadUrl": f"{self.base_url}/upload/{sessao_id}"})
+
+        if sessao and sessao.group(1) in self.sessoes:
+            return self._tratar_sessao(handler, metodo, self.sessoes[sessao.group(1)], sessao.group(1))
+
+        self._ler_corpo(handler)
+        self._responder(handler, 404, {"error": {"code": "itemNotFound"}})
+
+    def _tratar_sessao(self, handler, metodo, sessao, sessao_id):
+        if metodo == "GET":
+            return self._responder(handler, 200, {"nextExpectedRanges": [f"{len(sessao['dados'])}-"]})
+
+        if metodo == "DELETE":
+            del self.sessoes[sessao_id]
+            return self._responder(handler, 204)
+
+        chunk = self._ler_corpo(handler)
+        inicio, fim, total = map(int, re.match(
+            r"bytes (\d+)-(\d+)/(\d+)", handler.headers["Content-Range"]
+        ).groups())
+
+        with self._lock:
+            self._chunks_recebidos += 1
+            numero = self._chunks_recebidos
+
+        if numero in self.falhar_chunks and numero % 2 == 0:
+            return self._responder(handler, 500, {"error": {"code": "generalException"}})
+
+        if inicio != len(sessao["dados"]) or fim - inicio + 1 != len(chunk):
+            return self._responder(handler, 416, {"error": {"code": "invalidRange"}})
+
+        sessao["dados"].extend(chunk)
+        if numero in self.falhar_chunks:
+            return self._responder(handler, 500, {"error": {"code": "generalException"}})
+
+        if len(sessao["dados"]) < total:
+            return self._responder(handler, 202, {"nextExpectedRanges": [f"{len(sessao['dados'])}-"]})
+
+        status, corpo = self._gravar_se(sessao["nome"], sessao["dados"], sessao["condicao"])
+        del self.sessoes[sessao_id]
+        return self._responder(handler, status, corpo)
+
+
+class AuthFalsa:
+    """Substitui o MicrosoftAuth: token fixo aceito pelo servidor local"""
+    access_token = "token-teste"
+
+    def obter_headers_autenticados(self):
+        return {"Authorization": "Bearer token-teste", "Content-Type": "application/json"}
+
+
+class AuthAsyncFalsa:
+    """Substitui o MicrosoftAuthAsync"""
+    async def obter_headers_autenticados(self):
+        return AuthFalsa().obter_headers_autenticados()
+
+
+def criar_manager(servidor):
+    """OneDriveManager apontando para o servidor local"""
+    os.environ["ONEDRIVE_BASE_URL"] = servidor.base_url
+    os.environ["ONEDRIVE_ALERTA_ID"] = PASTA_ID
+    from utils.onedrive_manager import OneDriveManager
+    return OneDriveManager(AuthFalsa())
+
+# ============================================
+# TESTES
+# ============================================
+
+def testar_upload(servidor, pasta):
+    """Upload simples, upload em sessão e retomada após chunks perdidos"""
+    manager = criar_manager(servidor)
+    manager.limite_upload_simples = 1024 * 1024
+    manager.tamanho_chunk_upload = manager.TAMANHO_BLOCO_UPLOAD
+
+    pequeno = os.path.join(pasta, "pequeno.db")
+    with open(pequeno, "wb") as f:
+        f.write(os.urandom(100 * 1024))
+
+    assert manager.upload_database(pequeno), "upload simples falhou"
+    assert servidor.arquivos["alertas_bot.db"] == open(pequeno, "rb").read()
+    assert ("PUT", f"/me/drive/items/{PASTA_ID}:/alertas_bot.db:/content") in servidor.requisicoes
+    logger.info("✅ Upload simples (abaixo do limite)")
+
+    grande = os.path.join(pasta, "grande.db")
+    with open(grande, "wb") as f:
+        f.write(os.urandom(5 * manager.TAMANHO_BLOCO_UPLOAD + 12345))
+
+    servidor.falhar_chunks = {2, 3}
+    assert manager.upload_database(grande), "upload em sessão falhou"
+    assert servidor.arquivos["alertas_bot.db"] == open(grande, "rb").read(), "arquivo remoto corrompido"
+    assert not servidor.sessoes, "sessão não foi concluída"
+    logger.info(f"✅ Upload em sessão com retomada ({servidor._chunks_recebidos} PUTs de chunk)")
+
+    servidor.falhar_chunks = set(range(1, 1000))
+    assert not manager.upload_database(grande), "upload deveria falhar"
+    assert not servidor.sessoes, "sessão abandonada não foi cancelada"
+    servidor.falhar_chunks = set()
+    logger.info("✅ Sessão cancelada após falhas consecutivas")
+
+    destino = os.path.join(pasta, "baixado.db")
+    assert manager.download_database(destino)
+    assert open(destino, "rb").read() == open(grande, "rb").read()
+    logger.info("✅ Download do arquivo enviado em sessão")
+
+def testar_download_condicional(servidor, pasta):
+    """Download pulado quando eTag/cTag não mudou; rename atômico no destino"""
+    manager = criar_manager(servidor)
+    destino = os.path.join(pasta, "cache.db")
+    conteudo = "/me/drive/items/PASTA-ALERTA:/alertas_bot.db:/content"
+
+    assert manager.download_database(destino) is False, "arquivo inexistente deveria falhar"
+
+    servidor.gravar("alertas_bot.db", b"versao-1" * 1000)
+    assert manager.download_database(destino, somente_se_alterado=True) is True
+    assert open(destino, "rb").read() == b"versao-1" * 1000
+
+    downloads = servidor.requisicoes.count(("GET", conteudo))
+    for _ in range(5):
+        assert manager.download_database(destino, somente_se_alterado=True) is None
+    assert servidor.requisicoes.count(("GET", conteudo)) == downloads, "conteúdo baixado sem alteração"
+    logger.info("✅ Downloads pulados com remoto inalterado")
+
+    servidor.gravar("alertas_bot.db", b"versao-2" * 1000)
+    assert manager.download_database(destino, somente_se_alterado=True) is True
+    assert open(destino, "rb").read() == b"versao-2" * 1000
+    assert not os.path.exists(destino + ".part"), "temporário não removido"
+    logger.info("✅ Download completo após alteração remota")
+
+    # Após o nosso próprio upload o remoto corresponde ao cache: nada a baixar
+    with open(destino, "wb") as f:
+        f.write(b"versao-3" * 1000)
+    assert manager.upload_database(destino)
+    assert manager.download_database(destino, somente_se_alterado=True) is None
+
+    metricas = manager.metricas_download()
+    assert metricas["completos"] == 2 and metricas["inalterados"] == 6, metricas
+    logger.info(f"✅ Métricas: {metricas['completos']} completos, {metricas['inalterados']} pulados")
+
+def testar_upload_condicional(servidor, pasta):
+    """If-Match / conflictBehavior=fail: upload recusado quando o remoto mudou"""
+    import asyncio
+    from utils import http_client
+    from utils.onedrive_manager_async import OneDriveManagerAsync
+
+    manager = criar_manager(servidor)
+    arquivo = os.path.join(pasta, "cache.db")
+    with open(arquivo, "wb") as f:
+        f.write(b"versao-local" * 1000)
+
+    assert manager.upload_database(arquivo, condicional=True) is True, "criação condicional falhou"
+    etag = manager.obter_versao_remota()["eTag"]
+    assert manager.upload_database(arquivo, condicional=True) is None, "arquivo existente sobrescrito"
+
+    servidor.gravar("alertas_bot.db", b"outra instancia")
+    assert manager.upload_database(arquivo, condicional=True, etag=etag) is None, "eTag antigo aceito"
+    assert servidor.arquivos["alertas_bot.db"] == b"outra instancia", "upload de outra instância perdido"
+    logger.info("✅ Upload com eTag antigo recusado (412) sem sobrescrever o remoto")
+
+    assert manager.download_database(os.path.join(pasta, "remoto.db")) is True
+    etag = manager.obter_versao_remota()["eTag"]
+    assert manager.upload_database(arquivo, condicional=True, etag=etag) is True
+    assert manager.obter_versao_remota()["eTag"] != etag, "eTag do upload não registrado"
+
+    # Upload em sessão: condição conferida ao criar a sessão
+    manager.limite_upload_simples = 1
+    servidor.gravar("alertas_bot.db", b"outra instancia de novo")
+    assert manager.upload_database(arquivo, condicional=True, etag=etag) is None
+    assert not servidor.sessoes, "sessão criada apesar do conflito"
+
+    async def cenario():
+        assert await OneDriveManagerAsync(manager, AuthAsyncFalsa()).upload_database(
+            arquivo, condicional=True, etag=etag
+        ) is None
+        await http_client.fechar_cliente_async()
+
+    asyncio.run(cenario())
+    assert servidor.arquivos["alertas_bot.db"] == b"outra instancia de novo"
+    logger.info("✅ Upload em sessão (síncrono e async) recusado com eTag antigo")
+
+def _reconstruir_offline(servidor, pasta, modulo, prefixo, destino, *args):
+    """Copia os arquivos remotos de `prefixo` para uma pasta e roda a CLI de `modulo`"""
+    import subprocess
+
+    local = os.path.join(pasta, f"offline_{prefixo}")
+    os.makedirs(local, exist_ok=True)
+    for nome, conteudo in servidor.arquivos.items():
+        if nome.startswith(f"{prefixo}/"):
+            with open(os.path.join(local, nome[len(prefixo) + 1:]), "wb") as f:
+                f.write(bytes(conteudo))
+    saida = subprocess.run(
+        [sys.executable, "-m", modulo, local, destino, *args],
+        capture_output=True, text=True, env=os.environ.copy(), cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    assert saida.returncode == 0, f"{modulo} falhou: {saida.stderr[-500:]}"
+
+def testar_sync_delta(servidor, pasta):
+    """Lotes delta, compactação em snapshot (comprimido) e reconstrução snapshot + lotes"""
+    os.environ["RENDER_DISK_PATH"] = pasta
+    from utils import compressao
+    from utils.database import database
+    from utils.database.delta_sync import SincronizadorDelta, instalar_captura_alteracoes
+
+    os.environ["ONEDRIVE_COMPRESSION"] = "gzip"
+    try:
+        manager = criar_manager(servidor)
+    finally:
+        del os.environ["ONEDRIVE_COMPRESSION"]
+    assert database.init_database()
+
+    conn = database.get_connection()
+    try:
+        instalar_captura_alteracoes(conn)
+        conn.commit()
+    finally:
+        conn.close()
+
+    delta = SincronizadorDelta(
+        manager,
+        get_connection=database.get_connection,
+        criar_snapshot=database.criar_snapshot_consistente,
+        compactar_apos=200,
+        db_path_atual=database.get_db_path
+    )
+
+    # Primeiro envio: snapshot base
+    assert delta.enviar_pendentes()
+    assert any(nome.startswith("delta/snapshot_") for nome in servidor.arquivos)
+
+    for i in range(150):
+        database.salvar_responsavel(f"BR21-{i % 30:04d}", f"Nome {i}", "Cooperador", 1000 + i, f"user{i}")
+    assert delta.enviar_pendentes()
+
+    tamanhos = []
+    for i in range(5):
+        database.adicionar_admin(5000 + i, f"Admin {i}")
+        antes = delta.metricas()["bytes_enviados"]
+        assert delta.enviar_pendentes()
+        tamanhos.append(delta.metricas()["bytes_enviados"] - antes)
+    assert max(tamanhos) < 1024, f"lote de uma alteração grande demais: {tamanhos}"
+    logger.info(f"✅ Lotes de 1 alteração: {min(tamanhos)}-{max(tamanhos)} bytes (independe do tamanho do banco)")
+
+    database.remover_responsavel(1003)
+    database.editar_responsavel(1, {"nome": "Nome Editado"})
+    database.registrar_consentimento_lgpd(777)
+    assert delta.enviar_pendentes()
+
+    # Alertas ficam no histórico anexado: não geram lotes delta
+    antes = delta.metricas()["alteracoes_enviadas"]
+    database.registrar_alerta_enviado("BR21-0001", "Teste", "Mensagem fora do delta", 42)
+    assert delta.enviar_pendentes()
+    assert delta.metricas()["alteracoes_enviadas"] == antes, "alerta entrou no sync delta"
+
+    # Forçar compactação e conferir limpeza dos lotes antigos
+    for i in range(200):
+        database.registrar_consentimento_lgpd(20000 + i)
+    assert delta.enviar_pendentes()
+    remotos = sorted(nome for nome in servidor.arquivos if nome.startswith("delta/"))
+    assert sum(nome.startswith("delta/snapshot_") for nome in remotos) == 1, remotos
+    assert all(
+        servidor.arquivos[nome].startswith(compressao.MAGIA) for nome in remotos if nome.startswith("delta/snapshot_")
+    ), "snapshot enviado sem compressão"
+    database.adicionar_admin(6000, "Depois do snapshot")
+    assert delta.enviar_pendentes()
+    logger.info(f"✅ Compactação: {delta.metricas()['compactacoes']} snapshot(s), remoto = {remotos}")
+
+    # Reconstrução em outro arquivo deve reproduzir o banco atual
+    reconstruido = os.path.join(pasta, "reconstruido.db")
+    assert delta.restaurar(reconstruido) is None, "banco local já está em dia"
+    delta._db_path_atual = lambda: None
+    assert delta.restaurar(reconstruido) is True
+
+    # CLI offline sobre a cópia da pasta delta/ (snapshot comprimido)
+    offline = os.path.join(pasta, "reconstruido_offline.db")
+    _reconstruir_offline(servidor, pasta, "utils.database.delta_sync", "delta", offline)
+
+    for tabela in ("responsaveis", "administradores", "consentimento_lgpd"):
+        conn = database.get_connection(somente_leitura=True)
+        try:
+            esperado = conn.execute(f"SELECT * FROM {tabela} ORDER BY rowid").fetchall()
+            esperado = [tuple(linha) for linha in esperado]
+        finally:
+            conn.close()
+        obtido = sqlite3.connect(reconstruido).execute(f"SELECT * FROM {tabela} ORDER BY rowid").fetchall()
+        assert obtido == esperado, f"{tabela} divergente após reconstrução"
+        obtido = sqlite3.connect(offline).execute(f"SELECT * FROM {tabela} ORDER BY rowid").fetchall()
+        assert obtido == esperado, f"{tabela} divergente na reconstrução offline"
+    logger.info("✅ Banco reconstruído (snapshot comprimido + lotes) idêntico ao original, online e offline")
+
+    database.fechar_pool()
+
+def testar_replicacao_wal(servidor, pasta):
+    """Segmentos de frames do WAL, bases periódicas, restauração no tempo e bootstrap"""
+    os.environ["RENDER_DISK_PATH"] = pasta
+    from utils.database import database
+    from utils.database.wal_sync import ReplicadorWAL
+
+    def tabelas(caminho):
+        conn = sqlite3.connect(caminho)
+        try:
+            return {
+                tabela: conn.execute(f"SELECT * FROM {tabela} ORDER BY rowid").fetchall()
+                for tabela in ("responsaveis", "administradores", "consentimento_lgpd")
+            }
+        finally:
+            conn.close()
+
+    from utils import compressao
+
+    # Bases e segmentos vão comprimidos para o OneDrive
+    os.environ["ONEDRIVE_COMPRESSION"] = "gzip"
+    try:
+        manager = criar_manager(servidor)
+    finally:
+        del os.environ["ONEDRIVE_COMPRESSION"]
+    modo_original = (database._wal_habilitado, database._replicacao_wal)
+    database._wal_habilitado = database._replicacao_wal = True
+    replicador = ReplicadorWAL(manager, database.get_connection, database.get_db_path, base_a_cada=10)
+    try:
+        assert database.init_database()
+        conn = database.get_connection()
+        try:
+            assert conn.execute("PRAGMA wal_autocheckpoint").fetchone()[0] == 0
+        finally:
+            conn.close()
+
+        # Primeiro envio: base
+        assert replicador.enviar_pendentes()
+        assert any(nome.startswith("wal/base_") for nome in servidor.arquivos)
+
+        estados = {}
+        tamanhos = []
+        for i in range(24):
+            database.salvar_responsavel(f"BR21-{i % 30:04d}", f"Nome {i}", "Cooperador", 1000 + i, f"user{i}")
+            if i % 4 == 3:
+                database.remover_responsavel(1000 + i - 1)
+            antes = replicador.metricas()["bytes_enviados"]
+            assert replicador.enviar_pendentes()
+            tamanhos.append(replicador.metricas()["bytes_enviados"] - antes)
+            estados[replicador.metricas()["ultimo_seq"]] = tabelas(database.get_db_path())
+            if i % 6 == 5:
+                assert replicador.checkpoint() is not None
+        metricas = replicador.metricas()
+        assert metricas["reinicios_inesperados"] == 0 and metricas["bases_enviadas"] >= 2, metricas
+        assert max(tamanhos) < 64 * 1024, f"segmento de um cadastro grande demais: {tamanhos}"
+        logger.info(
+            f"✅ Segmentos WAL: {min(t for t in tamanhos if t) // 1024}-{max(tamanhos) // 1024} KB por cadastro, "
+            f"{metricas['bases_enviadas']} bases, {metricas['checkpoints']} checkpoints"
+        )
+
+        # Bootstrap de uma instância nova: base + segmentos
+        restaurado = os.path.join(pasta, "restaurado.db")
+        assert replicador.restaurar(restaurado) is None, "banco local já está em dia"
+        nova = ReplicadorWAL(criar_manager(servidor), database.get_connection, lambda: restaurado)
+        assert nova.restaurar(restaurado) is True
+        assert tabelas(restaurado) == tabelas(database.get_db_path()), "restauração divergente"
+        remotos = [nome for nome in servidor.arquivos if nome.startswith("wal/")]
+        assert all(servidor.arquivos[nome].startswith(compressao.MAGIA) for nome in remotos), "envio sem compressão"
+
+        # CLI offline sobre a cópia da pasta wal/ (bases e segmentos comprimidos)
+        offline = os.path.join(pasta, "restaurado_offline.db")
+        _reconstruir_offline(servidor, pasta, "utils.database.wal_sync", "wal", offline)
+        assert tabelas(offline) == tabelas(database.get_db_path()), "restauração offline divergente"
+        seq_meio = sorted(estados)[len(estados) // 2]
+        _reconstruir_offline(servidor, pasta, "utils.database.wal_sync", "wal", offline, "--seq", str(seq_meio))
+        assert tabelas(offline) == estados[seq_meio], f"restauração offline do seq {seq_meio} divergente"
+
+        # Ponto no tempo: cada seq ainda retido reproduz o estado daquele envio
+        retidos = 0
+        for seq, esperado in estados.items():
+            if nova.restaurar(restaurado, seq=seq):
+                assert tabelas(restaurado) == esperado, f"estado do seq {seq} divergente"
+                retidos += 1
+        assert retidos >= 10, retidos
+        nova.fechar()
+        logger.info(f"✅ Restauração WAL (comprimida) idêntica ao original ({retidos} pontos no tempo, CLI offline)")
+    finally:
+        replicador.fechar()
+        database._wal_habilitado, database._replicacao_wal = modo_original
+        database.fechar_pool()
+
+USUARIO_REMOVIDO = 501
+USUARIO_EDITADO = 502
+
+def _escritor_concorrente(base_url, pasta, indice, largada, resultados, rodadas):
+    """Instância do bot num processo próprio: cache próprio, mesmo OneDrive"""
+    logging.getLogger().setLevel(logging.WARNING)
+    os.environ["RENDER_DISK_PATH"] = pasta
+    os.environ["ONEDRIVE_CACHE_DIR"] = pasta
+    from utils.database import database
+
+    database._onedrive_manager = criar_manager(SimpleNamespace(base_url=base_url))
+    staging = database._CACHE_ONEDRIVE_PATH + ".download"
+    assert database._baixar_banco_onedrive(staging), "download inicial falhou"
+    assert database._substituir_cache_onedrive(staging), "cache inicial não trocado"
+    assert database.init_database()
+
+    # As duas instâncias partem da mesma versão remota (deploy sobreposto)
+    largada.wait(60)
+    for i in range(rodadas):
+        user_id = 10000 * (indice + 1) + i
+        database.salvar_responsavel(f"BR2{indice}-{i:04d}", f"Escritor {indice} {i}", "Cooperador", user_id, f"u{user_id}")
+        database.registrar_consentimento_lgpd(user_id)
+        if i % 5 == 0:
+            database.adicionar_admin(90000 + 100 * indice + i, f"Admin {indice} {i}")
+        if i == rodadas // 2:
+            if indice == 0:
+                assert database.remover_cadastros_por_user_id(USUARIO_REMOVIDO)
+            else:
+                conn = database.get_connection(somente_leitura=True)
+                try:
+                    id_editado = conn.execute(
+                        "SELECT id FROM responsaveis WHERE user_id = ?", (USUARIO_EDITADO,)
+                    ).fetchone()[0]
+                finally:
+                    conn.close()
+                assert database.editar_responsavel(id_editado, {"funcao": "Encarregado"})
+        for _ in range(20):
+            if database._enviar_banco_onedrive():
+                break
+        else:
+            raise AssertionError(f"escritor {indice}: upload não concluído")
+
+    resultados.put((indice, dict(database._metricas_conflito)))
+    database.fechar_pool()
+
+def testar_escritores_concorrentes(servidor, pasta):
+    """Duas instâncias gravando ao mesmo tempo: 412 + download, mescla e novo envio"""
+    import multiprocessing
+    os.environ["RENDER_DISK_PATH"] = pasta
+    from utils.database import database
+
+    # Versão remota inicial, com um cadastro a remover e outro a editar
+    assert database.init_database()
+    database.salvar_responsavel("BR99-0501", "Removido", "Cooperador", USUARIO_REMOVIDO, "removido")
+    database.salvar_responsavel("BR99-0502", "Editado", "Cooperador", USUARIO_EDITADO, "editado")
+    database.fechar_pool()
+    with open(database.get_db_path(), "rb") as f:
+        servidor.gravar("alertas_bot.db", f.read())
+
+    rodadas = 15
+    contexto = multiprocessing.get_context("spawn")
+    largada = contexto.Event()
+    resultados = contexto.Queue()
+    processos = []
+    for indice in range(2):
+        pasta_instancia = os.path.join(pasta, f"instancia{indice}")
+        os.makedirs(pasta_instancia)
+        processo = contexto.Process(
+            target=_escritor_concorrente,
+            args=(servidor.base_url, pasta_instancia, indice, largada, resultados, rodadas)
+        )
+        processo.start()
+        processos.append(processo)
+
+    time.sleep(0.5)
+    largada.set()
+    metricas = dict(resultados.get(timeout=180) for _ in processos)
+    for processo in processos:
+        processo.join(60)
+        assert processo.exitcode == 0, f"escritor terminou com código {processo.exitcode}"
+
+    final = os.path.join(pasta, "final.db")
+    assert criar_manager(servidor).download_database(final)
+    conn = sqlite3.connect(final)
+    try:
+        for indice in range(2):
+            cadastros = conn.execute(
+                "SELECT COUNT(*) FROM responsaveis WHERE codigo_casa LIKE ?", (f"BR2{indice}-%",)
+            ).fetchone()[0]
+            consentimentos = conn.execute(
+                "SELECT COUNT(*) FROM consentimento_lgpd WHERE user_id / 10000 = ?", (indice + 1,)
+            ).fetchone()[0]
+            admins = conn.execute(
+                "SELECT COUNT(*) FROM administradores WHERE user_id / 100 = ?", (900 + indice,)
+            ).fetchone()[0]
+            assert cadastros == rodadas, f"escritor {indice}: {cadastros} de {rodadas} cadastros no remoto"
+            assert consentimentos == rodadas, f"escritor {indice}: {consentimentos} consentimentos no remoto"
+            assert admins == len(range(0, rodadas, 5)), f"escritor {indice}: {admins} administradores no remoto"
+        assert conn.execute(
+            "SELECT COUNT(*) FROM responsaveis WHERE user_id = ?", (USUARIO_REMOVIDO,)
+        ).fetchone()[0] == 0, "remoção perdida na mescla"
+        assert conn.execute(
+            "SELECT funcao FROM responsaveis WHERE user_id = ?", (USUARIO_EDITADO,)
+        ).fetchone()[0] == "Encarregado", "edição perdida na mescla"
+    finally:
+        conn.close()
+
+    conflitos = sum(m["conflitos"] for m in metricas.values())
+    mesclagens = sum(m["mesclagens"] for m in metricas.values())
+    assert conflitos > 0 and mesclagens > 0, metricas
+    logger.info(
+        f"✅ Dois escritores concorrentes: nenhum cadastro perdido ({conflitos} uploads recusados, "
+        f"{mesclagens} mesclas, {sum(m['linhas_mescladas'] for m in metricas.values())} linhas mescladas)"
+    )
+
+def testar_historico_separado(servidor, pasta):
+    """Upload do banco crítico independe do histórico de alertas; histórico restaurável"""
+    os.environ["RENDER_DISK_PATH"] = pasta
+    from utils.database import database, historico
+
+    manager = criar_manager(servidor)
+    cache_original = database._CACHE_ONEDRIVE_PATH
+    database._CACHE_ONEDRIVE_PATH = os.path.join(pasta, "alertas_bot_cache.db")
+    database._onedrive_manager = manager
+    try:
+        assert database.init_database()
+
+        alertas = 20000
+        conn = database.get_connection()
+        try:
+            conn.executemany(
+                "INSERT INTO alertas_enviados (codigo_casa, tipo_alerta, mensagem, data_envio, user_id) "
+                "VALUES (?, 'Teste', ?, '01/01/2025 10:00:00', 42)",
+                [(f"BR21-{i % 50:04d}", f"Mensagem de alerta número {i} " * 4) for i in range(alertas)]
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+        database.salvar_responsavel("BR21-0001", "Responsável", "Cooperador", 1001, "resp")
+        assert database._enviar_banco_onedrive()
+        assert database._enviar_historico_onedrive()
+        critico = len(servidor.arquivos["alertas_bot.db"])
+        historico_remoto = len(servidor.arquivos[historico.NOME_REMOTO])
+        assert critico < 64 * 1024, f"upload de cadastro carregou o histórico: {critico} bytes"
+        assert historico_remoto > 10 * critico
+        logger.info(f"✅ Upload do cadastro: {critico // 1024} KB (histórico de {alertas} alertas: {historico_remoto // 1024} KB à parte)")
+
+        # Disco novo: histórico vazio é recuperado do OneDrive
+        database.fechar_pool()
+        os.remove(historico.caminho_historico(database._CACHE_ONEDRIVE_PATH))
+        database._restaurar_historico_onedrive()
+        assert database.obter_estatisticas_alertas()["total"] == alertas
+        logger.info("✅ Histórico de alertas restaurado do OneDrive")
+    finally:
+        database._onedrive_manager = None
+        database._CACHE_ONEDRIVE_PATH = cache_original
+        database.fechar_pool()
+
+def testar_transporte_http(servidor, pasta):
+    """Sessão compartilhada, novas tentativas em 429/5xx e métricas por endpoint"""
+    from utils import http_client
+
+    manager = criar_manager(servidor)
+    arquivo = os.path.join(pasta, "banco.db")
+    with open(arquivo, "wb") as f:
+        f.write(b"conteudo" * 4096)
+
+    # 429 com Retry-After e 503: o corpo (arquivo) é reenviado por inteiro
+    servidor.respostas_forcadas = [(429, {"Retry-After": "0"}), (503, {})]
+    assert manager.upload_database(arquivo)
+    assert servidor.arquivos["alertas_bot.db"] == open(arquivo, "rb").read(), "corpo reenviado incompleto"
+    logger.info("✅ Upload repetido após 429 (Retry-After) e 503")
+
+    # POST não idempotente: 500 não é repetido, 429 é
+    servidor.respostas_forcadas = [(500, {})]
+    assert http_client.post(f"{servidor.base_url}/nada", endpoint="teste.post").status_code == 500
+    servidor.respostas_forcadas = [(429, {"Retry-After": "0"})]
+    assert http_client.post(f"{servidor.base_url}/nada", endpoint="teste.post").status_code == 404
+
+    # Erros persistentes: desiste após HTTP_RETRY_ATTEMPTS tentativas
+    servidor.respostas_forcadas = [(503, {})] * 10
+    antes = len(servidor.requisicoes)
+    assert http_client.get(f"{servidor.base_url}/nada", endpoint="teste.get").status_code == 503
+    assert len(servidor.requisicoes) - antes == 4, "número de tentativas inesperado"
+    servidor.respostas_forcadas = []
+
+    # Keep-alive: várias chamadas reaproveitam a mesma sessão
+    assert http_client.obter_sessao() is http_client.obter_sessao()
+    for _ in range(20):
+        assert manager.obter_metadados_database()
+
+    metricas = http_client.obter_metricas_http()
+    assert metricas["graph.upload"]["retentativas"] == 2, metricas["graph.upload"]
+    assert metricas["graph.metadados"]["chamadas"] >= 20
+    assert sum(metricas["graph.metadados"]["faixas"]) == metricas["graph.metadados"]["chamadas"]
+    for nome in ("graph.upload", "graph.metadados", "teste.get"):
+        m = metricas[nome]
+        logger.info(
+            f"📊 {nome}: {m['chamadas']} chamadas, {m['retentativas']} retentativas, "
+            f"média {m['media_ms']}ms, p95 <= {m['p95_ms']}ms"
+        )
+    logger.info("✅ Métricas de latência por endpoint")
+
+def testar_cliente_async(servidor, pasta):
+    """OneDriveManagerAsync: mesmas operações, aguardáveis no event loop"""
+    import asyncio
+    from utils import http_client
+    from utils.onedrive_manager_async import OneDriveManagerAsync
+
+    manager = criar_manager(servidor)
+    manager.limite_upload_simples = 1024 * 1024
+    manager.tamanho_chunk_upload = manager.TAMANHO_BLOCO_UPLOAD
+    manager_async = OneDriveManagerAsync(manager, AuthAsyncFalsa())
+
+    grande = os.path.join(pasta, "grande.db")
+    with open(grande, "wb") as f:
+        f.write(os.urandom(3 * manager.TAMANHO_BLOCO_UPLOAD + 999))
+    pequeno = os.path.join(pasta, "pequeno.json")
+    with open(pequeno, "wb") as f:
+        f.write(b'{"ok": true}')
+
+    async def cenario():
+        servidor.falhar_chunks = {2}
+        assert await manager_async.upload_database(grande), "upload em sessão async falhou"
+        assert servidor.arquivos["alertas_bot.db"] == open(grande, "rb").read()
+        servidor.falhar_chunks = set()
+
+        # Versão remota compartilhada com o gerenciador síncrono
+        assert manager._versao_remota.get("eTag"), "eTag não registrado"
+        destino = os.path.join(pasta, "baixado.db")
+        assert await manager_async.download_database(destino, somente_se_alterado=True) is None
+        servidor.gravar("alertas_bot.db", b"nova versao")
+        assert await manager_async.download_database(destino, somente_se_alterado=True) is True
+        assert open(destino, "rb").read() == b"nova versao"
+
+        servidor.respostas_forcadas = [(429, {"Retry-After": "0"}), (503, {})]
+        assert await manager_async.upload_arquivo(pequeno, "delta/lote_1_1.json")
+        assert [i["name"] for i in await manager_async.listar_arquivos("delta")] == ["lote_1_1.json"]
+        assert await manager_async.remover_arquivo("delta/lote_1_1.json")
+        assert await manager_async.listar_arquivos("delta") == []
+
+        # Chamadas concorrentes compartilham o cliente do loop
+        resultados = await asyncio.gather(*[manager_async.obter_metadados_database() for _ in range(10)])
+        assert all(r and r["size"] == len(b"nova versao") for r in resultados)
+        await http_client.fechar_cliente_async()
+
+    asyncio.run(cenario())
+    assert http_client.obter_metricas_http()["graph.upload"]["retentativas"] >= 2
+    logger.info("✅ Upload/download/listagem pelo cliente assíncrono")
+
+def testar_compressao(servidor, pasta):
+    """Transporte comprimido com cabeçalho CCBZ e compatibilidade com o arquivo bruto"""
+    import asyncio
+    from utils import compressao, http_client
+    from utils.onedrive_manager_async import OneDriveManagerAsync
+
+    manager = criar_manager(servidor)
+    manager.limite_upload_simples = 1024 * 1024
+    manager.tamanho_chunk_upload = manager.TAMANHO_BLOCO_UPLOAD
+
+    # Banco SQLite de verdade: texto repetitivo e páginas livres comprimem bem
+    banco = os.path.join(pasta, "banco.db")
+    conn = sqlite3.connect(banco)
+    conn.execute("CREATE TABLE responsaveis (codigo_casa TEXT, nome TEXT, funcao TEXT)")
+    conn.executemany(
+        "INSERT INTO responsaveis VALUES (?, ?, 'Cooperador')",
+        ((f"BR21-{i % 900:04d}", f"Responsável {i}") for i in range(60000))
+    )
+    conn.commit()
+    conn.close()
+    original = open(banco, "rb").read()
+
+    algoritmos = ["gzip"] + (["zstd"] if compressao.zstd_disponivel() else [])
+    for algoritmo in algoritmos:
+        manager.compressao_upload = algoritmo
+        assert manager.upload_database(banco), f"upload {algoritmo} falhou"
+        remoto = servidor.arquivos["alertas_bot.db"]
+        assert remoto.startswith(compressao.MAGIA), "cabeçalho ausente"
+        assert len(remoto) < len(original) / 3, f"{algoritmo}: {len(remoto)} de {len(original)} bytes"
+        assert not os.path.exists(f"{banco}.{algoritmo}"), "temporário comprimido não removido"
+
+        destino = os.path.join(pasta, f"baixado_{algoritmo}.db")
+        assert manager.download_database(destino) is True
+        assert open(destino, "rb").read() == original, f"{algoritmo}: conteúdo divergente"
+        logger.info(f"✅ {algoritmo}: {len(original)} → {len(remoto)} bytes, download idêntico")
+
+    if not compressao.zstd_disponivel():
+        assert compressao.resolver_algoritmo("zstd") == "gzip"
+        logger.info("✅ zstd indisponível: envio cai para gzip")
+
+    # Arquivo bruto de versões anteriores continua sendo aceito
+    servidor.gravar("alertas_bot.db", original)
+    bruto = os.path.join(pasta, "bruto.db")
+    assert manager.download_database(bruto) is True
+    assert open(bruto, "rb").read() == original
+    logger.info("✅ Download do alertas_bot.db sem compressão")
+
+    # Comprimido truncado: download falha sem tocar no destino
+    manager.compressao_upload = "gzip"
+    assert manager.upload_database(banco)
+    servidor.gravar("alertas_bot.db", servidor.arquivos["alertas_bot.db"][:-100])
+    assert manager.download_database(bruto) is False
+    assert open(bruto, "rb").read() == original, "destino alterado por download corrompido"
+    assert not [nome for nome in os.listdir(pasta) if nome.startswith("bruto.db.")], "temporários esquecidos"
+    logger.info("✅ Arquivo comprimido truncado rejeitado")
+
+    # Cliente assíncrono: mesmo formato nos dois sentidos
+    manager_async = OneDriveManagerAsync(manager, AuthAsyncFalsa())
+
+    async def cenario():
+        assert await manager_async.upload_arquivo(banco, "alertas_historico.db", comprimir=True)
+        assert servidor.arquivos["alertas_historico.db"].startswith(compressao.MAGIA)
+        destino = os.path.join(pasta, "historico.db")
+        assert await manager_async.download_arquivo("alertas_historico.db", destino)
+        assert open(destino, "rb").read() == original
+        await http_client.fechar_cliente_async()
+
+    asyncio.run(cenario())
+    logger.info("✅ Upload/download comprimidos pelo cliente assíncrono")
+
+def testar_token_compartilhado(servidor, pasta):
+    """Provedor de token único: renovação proativa e single-flight entre threads"""
+    import asyncio
+    import time
+    from unittest import mock
+    from cryptography.fernet import Fernet
+    from auth import microsoft_auth
+    from utils import http_client
+
+    os.environ.update({
+        "MICROSOFT_CLIENT_ID": "cliente-teste",
+        "ENCRYPTION_KEY": Fernet.generate_key().decode(),
+        "ONEDRIVE_ALERTA_ID": PASTA_ID,
+        "MICROSOFT_TOKEN_REFRESH_MARGIN_SECONDS": "2",
+    })
+
+    chamadas = {"POST": 0, "PUT": 0}
+    lock = threading.Lock()
+
+    class Resposta:
+        def __init__(self, status, corpo=None):
+            self.status_code = status
+            self._corpo = corpo or {}
+            self.text = ""
+
+        def json(self):
+            return self._corpo
+
+    def post(url, **kwargs):
+        with lock:
+            chamadas["POST"] += 1
+            numero = chamadas["POST"]
+        time.sleep(0.2)  # login.microsoftonline.com lento
+        return Resposta(200, {"access_token": f"acesso-{numero}", "refresh_token": f"refresh-{numero}", "expires_in": 3})
+
+    def put(url, **kwargs):
+        with lock:
+            chamadas["PUT"] += 1
+        time.sleep(0.5)  # PUT do token_ccb.json lento
+        return Resposta(201)
+
+    with mock.patch.object(http_client, "post", post), mock.patch.object(http_client, "put", put):
+        auth = microsoft_auth.obter_auth_compartilhado()
+        try:
+            assert microsoft_auth.obter_auth_compartilhado() is auth, "instância não compartilhada"
+            auth._tokens = {"access_token": "expirado", "refresh_token": "r0", "expires_on": 0}
+
+            # 10 threads com token expirado: uma única renovação
+            tokens = []
+            threads = [threading.Thread(target=lambda: tokens.append(auth.access_token)) for _ in range(10)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            assert chamadas["POST"] == 1, f"{chamadas['POST']} renovações concorrentes"
+            assert set(tokens) == {"acesso-1"}, tokens
+
+            # Corrotinas e threads juntas: mesmo lock, uma renovação, PUT fora do caminho
+            auth._tokens = {"access_token": "expirado", "refresh_token": "refresh-1", "expires_on": 0}
+            auth_async = microsoft_auth.MicrosoftAuthAsync(auth)
+            auth.is_token_valid = lambda: auth._tokens["access_token"] != "expirado"  # expires_in de 3s
+
+            async def corrotinas():
+                inicio = time.monotonic()
+                renovados = await asyncio.gather(*(auth_async.obter_access_token() for _ in range(5)))
+                return renovados, time.monotonic() - inicio
+
+            threads = [threading.Thread(target=lambda: tokens.append(auth.access_token)) for _ in range(5)]
+            for t in threads:
+                t.start()
+            renovados, duracao = asyncio.run(corrotinas())
+            for t in threads:
+                t.join()
+            assert chamadas["POST"] == 2, f"{chamadas['POST'] - 1} renovações com corrotinas e threads"
+            assert set(renovados) == {"acesso-2"} and set(tokens[10:]) == {"acesso-2"}, (renovados, tokens)
+            assert duracao < 0.5, f"renovação assíncrona esperou o PUT ({duracao:.2f}s)"
+
+            # Expira em 3s com margem de 2s: a thread de fundo renova sozinha
+            auth.is_token_valid = lambda: True  # validade de 5 min do Graph não cabe no teste
+            auth._parar_renovador.set()
+            auth._renovador.join()
+            auth.iniciar_renovacao_automatica()
+            limite = time.time() + 5
+            while not auth.metricas_token()["renovacoes_proativas"] and time.time() < limite:
+                time.sleep(0.05)
+            assert chamadas["POST"] >= 2, "renovação proativa não ocorreu"
+            assert auth.access_token.startswith("acesso-") and auth.access_token != "acesso-1"
+
+            metricas = microsoft_auth.obter_metricas_token()
+            assert metricas["renovacoes_sob_demanda"] == 2 and metricas["renovacoes_proativas"] >= 1, metricas
+            assert chamadas["PUT"] >= 1, "token não persistido no OneDrive"
+        finally:
+            for t in threading.enumerate():
+                if t.name == "token-ccb-save":
+                    t.join()
+            microsoft_auth.encerrar_auth_compartilhado()
+
+    logger.info(f"✅ Token compartilhado: 1 renovação para 10 threads (e para threads + corrotinas), {metricas['renovacoes_proativas']} proativa(s)")
+
+TESTES = [
+    testar_upload, testar_download_condicional, testar_upload_condicional, testar_sync_delta,
+    testar_replicacao_wal, testar_escritores_concorrentes, testar_historico_separado, testar_transporte_http, testar_cliente_async, testar_compressao,
+    testar_token_compartilhado
+]
+
+def main():
+    """Executa os testes contra o servidor Graph local"""
+    logger.info("=" * 60)
+    logger.info("TESTE DO ONEDRIVE MANAGER (SERVIDOR GRAPH LOCAL)")
+    logger.info("=" * 60)
+
+    for teste in TESTES:
+        servidor = ServidorGraphLocal().iniciar()
+        pasta = tempfile.mkdtemp(prefix="ccb_teste_onedrive_")
+        try:
+            teste(servidor, pasta)
+        except AssertionError as e:
+            logger.error(f"❌ {teste.__name__}: {e}")
+            sys.exit(1)
+        finally:
+            servidor.parar()
+            shutil.rmtree(pasta, ignore_errors=True)
+
+    logger.info("\n" + "=" * 60)
+    logger.info("✅ TESTE CONCLUÍDO COM SUCESSO!")
+    logger.info("=" * 60)
+
+if __name__ == "__main__":
+    main()
@@ -32,6 +32,8 @@ from .database import (
     # Funções principais do banco
     get_db_path,
     get_connection,
+    fechar_pool,
+    obter_estatisticas_pool,
     init_database,
     fazer_backup_banco,
     
@@ -93,6 +95,8 @@ __all__ = [
     # Funções do banco de dados
     'get_db_path',
     'get_connection',
+    'fechar_pool',
+    'obter_estatisticas_pool',
     'init_database',
     'fazer_backup_banco',
     
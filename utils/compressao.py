@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+📁 ARQUIVO: utils/compressao.py
+💾 ONDE SALVAR: ccb-alerta-bot/utils/compressao.py
+📦 FUNÇÃO: Compressão dos arquivos trocados com o OneDrive
+🔧 DESCRIÇÃO: gzip (padrão da biblioteca) ou zstd (pacote zstandard,
+   opcional), sempre em streaming. O arquivo comprimido começa com um
+   cabeçalho próprio - quem baixa detecta o formato pelos bytes iniciais e
+   arquivos sem cabeçalho (ex: alertas_bot.db bruto de versões anteriores)
+   passam direto.
+
+   Cabeçalho (14 bytes): b"CCBZ" + versão (1 byte) + algoritmo (1 byte)
+   + tamanho original (8 bytes, big-endian)
+👨‍💼 ADAPTADO PARA: CCB Alerta Bot
+"""
+
+import os
+import gzip
+import shutil
+import struct
+import logging
+from typing import Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger("CCB-Alerta-Bot.compressao")
+
+MAGIA = b"CCBZ"
+VERSAO_FORMATO = 1
+_CABECALHO = struct.Struct(">4sBBQ")
+
+# Código gravado no cabeçalho de cada algoritmo
+ALGORITMOS = {"gzip": 1, "zstd": 2}
+_NOMES = {codigo: nome for nome, codigo in ALGORITMOS.items()}
+
+NIVEL_PADRAO = {"gzip": 6, "zstd": 3}
+
+_BLOCO = 1024 * 1024
+
+
+def zstd_disponivel() -> bool:
+    return zstandard is not None
+
+
+def resolver_algoritmo(algoritmo: Optional[str]) -> Optional[str]:
+    """
+    Normaliza o algoritmo configurado ("none", "gzip", "zstd")
+
+    zstd sem o pacote zstandard instalado cai para gzip (com aviso).
+
+    Returns:
+        str: algoritmo utilizável, ou None para envio sem compressão
+    """
+    algoritmo = (algoritmo or "none").strip().lower()
+    if algoritmo in ("", "none", "nenhum", "false", "0"):
+        return None
+    if algoritmo not in ALGORITMOS:
+        logger.warning(f"⚠️ Compressão desconhecida '{algoritmo}' - enviando sem compressão")
+        return None
+    if algoritmo == "zstd" and not zstd_disponivel():
+        logger.warning("⚠️ zstd indisponível (pacote zstandard não instalado) - usando gzip")
+        return "gzip"
+    return algoritmo
+
+
+def ler_cabecalho(caminho: str) -> Optional[dict]:
+    """
+    Cabeçalho de um arquivo comprimido
+
+    Returns:
+        dict: algoritmo e tamanho_original; None se o arquivo não está no formato
+    """
+    with open(caminho, 'rb') as f:
+        dados = f.read(_CABECALHO.size)
+    if len(dados) < _CABECALHO.size or not dados.startswith(MAGIA):
+        return None
+
+    _, versao, codigo, tamanho = _CABECALHO.unpack(dados)
+    if versao != VERSAO_FORMATO or codigo not in _NOMES:
+        raise ValueError(f"Formato comprimido não suportado (versão {versao}, algoritmo {codigo})")
+    return {"algoritmo": _NOMES[codigo], "tamanho_original": tamanho}
+
+
+def comprimir_arquivo(origem: str, destino: str, algoritmo: str = "gzip", nivel: Optional[int] = None) -> int:
+    """
+    Comprime `origem` em `destino` (com cabeçalho), lendo um bloco por vez
+
+    Args:
+        origem (str): arquivo original
+        destino (str): arquivo comprimido (sobrescrito)
+        algoritmo (str): "gzip" ou "zstd"
+        nivel (int): nível de compressão (padrão: 6 no gzip, 3 no zstd)
+
+    Returns:
+        int: tamanho do arquivo comprimido
+    """
+    if nivel is None:
+        nivel = NIVEL_PADRAO[algoritmo]
+
+    with open(origem, 'rb') as entrada, open(destino, 'wb') as saida:
+        tamanho_original = os.fstat(entrada.fileno()).st_size
+        saida.write(_CABECALHO.pack(MAGIA, VERSAO_FORMATO, ALGORITMOS[algoritmo], tamanho_original))
+
+        if algoritmo == "zstd":
+            zstandard.ZstdCompressor(level=nivel).copy_stream(
+                entrada, saida, size=tamanho_original, read_size=_BLOCO, write_size=_BLOCO
+            )
+        else:
+            # mtime=0: mesmo conteúdo gera os mesmos bytes
+            with gzip.GzipFile(fileobj=saida, mode='wb', compresslevel=nivel, mtime=0) as compactador:
+                shutil.copyfileobj(entrada, compactador, _BLOCO)
+
+        saida.flush()
+        os.fsync(saida.fileno())
+        return saida.tell()
+
+
+def descomprimir_arquivo(origem: str, destino: str) -> int:
+    """
+    Descomprime um arquivo com cabeçalho em `destino`
+
+    Raises:
+        ValueError: sem cabeçalho, algoritmo indisponível ou tamanho divergente
+
+    Returns:
+        int: tamanho do arquivo descomprimido
+    """
+    cabecalho = ler_cabecalho(origem)
+    if cabecalho is None:
+        raise ValueError(f"{origem} não está comprimido")
+    if cabecalho["algoritmo"] == "zstd" and not zstd_disponivel():
+        raise ValueError("Arquivo comprimido com zstd, mas o pacote zstandard não está instalado")
+
+    with open(origem, 'rb') as entrada, open(destino, 'wb') as saida:
+        entrada.seek(_CABECALHO.size)
+        if cabecalho["algoritmo"] == "zstd":
+            zstandard.ZstdDecompressor().copy_stream(entrada, saida, read_size=_BLOCO, write_size=_BLOCO)
+        else:
+            with gzip.GzipFile(fileobj=entrada, mode='rb') as descompactador:
+                shutil.copyfileobj(descompactador, saida, _BLOCO)
+
+        tamanho = saida.tell()
+        if tamanho != cabecalho["tamanho_original"]:
+            raise ValueError(f"Descompressão incompleta: {tamanho} de {cabecalho['tamanho_original']} bytes")
+        saida.flush()
+        os.fsync(saida.fileno())
+        return tamanho
+
+
+def descomprimir_se_necessario(caminho: str) -> Optional[str]:
+    """
+    Descomprime `caminho` no próprio lugar se tiver cabeçalho (senão não mexe)
+
+    Returns:
+        str: algoritmo encontrado, ou None se o arquivo já estava bruto
+    """
+    cabecalho = ler_cabecalho(caminho)
+    if cabecalho is None:
+        return None
+
+    temporario = caminho + ".descomprimido"
+    try:
+        descomprimir_arquivo(caminho, temporario)
+        os.replace(temporario, caminho)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+    return cabecalho["algoritmo"]
+
+
+def preparar_envio(caminho: str, algoritmo: Optional[str], nivel: Optional[int] = None) -> str:
+    """
+    Arquivo a enviar: `caminho` ou uma cópia comprimida ao lado dele
+
+    Quem chama remove o arquivo devolvido quando for diferente de `caminho`.
+    """
+    if not algoritmo:
+        return caminho
+    destino = f"{caminho}.{algoritmo}"
+    try:
+        comprimir_arquivo(caminho, destino, algoritmo, nivel)
+    except Exception:
+        if os.path.exists(destino):
+            os.remove(destino)
+        raise
+    return destino
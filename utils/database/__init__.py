@@ -11,7 +11,33 @@ CORREÇÃO: Adicionada exportação da nova função verificar_cadastro_existent
 from .database import (
     get_db_path,
     get_connection,
+    fechar_pool,
+    obter_estatisticas_pool,
+    obter_metricas_cache_responsaveis,
+    checkpoint_wal,
+    iniciar_agendador_checkpoint,
+    parar_agendador_checkpoint,
+    compactar_banco,
+    iniciar_agendador_vacuum,
+    parar_agendador_vacuum,
+    obter_metricas_espaco,
+    parar_atualizador_onedrive,
+    obter_status_atualizacao_onedrive,
+    finalizar_sincronizacao_onedrive,
+    obter_metricas_upload_onedrive,
+    obter_metricas_upload_historico,
+    obter_metricas_download_onedrive,
+    obter_metricas_delta_onedrive,
+    obter_metricas_wal_onedrive,
+    obter_metricas_conflito_onedrive,
+    restaurar_banco_no_tempo,
+    sincronizar_agora_onedrive,
+    obter_onedrive_async,
     init_database,
+    iniciar_banco,
+    aguardar_banco_pronto,
+    obter_status_inicializacao,
+    criar_snapshot_consistente,
     fazer_backup_banco,
     salvar_responsavel,
     verificar_cadastro_existente,
@@ -21,20 +47,30 @@ from .database import (
     buscar_responsaveis_por_codigo,
     buscar_responsavel_por_id,
     listar_todos_responsaveis,
+    listar_conflitos_cadastro,
+    listar_cadastros_por_periodo,
     remover_responsavel,
     remover_responsavel_especifico,
     editar_responsavel,
     limpar_todos_responsaveis,
     verificar_admin,
+    obter_ids_admins,
+    obter_ids_admins_sem_banco,
+    obter_metricas_registro_admins,
     listar_admins,
     adicionar_admin,
     remover_admin,
     registrar_consentimento_lgpd,
     verificar_consentimento_lgpd,
+    obter_metricas_cache_lgpd,
+    obter_versao_schema,
     remover_consentimento_lgpd,
     registrar_alerta_enviado,
     listar_alertas_enviados,
+    listar_alertas_por_periodo,
+    contar_alertas_por_periodo,
     obter_estatisticas_alertas,
+    reconstruir_estatisticas_alertas,
     inicializar_admins_padrao
 )
 
@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+📁 ARQUIVO: utils/database/async_database.py
+📦 FUNÇÃO: Acesso assíncrono ao banco para os handlers do telegram
+🔧 DESCRIÇÃO: Versões aguardáveis das funções de utils.database, executadas
+   num pool de threads dedicado - o event loop nunca espera pelo SQLite
+"""
+
+import os
+import asyncio
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from . import database
+
+logger = logging.getLogger("CCB-Alerta-Bot.database.async")
+
+# Uma thread por conexão do pool (1 escritor + N leitores): mais que isso só esperaria no pool
+_workers = int(os.getenv("DB_ASYNC_WORKERS", str(int(os.getenv("DB_POOL_READERS", "4")) + 1)))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _obter_executor():
+    """Pool de threads do banco (criado sob demanda, um por processo)"""
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_workers, thread_name_prefix="ccb-db")
+            logger.info(f"🧵 Executor do banco iniciado ({_workers} threads)")
+        return _executor
+
+
+def fechar_executor():
+    """Aguarda as operações em andamento e encerra o executor (shutdown)"""
+    global _executor
+
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+async def executar(funcao, *args, **kwargs):
+    """
+    Executa uma função síncrona do banco no executor dedicado
+
+    Args:
+        funcao: função bloqueante (ex: database.salvar_responsavel)
+
+    Returns:
+        O retorno da função
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_obter_executor(), _executar_quando_pronto, funcao, args, kwargs)
+
+
+def _executar_quando_pronto(funcao, args, kwargs):
+    # Durante o startup sem cache local, espera o download inicial (na thread, não no loop)
+    database.aguardar_banco_pronto()
+    return funcao(*args, **kwargs)
+
+
+def _assincrona(funcao):
+    """Cria a versão aguardável de uma função síncrona do banco"""
+    @functools.wraps(funcao)
+    async def wrapper(*args, **kwargs):
+        return await executar(funcao, *args, **kwargs)
+    return wrapper
+
+
+# ============================================
+# FUNÇÕES EXPORTADAS (mesmos nomes de utils.database)
+# ============================================
+
+get_db_path = _assincrona(database.get_db_path)
+fazer_backup_banco = _assincrona(database.fazer_backup_banco)
+
+salvar_responsavel = _assincrona(database.salvar_responsavel)
+verificar_cadastro_existente = _assincrona(database.verificar_cadastro_existente)
+verificar_cadastro_existente_detalhado = _assincrona(database.verificar_cadastro_existente_detalhado)
+obter_cadastros_por_user_id = _assincrona(database.obter_cadastros_por_user_id)
+remover_cadastros_por_user_id = _assincrona(database.remover_cadastros_por_user_id)
+buscar_responsaveis_por_codigo = _assincrona(database.buscar_responsaveis_por_codigo)
+buscar_responsavel_por_id = _assincrona(database.buscar_responsavel_por_id)
+listar_todos_responsaveis = _assincrona(database.listar_todos_responsaveis)
+listar_cadastros_por_periodo = _assincrona(database.listar_cadastros_por_periodo)
+remover_responsavel = _assincrona(database.remover_responsavel)
+remover_responsavel_especifico = _assincrona(database.remover_responsavel_especifico)
+editar_responsavel = _assincrona(database.editar_responsavel)
+limpar_todos_responsaveis = _assincrona(database.limpar_todos_responsaveis)
+
+async def verificar_admin(user_id):
+    """Versão aguardável de verificar_admin: responde sem o executor quando os admins estão em memória"""
+    admins = database.admins_em_memoria()
+    if admins is not None:
+        try:
+            return int(user_id) in admins
+        except (TypeError, ValueError):
+            return False
+    return await executar(database.verificar_admin, user_id)
+
+async def obter_ids_admins():
+    """Versão aguardável de obter_ids_admins: sem o executor quando os admins estão em memória"""
+    admins = database.admins_em_memoria()
+    if admins is not None:
+        return admins
+    return await executar(database.obter_ids_admins)
+
+async def get_admin_ids():
+    """IDs dos administradores (ADMIN_IDS + tabela) como texto, para envio de mensagens"""
+    return [str(admin_id) for admin_id in sorted(await obter_ids_admins())]
+
+listar_admins = _assincrona(database.listar_admins)
+adicionar_admin = _assincrona(database.adicionar_admin)
+remover_admin = _assincrona(database.remover_admin)
+
+registrar_consentimento_lgpd = _assincrona(database.registrar_consentimento_lgpd)
+async def verificar_consentimento_lgpd(user_id):
+    """Versão aguardável de verificar_consentimento_lgpd: acertos do cache não passam pelo executor"""
+    consentiu = database.consentimento_em_memoria(user_id)
+    if consentiu is not None:
+        return consentiu
+    return await executar(database.verificar_consentimento_lgpd, user_id)
+remover_consentimento_lgpd = _assincrona(database.remover_consentimento_lgpd)
+
+registrar_alerta_enviado = _assincrona(database.registrar_alerta_enviado)
+listar_alertas_enviados = _assincrona(database.listar_alertas_enviados)
+listar_alertas_por_periodo = _assincrona(database.listar_alertas_por_periodo)
+contar_alertas_por_periodo = _assincrona(database.contar_alertas_por_periodo)
+obter_estatisticas_alertas = _assincrona(database.obter_estatisticas_alertas)
+reconstruir_estatisticas_alertas = _assincrona(database.reconstruir_estatisticas_alertas)
@@ -0,0 +1,482 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+📁 ARQUIVO: utils/database/cache.py
+📦 FUNÇÃO: Projeções em memória de responsaveis, administradores e consentimento_lgpd
+🔧 DESCRIÇÃO: Índices por id, user_id e codigo_casa carregados uma vez,
+   atualizados pelas funções de escrita e invalidados quando o arquivo
+   do banco é substituído (download do OneDrive)
+"""
+
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("CCB-Alerta-Bot.database.cache")
+
+
+class CacheResponsaveis:
+    """
+    Cópia em memória da tabela responsaveis, segura entre threads
+
+    - `carregar` devolve todas as linhas (dicts) e só é chamado na
+      primeira leitura e após uma invalidação
+    - `chave` calcula a chave de duplicidade (código, nome) de uma linha,
+      a mesma gravada nas colunas normalizadas do banco
+    - escritas aplicam as linhas alteradas (upsert/remoção por id)
+      enquanto ainda seguram o escritor do pool, na ordem dos commits
+    - cada escrita/invalidação incrementa a versão: uma reconstrução que
+      leu o banco antes disso é descartada em vez de instalar dados velhos
+    """
+
+    def __init__(self, carregar: Callable[[], List[Dict]], chave: Callable[[Dict], Tuple[str, str]]):
+        self._carregar = carregar
+        self._chave = chave
+        self._lock = threading.Lock()
+
+        self._versao = 0
+        self._carregado = False
+        self._por_id: Dict[int, Dict] = {}
+        self._por_user_id: Dict[int, set] = {}
+        self._por_codigo: Dict[str, set] = {}
+        self._por_chave: Dict[Tuple[str, str], set] = {}
+        self._ordenados: Optional[List[Dict]] = None
+
+        self._stats = {
+            "acertos": 0,
+            "faltas": 0,
+            "reconstrucoes": 0,
+            "reconstrucoes_descartadas": 0,
+            "invalidacoes": 0,
+            "escritas": 0,
+            "tempo_reconstrucao_total_ms": 0.0,
+            "ultima_reconstrucao_ms": 0.0,
+        }
+
+    # ------------------------------------------------------------------
+    # Carga / invalidação
+    # ------------------------------------------------------------------
+
+    def _indexar(self, linha: Dict):
+        id_registro = linha["id"]
+        self._por_id[id_registro] = linha
+        self._por_user_id.setdefault(linha["user_id"], set()).add(id_registro)
+        self._por_codigo.setdefault(linha["codigo_casa"], set()).add(id_registro)
+        self._por_chave.setdefault(self._chave(linha), set()).add(id_registro)
+
+    def _desindexar(self, id_registro: int):
+        linha = self._por_id.pop(id_registro, None)
+        if linha is None:
+            return
+        for indice, valor in ((self._por_user_id, linha["user_id"]),
+                              (self._por_codigo, linha["codigo_casa"]),
+                              (self._por_chave, self._chave(linha))):
+            ids = indice.get(valor)
+            if ids is not None:
+                ids.discard(id_registro)
+                if not ids:
+                    del indice[valor]
+
+    def _limpar_indices(self):
+        self._por_id = {}
+        self._por_user_id = {}
+        self._por_codigo = {}
+        self._por_chave = {}
+        self._ordenados = None
+
+    def _reconstruir(self) -> Dict[int, Dict]:
+        """
+        Lê a tabela e instala a projeção, se nenhuma escrita ocorreu durante a leitura
+
+        Returns:
+            Dict: linhas lidas, por id (instaladas ou não)
+        """
+        with self._lock:
+            versao = self._versao
+
+        inicio = time.perf_counter()
+        linhas = {linha["id"]: linha for linha in self._carregar()}
+        duracao_ms = (time.perf_counter() - inicio) * 1000
+
+        with self._lock:
+            self._stats["tempo_reconstrucao_total_ms"] += duracao_ms
+            self._stats["ultima_reconstrucao_ms"] = round(duracao_ms, 2)
+
+            if self._versao != versao:
+                # Escrita ou troca de arquivo durante a leitura: não instalar
+                self._stats["reconstrucoes_descartadas"] += 1
+                return linhas
+
+            self._limpar_indices()
+            for linha in linhas.values():
+                self._indexar(dict(linha))
+            self._carregado = True
+            self._stats["reconstrucoes"] += 1
+
+        logger.debug(f"🧠 Cache de responsáveis reconstruído: {len(linhas)} registros em {duracao_ms:.1f}ms")
+        return linhas
+
+    def invalidar(self):
+        """Descarta a projeção (arquivo do banco substituído)"""
+        with self._lock:
+            self._versao += 1
+            self._carregado = False
+            self._limpar_indices()
+            self._stats["invalidacoes"] += 1
+
+    # ------------------------------------------------------------------
+    # Escrita (write-through)
+    # ------------------------------------------------------------------
+
+    def aplicar(self, atualizadas: Iterable[Dict] = (), removidas: Iterable[int] = ()):
+        """
+        Aplica o resultado de uma escrita já confirmada (commit)
+
+        Args:
+            atualizadas: linhas completas inseridas/alteradas
+            removidas: ids excluídos
+        """
+        with self._lock:
+            self._versao += 1
+            self._stats["escritas"] += 1
+            if not self._carregado:
+                return
+
+            for id_registro in removidas:
+                self._desindexar(id_registro)
+            for linha in atualizadas:
+                self._desindexar(linha["id"])
+                self._indexar(dict(linha))
+            self._ordenados = None
+
+    def limpar(self):
+        """Tabela esvaziada: projeção válida e vazia"""
+        with self._lock:
+            self._versao += 1
+            self._stats["escritas"] += 1
+            self._limpar_indices()
+            self._carregado = True
+
+    # ------------------------------------------------------------------
+    # Leitura (sem SQL)
+    # ------------------------------------------------------------------
+
+    def _consultar(self, selecionar: Callable[[Dict[int, Dict], Optional[Callable]], List[Dict]]) -> List[Dict]:
+        with self._lock:
+            if self._carregado:
+                self._stats["acertos"] += 1
+                return [dict(linha) for linha in selecionar(self._por_id, self._indice)]
+            self._stats["faltas"] += 1
+
+        # Falta: a própria leitura que reconstruiu responde (varredura única)
+        return [dict(linha) for linha in selecionar(self._reconstruir(), None)]
+
+    def _indice(self, nome: str, valor) -> Iterable[int]:
+        indice = {"user_id": self._por_user_id, "codigo_casa": self._por_codigo, "chave": self._por_chave}[nome]
+        return indice.get(valor, ())
+
+    def _filtrar(self, por_id: Dict[int, Dict], indice: Optional[Callable], campo: str, valor) -> List[Dict]:
+        if indice is not None:
+            return [por_id[i] for i in indice(campo, valor)]
+        if campo == "chave":
+            return [l for l in por_id.values() if self._chave(l) == valor]
+        return [l for l in por_id.values() if l[campo] == valor]
+
+    def listar_todos(self) -> List[Dict]:
+        """Todos os registros, ORDER BY codigo_casa, nome"""
+        def selecionar(por_id, indice):
+            if indice is None:
+                return sorted(por_id.values(), key=_ordem_codigo_nome)
+            if self._ordenados is None:
+                self._ordenados = sorted(por_id.values(), key=_ordem_codigo_nome)
+            return self._ordenados
+        return self._consultar(selecionar)
+
+    def por_codigo(self, codigo_casa: str) -> List[Dict]:
+        """Registros de uma casa, ORDER BY nome"""
+        return self._consultar(lambda por_id, indice: sorted(
+            self._filtrar(por_id, indice, "codigo_casa", codigo_casa), key=lambda l: (l["nome"], l["id"])
+        ))
+
+    def por_user_id(self, user_id: int) -> List[Dict]:
+        """Registros de um usuário, ORDER BY codigo_casa, nome"""
+        return self._consultar(lambda por_id, indice: sorted(
+            self._filtrar(por_id, indice, "user_id", user_id), key=_ordem_codigo_nome
+        ))
+
+    def por_chave(self, chave: Tuple[str, str]) -> Optional[Dict]:
+        """Registro com a chave de duplicidade (código, nome) normalizada"""
+        linhas = self._consultar(lambda por_id, indice: sorted(
+            self._filtrar(por_id, indice, "chave", chave), key=lambda l: l["id"]
+        )[:1])
+        return linhas[0] if linhas else None
+
+    # ------------------------------------------------------------------
+    # Métricas
+    # ------------------------------------------------------------------
+
+    def metricas(self) -> Dict:
+        """
+        Métricas do cache
+
+        Returns:
+            Dict: acertos, faltas, reconstruções, invalidações, tempos e registros
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["carregado"] = self._carregado
+            stats["versao"] = self._versao
+            stats["registros"] = len(self._por_id)
+
+        leituras = stats["acertos"] + stats["faltas"]
+        stats["taxa_acerto"] = round(stats["acertos"] / leituras, 4) if leituras else 0.0
+        stats["tempo_reconstrucao_total_ms"] = round(stats["tempo_reconstrucao_total_ms"], 2)
+        return stats
+
+
+def _ordem_codigo_nome(linha: Dict):
+    return (linha["codigo_casa"], linha["nome"], linha["id"])
+
+
+class RegistroAdmins:
+    """
+    Conjunto de administradores (ADMIN_IDS + tabela administradores)
+
+    Leituras consultam um frozenset imutável sem lock: cada alteração
+    publica um snapshot novo em vez de modificar o atual. As mesmas regras
+    de versão do CacheResponsaveis descartam recargas concorrentes a escritas.
+    """
+
+    def __init__(self, carregar: Callable[[], Iterable[int]], ids_ambiente: Iterable[int] = ()):
+        self._carregar = carregar
+        self._ids_ambiente = frozenset(ids_ambiente)
+        self._lock = threading.Lock()
+
+        self._versao = 0
+        self._snapshot: Optional[frozenset] = None
+
+        self._stats = {
+            "acertos": 0,
+            "faltas": 0,
+            "recargas": 0,
+            "invalidacoes": 0,
+            "ultima_recarga_ms": 0.0,
+        }
+
+    def snapshot(self) -> frozenset:
+        """
+        Ids de administradores (carrega a tabela na primeira chamada)
+
+        Returns:
+            frozenset: ids do ambiente e da tabela; se a tabela não puder
+            ser lida, apenas os do ambiente (sem guardar, nova tentativa
+            na próxima chamada)
+        """
+        snapshot = self._snapshot
+        if snapshot is not None:
+            with self._lock:
+                self._stats["acertos"] += 1
+            return snapshot
+
+        with self._lock:
+            self._stats["faltas"] += 1
+            versao = self._versao
+
+        inicio = time.perf_counter()
+        try:
+            ids = self._ids_ambiente | frozenset(self._carregar())
+        except Exception as e:
+            logger.warning(f"⚠️ Administradores da tabela indisponíveis - usando ADMIN_IDS: {e}")
+            return self._ids_ambiente
+        duracao_ms = (time.perf_counter() - inicio) * 1000
+
+        with self._lock:
+            self._stats["ultima_recarga_ms"] = round(duracao_ms, 2)
+            if self._versao == versao:
+                self._snapshot = ids
+                self._stats["recargas"] += 1
+        return ids
+
+    def em_memoria(self) -> Optional[frozenset]:
+        """Snapshot atual sem acessar o banco (None se precisa recarregar)"""
+        return self._snapshot
+
+    def contem(self, user_id) -> bool:
+        """Verificação O(1) de administrador"""
+        return user_id in self.snapshot()
+
+    def aplicar(self, adicionados: Iterable[int] = (), removidos: Iterable[int] = ()):
+        """Publica um novo snapshot após adicionar/remover administradores (já confirmado)"""
+        with self._lock:
+            self._versao += 1
+            if self._snapshot is None:
+                return
+            # Ids de ADMIN_IDS continuam administradores mesmo removidos da tabela
+            removidos = frozenset(removidos) - self._ids_ambiente
+            self._snapshot = (self._snapshot | frozenset(adicionados)) - removidos
+
+    def invalidar(self):
+        """Descarta o snapshot (arquivo do banco substituído)"""
+        with self._lock:
+            self._versao += 1
+            self._snapshot = None
+            self._stats["invalidacoes"] += 1
+
+    def metricas(self) -> Dict:
+        """
+        Métricas do registro de administradores
+
+        Returns:
+            Dict: acertos, faltas, recargas, invalidações e total de admins
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["admins"] = len(self._snapshot) if self._snapshot is not None else None
+            stats["admins_ambiente"] = len(self._ids_ambiente)
+        return stats
+
+
+def ids_admin_ambiente(valor: Optional[str]) -> frozenset:
+    """Ids numéricos de ADMIN_IDS (separados por vírgula)"""
+    return frozenset(int(parte.strip()) for parte in (valor or "").split(",") if parte.strip().isdigit())
+
+
+class CacheConsentimento:
+    """
+    Consentimentos LGPD por user_id, com entradas positivas e negativas
+
+    Após a pré-carga (todos os user_id da tabela) o conjunto é completo:
+    qualquer id ausente é um negativo sem consulta. Sem pré-carga, cada
+    falta consulta o banco uma vez e guarda o resultado, positivo ou não.
+
+    Os negativos (usuários que escreveram ao bot sem consentir) ficam num
+    LRU de até `max_negativos` entradas: os menos recentes são descartados
+    e voltam a consultar o banco.
+    """
+
+    def __init__(self, carregar_todos: Callable[[], Iterable[int]], consultar: Callable[[int], bool],
+                 max_negativos: int = 10000):
+        self._carregar_todos = carregar_todos
+        self._consultar = consultar
+        self._max_negativos = max_negativos
+        self._lock = threading.Lock()
+
+        self._versao = 0
+        self._completo = False
+        self._positivos: set = set()
+        self._negativos: OrderedDict = OrderedDict()
+
+        self._stats = {
+            "acertos_positivos": 0,
+            "acertos_negativos": 0,
+            "faltas": 0,
+            "precargas": 0,
+            "invalidacoes": 0,
+            "negativos_descartados": 0,
+            "ultima_precarga_ms": 0.0,
+        }
+
+    def _guardar_negativo(self, user_id: int):
+        """Inclui/renova um negativo no LRU (chamar com o lock)"""
+        self._negativos[user_id] = None
+        self._negativos.move_to_end(user_id)
+        while len(self._negativos) > self._max_negativos:
+            self._negativos.popitem(last=False)
+            self._stats["negativos_descartados"] += 1
+
+    def em_memoria(self, user_id: int) -> Optional[bool]:
+        """Consentimento conhecido sem acessar o banco (None = precisa consultar)"""
+        with self._lock:
+            if user_id in self._positivos:
+                self._stats["acertos_positivos"] += 1
+                return True
+            if self._completo:
+                self._stats["acertos_negativos"] += 1
+                return False
+            if user_id in self._negativos:
+                self._negativos.move_to_end(user_id)
+                self._stats["acertos_negativos"] += 1
+                return False
+            return None
+
+    def verificar(self, user_id: int) -> bool:
+        """Consentimento do usuário (consulta o banco apenas em uma falta)"""
+        resultado = self.em_memoria(user_id)
+        if resultado is not None:
+            return resultado
+
+        with self._lock:
+            self._stats["faltas"] += 1
+            versao = self._versao
+
+        resultado = self._consultar(user_id)
+
+        with self._lock:
+            if self._versao == versao:
+                if resultado:
+                    self._positivos.add(user_id)
+                else:
+                    self._guardar_negativo(user_id)
+        return resultado
+
+    def precarregar(self):
+        """Carrega todos os consentimentos de uma vez (negativos passam a ser implícitos)"""
+        with self._lock:
+            versao = self._versao
+
+        inicio = time.perf_counter()
+        positivos = set(self._carregar_todos())
+        duracao_ms = (time.perf_counter() - inicio) * 1000
+
+        with self._lock:
+            self._stats["ultima_precarga_ms"] = round(duracao_ms, 2)
+            if self._versao != versao:
+                return False
+            self._positivos = positivos
+            self._negativos = OrderedDict()
+            self._completo = True
+            self._stats["precargas"] += 1
+
+        logger.debug(f"🧠 Consentimentos LGPD pré-carregados: {len(positivos)} em {duracao_ms:.1f}ms")
+        return True
+
+    def aplicar(self, user_id: int, consentiu: bool):
+        """Registra o resultado de registrar/remover consentimento (já confirmado)"""
+        with self._lock:
+            self._versao += 1
+            if consentiu:
+                self._positivos.add(user_id)
+                self._negativos.pop(user_id, None)
+            else:
+                self._positivos.discard(user_id)
+                if not self._completo:
+                    self._guardar_negativo(user_id)
+
+    def invalidar(self):
+        """Descarta todas as entradas (arquivo do banco substituído)"""
+        with self._lock:
+            self._versao += 1
+            self._completo = False
+            self._positivos = set()
+            self._negativos = OrderedDict()
+            self._stats["invalidacoes"] += 1
+
+    def metricas(self) -> Dict:
+        """
+        Métricas do cache de consentimentos
+
+        Returns:
+            Dict: acertos positivos/negativos, faltas, pré-cargas e entradas
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["completo"] = self._completo
+            stats["positivos"] = len(self._positivos)
+            stats["negativos"] = len(self._negativos)
+
+        leituras = stats["acertos_positivos"] + stats["acertos_negativos"] + stats["faltas"]
+        acertos = stats["acertos_positivos"] + stats["acertos_negativos"]
+        stats["taxa_acerto"] = round(acertos / leituras, 4) if leituras else 0.0
+        return stats
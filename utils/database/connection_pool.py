@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+📁 ARQUIVO: utils/database/connection_pool.py
+📦 FUNÇÃO: Pool de conexões SQLite persistentes
+🔧 DESCRIÇÃO: Um escritor + N leitores reaproveitados entre chamadas,
+   seguros para uso pelo event loop do telegram e pelas threads de upload
+"""
+
+import sqlite3
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger("CCB-Alerta-Bot.database.pool")
+
+
+class ConexaoPool:
+    """
+    Conexão emprestada do pool
+
+    Repassa todos os atributos para a sqlite3.Connection original.
+    close() devolve a conexão ao pool em vez de fechá-la, mantendo
+    compatibilidade com o padrão `conn = get_connection() ... conn.close()`.
+    """
+
+    def __init__(self, pool, conn: sqlite3.Connection, escrita: bool, geracao: int):
+        self._pool = pool
+        self._conn = conn
+        self._geracao = geracao
+        self.escrita = escrita
+        self._devolvida = False
+
+    def __getattr__(self, nome):
+        return getattr(self._conn, nome)
+
+    def close(self):
+        """Devolve a conexão ao pool (idempotente)"""
+        if self._devolvida:
+            return
+        self._devolvida = True
+        self._pool._devolver(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class SQLiteConnectionPool:
+    """
+    Pool limitado de conexões SQLite de longa duração
+
+    - 1 conexão de escrita, protegida por lock (SQLite só aceita um escritor)
+    - até `max_leitores` conexões de leitura reaproveitadas
+    - conexões criadas com check_same_thread=False, mas cada uma é usada
+      por uma única thread por vez (exclusividade garantida pelo checkout)
+    """
+
+    def __init__(self, db_path: str, max_leitores: int = 4, timeout: float = 30.0,
+                 configurar_conexao: Optional[Callable[[sqlite3.Connection], None]] = None):
+        self.db_path = db_path
+        self.max_leitores = max(1, max_leitores)
+        self.timeout = timeout
+        self._configurar_conexao = configurar_conexao
+
+        self._lock = threading.Lock()
+        self._escritor_lock = threading.Lock()
+        self._leitores_sem = threading.BoundedSemaphore(self.max_leitores)
+
+        self._escritor: Optional[sqlite3.Connection] = None
+        self._leitores_livres = []
+        self._em_uso = 0
+        self._geracao = 0
+        self._fechado = False
+
+        self._stats = {
+            "checkouts": 0,
+            "checkouts_escrita": 0,
+            "checkouts_leitura": 0,
+            "esperas": 0,
+            "tempo_espera_total_ms": 0.0,
+            "hits": 0,
+            "misses": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Criação / configuração
+    # ------------------------------------------------------------------
+
+    def _criar_conexao(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        if self._configurar_conexao:
+            self._configurar_conexao(conn)
+        return conn
+
+    # ------------------------------------------------------------------
+    # Checkout / devolução
+    # ------------------------------------------------------------------
+
+    def obter_conexao(self, somente_leitura: bool = False, timeout: Optional[float] = None) -> ConexaoPool:
+        """
+        Empresta uma conexão do pool
+
+        Args:
+            somente_leitura (bool): True para conexão de leitura
+            timeout (float): Segundos máximos de espera por uma conexão livre
+
+        Returns:
+            ConexaoPool: conexão emprestada (devolver com close())
+        """
+        if self._fechado:
+            raise sqlite3.ProgrammingError("Pool de conexões já foi fechado")
+
+        timeout = self.timeout if timeout is None else timeout
+        trava = self._leitores_sem if somente_leitura else self._escritor_lock
+
+        inicio = time.perf_counter()
+        esperou = False
+        if not trava.acquire(blocking=False):
+            esperou = True
+            if not trava.acquire(timeout=timeout):
+                raise sqlite3.OperationalError(
+                    f"Timeout aguardando conexão {'de leitura' if somente_leitura else 'de escrita'} do pool"
+                )
+        espera_ms = (time.perf_counter() - inicio) * 1000
+
+        try:
+            with self._lock:
+                if somente_leitura:
+                    conn = self._leitores_livres.pop() if self._leitores_livres else None
+                else:
+                    conn, self._escritor = self._escritor, None
+                geracao = self._geracao
+
+                self._stats["checkouts"] += 1
+                self._stats["checkouts_leitura" if somente_leitura else "checkouts_escrita"] += 1
+                self._stats["hits" if conn is not None else "misses"] += 1
+                if esperou:
+                    self._stats["esperas"] += 1
+                    self._stats["tempo_espera_total_ms"] += espera_ms
+                self._em_uso += 1
+
+            if conn is None:
+                conn = self._criar_conexao()
+        except Exception:
+            with self._lock:
+                self._em_uso -= 1
+            trava.release()
+            raise
+
+        return ConexaoPool(self, conn, escrita=not somente_leitura, geracao=geracao)
+
+    def _devolver(self, conexao: ConexaoPool):
+        conn = conexao._conn
+        descartar = False
+
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            descartar = True
+
+        with self._lock:
+            self._em_uso -= 1
+            if self._fechado or conexao._geracao != self._geracao:
+                descartar = True
+            if not descartar:
+                if conexao.escrita:
+                    self._escritor = conn
+                else:
+                    self._leitores_livres.append(conn)
+
+        if descartar:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+        if conexao.escrita:
+            self._escritor_lock.release()
+        else:
+            self._leitores_sem.release()
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida
+    # ------------------------------------------------------------------
+
+    def _fechar_ociosas(self):
+        with self._lock:
+            ociosas = list(self._leitores_livres)
+            self._leitores_livres = []
+            if self._escritor is not None:
+                ociosas.append(self._escritor)
+                self._escritor = None
+            self._geracao += 1
+
+        for conn in ociosas:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    def reiniciar(self):
+        """
+        Descarta todas as conexões (ex: arquivo do banco foi substituído)
+
+        Conexões ociosas são fechadas imediatamente; as que estão em uso
+        são fechadas quando devolvidas.
+        """
+        self._fechar_ociosas()
+        logger.debug(f"🔄 Pool reiniciado: {self.db_path}")
+
+    @contextmanager
+    def acesso_exclusivo(self, timeout: Optional[float] = None):
+        """
+        Bloqueia todos os checkouts enquanto o bloco executa
+
+        Espera o escritor e todos os leitores serem devolvidos e fecha as
+        conexões ociosas - usado para substituir o arquivo do banco em disco.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        if not self._escritor_lock.acquire(timeout=timeout):
+            raise sqlite3.OperationalError("Timeout aguardando acesso exclusivo (escritor em uso)")
+
+        adquiridos = 0
+        try:
+            for _ in range(self.max_leitores):
+                if not self._leitores_sem.acquire(timeout=timeout):
+                    raise sqlite3.OperationalError("Timeout aguardando acesso exclusivo (leitores em uso)")
+                adquiridos += 1
+
+            self._fechar_ociosas()
+            yield
+        finally:
+            for _ in range(adquiridos):
+                self._leitores_sem.release()
+            self._escritor_lock.release()
+
+    def fechar(self):
+        """Fecha o pool definitivamente"""
+        self._fechado = True
+        self._fechar_ociosas()
+        logger.info(f"🔒 Pool de conexões fechado: {self.db_path}")
+
+    # ------------------------------------------------------------------
+    # Métricas
+    # ------------------------------------------------------------------
+
+    def estatisticas(self) -> Dict:
+        """
+        Estatísticas de uso do pool
+
+        Returns:
+            Dict: checkouts, esperas, hits/misses, taxa de acerto e conexões
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["em_uso"] = self._em_uso
+            stats["leitores_ociosos"] = len(self._leitores_livres)
+            stats["max_leitores"] = self.max_leitores
+            stats["db_path"] = self.db_path
+
+        checkouts = stats["checkouts"]
+        stats["taxa_acerto"] = round(stats["hits"] / checkouts, 4) if checkouts else 0.0
+        stats["espera_media_ms"] = (
+            round(stats["tempo_espera_total_ms"] / stats["esperas"], 2) if stats["esperas"] else 0.0
+        )
+        return stats
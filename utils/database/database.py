@@ -5,35 +5,119 @@ NUNCA MAIS VAI PERDER DADOS + TODAS AS FUNÇÕES IMPLEMENTADAS
 """
 import sqlite3
 import os
+import shutil
+import atexit
 import logging
 from datetime import datetime, timedelta
 import pytz
-import shutil
 import threading
 import time
+from contextlib import nullcontext
+
+from .connection_pool import SQLiteConnectionPool
+from .cache import CacheResponsaveis, CacheConsentimento, RegistroAdmins, ids_admin_ambiente
+from .onedrive_sync import AtualizadorBancoOneDrive, FilaUploadOneDrive
+from .delta_sync import SincronizadorDelta, instalar_captura_alteracoes, remover_captura_alteracoes
+from .wal_sync import ReplicadorWAL
+from .mesclagem import mesclar_banco
+from .migrations import (
+    aplicar_migracoes, migrar_arquivo, versao_schema, chave_responsavel, epoch_de_texto, VERSAO_ATUAL
+)
+from .resumo_alertas import ler_resumo, reconstruir_resumo
+from .espaco import estatisticas_espaco, liberar_paginas
+from . import historico
 
 logger = logging.getLogger("CCB-Alerta-Bot.database")
 
+# Pool de conexões persistentes (1 escritor + N leitores)
+_pool = None
+_pool_lock = threading.Lock()
+_pool_max_leitores = int(os.getenv("DB_POOL_READERS", "4"))
+
+# Modo WAL (opt-in) e pragmas de desempenho
+_wal_habilitado = os.getenv("DB_WAL_ENABLED", "false").lower() == "true"
+_pragma_synchronous = os.getenv("DB_SYNCHRONOUS", "").upper()  # vazio = NORMAL em WAL, FULL sem WAL
+_pragma_cache_size = int(os.getenv("DB_CACHE_SIZE", "-8000"))  # negativo = KiB
+_pragma_mmap_size = int(os.getenv("DB_MMAP_SIZE", str(64 * 1024 * 1024)))
+_pragma_temp_store = os.getenv("DB_TEMP_STORE", "MEMORY").upper()
+_checkpoint_intervalo_segundos = int(os.getenv("DB_CHECKPOINT_INTERVAL", "60"))
+
+# Agendador de checkpoints WAL
+_checkpoint_thread = None
+_checkpoint_parar = threading.Event()
+
+# Compactação incremental (auto_vacuum=INCREMENTAL): devolve páginas livres
+# quando passam de DB_VACUUM_FREELIST_RATIO do arquivo
+_vacuum_intervalo_segundos = int(os.getenv("DB_VACUUM_INTERVAL_SECONDS", "600"))
+_vacuum_limiar_livre = float(os.getenv("DB_VACUUM_FREELIST_RATIO", "0.2"))
+_vacuum_thread = None
+_vacuum_parar = threading.Event()
+_vacuum_solicitado = threading.Event()
+_metricas_vacuum = {"verificacoes": 0, "compactacoes": 0, "paginas_liberadas": 0, "bytes_liberados": 0}
+
+# Projeção em memória de responsaveis (leituras sem SQL)
+_cache_responsaveis_habilitado = os.getenv("DB_RESPONSAVEIS_CACHE_ENABLED", "true").lower() == "true"
+_cache_lgpd_habilitado = os.getenv("DB_LGPD_CACHE_ENABLED", "true").lower() == "true"
+_cache_lgpd_max_negativos = int(os.getenv("DB_LGPD_CACHE_MAX_NEGATIVES", "10000"))
+
 # Gerenciador OneDrive global (será inicializado)
 _onedrive_manager = None
+_onedrive_async = None
 
-# Cache para evitar downloads repetidos
-_last_onedrive_sync = None
-_cache_timeout_minutes = 3
+# Cache local do banco quando o OneDrive está ativo
+_CACHE_ONEDRIVE_PATH = os.path.join(os.getenv("ONEDRIVE_CACHE_DIR", "/opt/render/project/storage"), "alertas_bot_cache.db")
 
-def _should_sync_onedrive():
-    """Evitar sincronizações muito frequentes"""
-    global _last_onedrive_sync
-    
-    if not _last_onedrive_sync:
-        return True
-    
-    cache_age = datetime.now() - _last_onedrive_sync
-    return cache_age.total_seconds() > (_cache_timeout_minutes * 60)
+# Startup em etapas: o bot atende com o cache local enquanto o OneDrive inicializa
+_usar_cache_onedrive = False
+_banco_pronto = threading.Event()
+_banco_pronto_timeout_segundos = float(os.getenv("DB_READY_TIMEOUT_SECONDS", "60"))
+_status_inicializacao = {"estado": "não iniciado", "inicio": None, "duracao_segundos": None, "erro": None}
+
+# Atualizador em segundo plano (download periódico fora do caminho das consultas)
+_atualizador = None
+_refresh_intervalo_segundos = int(os.getenv("ONEDRIVE_REFRESH_SECONDS", "180"))
+
+# Versão das alterações locais: impede que um download sobrescreva escritas
+# que ainda não chegaram ao OneDrive
+_versao_lock = threading.Lock()
+_versao_local = 0
+_versao_enviada = 0
+_versao_no_download = 0
+
+# Upload condicional (modo arquivo): eTag da versão remota contida no cache e
+# cópia dela (".base") como ancestral da mescla quando outra instância enviou antes
+_transferencia_lock = threading.Lock()  # download/upload do banco + leitura do eTag resultante
+_etag_cache = None
+_etag_no_download = None
+_etag_cache_no_download = None
+_upload_tentativas_conflito = int(os.getenv("ONEDRIVE_UPLOAD_CONFLICT_RETRIES", "3"))
+_metricas_conflito = {"conflitos": 0, "mesclagens": 0, "linhas_mescladas": 0, "falhas": 0}
+
+# Fila única de upload com debounce (coalesce rajadas de escritas)
+_fila_upload = None
+_upload_debounce_segundos = float(os.getenv("ONEDRIVE_UPLOAD_DEBOUNCE_SECONDS", "5"))
+_upload_espera_maxima_segundos = float(os.getenv("ONEDRIVE_UPLOAD_MAX_WAIT_SECONDS", "30"))
+_upload_backoff_maximo_segundos = float(os.getenv("ONEDRIVE_UPLOAD_BACKOFF_MAX_SECONDS", "300"))
+
+# Modo de sincronização: "arquivo" (banco inteiro), "delta" (lotes de alterações)
+# ou "wal" (frames do WAL em segmentos + bases periódicas; requer DB_WAL_ENABLED)
+_sync_modo = os.getenv("ONEDRIVE_SYNC_MODE", "arquivo").lower()
+_delta_compactar_apos = int(os.getenv("ONEDRIVE_DELTA_COMPACT_OPS", "500"))
+_sincronizador_delta = None
+_replicacao_wal = _sync_modo == "wal" and _wal_habilitado
+_wal_base_a_cada = int(os.getenv("ONEDRIVE_WAL_BASE_SEGMENTS", "200"))
+_wal_bases_mantidas = int(os.getenv("ONEDRIVE_WAL_RETENTION_BASES", "3"))
+_replicador_wal = None
+
+# Histórico de alertas em arquivo anexado, com upload próprio e mais espaçado
+_historico_separado = os.getenv("DB_HISTORICO_SEPARADO", "true").lower() == "true"
+_fila_upload_historico = None
+_historico_debounce_segundos = float(os.getenv("ONEDRIVE_HISTORY_UPLOAD_DEBOUNCE_SECONDS", "300"))
+_historico_espera_maxima_segundos = float(os.getenv("ONEDRIVE_HISTORY_UPLOAD_MAX_WAIT_SECONDS", "1800"))
 
 def inicializar_onedrive_manager():
     """Inicializar gerenciador OneDrive globalmente"""
-    global _onedrive_manager
+    global _onedrive_manager, _sincronizador_delta, _replicador_wal
     
     try:
         onedrive_enabled = os.getenv("ONEDRIVE_DATABASE_ENABLED", "false").lower() == "true"
@@ -42,10 +126,10 @@ def inicializar_onedrive_manager():
             logger.info("📁 OneDrive desabilitado - usando storage local")
             return
         
-        from auth.microsoft_auth import MicrosoftAuth
+        from auth.microsoft_auth import obter_auth_compartilhado
         from utils.onedrive_manager import OneDriveManager
         
-        auth = MicrosoftAuth()
+        auth = obter_auth_compartilhado()
         
         if not auth.access_token:
             logger.warning("⚠️ Token Microsoft não disponível - usando storage local")
@@ -56,34 +140,49 @@ def inicializar_onedrive_manager():
         
         logger.info("✅ OneDriveManager inicializado com sucesso")
         
+        if _sync_modo == "delta":
+            _sincronizador_delta = SincronizadorDelta(
+                _onedrive_manager,
+                get_connection=get_connection,
+                criar_snapshot=criar_snapshot_consistente,
+                compactar_apos=_delta_compactar_apos,
+                db_path_atual=get_db_path
+            )
+            logger.info(f"🧩 Sync OneDrive em modo delta (snapshot a cada {_delta_compactar_apos} alterações)")
+        elif _sync_modo == "wal" and not _wal_habilitado:
+            logger.warning("⚠️ ONEDRIVE_SYNC_MODE=wal requer DB_WAL_ENABLED=true - usando modo arquivo")
+        elif _sync_modo == "wal":
+            _replicador_wal = ReplicadorWAL(
+                _onedrive_manager,
+                get_connection=get_connection,
+                db_path_atual=get_db_path,
+                base_a_cada=_wal_base_a_cada,
+                bases_mantidas=_wal_bases_mantidas
+            )
+            logger.info(
+                f"🧩 Sync OneDrive em modo wal (base a cada {_wal_base_a_cada} segmentos, "
+                f"{_wal_bases_mantidas} bases mantidas)"
+            )
+        elif _sync_modo != "arquivo":
+            logger.warning(f"⚠️ ONEDRIVE_SYNC_MODE desconhecido: {_sync_modo} - usando modo arquivo")
+        
+        # Download inicial (startup) + atualização periódica em segundo plano
+        _iniciar_fila_upload()
+        _iniciar_atualizador_onedrive()
+        
     except Exception as e:
         logger.error(f"❌ Erro inicializando OneDriveManager: {e}")
         logger.info("📁 Continuando com storage local")
 
 def get_db_path():
-    """Caminho database com cache otimizado"""
-    global _onedrive_manager, _last_onedrive_sync
+    """
+    Caminho do banco em uso
     
-    if _onedrive_manager:
-        try:
-            cache_path = os.path.join(
-                "/opt/render/project/storage", 
-                "alertas_bot_cache.db"
-            )
-            
-            if _should_sync_onedrive() or not os.path.exists(cache_path):
-                if _onedrive_manager.download_database(cache_path):
-                    _last_onedrive_sync = datetime.now()
-                    logger.info("✅ Database atualizado do OneDrive")
-                else:
-                    logger.debug("📁 Usando cache local existente")
-            else:
-                logger.debug("📁 Cache ainda válido - sem download")
-            
-            return cache_path
-            
-        except Exception as e:
-            logger.warning(f"⚠️ Erro OneDrive: {e}")
+    Nunca acessa a rede: com OneDrive ativo retorna o cache local, que é
+    mantido atualizado pelo atualizador em segundo plano.
+    """
+    if _onedrive_manager or _usar_cache_onedrive:
+        return _CACHE_ONEDRIVE_PATH
     
     # Fallback: caminho local
     RENDER_DISK_PATH = os.environ.get("RENDER_DISK_PATH", "/opt/render/project/disk")
@@ -92,139 +191,1284 @@ def get_db_path():
     
     return os.path.join(DATA_DIR, "alertas_bot.db")
 
-def _sincronizar_para_onedrive_critico():
+def iniciar_banco(onedrive_habilitado, preparar_banco, em_segundo_plano=True):
+    """
+    Startup em etapas do banco de dados
+    
+    Sem OneDrive, `preparar_banco` (init_database + administradores) roda
+    na hora. Com OneDrive, o bootstrap (token, pastas, download inicial,
+    preparar_banco) roda numa thread: se já existe cache local, ele é
+    usado imediatamente; senão, o acesso ao banco aguarda o bootstrap
+    (ver aguardar_banco_pronto).
+    
+    Args:
+        onedrive_habilitado (bool): ONEDRIVE_DATABASE_ENABLED com client id
+        preparar_banco: função() executada depois do download inicial
+        em_segundo_plano (bool): False = bootstrap bloqueante (startup antigo)
+    """
+    global _usar_cache_onedrive
+    
+    _status_inicializacao["inicio"] = datetime.now()
+    
+    if not onedrive_habilitado:
+        _executar_bootstrap(preparar_banco, onedrive=False)
+        return
+    
+    if os.path.exists(_CACHE_ONEDRIVE_PATH):
+        # Cache da execução anterior: atender já, o download inicial atualiza depois
+        _usar_cache_onedrive = True
+        _banco_pronto.set()
+        logger.info("⚡ Usando cache local do banco enquanto o OneDrive inicializa")
+    
+    if not em_segundo_plano:
+        _executar_bootstrap(preparar_banco, onedrive=True)
+        return
+    
+    threading.Thread(
+        target=_executar_bootstrap, args=(preparar_banco, True), name="onedrive-bootstrap", daemon=True
+    ).start()
+
+def _executar_bootstrap(preparar_banco, onedrive):
+    """Inicializa OneDrive (opcional) e banco; libera o acesso ao final"""
+    global _usar_cache_onedrive
+    
+    inicio = time.perf_counter()
+    _status_inicializacao["estado"] = "inicializando OneDrive" if onedrive else "inicializando banco local"
+    
+    try:
+        if onedrive:
+            inicializar_onedrive_manager()
+            if not _onedrive_manager and not _banco_pronto.is_set():
+                # Sem OneDrive e sem cache anterior: seguir com o storage local
+                _usar_cache_onedrive = False
+        
+        preparar_banco()
+        _recarregar_caches()
+        
+        if onedrive and _onedrive_manager:
+            _restaurar_historico_onedrive()
+        
+        # Escritas feitas no cache enquanto o OneDrive inicializava
+        with _versao_lock:
+            pendente = _versao_enviada < _versao_local
+        if pendente and _fila_upload:
+            _fila_upload.marcar_alterado()
+        
+        if onedrive and _onedrive_manager:
+            _status_inicializacao["estado"] = "pronto (OneDrive)"
+        elif onedrive:
+            _status_inicializacao["estado"] = "pronto (OneDrive indisponível - storage local)"
+        else:
+            _status_inicializacao["estado"] = "pronto (storage local)"
+    except Exception as e:
+        _status_inicializacao["estado"] = "falhou"
+        _status_inicializacao["erro"] = str(e)
+        logger.error(f"❌ Erro na inicialização do banco: {e}")
+    finally:
+        _status_inicializacao["duracao_segundos"] = time.perf_counter() - inicio
+        _banco_pronto.set()
+        logger.info(
+            f"🚀 Inicialização do banco: {_status_inicializacao['estado']} "
+            f"({_status_inicializacao['duracao_segundos']:.2f}s)"
+        )
+
+def aguardar_banco_pronto(timeout=None):
+    """
+    Bloqueia até o banco estar disponível (cache local ou bootstrap concluído)
+    
+    Returns:
+        bool: False se o timeout expirou (o acesso segue assim mesmo)
+    """
+    if _banco_pronto.is_set() or _status_inicializacao["inicio"] is None:
+        return True  # pronto, ou startup em etapas não usado (scripts/testes)
+    
+    pronto = _banco_pronto.wait(_banco_pronto_timeout_segundos if timeout is None else timeout)
+    if not pronto:
+        logger.warning("⚠️ Banco ainda inicializando - acesso liberado após o timeout")
+    return pronto
+
+def obter_status_inicializacao():
+    """
+    Estado do startup em etapas para o /health
+    
+    Returns:
+        dict: estado, pronto, duração e erro do bootstrap
+    """
+    status = dict(_status_inicializacao)
+    status["pronto"] = _banco_pronto.is_set()
+    status["usando_cache"] = _usar_cache_onedrive
+    return status
+
+def _baixar_banco_onedrive(destino):
+    """Download do banco remoto para o arquivo de staging do atualizador"""
+    global _versao_no_download, _etag_no_download, _etag_cache_no_download
+    
+    with _versao_lock:
+        _versao_no_download = _versao_local
+    
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    
+    # Modo delta: último snapshot + lotes de alterações posteriores
+    if _sincronizador_delta:
+        return _sincronizador_delta.restaurar(destino)
+    
+    # Modo wal: base mais recente + segmentos seguintes
+    if _replicador_wal:
+        return _replicador_wal.restaurar(destino)
+    
+    # Sem cache local não há o que reaproveitar: baixar sempre
+    with _transferencia_lock:
+        baixado = _onedrive_manager.download_database(
+            destino, somente_se_alterado=os.path.exists(_CACHE_ONEDRIVE_PATH)
+        )
+        with _versao_lock:
+            _etag_cache_no_download = _etag_cache
+            if baixado:
+                _etag_no_download = _onedrive_manager.obter_versao_remota().get("eTag")
+    return baixado
+
+def _caminho_base_sincronizada():
+    """Cópia da última versão sincronizada com o OneDrive (ancestral da mescla)"""
+    return _CACHE_ONEDRIVE_PATH + ".base"
+
+def _preparar_arquivo_baixado(novo_arquivo):
+    """
+    Leva o arquivo recém-baixado até a versão de schema deste código
+    
+    Um banco enviado por uma versão anterior do bot é migrado antes de
+    entrar em uso (e, portanto, antes de ser reenviado). Os triggers do
+    sync delta acompanham o schema migrado.
+    
+    Returns:
+        bool: False se a migração falhou (o cache atual é mantido)
+    """
+    try:
+        relatorio = migrar_arquivo(novo_arquivo, pasta_backup=_pasta_backup())
+        movidos = None
+        if relatorio['passos'] or _historico_separado:
+            conn = sqlite3.connect(novo_arquivo, timeout=30)
+            try:
+                # Banco enviado antes da separação: alertas vão para o histórico local
+                if _historico_separado:
+                    historico.anexar_historico(conn, historico.caminho_historico(_CACHE_ONEDRIVE_PATH))
+                    movidos = historico.separar_historico(conn)
+                    if movidos is not None:
+                        conn.execute("VACUUM main")
+                if _sincronizador_delta:
+                    instalar_captura_alteracoes(conn)
+                else:
+                    remover_captura_alteracoes(conn)
+                conn.commit()
+            finally:
+                conn.close()
+        if relatorio['passos']:
+            logger.info(
+                f"🔧 Banco baixado migrado: v{relatorio['versao_inicial']} -> v{relatorio['versao_final']}"
+            )
+        if movidos:
+            _sincronizar_historico_onedrive()
+        return True
+    except Exception as e:
+        logger.error(f"❌ Erro ao migrar banco baixado, mantendo cache atual: {e}")
+        return False
+
+def _substituir_cache_onedrive(novo_arquivo):
+    """
+    Troca atomicamente o cache em uso pelo arquivo recém-baixado
+    
+    Bloqueia o pool até todas as conexões serem devolvidas, então faz
+    os.replace() e descarta -wal/-shm do arquivo antigo. A troca é adiada
+    se houver escritas locais ainda não enviadas ao OneDrive.
+    
+    Returns:
+        bool: True se o arquivo foi trocado
+    """
+    global _etag_cache
+    
+    # Migra o arquivo baixado antes da troca, fora do bloqueio do pool
+    if not _preparar_arquivo_baixado(novo_arquivo):
+        return False
+    
+    with _pool_lock:
+        pool = _pool if _pool is not None and _pool.db_path == _CACHE_ONEDRIVE_PATH else None
+    
+    with (pool.acesso_exclusivo() if pool else nullcontext()):
+        with _versao_lock:
+            pendente = _versao_local != _versao_no_download or _versao_enviada < _versao_local
+            # Upload ou mescla depois do download: o cache já é mais novo que o arquivo baixado
+            pendente = pendente or _etag_cache != _etag_cache_no_download
+        
+        if pendente:
+            logger.info("⏸️ Atualização do OneDrive adiada - há escritas locais não enviadas")
+            return False
+        
+        if not _sincronizador_delta and not _replicador_wal:
+            shutil.copyfile(novo_arquivo, _caminho_base_sincronizada())
+            with _versao_lock:
+                _etag_cache = _etag_no_download
+        
+        os.replace(novo_arquivo, _CACHE_ONEDRIVE_PATH)
+        _remover_arquivos_wal(_CACHE_ONEDRIVE_PATH)
+        if _replicador_wal:
+            _replicador_wal.arquivo_substituido()
+        _invalidar_caches()
+    
+    _recarregar_caches()
+    logger.info("✅ Database atualizado do OneDrive")
+    return True
+
+def _iniciar_atualizador_onedrive():
+    """Cria o atualizador, faz o download inicial e agenda os seguintes"""
+    global _atualizador
+    
+    if _atualizador is None:
+        _atualizador = AtualizadorBancoOneDrive(
+            baixar=_baixar_banco_onedrive,
+            substituir=_substituir_cache_onedrive,
+            cache_path=_CACHE_ONEDRIVE_PATH,
+            intervalo_segundos=_refresh_intervalo_segundos
+        )
+    
+    if not _atualizador.atualizar_agora():
+        logger.info("📁 Usando cache local existente")
+    _atualizador.iniciar()
+
+def parar_atualizador_onedrive():
+    """Interrompe as atualizações periódicas do OneDrive"""
+    if _atualizador:
+        _atualizador.parar()
+
+def obter_status_atualizacao_onedrive():
+    """
+    Estado da atualização periódica do cache a partir do OneDrive
+    
+    Returns:
+        dict: idade/duração da última atualização ou {} se OneDrive inativo
+    """
+    if not _atualizador:
+        return {}
+    return _atualizador.status()
+
+def obter_metricas_download_onedrive():
+    """
+    Contadores de download condicional (eTag/cTag) do OneDrive
+    
+    Returns:
+        dict: downloads completos, pulados e bytes baixados ou {} se OneDrive inativo
+    """
+    if not _onedrive_manager:
+        return {}
+    return _onedrive_manager.metricas_download()
+
+def _sincronizar_para_onedrive_critico():
+    """
+    🔥 CORREÇÃO PRINCIPAL: Sincronização APENAS para operações críticas
+    
+    Esta função é chamada APENAS após:
+    - Cadastros completos (salvar_responsavel)
+    - Exclusões de dados (remover_cadastros_por_user_id)
+    - Operações administrativas (adicionar_admin)
+    - Consentimentos LGPD (registrar_consentimento_lgpd)
+    
+    NÃO é chamada durante:
+    - Navegação de botões (Anterior/Próxima)
+    - Consultas de leitura (listar, buscar)
+    - Operações temporárias
+    
+    BENEFÍCIOS:
+    ✅ Garante que dados nunca sejam perdidos
+    ✅ Não interfere com navegação de botões
+    ✅ Upload assíncrono (não trava interface)
+    ✅ Rajadas de escritas viram um único upload (fila com debounce)
+    """
+    global _versao_local
+    
+    with _versao_lock:
+        _versao_local += 1
+    
+    if not _onedrive_manager or not _fila_upload:
+        logger.debug("📁 OneDrive não configurado - dados salvos apenas localmente")
+        return
+    
+    _fila_upload.marcar_alterado()
+    logger.debug("📤 Alteração enfileirada para sync OneDrive")
+
+def _sincronizar_historico_onedrive():
+    """
+    Marca o histórico de alertas para upload (fila própria, debounce longo)
+    
+    Alertas não alteram o arquivo principal: não entram na versão local
+    que protege o cache de ser sobrescrito por um download.
+    """
+    if not _historico_separado:
+        _sincronizar_para_onedrive_critico()
+        return
+    
+    if not _onedrive_manager or not _fila_upload_historico:
+        logger.debug("📁 OneDrive não configurado - histórico salvo apenas localmente")
+        return
+    
+    _fila_upload_historico.marcar_alterado()
+
+def _enviar_historico_onedrive():
+    """Upload do arquivo de histórico (executado pelo worker da fila do histórico)"""
+    snapshot_path = historico.caminho_historico(get_db_path()) + ".snapshot"
+    try:
+        criar_snapshot_consistente(snapshot_path, esquema=historico.ESQUEMA)
+    except Exception as e:
+        logger.error(f"❌ Snapshot do histórico para upload falhou: {e}")
+        return False
+    
+    try:
+        tamanho = os.path.getsize(snapshot_path)
+        if not _onedrive_manager.upload_arquivo(snapshot_path, historico.NOME_REMOTO, comprimir=True):
+            logger.warning("⚠️ Falha no upload do histórico - dados seguros localmente")
+            return False
+    finally:
+        try:
+            os.remove(snapshot_path)
+        except OSError:
+            pass
+    
+    logger.info(f"💾 Histórico de alertas sincronizado: {tamanho} bytes")
+    return True
+
+def _restaurar_historico_onedrive():
+    """
+    Recupera o histórico do OneDrive quando o local está vazio (ex: disco novo)
+    
+    O histórico é só acrescentado: a cópia remota é mesclada por id, sem
+    substituir alertas já gravados localmente.
+    """
+    if not _historico_separado:
+        return
+    
+    try:
+        conn = get_connection()
+        try:
+            # Garante o schema (arquivo de histórico recém-criado pelo ATTACH)
+            historico.separar_historico(conn)
+            vazio = conn.execute(f"SELECT 1 FROM {historico.ESQUEMA}.alertas_enviados LIMIT 1").fetchone() is None
+        finally:
+            conn.close()
+        if not vazio:
+            return
+        
+        baixado = historico.caminho_historico(get_db_path()) + ".download"
+        if not _onedrive_manager.download_arquivo(historico.NOME_REMOTO, baixado):
+            logger.info("📁 Histórico de alertas ainda não existe no OneDrive")
+            return
+        
+        try:
+            conn = get_connection()
+            try:
+                acrescentados = historico.mesclar_arquivo(conn, baixado)
+            finally:
+                conn.close()
+        finally:
+            os.remove(baixado)
+        logger.info(f"✅ Histórico de alertas restaurado do OneDrive: {acrescentados} alertas")
+    except Exception as e:
+        logger.error(f"❌ Erro ao restaurar histórico do OneDrive: {e}")
+
+def _enviar_banco_onedrive():
+    """
+    Upload do cache local (executado pelo worker da fila de upload)
+    
+    O upload é condicionado ao eTag da versão remota contida no cache: se
+    outra instância enviou antes (HTTP 412), a versão remota é baixada e
+    mesclada linha a linha e o envio é repetido com o novo eTag.
+    """
+    global _versao_enviada, _etag_cache
+    
+    cache_path = _CACHE_ONEDRIVE_PATH
+    if not os.path.exists(cache_path):
+        logger.warning("⚠️ Cache local não encontrado para sync")
+        return False
+    
+    for tentativa in range(_upload_tentativas_conflito + 1):
+        with _versao_lock:
+            versao = _versao_local
+            etag = _etag_cache
+        
+        # Snapshot consistente: o upload nunca lê o arquivo vivo
+        snapshot_path = cache_path + ".snapshot"
+        try:
+            criar_snapshot_consistente(snapshot_path)
+        except Exception as e:
+            logger.error(f"❌ Snapshot para upload falhou: {e}")
+            return False
+        
+        try:
+            tamanho = os.path.getsize(snapshot_path)
+            with _transferencia_lock:
+                enviado = _onedrive_manager.upload_database(snapshot_path, condicional=True, etag=etag)
+                if enviado:
+                    # O arquivo enviado é o novo ancestral das próximas mesclas
+                    os.replace(snapshot_path, _caminho_base_sincronizada())
+                    with _versao_lock:
+                        _etag_cache = _onedrive_manager.obter_versao_remota().get("eTag")
+        finally:
+            try:
+                os.remove(snapshot_path)
+            except OSError:
+                pass
+        
+        if enviado:
+            break
+        if enviado is False:
+            logger.warning("⚠️ Falha no upload OneDrive - dados seguros localmente")
+            return False
+        
+        # Outra instância enviou primeiro: trazer as alterações dela e tentar de novo
+        _metricas_conflito["conflitos"] += 1
+        if tentativa == _upload_tentativas_conflito or not _mesclar_banco_remoto():
+            _metricas_conflito["falhas"] += 1
+            logger.warning("⚠️ Conflito de upload não resolvido - nova tentativa na fila")
+            return False
+    
+    with _versao_lock:
+        _versao_enviada = max(_versao_enviada, versao)
+    
+    logger.info("🔥 DADOS SINCRONIZADOS COM ONEDRIVE - PROTEGIDOS CONTRA PERDA!")
+    logger.info(f"💾 Snapshot sincronizado: {tamanho} bytes")
+    return True
+
+def _mesclar_banco_remoto():
+    """
+    Baixa a versão remota e mescla as alterações dela no cache local
+    
+    responsaveis, consentimento_lgpd e administradores são mesclados por
+    chave natural, com a última versão sincronizada como ancestral (ver
+    mesclagem.py). Depois da mescla o cache contém a versão remota, e o
+    próximo upload é condicionado ao eTag dela.
+    
+    Returns:
+        bool: True se a mescla foi aplicada
+    """
+    global _versao_local, _etag_cache
+    
+    remoto_path = _CACHE_ONEDRIVE_PATH + ".remoto"
+    try:
+        with _transferencia_lock:
+            if not _onedrive_manager.download_database(remoto_path):
+                logger.error("❌ Download da versão remota para mescla falhou")
+                return False
+            etag_remoto = _onedrive_manager.obter_versao_remota().get("eTag")
+        
+        migrar_arquivo(remoto_path, pasta_backup=_pasta_backup())
+        
+        base_path = _caminho_base_sincronizada()
+        conn = get_connection()
+        try:
+            resultado = mesclar_banco(conn, remoto_path, base_path)
+            # Ainda com o escritor: nenhuma escrita intercala com a recarga das projeções
+            _invalidar_caches()
+        finally:
+            conn.close()
+        
+        os.replace(remoto_path, base_path)
+        with _versao_lock:
+            _versao_local += 1
+            _etag_cache = etag_remoto
+        _recarregar_caches()
+        
+        linhas = sum(
+            contadores["adicionados"] + contadores["atualizados"] + contadores["removidos"]
+            for contadores in resultado.values()
+        )
+        _metricas_conflito["mesclagens"] += 1
+        _metricas_conflito["linhas_mescladas"] += linhas
+        logger.info(f"🔀 Versão remota mesclada no cache: {linhas} linhas")
+        for tabela, contadores in resultado.items():
+            if any(contadores.values()):
+                logger.info(f"   {tabela}: {contadores}")
+        return True
+    except Exception as e:
+        logger.error(f"❌ Erro mesclando versão remota: {e}")
+        return False
+    finally:
+        try:
+            os.remove(remoto_path)
+        except OSError:
+            pass
+
+def obter_metricas_conflito_onedrive():
+    """
+    Conflitos de upload (outra instância enviou antes) e mesclas feitas
+    
+    Returns:
+        dict: conflitos, mesclagens, linhas mescladas e falhas ou {} se inativo
+    """
+    if not _onedrive_manager or _sincronizador_delta or _replicador_wal:
+        return {}
+    return dict(_metricas_conflito)
+
+def _enviar_delta_onedrive():
+    """Upload das alterações pendentes em lote (modo delta)"""
+    global _versao_enviada
+    
+    with _versao_lock:
+        versao = _versao_local
+    
+    try:
+        if not _sincronizador_delta.enviar_pendentes():
+            logger.warning("⚠️ Falha no envio delta - dados seguros localmente")
+            return False
+    except Exception as e:
+        logger.error(f"❌ Erro no envio delta: {e}")
+        return False
+    
+    with _versao_lock:
+        _versao_enviada = max(_versao_enviada, versao)
+    return True
+
+def _enviar_wal_onedrive():
+    """Upload dos frames do WAL ainda não enviados (modo wal)"""
+    global _versao_enviada
+    
+    with _versao_lock:
+        versao = _versao_local
+    
+    try:
+        if not _replicador_wal.enviar_pendentes():
+            logger.warning("⚠️ Falha no envio do WAL - dados seguros localmente")
+            return False
+    except Exception as e:
+        logger.error(f"❌ Erro no envio do WAL: {e}")
+        return False
+    
+    with _versao_lock:
+        _versao_enviada = max(_versao_enviada, versao)
+    return True
+
+def obter_metricas_wal_onedrive():
+    """
+    Métricas da replicação por WAL (segmentos, bases, checkpoints, restaurações)
+    
+    Returns:
+        dict: contadores do replicador ou {} se o modo wal está inativo
+    """
+    if not _replicador_wal:
+        return {}
+    return _replicador_wal.metricas()
+
+def restaurar_banco_no_tempo(destino, momento=None, seq=None):
+    """
+    Reconstrói em `destino` o banco como estava em um momento (modo wal)
+    
+    Não mexe no banco em uso: o arquivo restaurado serve para consulta ou
+    para substituição manual. Bloqueante: chamar de handlers via
+    asyncio.to_thread.
+    
+    Args:
+        destino (str): Arquivo a criar
+        momento (datetime): Estado enviado até este momento (None = mais recente)
+        seq (int): Estado até este segmento (inclusive)
+        
+    Returns:
+        bool: True se o arquivo foi reconstruído
+    """
+    if not _replicador_wal:
+        logger.warning("⚠️ Restauração no tempo requer ONEDRIVE_SYNC_MODE=wal")
+        return False
+    if momento is not None and momento.tzinfo is None:
+        # Datas sem fuso são horário de Brasília, como no restante do banco
+        momento = pytz.timezone('America/Sao_Paulo').localize(momento)
+    return bool(_replicador_wal.restaurar(destino, ate=momento, seq=seq))
+
+def obter_metricas_delta_onedrive():
+    """
+    Métricas do sync delta (lotes, compactações, restaurações)
+    
+    Returns:
+        dict: contadores do sincronizador ou {} se o modo delta está inativo
+    """
+    if not _sincronizador_delta:
+        return {}
+    return _sincronizador_delta.metricas()
+
+def _selecionar_envio():
+    """Função de upload da fila principal conforme o modo de sincronização"""
+    if _sincronizador_delta:
+        return _enviar_delta_onedrive
+    if _replicador_wal:
+        return _enviar_wal_onedrive
+    return _enviar_banco_onedrive
+
+def _iniciar_fila_upload():
+    """Cria as filas de upload com debounce (banco principal e histórico, uma de cada por processo)"""
+    global _fila_upload, _fila_upload_historico
+    
+    if _fila_upload is None:
+        _fila_upload = FilaUploadOneDrive(
+            enviar=_selecionar_envio(),
+            debounce_segundos=_upload_debounce_segundos,
+            espera_maxima_segundos=_upload_espera_maxima_segundos,
+            backoff_maximo_segundos=_upload_backoff_maximo_segundos
+        )
+        atexit.register(finalizar_sincronizacao_onedrive)
+        logger.info(f"📤 Fila de upload OneDrive ativa (debounce {_upload_debounce_segundos:.0f}s)")
+    
+    if _fila_upload_historico is None and _historico_separado:
+        _fila_upload_historico = FilaUploadOneDrive(
+            enviar=_enviar_historico_onedrive,
+            debounce_segundos=_historico_debounce_segundos,
+            espera_maxima_segundos=_historico_espera_maxima_segundos,
+            backoff_maximo_segundos=_upload_backoff_maximo_segundos,
+            nome="histórico"
+        )
+        logger.info(f"📤 Fila de upload do histórico ativa (debounce {_historico_debounce_segundos:.0f}s)")
+
+def finalizar_sincronizacao_onedrive(timeout=30):
+    """
+    Envia alterações pendentes e encerra a fila de upload (shutdown)
+    
+    Returns:
+        bool: True se não restaram alterações sem upload
+    """
+    if not _fila_upload:
+        return True
+    enviado = _fila_upload.finalizar(timeout)
+    if _fila_upload_historico:
+        enviado = _fila_upload_historico.finalizar(timeout) and enviado
+    return enviado
+
+def sincronizar_agora_onedrive(timeout=60):
+    """
+    Força um upload imediato do estado atual do banco (comando /sync)
+    
+    Bloqueante: chamar de handlers via asyncio.to_thread.
+    
+    Returns:
+        bool: True se o envio foi concluído dentro do timeout
+    """
+    if not _onedrive_manager or not _fila_upload:
+        return False
+    
+    _fila_upload.marcar_alterado()
+    enviado = _fila_upload.flush(timeout)
+    if _fila_upload_historico:
+        enviado = _fila_upload_historico.flush(timeout) and enviado
+    return enviado
+
+def obter_onedrive_async():
+    """
+    Variante assíncrona do gerenciador OneDrive, para uso nos handlers
+    
+    Compartilha autenticação, pasta e versão remota com o gerenciador
+    usado pelas threads de sincronização.
+    
+    Returns:
+        OneDriveManagerAsync: gerenciador aguardável ou None se OneDrive inativo
+    """
+    global _onedrive_async
+    
+    if not _onedrive_manager:
+        return None
+    if _onedrive_async is None or _onedrive_async.sync is not _onedrive_manager:
+        from ..onedrive_manager_async import OneDriveManagerAsync
+        _onedrive_async = OneDriveManagerAsync(_onedrive_manager)
+    return _onedrive_async
+
+def obter_metricas_upload_onedrive():
+    """
+    Métricas da fila de upload OneDrive
+    
+    Returns:
+        dict: enfileirados, coalescidos, uploads, falhas ou {} se inativa
+    """
+    if not _fila_upload:
+        return {}
+    return _fila_upload.metricas()
+
+def obter_metricas_upload_historico():
+    """
+    Métricas da fila de upload do histórico de alertas
+    
+    Returns:
+        dict: mesmos contadores de obter_metricas_upload_onedrive ou {} se inativa
+    """
+    if not _fila_upload_historico:
+        return {}
+    return _fila_upload_historico.metricas()
+
+def _obter_pool(db_path):
+    """Retorna o pool do arquivo atual, recriando-o se o caminho mudou"""
+    global _pool
+    
+    with _pool_lock:
+        if _pool is None or _pool.db_path != db_path:
+            if _pool is not None:
+                _pool.fechar()
+            _invalidar_caches()
+            _pool = SQLiteConnectionPool(
+                db_path,
+                max_leitores=_pool_max_leitores,
+                configurar_conexao=configurar_conexao
+            )
+            logger.info(f"🔌 Pool de conexões criado: {db_path} (1 escritor + {_pool_max_leitores} leitores)")
+        return _pool
+
+def get_connection(somente_leitura=False):
+    """
+    Conexão SQLite emprestada do pool persistente
+    
+    Args:
+        somente_leitura (bool): True para consultas (usa um dos leitores do pool)
+        
+    Returns:
+        ConexaoPool: conexão compatível com sqlite3.Connection; close() devolve ao pool
+    """
+    try:
+        db_path = get_db_path()
+        return _obter_pool(db_path).obter_conexao(somente_leitura=somente_leitura)
+    except Exception as e:
+        logger.error(f"Erro criando conexão: {e}")
+        raise
+
+def fechar_pool():
+    """Fecha o pool de conexões (encerramento do bot)"""
+    global _pool
+    
+    with _pool_lock:
+        if _pool is not None:
+            _pool.fechar()
+            _pool = None
+
+def obter_estatisticas_pool():
+    """
+    Estatísticas do pool de conexões
+    
+    Returns:
+        dict: checkouts, esperas, hits/misses e taxa de acerto
+    """
+    with _pool_lock:
+        if _pool is None:
+            return {}
+        return _pool.estatisticas()
+
+
+# ============================================
+# CACHE EM MEMÓRIA DE RESPONSÁVEIS
+# ============================================
+
+# Colunas expostas pelas consultas (as chaves normalizadas são internas)
+_COLUNAS_RESPONSAVEIS = "id, codigo_casa, nome, funcao, user_id, username, data_cadastro, ultima_atualizacao"
+
+def _carregar_responsaveis():
+    """Leitura completa da tabela para (re)construir o cache"""
+    conn = get_connection(somente_leitura=True)
+    try:
+        return [dict(row) for row in conn.execute(f"SELECT {_COLUNAS_RESPONSAVEIS} FROM responsaveis")]
+    finally:
+        conn.close()
+
+_cache_responsaveis = (
+    CacheResponsaveis(_carregar_responsaveis, lambda linha: chave_responsavel(linha["codigo_casa"], linha["nome"]))
+    if _cache_responsaveis_habilitado else None
+)
+
+def _carregar_admins():
+    """Ids da tabela administradores para o registro em memória"""
+    conn = get_connection(somente_leitura=True)
+    try:
+        return [row['user_id'] for row in conn.execute("SELECT user_id FROM administradores")]
+    finally:
+        conn.close()
+
+# Administradores: ADMIN_IDS + tabela, num frozenset consultado sem SQL
+_registro_admins = RegistroAdmins(_carregar_admins, ids_admin_ambiente(os.getenv("ADMIN_IDS")))
+
+def _carregar_consentimentos():
+    """Todos os user_id com consentimento LGPD (pré-carga do cache)"""
+    conn = get_connection(somente_leitura=True)
+    try:
+        return [row['user_id'] for row in conn.execute("SELECT user_id FROM consentimento_lgpd")]
+    finally:
+        conn.close()
+
+def _consultar_consentimento(user_id):
+    """Consulta pontual de consentimento LGPD no banco"""
+    conn = get_connection(somente_leitura=True)
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT user_id FROM consentimento_lgpd WHERE user_id = ?", (user_id,))
+        return cursor.fetchone() is not None
+    finally:
+        conn.close()
+
+_cache_lgpd = (
+    CacheConsentimento(_carregar_consentimentos, _consultar_consentimento, _cache_lgpd_max_negativos)
+    if _cache_lgpd_habilitado else None
+)
+
+def _invalidar_caches():
+    """Descarta as projeções em memória (arquivo do banco trocado)"""
+    if _cache_responsaveis:
+        _cache_responsaveis.invalidar()
+    _registro_admins.invalidar()
+    if _cache_lgpd:
+        _cache_lgpd.invalidar()
+
+def _recarregar_caches():
+    """Recarrega administradores e consentimentos fora do caminho dos handlers"""
+    try:
+        _registro_admins.snapshot()
+        if _cache_lgpd:
+            _cache_lgpd.precarregar()
+    except Exception as e:
+        logger.warning(f"⚠️ Erro recarregando caches em memória: {e}")
+
+def _atualizar_cache_responsaveis(cursor, atualizados=(), removidos=()):
+    """
+    Write-through: aplica ao cache as linhas alteradas por uma escrita
+    
+    Chamado após o commit e antes de devolver o escritor ao pool, para que
+    escritas concorrentes cheguem ao cache na mesma ordem dos commits.
+    """
+    if not _cache_responsaveis:
+        return
+    
+    linhas = []
+    if atualizados:
+        marcadores = ", ".join("?" * len(atualizados))
+        cursor.execute(f"SELECT {_COLUNAS_RESPONSAVEIS} FROM responsaveis WHERE id IN ({marcadores})", list(atualizados))
+        linhas = [dict(row) for row in cursor.fetchall()]
+    _cache_responsaveis.aplicar(atualizadas=linhas, removidas=removidos)
+
+def obter_metricas_cache_responsaveis():
+    """
+    Métricas do cache em memória de responsáveis
+    
+    Returns:
+        dict: acertos, faltas, reconstruções e tempo de reconstrução ou {} se desabilitado
+    """
+    if not _cache_responsaveis:
+        return {}
+    return _cache_responsaveis.metricas()
+
+def obter_versao_schema():
+    """
+    Versão do schema do banco em uso (PRAGMA user_version)
+    
+    Returns:
+        dict: versao (gravada no arquivo) e atual (conhecida por este código)
+    """
+    conn = get_connection(somente_leitura=True)
+    try:
+        return {'versao': versao_schema(conn), 'atual': VERSAO_ATUAL}
+    finally:
+        conn.close()
+
+def obter_ids_admins():
+    """
+    Administradores do ambiente (ADMIN_IDS) e da tabela, sem consultar o banco após a carga
+    
+    Returns:
+        frozenset: ids numéricos dos administradores
+    """
+    return _registro_admins.snapshot()
+
+def admins_em_memoria():
+    """Snapshot de administradores já carregado, ou None (nunca acessa o banco)"""
+    return _registro_admins.em_memoria()
+
+def obter_ids_admins_sem_banco():
+    """
+    Administradores sem acessar o banco (logs de startup)
+    
+    Returns:
+        frozenset: snapshot já carregado ou, antes da carga, só ADMIN_IDS
+    """
+    admins = _registro_admins.em_memoria()
+    if admins is None:
+        return ids_admin_ambiente(os.getenv("ADMIN_IDS"))
+    return admins
+
+def obter_metricas_registro_admins():
+    """
+    Métricas do registro de administradores
+    
+    Returns:
+        dict: acertos, faltas, recargas e total de administradores
+    """
+    return _registro_admins.metricas()
+
+def consentimento_em_memoria(user_id):
+    """Consentimento LGPD já conhecido pelo cache: True/False, ou None (nunca acessa o banco)"""
+    if not _cache_lgpd:
+        return None
+    return _cache_lgpd.em_memoria(user_id)
+
+def obter_metricas_cache_lgpd():
+    """
+    Métricas do cache de consentimentos LGPD
+    
+    Returns:
+        dict: acertos positivos/negativos, faltas e pré-cargas ou {} se desabilitado
+    """
+    if not _cache_lgpd:
+        return {}
+    return _cache_lgpd.metricas()
+
+
+# ============================================
+# JOURNAL WAL, PRAGMAS E CHECKPOINTS
+# ============================================
+
+_SYNCHRONOUS_VALIDOS = ("OFF", "NORMAL", "FULL", "EXTRA")
+_TEMP_STORE_VALIDOS = ("DEFAULT", "FILE", "MEMORY")
+
+def configurar_conexao(conn, wal=None):
+    """
+    Aplica journal mode e pragmas de desempenho a uma nova conexão do pool
+    
+    Args:
+        conn (sqlite3.Connection): Conexão recém-criada
+        wal (bool): Força WAL ligado/desligado (None = usar DB_WAL_ENABLED)
+    """
+    wal = _wal_habilitado if wal is None else wal
+    synchronous = _pragma_synchronous
+    if synchronous not in _SYNCHRONOUS_VALIDOS:
+        synchronous = "NORMAL" if wal else "FULL"
+    temp_store = _pragma_temp_store if _pragma_temp_store in _TEMP_STORE_VALIDOS else "DEFAULT"
+    
+    # Histórico anexado antes do journal_mode, que vale para todos os schemas
+    esquemas = ["main"]
+    arquivo = conn.execute("PRAGMA database_list").fetchone()[2]
+    if _historico_separado and arquivo:
+        historico.anexar_historico(conn, historico.caminho_historico(arquivo))
+        esquemas.append(historico.ESQUEMA)
+    
+    try:
+        modo = conn.execute(f"PRAGMA journal_mode={'WAL' if wal else 'DELETE'}").fetchone()[0]
+        if wal and modo.lower() != "wal":
+            logger.warning(f"⚠️ Não foi possível ativar WAL (journal_mode={modo})")
+    except sqlite3.OperationalError as e:
+        # Outra conexão está no meio de uma transação - mantém o modo atual do arquivo
+        logger.debug(f"journal_mode não alterado: {e}")
+    
+    for esquema in esquemas:
+        conn.execute(f"PRAGMA {esquema}.synchronous={synchronous}")
+    if wal and _replicacao_wal:
+        # Só o replicador faz checkpoint: o WAL não recomeça com frames não enviados
+        conn.execute("PRAGMA wal_autocheckpoint=0")
+    conn.execute(f"PRAGMA cache_size={_pragma_cache_size}")
+    conn.execute(f"PRAGMA mmap_size={_pragma_mmap_size}")
+    conn.execute(f"PRAGMA temp_store={temp_store}")
+
+def checkpoint_wal(modo="PASSIVE", esquema=None):
+    """
+    Executa um checkpoint WAL no banco atual
+    
+    PASSIVE não bloqueia leitores nem escritores; TRUNCATE espera o escritor,
+    copia todo o WAL para o arquivo principal e zera o -wal, deixando o
+    arquivo .db autocontido (necessário antes de enviar ao OneDrive).
+    
+    Args:
+        modo (str): PASSIVE, FULL, RESTART ou TRUNCATE
+        esquema (str): Só este schema (None = todos os arquivos anexados)
+        
+    Returns:
+        tuple: (busy, frames_log, frames_copiados) ou None se WAL desabilitado
+    """
+    if not _wal_habilitado:
+        return None
+    
+    modo = modo.upper()
+    if modo not in ("PASSIVE", "FULL", "RESTART", "TRUNCATE"):
+        raise ValueError(f"Modo de checkpoint inválido: {modo}")
+    
+    with _pool_lock:
+        pool = _pool
+    if pool is None:
+        return None
+    
+    try:
+        # PASSIVE pode rodar em um leitor; os demais modos precisam do escritor
+        conn = pool.obter_conexao(somente_leitura=(modo == "PASSIVE"))
+        try:
+            prefixo = f"{esquema}." if esquema else ""
+            resultado = tuple(conn.execute(f"PRAGMA {prefixo}wal_checkpoint({modo})").fetchone())
+        finally:
+            conn.close()
+        
+        if resultado[0]:
+            logger.debug(f"⏳ Checkpoint {modo} parcial (banco ocupado): {resultado}")
+        else:
+            logger.debug(f"✅ Checkpoint {modo}: {resultado[2]}/{resultado[1]} frames")
+        return resultado
+        
+    except Exception as e:
+        logger.warning(f"⚠️ Erro no checkpoint WAL {modo}: {e}")
+        return None
+
+def _checkpoint_periodico():
+    """
+    Checkpoint PASSIVE do agendador
+    
+    No modo wal o banco principal passa pelo replicador (só com todos os
+    frames enviados); o histórico anexado segue com o checkpoint normal.
+    """
+    if not _replicador_wal:
+        return checkpoint_wal("PASSIVE")
+    
+    try:
+        resultado = _replicador_wal.checkpoint()
+    except Exception as e:
+        logger.warning(f"⚠️ Erro no checkpoint do replicador WAL: {e}")
+        resultado = None
+    if _historico_separado:
+        checkpoint_wal("PASSIVE", esquema=historico.ESQUEMA)
+    return resultado
+
+def _loop_checkpoint():
+    """Thread do agendador: checkpoints PASSIVE periódicos"""
+    while not _checkpoint_parar.wait(_checkpoint_intervalo_segundos):
+        _checkpoint_periodico()
+
+def iniciar_agendador_checkpoint():
+    """Inicia (uma única vez) a thread de checkpoints periódicos do WAL"""
+    global _checkpoint_thread
+    
+    if not _wal_habilitado:
+        return
+    if _checkpoint_thread and _checkpoint_thread.is_alive():
+        return
+    
+    _checkpoint_parar.clear()
+    _checkpoint_thread = threading.Thread(target=_loop_checkpoint, name="wal-checkpoint", daemon=True)
+    _checkpoint_thread.start()
+    logger.info(f"⏱️ Agendador de checkpoint WAL iniciado (a cada {_checkpoint_intervalo_segundos}s)")
+
+def parar_agendador_checkpoint():
+    """Interrompe a thread de checkpoints e deixa o arquivo autocontido"""
+    _checkpoint_parar.set()
+    if _checkpoint_thread:
+        _checkpoint_thread.join(timeout=5)
+    checkpoint_wal("TRUNCATE")
+
+# ============================================
+# COMPACTAÇÃO INCREMENTAL (AUTO_VACUUM)
+# ============================================
+
+def _esquemas_do_banco(conn):
+    """main e, se anexado, o histórico de alertas"""
+    return [esquema for esquema in historico.esquemas_anexados(conn) if esquema in ("main", historico.ESQUEMA)]
+
+def compactar_banco(forcar=False):
+    """
+    Devolve ao sistema as páginas livres deixadas por DELETEs
+    
+    Só age em schemas com auto_vacuum=INCREMENTAL (migração v5) e, sem
+    `forcar`, quando as páginas livres passam de DB_VACUUM_FREELIST_RATIO.
+    O arquivo compactado entra na fila de upload correspondente.
+    
+    Args:
+        forcar (bool): Compactar mesmo abaixo do limiar
+        
+    Returns:
+        dict: páginas liberadas por schema (vazio se nada foi feito)
+    """
+    liberadas = {}
+    bytes_liberados = 0
+    
+    # Sem pool aberto (encerramento, troca de arquivo) não há o que compactar
+    with _pool_lock:
+        pool = _pool
+    if pool is None:
+        return liberadas
+    
+    try:
+        conn = pool.obter_conexao()
+        try:
+            for esquema in _esquemas_do_banco(conn):
+                espaco = estatisticas_espaco(conn, esquema)
+                if espaco["auto_vacuum"] != "INCREMENTAL" or not espaco["paginas_livres"]:
+                    continue
+                if not forcar and espaco["razao_livre"] < _vacuum_limiar_livre:
+                    continue
+                
+                paginas = liberar_paginas(conn, esquema)
+                if paginas:
+                    liberadas[esquema] = paginas
+                    bytes_liberados += paginas * espaco["tamanho_pagina"]
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.warning(f"⚠️ Erro na compactação incremental: {e}")
+    
+    _metricas_vacuum["verificacoes"] += 1
+    if not liberadas:
+        return liberadas
+    
+    _metricas_vacuum["compactacoes"] += 1
+    _metricas_vacuum["paginas_liberadas"] += sum(liberadas.values())
+    _metricas_vacuum["bytes_liberados"] += bytes_liberados
+    logger.info(f"🧹 Compactação incremental: {bytes_liberados / 1024:.0f} KB liberados {liberadas}")
+    
+    # Arquivo menor só ajuda o upload se for reenviado
+    if "main" in liberadas:
+        _sincronizar_para_onedrive_critico()
+    if historico.ESQUEMA in liberadas:
+        _sincronizar_historico_onedrive()
+    return liberadas
+
+def solicitar_compactacao():
+    """Antecipa a próxima verificação do agendador (após remoções em massa)"""
+    _vacuum_solicitado.set()
+
+def _loop_vacuum():
+    """Thread do agendador: verificação periódica ou sob demanda do espaço livre"""
+    while not _vacuum_parar.is_set():
+        _vacuum_solicitado.wait(_vacuum_intervalo_segundos)
+        _vacuum_solicitado.clear()
+        if _vacuum_parar.is_set():
+            break
+        compactar_banco()
+
+def iniciar_agendador_vacuum():
+    """Inicia (uma única vez) a thread de compactação incremental"""
+    global _vacuum_thread
+    
+    if _vacuum_thread and _vacuum_thread.is_alive():
+        return
+    
+    _vacuum_parar.clear()
+    _vacuum_thread = threading.Thread(target=_loop_vacuum, name="db-vacuum", daemon=True)
+    _vacuum_thread.start()
+    logger.info(
+        f"🧹 Compactação incremental ativa (a cada {_vacuum_intervalo_segundos}s, "
+        f"limiar {_vacuum_limiar_livre:.0%} livre)"
+    )
+
+def parar_agendador_vacuum():
+    """Interrompe a thread de compactação incremental"""
+    _vacuum_parar.set()
+    _vacuum_solicitado.set()
+    if _vacuum_thread:
+        _vacuum_thread.join(timeout=5)
+
+def obter_metricas_espaco():
     """
-    🔥 CORREÇÃO PRINCIPAL: Sincronização APENAS para operações críticas
-    
-    Esta função é chamada APENAS após:
-    - Cadastros completos (salvar_responsavel)
-    - Exclusões de dados (remover_cadastros_por_user_id)
-    - Operações administrativas (adicionar_admin)
-    - Consentimentos LGPD (registrar_consentimento_lgpd)
+    Tamanho do arquivo x dados vivos por schema e contadores da compactação
     
-    NÃO é chamada durante:
-    - Navegação de botões (Anterior/Próxima)
-    - Consultas de leitura (listar, buscar)
-    - Operações temporárias
+    Returns:
+        dict: esquemas (ver estatisticas_espaco), limiar e contadores
+        (verificacoes, compactacoes, paginas_liberadas, bytes_liberados)
+    """
+    esquemas = {}
+    try:
+        conn = get_connection(somente_leitura=True)
+        try:
+            esquemas = {esquema: estatisticas_espaco(conn, esquema) for esquema in _esquemas_do_banco(conn)}
+        finally:
+            conn.close()
+    except Exception as e:
+        logger.warning(f"⚠️ Erro obtendo métricas de espaço: {e}")
     
-    BENEFÍCIOS:
-    ✅ Garante que dados nunca sejam perdidos
-    ✅ Não interfere com navegação de botões
-    ✅ Upload assíncrono (não trava interface)
-    ✅ Logs detalhados para monitoramento
+    return dict(_metricas_vacuum, esquemas=esquemas, limiar=_vacuum_limiar_livre)
+
+def _remover_arquivos_wal(db_path):
+    """Remove -wal/-shm órfãos após o arquivo principal ser substituído"""
+    for sufixo in ("-wal", "-shm"):
+        try:
+            os.remove(db_path + sufixo)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"⚠️ Não foi possível remover {db_path}{sufixo}: {e}")
+
+# ============================================
+# SNAPSHOT CONSISTENTE (BACKUP API)
+# ============================================
+
+def criar_snapshot_consistente(destino, esquema="main"):
     """
-    global _onedrive_manager
+    Copia o banco em uso para `destino` pela API de backup do SQLite
     
-    if not _onedrive_manager:
-        logger.debug("📁 OneDrive não configurado - dados salvos apenas localmente")
-        return
+    A cópia é transacionalmente consistente (inclui os frames do WAL),
+    nunca captura um commit pela metade e não trava escritores em modo WAL.
+    O snapshot é convertido para journal DELETE (arquivo autocontido) e
+    validado com PRAGMA quick_check antes de ser colocado em `destino`.
     
-    try:
-        def fazer_upload_seguro():
-            """Thread separada para upload sem bloquear interface"""
-            try:
-                cache_path = "/opt/render/project/storage/alertas_bot_cache.db"
-                
-                if not os.path.exists(cache_path):
-                    logger.warning("⚠️ Cache local não encontrado para sync")
-                    return
-                
-                # Tentar upload com timeout
-                sucesso = _onedrive_manager.upload_database(cache_path)
-                
-                if sucesso:
-                    logger.info("🔥 DADOS SINCRONIZADOS COM ONEDRIVE - PROTEGIDOS CONTRA PERDA!")
-                    logger.info(f"💾 Arquivo sincronizado: {os.path.getsize(cache_path)} bytes")
-                else:
-                    logger.warning("⚠️ Falha no upload OneDrive - dados seguros localmente")
-                    
-            except Exception as e:
-                logger.error(f"❌ Erro no upload OneDrive: {e}")
-                logger.info("💾 Dados permanecem seguros no cache local")
+    Args:
+        destino (str): Caminho do arquivo de snapshot
+        esquema (str): "main" (dados críticos) ou "historico" (alertas)
         
-        # Executar upload em thread separada para não bloquear
-        thread_upload = threading.Thread(target=fazer_upload_seguro, daemon=True)
-        thread_upload.start()
+    Returns:
+        str: `destino` se o snapshot foi criado e validado
         
-        logger.info("📤 SYNC ONEDRIVE INICIADO - Dados serão protegidos em segundo plano")
-        
-    except Exception as e:
-        logger.error(f"❌ Erro criando thread de sync: {e}")
-
-def get_connection():
-    """Conexão SQLite segura"""
+    Raises:
+        sqlite3.DatabaseError: se o quick_check do snapshot falhar
+    """
+    temporario = destino + ".tmp"
+    if os.path.exists(temporario):
+        os.remove(temporario)
+    
+    origem = get_connection(somente_leitura=True)
     try:
-        db_path = get_db_path()
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        return conn
-    except Exception as e:
-        logger.error(f"Erro criando conexão: {e}")
+        snapshot = sqlite3.connect(temporario)
+        try:
+            if _wal_habilitado:
+                # Leitura em WAL não bloqueia escritores: copia tudo de uma vez
+                origem.backup(snapshot, name=esquema)
+            else:
+                # Rollback journal: copiar em passos curtos para liberar o lock
+                # entre eles (o backup recomeça se outra conexão escrever)
+                origem.backup(snapshot, pages=256, sleep=0.005, name=esquema)
+            
+            snapshot.execute("PRAGMA journal_mode=DELETE")
+            resultado = snapshot.execute("PRAGMA quick_check").fetchone()[0]
+            if resultado != "ok":
+                raise sqlite3.DatabaseError(f"quick_check do snapshot falhou: {resultado}")
+        finally:
+            snapshot.close()
+    except Exception:
+        if os.path.exists(temporario):
+            os.remove(temporario)
         raise
+    finally:
+        origem.close()
+    
+    os.replace(temporario, destino)
+    return destino
 
 def init_database():
     """Inicializa o banco de dados com as tabelas necessárias"""
     try:
         conn = get_connection()
         try:
-            cursor = conn.cursor()
-            
-            # Tabela de usuários/responsáveis
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS responsaveis (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                codigo_casa TEXT NOT NULL,
-                nome TEXT NOT NULL,
-                funcao TEXT NOT NULL,
-                user_id INTEGER NOT NULL,
-                username TEXT,
-                data_cadastro TEXT NOT NULL,
-                ultima_atualizacao TEXT NOT NULL
-            )
-            ''')
-            
-            # Índices para otimizar buscas
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_codigo_casa ON responsaveis(codigo_casa)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_user_id ON responsaveis(user_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_nome ON responsaveis(nome)')
-            
-            # Tabela para registro de alertas enviados
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS alertas_enviados (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                codigo_casa TEXT NOT NULL,
-                tipo_alerta TEXT NOT NULL,
-                mensagem TEXT NOT NULL,
-                data_envio TEXT NOT NULL,
-                user_id INTEGER NOT NULL,
-                pdf_path TEXT
-            )
-            ''')
-            
-            # Tabela para registros de consentimento LGPD
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS consentimento_lgpd (
-                user_id INTEGER PRIMARY KEY,
-                data_consentimento TEXT NOT NULL,
-                ip_address TEXT,
-                detalhes TEXT
-            )
-            ''')
-            
-            # Tabela para administradores
-            cursor.execute('''
-            CREATE TABLE IF NOT EXISTS administradores (
-                user_id INTEGER PRIMARY KEY,
-                nome TEXT,
-                data_adicao TEXT NOT NULL
-            )
-            ''')
+            # Schema versionado (PRAGMA user_version): passos pendentes em ordem
+            relatorio = aplicar_migracoes(conn, pasta_backup=_pasta_backup())
+            migrado = any(passo['linhas'] for passo in relatorio['passos'])
+            
+            # Alertas no arquivo anexado: o principal fica só com os dados críticos
+            movidos = historico.separar_historico(conn) if _historico_separado else None
+            if movidos is not None:
+                conn.execute("VACUUM main")
+            
+            # Sync delta: triggers registram cada alteração para envio em lotes
+            if _sincronizador_delta:
+                instalar_captura_alteracoes(conn)
+            else:
+                remover_captura_alteracoes(conn)
             
             conn.commit()
             logger.info("✅ Banco de dados inicializado com sucesso")
             
+            if migrado:
+                _invalidar_caches()
+            
+            if _wal_habilitado:
+                iniciar_agendador_checkpoint()
+            iniciar_agendador_vacuum()
+            
             # 🔥 CORREÇÃO: Sincronizar após inicialização
             _sincronizar_para_onedrive_critico()
+            if movidos:
+                _sincronizar_historico_onedrive()
             
             return True
             
@@ -249,68 +1493,74 @@ def salvar_responsavel(codigo_casa, nome, funcao, user_id, username):
         fuso_horario = pytz.timezone('America/Sao_Paulo')
         agora = datetime.now(fuso_horario).strftime("%d/%m/%Y %H:%M:%S")
         
+        codigo_norm, nome_norm = chave_responsavel(codigo_casa, nome)
+        
         conn = get_connection()
         try:
             cursor = conn.cursor()
             
-            # Verificar se já existe cadastro com mesmo código + nome
+            # Leitura e escrita na mesma transação: a função anterior usada
+            # na resposta é a que o UPSERT encontrou, mesmo com outro processo
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute(
+                "SELECT id, funcao, user_id FROM responsaveis WHERE codigo_norm = ? AND nome_norm = ?",
+                (codigo_norm, nome_norm)
+            )
+            registro_existente = cursor.fetchone()
+            
+            # UPSERT pelo índice único: insere, ou atualiza se o cadastro é do
+            # mesmo usuário. Se o WHERE bloqueia a atualização (cadastro de
+            # outro usuário), a linha não é tocada e RETURNING não devolve nada
             cursor.execute('''
-            SELECT id, funcao, user_id FROM responsaveis 
-            WHERE UPPER(TRIM(codigo_casa)) = ? AND UPPER(TRIM(nome)) = ?
-            ''', (codigo_casa.strip().upper(), nome.strip().upper()))
+            INSERT INTO responsaveis 
+            (codigo_casa, nome, funcao, user_id, username, data_cadastro, ultima_atualizacao,
+             codigo_norm, nome_norm, data_cadastro_ts)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(codigo_norm, nome_norm) DO UPDATE SET
+                funcao = excluded.funcao,
+                username = excluded.username,
+                ultima_atualizacao = excluded.ultima_atualizacao
+            WHERE responsaveis.user_id = excluded.user_id
+            RETURNING id
+            ''', (
+                codigo_casa,
+                nome,
+                funcao,
+                user_id,
+                username,
+                agora,
+                agora,
+                codigo_norm,
+                nome_norm,
+                epoch_de_texto(agora)
+            ))
+            gravados = cursor.fetchall()
+            
+            if not gravados:
+                # Usuário diferente tentando cadastrar mesmo nome na mesma igreja
+                conn.rollback()
+                funcao_existente = registro_existente['funcao'] if registro_existente else ""
+                logger.warning(f"⚠️ Tentativa de cadastro duplicado: {codigo_casa} - {nome} (usuário {user_id})")
+                return False, f"nome_ja_cadastrado|{funcao_existente}"
             
-            registro_existente = cursor.fetchone()
+            conn.commit()
+            _atualizar_cache_responsaveis(cursor, atualizados=[gravados[0]['id']])
+            
+            # 🔥 CORREÇÃO CRÍTICA: Sincronizar após inserção/atualização
+            _sincronizar_para_onedrive_critico()
             
             if registro_existente:
-                if registro_existente['user_id'] == user_id:
-                    # Mesmo usuário atualizando sua própria função
-                    cursor.execute('''
-                    UPDATE responsaveis 
-                    SET funcao = ?, username = ?, ultima_atualizacao = ?
-                    WHERE id = ?
-                    ''', (funcao, username, agora, registro_existente['id']))
-                    
-                    conn.commit()
-                    
-                    # 🔥 CORREÇÃO CRÍTICA: Sincronizar após atualização
-                    _sincronizar_para_onedrive_critico()
-                    
-                    if registro_existente['funcao'] != funcao:
-                        logger.info(f"✅ FUNÇÃO ATUALIZADA E SINCRONIZADA: {nome} ({registro_existente['funcao']} → {funcao})")
-                        return True, f"funcao_atualizada|{registro_existente['funcao']}|{funcao}"
-                    else:
-                        logger.info(f"✅ DADOS ATUALIZADOS E SINCRONIZADOS: {nome}")
-                        return True, "dados_atualizados"
-                        
+                # Mesmo usuário atualizando sua própria função
+                if registro_existente['funcao'] != funcao:
+                    logger.info(f"✅ FUNÇÃO ATUALIZADA E SINCRONIZADA: {nome} ({registro_existente['funcao']} → {funcao})")
+                    return True, f"funcao_atualizada|{registro_existente['funcao']}|{funcao}"
                 else:
-                    # Usuário diferente tentando cadastrar mesmo nome na mesma igreja
-                    logger.warning(f"⚠️ Tentativa de cadastro duplicado: {codigo_casa} - {nome} (usuário {user_id})")
-                    return False, f"nome_ja_cadastrado|{registro_existente['funcao']}"
+                    logger.info(f"✅ DADOS ATUALIZADOS E SINCRONIZADOS: {nome}")
+                    return True, "dados_atualizados"
             
-            else:
-                # Não existe - inserir novo registro
-                cursor.execute('''
-                INSERT INTO responsaveis 
-                (codigo_casa, nome, funcao, user_id, username, data_cadastro, ultima_atualizacao)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    codigo_casa,
-                    nome,
-                    funcao,
-                    user_id,
-                    username,
-                    agora,
-                    agora
-                ))
-                
-                conn.commit()
-                
-                # 🔥 CORREÇÃO CRÍTICA: Sincronizar após inserção
-                _sincronizar_para_onedrive_critico()
-                
-                logger.info(f"🔥 NOVO CADASTRO INSERIDO E SINCRONIZADO: {codigo_casa} - {nome} ({funcao})")
-                logger.info(f"👥 Usuário ID: {user_id}, Username: {username}")
-                return True, "inserido"
+            logger.info(f"🔥 NOVO CADASTRO INSERIDO E SINCRONIZADO: {codigo_casa} - {nome} ({funcao})")
+            logger.info(f"👥 Usuário ID: {user_id}, Username: {username}")
+            return True, "inserido"
                 
         finally:
             conn.close()
@@ -319,33 +1569,38 @@ def salvar_responsavel(codigo_casa, nome, funcao, user_id, username):
         logger.error(f"❌ Erro ao salvar responsável: {e}")
         return False, str(e)
 
+def _buscar_por_codigo_nome(codigo, nome):
+    """Cadastro com o mesmo código e nome (sem acentos/maiúsculas), do cache ou do banco"""
+    chave = chave_responsavel(codigo, nome)
+    
+    if _cache_responsaveis:
+        return _cache_responsaveis.por_chave(chave)
+    
+    conn = get_connection(somente_leitura=True)
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT {_COLUNAS_RESPONSAVEIS} FROM responsaveis WHERE codigo_norm = ? AND nome_norm = ?",
+            chave
+        )
+        
+        resultado = cursor.fetchone()
+        return dict(resultado) if resultado else None
+        
+    finally:
+        conn.close()
+
 def verificar_cadastro_existente(codigo, nome, funcao=None):
     """Verifica se já existe um cadastro com o mesmo código e nome"""
     try:
-        conn = get_connection()
-        try:
-            cursor = conn.cursor()
-            
-            codigo_norm = codigo.strip().upper()
-            nome_norm = nome.strip().upper()
-            
-            cursor.execute('''
-            SELECT id, funcao FROM responsaveis 
-            WHERE UPPER(TRIM(codigo_casa)) = ? 
-              AND UPPER(TRIM(nome)) = ?
-            ''', (codigo_norm, nome_norm))
-            
-            resultado = cursor.fetchone()
-            
-            if resultado:
-                logger.info(f"📋 Cadastro já existe: {codigo} - {nome} (função atual: {resultado['funcao']})")
-                return True
-            
-            return False
-            
-        finally:
-            conn.close()
-            
+        resultado = _buscar_por_codigo_nome(codigo, nome)
+        
+        if resultado:
+            logger.info(f"📋 Cadastro já existe: {codigo} - {nome} (função atual: {resultado['funcao']})")
+            return True
+        
+        return False
+        
     except Exception as e:
         logger.error(f"❌ Erro ao verificar cadastro existente: {e}")
         return False
@@ -355,30 +1610,8 @@ def verificar_cadastro_existente_detalhado(codigo, nome):
     🔥 FUNÇÃO FALTANTE IMPLEMENTADA: Verifica se já existe um cadastro e retorna detalhes
     """
     try:
-        conn = get_connection()
-        try:
-            cursor = conn.cursor()
-            
-            # Normalizar para comparação
-            codigo_norm = codigo.strip().upper()
-            nome_norm = nome.strip().upper()
-            
-            cursor.execute('''
-            SELECT * FROM responsaveis 
-            WHERE UPPER(TRIM(codigo_casa)) = ? 
-              AND UPPER(TRIM(nome)) = ?
-            ''', (codigo_norm, nome_norm))
-            
-            resultado = cursor.fetchone()
-            
-            if resultado:
-                return dict(resultado)
-            
-            return None
-            
-        finally:
-            conn.close()
-            
+        return _buscar_por_codigo_nome(codigo, nome)
+        
     except Exception as e:
         logger.error(f"❌ Erro ao verificar cadastro existente detalhado: {e}")
         return None
@@ -386,11 +1619,14 @@ def verificar_cadastro_existente_detalhado(codigo, nome):
 def obter_cadastros_por_user_id(user_id):
     """Obtem todos os cadastros de um usuário pelo ID"""
     try:
-        conn = get_connection()
+        if _cache_responsaveis:
+            return _cache_responsaveis.por_user_id(user_id)
+        
+        conn = get_connection(somente_leitura=True)
         try:
             cursor = conn.cursor()
             cursor.execute(
-                "SELECT * FROM responsaveis WHERE user_id = ? ORDER BY codigo_casa, nome",
+                f"SELECT {_COLUNAS_RESPONSAVEIS} FROM responsaveis WHERE user_id = ? ORDER BY codigo_casa, nome",
                 (user_id,)
             )
             
@@ -413,6 +1649,9 @@ def remover_cadastros_por_user_id(user_id):
         conn = get_connection()
         try:
             cursor = conn.cursor()
+            cursor.execute("SELECT id FROM responsaveis WHERE user_id = ?", (user_id,))
+            ids = [row['id'] for row in cursor.fetchall()]
+            
             cursor.execute(
                 "DELETE FROM responsaveis WHERE user_id = ?",
                 (user_id,)
@@ -420,9 +1659,11 @@ def remover_cadastros_por_user_id(user_id):
             
             removidos = cursor.rowcount
             conn.commit()
+            _atualizar_cache_responsaveis(cursor, removidos=ids)
             
             # 🔥 CORREÇÃO: Sincronizar após remoção
             if removidos > 0:
+                solicitar_compactacao()
                 _sincronizar_para_onedrive_critico()
                 logger.info(f"🔥 {removidos} CADASTROS REMOVIDOS E SINCRONIZADOS para usuário {user_id}")
             
@@ -438,11 +1679,14 @@ def remover_cadastros_por_user_id(user_id):
 def buscar_responsaveis_por_codigo(codigo_casa):
     """Busca responsáveis pelo código da casa"""
     try:
-        conn = get_connection()
+        if _cache_responsaveis:
+            return _cache_responsaveis.por_codigo(codigo_casa)
+        
+        conn = get_connection(somente_leitura=True)
         try:
             cursor = conn.cursor()
             cursor.execute(
-                "SELECT * FROM responsaveis WHERE codigo_casa = ? ORDER BY nome",
+                f"SELECT {_COLUNAS_RESPONSAVEIS} FROM responsaveis WHERE codigo_casa = ? ORDER BY nome",
                 (codigo_casa,)
             )
             
@@ -462,11 +1706,15 @@ def buscar_responsaveis_por_codigo(codigo_casa):
 def buscar_responsavel_por_id(user_id):
     """Busca responsável pelo ID do Telegram"""
     try:
-        conn = get_connection()
+        if _cache_responsaveis:
+            cadastros = _cache_responsaveis.por_user_id(user_id)
+            return min(cadastros, key=lambda r: r['id']) if cadastros else None
+        
+        conn = get_connection(somente_leitura=True)
         try:
             cursor = conn.cursor()
             cursor.execute(
-                "SELECT * FROM responsaveis WHERE user_id = ?",
+                f"SELECT {_COLUNAS_RESPONSAVEIS} FROM responsaveis WHERE user_id = ?",
                 (user_id,)
             )
             
@@ -485,10 +1733,13 @@ def buscar_responsavel_por_id(user_id):
 def listar_todos_responsaveis():
     """Retorna todos os responsáveis cadastrados"""
     try:
-        conn = get_connection()
+        if _cache_responsaveis:
+            return _cache_responsaveis.listar_todos()
+        
+        conn = get_connection(somente_leitura=True)
         try:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM responsaveis ORDER BY codigo_casa, nome")
+            cursor.execute(f"SELECT {_COLUNAS_RESPONSAVEIS} FROM responsaveis ORDER BY codigo_casa, nome")
             
             resultados = []
             for row in cursor.fetchall():
@@ -503,6 +1754,76 @@ def listar_todos_responsaveis():
         logger.error(f"❌ Erro ao listar todos responsáveis: {e}")
         return []
 
+def listar_conflitos_cadastro():
+    """
+    Cadastros que colidiram na criação do índice único (migração v2)
+    
+    Continuam em responsaveis com o sufixo "#<id>" em nome_norm até um
+    administrador remover ou editar o registro duplicado.
+    
+    Returns:
+        list: dicts com id, id_original, codigo_casa, nome, funcao, user_id e data_deteccao
+    """
+    try:
+        conn = get_connection(somente_leitura=True)
+        try:
+            cursor = conn.cursor()
+            cursor.execute('''
+            SELECT r.id, c.id_original, r.codigo_casa, r.nome, r.funcao, r.user_id, c.data_deteccao
+            FROM responsaveis_conflitos c
+            JOIN responsaveis r ON r.id = c.id_responsavel
+            WHERE r.nome_norm = c.nome_norm || '#' || r.id
+            ORDER BY r.codigo_casa, r.nome
+            ''')
+            return [dict(row) for row in cursor.fetchall()]
+        finally:
+            conn.close()
+            
+    except sqlite3.OperationalError:
+        return []  # banco anterior à tabela de conflitos
+    except Exception as e:
+        logger.error(f"❌ Erro ao listar conflitos de cadastro: {e}")
+        return []
+
+def listar_cadastros_por_periodo(inicio=None, fim=None):
+    """
+    Responsáveis cadastrados no intervalo [inicio, fim), mais recentes primeiro
+    
+    Args:
+        inicio, fim: datetime (sem fuso = horário de Brasília), texto
+            dd/mm/YYYY HH:MM:SS ou epoch; None = sem limite
+    
+    Returns:
+        list: cadastros como dicionários
+    """
+    try:
+        where_clauses = []
+        params = []
+        inicio, fim = _para_epoch(inicio), _para_epoch(fim)
+        if inicio is not None:
+            where_clauses.append("data_cadastro_ts >= ?")
+            params.append(inicio)
+        if fim is not None:
+            where_clauses.append("data_cadastro_ts < ?")
+            params.append(fim)
+        
+        query = f"SELECT {_COLUNAS_RESPONSAVEIS} FROM responsaveis"
+        if where_clauses:
+            query += " WHERE " + " AND ".join(where_clauses)
+        query += " ORDER BY data_cadastro_ts DESC, id DESC"
+        
+        conn = get_connection(somente_leitura=True)
+        try:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            return [dict(row) for row in cursor.fetchall()]
+        finally:
+            conn.close()
+            
+    except Exception as e:
+        logger.error(f"❌ Erro ao listar cadastros por período: {e}")
+        return []
+
 def remover_responsavel(user_id):
     """Remove todos os registros de um usuário pelo ID"""
     try:
@@ -510,11 +1831,13 @@ def remover_responsavel(user_id):
         try:
             cursor = conn.cursor()
             
-            cursor.execute("SELECT COUNT(*) as total FROM responsaveis WHERE user_id = ?", (user_id,))
-            count = cursor.fetchone()['total']
+            cursor.execute("SELECT id FROM responsaveis WHERE user_id = ?", (user_id,))
+            ids = [row['id'] for row in cursor.fetchall()]
+            count = len(ids)
             
             cursor.execute("DELETE FROM responsaveis WHERE user_id = ?", (user_id,))
             conn.commit()
+            _atualizar_cache_responsaveis(cursor, removidos=ids)
             
             # 🔥 CORREÇÃO: Sincronizar após remoção
             if count > 0:
@@ -537,17 +1860,18 @@ def remover_responsavel_especifico(codigo_casa, nome, funcao=None):
             cursor = conn.cursor()
             
             if funcao:
-                cursor.execute(
-                    "DELETE FROM responsaveis WHERE codigo_casa = ? AND nome = ? AND funcao = ?", 
-                    (codigo_casa, nome, funcao)
-                )
+                filtro = "codigo_casa = ? AND nome = ? AND funcao = ?"
+                parametros = (codigo_casa, nome, funcao)
             else:
-                cursor.execute(
-                    "DELETE FROM responsaveis WHERE codigo_casa = ? AND nome = ?", 
-                    (codigo_casa, nome)
-                )
+                filtro = "codigo_casa = ? AND nome = ?"
+                parametros = (codigo_casa, nome)
             
+            cursor.execute(f"SELECT id FROM responsaveis WHERE {filtro}", parametros)
+            ids = [row['id'] for row in cursor.fetchall()]
+            
+            cursor.execute(f"DELETE FROM responsaveis WHERE {filtro}", parametros)
             conn.commit()
+            _atualizar_cache_responsaveis(cursor, removidos=ids)
             
             # 🔥 CORREÇÃO: Sincronizar após remoção
             if cursor.rowcount > 0:
@@ -580,6 +1904,16 @@ def editar_responsavel(id_registro, campos):
         try:
             cursor = conn.cursor()
             
+            # Código ou nome alterado: recalcular a chave de duplicidade
+            if 'codigo_casa' in campos_update or 'nome' in campos_update:
+                cursor.execute("SELECT codigo_casa, nome FROM responsaveis WHERE id = ?", (id_registro,))
+                atual = cursor.fetchone()
+                if atual:
+                    campos_update['codigo_norm'], campos_update['nome_norm'] = chave_responsavel(
+                        campos_update.get('codigo_casa', atual['codigo_casa']),
+                        campos_update.get('nome', atual['nome'])
+                    )
+            
             campos_set = ', '.join([f"{campo} = ?" for campo in campos_update.keys()])
             valores = list(campos_update.values())
             valores.append(id_registro)
@@ -590,6 +1924,8 @@ def editar_responsavel(id_registro, campos):
             conn.commit()
             
             sucesso = cursor.rowcount > 0
+            if sucesso:
+                _atualizar_cache_responsaveis(cursor, atualizados=[id_registro])
             
             # 🔥 CORREÇÃO: Sincronizar após edição
             if sucesso:
@@ -601,6 +1937,9 @@ def editar_responsavel(id_registro, campos):
         finally:
             conn.close()
     
+    except sqlite3.IntegrityError:
+        logger.warning(f"⚠️ Edição recusada - já existe cadastro com o mesmo código e nome (ID {id_registro})")
+        return False
     except Exception as e:
         logger.error(f"❌ Erro ao editar responsável: {e}")
         return False
@@ -617,11 +1956,14 @@ def limpar_todos_responsaveis():
             
             cursor.execute("DELETE FROM responsaveis")
             conn.commit()
+            if _cache_responsaveis:
+                _cache_responsaveis.limpar()
             
             logger.info(f"🔥 REMOVIDOS {count} RESPONSÁVEIS DO BANCO DE DADOS")
             
             # 🔥 CORREÇÃO: Sincronizar após limpeza
             if count > 0:
+                solicitar_compactacao()
                 _sincronizar_para_onedrive_critico()
                 logger.info("🔥 LIMPEZA SINCRONIZADA COM ONEDRIVE")
             
@@ -639,15 +1981,9 @@ def limpar_todos_responsaveis():
 # ============================================
 
 def verificar_admin(user_id):
-    """Verifica se o usuário é um administrador"""
+    """Verifica se o usuário é um administrador (ADMIN_IDS ou tabela, em memória)"""
     try:
-        conn = get_connection()
-        try:
-            cursor = conn.cursor()
-            cursor.execute("SELECT user_id FROM administradores WHERE user_id = ?", (user_id,))
-            return cursor.fetchone() is not None
-        finally:
-            conn.close()
+        return _registro_admins.contem(int(user_id))
     except Exception as e:
         logger.error(f"❌ Erro ao verificar administrador: {e}")
         return False
@@ -655,7 +1991,7 @@ def verificar_admin(user_id):
 def listar_admins():
     """Lista todos os administradores"""
     try:
-        conn = get_connection()
+        conn = get_connection(somente_leitura=True)
         try:
             cursor = conn.cursor()
             cursor.execute("SELECT user_id FROM administradores")
@@ -669,20 +2005,25 @@ def listar_admins():
 def adicionar_admin(user_id, nome=None):
     """Adiciona um novo administrador - COM SYNC"""
     try:
-        if verificar_admin(user_id):
-            return False, "já é admin"
-        
         fuso_horario = pytz.timezone('America/Sao_Paulo')
         agora = datetime.now(fuso_horario).strftime("%d/%m/%Y %H:%M:%S")
         
         conn = get_connection()
         try:
             cursor = conn.cursor()
+            
+            # Consulta a tabela (não o registro em memória): ids de ADMIN_IDS
+            # também precisam ser gravados por inicializar_admins_padrao
+            cursor.execute("SELECT user_id FROM administradores WHERE user_id = ?", (user_id,))
+            if cursor.fetchone():
+                return False, "já é admin"
+            
             cursor.execute(
                 "INSERT INTO administradores (user_id, nome, data_adicao) VALUES (?, ?, ?)",
                 (user_id, nome, agora)
             )
             conn.commit()
+            _registro_admins.aplicar(adicionados=[int(user_id)])
             
             # 🔥 CORREÇÃO: Sincronizar após adicionar admin
             _sincronizar_para_onedrive_critico()
@@ -705,6 +2046,7 @@ def remover_admin(user_id):
             cursor = conn.cursor()
             cursor.execute("DELETE FROM administradores WHERE user_id = ?", (user_id,))
             conn.commit()
+            _registro_admins.aplicar(removidos=[int(user_id)])
             
             sucesso = cursor.rowcount > 0
             
@@ -763,6 +2105,8 @@ def registrar_consentimento_lgpd(user_id, ip_address=None, detalhes=None):
                 )
                 
             conn.commit()
+            if _cache_lgpd:
+                _cache_lgpd.aplicar(user_id, True)
             
             # 🔥 CORREÇÃO: Sincronizar após registrar consentimento
             _sincronizar_para_onedrive_critico()
@@ -778,15 +2122,11 @@ def registrar_consentimento_lgpd(user_id, ip_address=None, detalhes=None):
         return False
 
 def verificar_consentimento_lgpd(user_id):
-    """Verifica se o usuário deu consentimento LGPD"""
+    """Verifica se o usuário deu consentimento LGPD (cache em memória com entradas negativas)"""
     try:
-        conn = get_connection()
-        try:
-            cursor = conn.cursor()
-            cursor.execute("SELECT user_id FROM consentimento_lgpd WHERE user_id = ?", (user_id,))
-            return cursor.fetchone() is not None
-        finally:
-            conn.close()
+        if _cache_lgpd:
+            return _cache_lgpd.verificar(user_id)
+        return _consultar_consentimento(user_id)
     except Exception as e:
         logger.error(f"❌ Erro ao verificar consentimento LGPD: {e}")
         return False
@@ -799,11 +2139,14 @@ def remover_consentimento_lgpd(user_id):
             cursor = conn.cursor()
             cursor.execute("DELETE FROM consentimento_lgpd WHERE user_id = ?", (user_id,))
             conn.commit()
+            if _cache_lgpd:
+                _cache_lgpd.aplicar(user_id, False)
             
             sucesso = cursor.rowcount > 0
             
             # 🔥 CORREÇÃO: Sincronizar após remoção
             if sucesso:
+                solicitar_compactacao()
                 _sincronizar_para_onedrive_critico()
             
             return sucesso
@@ -831,15 +2174,15 @@ def registrar_alerta_enviado(codigo_casa, tipo_alerta, mensagem, user_id, pdf_pa
             cursor.execute(
                 """
                 INSERT INTO alertas_enviados 
-                (codigo_casa, tipo_alerta, mensagem, data_envio, user_id, pdf_path)
-                VALUES (?, ?, ?, ?, ?, ?)
+                (codigo_casa, tipo_alerta, mensagem, data_envio, user_id, pdf_path, data_envio_ts)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
                 """,
-                (codigo_casa, tipo_alerta, mensagem, agora, user_id, pdf_path)
+                (codigo_casa, tipo_alerta, mensagem, agora, user_id, pdf_path, epoch_de_texto(agora))
             )
             conn.commit()
             
-            # 🔥 CORREÇÃO: Sincronizar após registrar alerta
-            _sincronizar_para_onedrive_critico()
+            # Histórico de alertas: fila própria, sem reenviar os dados críticos
+            _sincronizar_historico_onedrive()
             
             return True
             
@@ -853,7 +2196,7 @@ def registrar_alerta_enviado(codigo_casa, tipo_alerta, mensagem, user_id, pdf_pa
 def listar_alertas_enviados(user_id=None, codigo_casa=None, limite=100):
     """Lista alertas enviados, com filtragem opcional"""
     try:
-        conn = get_connection()
+        conn = get_connection(somente_leitura=True)
         try:
             cursor = conn.cursor()
             
@@ -872,7 +2215,8 @@ def listar_alertas_enviados(user_id=None, codigo_casa=None, limite=100):
             if where_clauses:
                 query += " WHERE " + " AND ".join(where_clauses)
                 
-            query += " ORDER BY data_envio DESC LIMIT ?"
+            # Mais recentes primeiro pelos índices (codigo_casa|user_id, data_envio_ts)
+            query += " ORDER BY data_envio_ts DESC, id DESC LIMIT ?"
             params.append(limite)
             
             cursor.execute(query, params)
@@ -890,55 +2234,152 @@ def listar_alertas_enviados(user_id=None, codigo_casa=None, limite=100):
         logger.error(f"❌ Erro ao listar alertas enviados: {e}")
         return []
 
-def obter_estatisticas_alertas():
-    """Obtém estatísticas sobre alertas enviados"""
+def _para_epoch(momento):
+    """datetime (sem fuso = horário de Brasília), texto dd/mm/YYYY HH:MM:SS ou epoch -> epoch"""
+    if momento is None or isinstance(momento, (int, float)):
+        return momento
+    if isinstance(momento, str):
+        epoch = epoch_de_texto(momento)
+        if epoch is None:
+            raise ValueError(f"Data inválida: {momento}")
+        return epoch
+    if momento.tzinfo is None:
+        momento = pytz.timezone('America/Sao_Paulo').localize(momento)
+    return int(momento.timestamp())
+
+def _filtro_periodo(inicio, fim, codigo_casa, user_id):
+    """Cláusula WHERE de intervalo [inicio, fim) sobre data_envio_ts"""
+    where_clauses = []
+    params = []
+    
+    if codigo_casa:
+        where_clauses.append("codigo_casa = ?")
+        params.append(codigo_casa)
+    if user_id:
+        where_clauses.append("user_id = ?")
+        params.append(user_id)
+    
+    inicio, fim = _para_epoch(inicio), _para_epoch(fim)
+    if inicio is not None:
+        where_clauses.append("data_envio_ts >= ?")
+        params.append(inicio)
+    if fim is not None:
+        where_clauses.append("data_envio_ts < ?")
+        params.append(fim)
+    
+    return (" WHERE " + " AND ".join(where_clauses) if where_clauses else ""), params
+
+def listar_alertas_por_periodo(inicio=None, fim=None, codigo_casa=None, user_id=None, limite=100):
+    """
+    Lista alertas enviados no intervalo [inicio, fim), mais recentes primeiro
+    
+    Args:
+        inicio, fim: datetime (sem fuso = horário de Brasília), texto
+            dd/mm/YYYY HH:MM:SS ou epoch; None = sem limite
+        codigo_casa (str): filtra pela casa (índice codigo_casa, data_envio_ts)
+        user_id (int): filtra pelo usuário (índice user_id, data_envio_ts)
+        limite (int): máximo de alertas (None = todos)
+    
+    Returns:
+        list: alertas como dicionários
+    """
     try:
-        conn = get_connection()
+        where, params = _filtro_periodo(inicio, fim, codigo_casa, user_id)
+        query = f"SELECT * FROM alertas_enviados{where} ORDER BY data_envio_ts DESC, id DESC"
+        if limite is not None:
+            query += " LIMIT ?"
+            params.append(limite)
+        
+        conn = get_connection(somente_leitura=True)
         try:
             cursor = conn.cursor()
+            cursor.execute(query, params)
+            return [dict(row) for row in cursor.fetchall()]
+        finally:
+            conn.close()
             
-            # Total de alertas
-            cursor.execute("SELECT COUNT(*) as total FROM alertas_enviados")
-            total = cursor.fetchone()['total']
-            
-            # Contagem por tipo
-            cursor.execute("""
-                SELECT tipo_alerta, COUNT(*) as contagem 
-                FROM alertas_enviados 
-                GROUP BY tipo_alerta
-                ORDER BY contagem DESC
-            """)
-            
-            tipos = {}
-            for row in cursor.fetchall():
-                tipos[row['tipo_alerta']] = row['contagem']
-            
-            # Contagem por mês/ano
-            cursor.execute("""
-                SELECT 
-                    substr(data_envio, 7, 4) || '-' || substr(data_envio, 4, 2) as mes_ano,
-                    COUNT(*) as contagem
-                FROM alertas_enviados
-                GROUP BY mes_ano
-                ORDER BY mes_ano DESC
-            """)
-            
-            por_periodo = {}
-            for row in cursor.fetchall():
-                por_periodo[row['mes_ano']] = row['contagem']
-            
-            return {
-                'total': total,
-                'por_tipo': tipos,
-                'por_periodo': por_periodo
-            }
+    except Exception as e:
+        logger.error(f"❌ Erro ao listar alertas por período: {e}")
+        return []
+
+def contar_alertas_por_periodo(inicio=None, fim=None, codigo_casa=None, user_id=None):
+    """
+    Conta alertas enviados no intervalo [inicio, fim) - mesmos filtros de listar_alertas_por_periodo
+    
+    Returns:
+        int: quantidade de alertas (0 em caso de erro)
+    """
+    try:
+        where, params = _filtro_periodo(inicio, fim, codigo_casa, user_id)
+        
+        conn = get_connection(somente_leitura=True)
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT COUNT(*) FROM alertas_enviados{where}", params)
+            return cursor.fetchone()[0]
+        finally:
+            conn.close()
             
+    except Exception as e:
+        logger.error(f"❌ Erro ao contar alertas por período: {e}")
+        return 0
+
+def obter_estatisticas_alertas():
+    """
+    Obtém estatísticas sobre alertas enviados
+    
+    Lidas das tabelas de resumo mantidas por triggers (resumo_alertas.py):
+    o custo não cresce com o histórico de alertas.
+    """
+    try:
+        conn = get_connection(somente_leitura=True)
+        try:
+            return ler_resumo(conn)
         finally:
             conn.close()
             
     except Exception as e:
         logger.error(f"❌ Erro ao obter estatísticas de alertas: {e}")
-        return {'total': 0, 'por_tipo': {}, 'por_periodo': {}}
+        return {'total': 0, 'por_tipo': {}, 'por_periodo': {}, 'por_casa': {}}
+
+def reconstruir_estatisticas_alertas(verificar=False):
+    """
+    Recalcula o resumo de alertas a partir de alertas_enviados (verificação de consistência)
+    
+    Args:
+        verificar (bool): True = só compara, sem regravar
+    
+    Returns:
+        dict: contagens divergentes por tabela de resumo, ou None em caso de erro
+    """
+    try:
+        conn = get_connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            divergencias = reconstruir_resumo(conn, verificar=verificar)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        
+        if any(divergencias.values()):
+            logger.warning(f"⚠️ Resumo de alertas divergente: {divergencias}")
+            if not verificar:
+                _sincronizar_historico_onedrive()
+        else:
+            logger.info("✅ Resumo de alertas consistente")
+        return divergencias
+        
+    except Exception as e:
+        logger.error(f"❌ Erro ao reconstruir estatísticas de alertas: {e}")
+        return None
+
+def _pasta_backup():
+    """Pasta dos backups locais (manuais e pré-migração)"""
+    RENDER_DISK_PATH = os.environ.get("RENDER_DISK_PATH", "/opt/render/project/disk")
+    return os.path.join(RENDER_DISK_PATH, "shared_data", "backup")
 
 def fazer_backup_banco():
     """Cria um backup do banco de dados"""
@@ -952,14 +2393,15 @@ def fazer_backup_banco():
         agora = datetime.now(fuso_horario)
         timestamp = agora.strftime("%Y%m%d%H%M%S")
         
-        RENDER_DISK_PATH = os.environ.get("RENDER_DISK_PATH", "/opt/render/project/disk")
-        DATA_DIR = os.path.join(RENDER_DISK_PATH, "shared_data")
-        backup_dir = os.path.join(DATA_DIR, "backup")
+        backup_dir = _pasta_backup()
         os.makedirs(backup_dir, exist_ok=True)
         
         backup_file = os.path.join(backup_dir, f"backup_{timestamp}.db")
         
-        shutil.copy2(db_path, backup_file)
+        # API de backup: cópia consistente mesmo com escritas em andamento
+        criar_snapshot_consistente(backup_file)
+        if _historico_separado:
+            criar_snapshot_consistente(historico.caminho_historico(backup_file), esquema=historico.ESQUEMA)
         
         logger.info(f"✅ Backup local criado: {backup_file}")
         return backup_file
@@ -0,0 +1,578 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+📁 ARQUIVO: utils/database/delta_sync.py
+📦 FUNÇÃO: Sincronização incremental (delta) do banco com o OneDrive
+🔧 DESCRIÇÃO: Triggers registram cada alteração em `registro_alteracoes`;
+   lotes JSON com as alterações novas são enviados ao OneDrive e,
+   periodicamente, compactados em um snapshot completo. O banco é
+   reconstruído a partir do último snapshot + lotes posteriores.
+
+Layout remoto (pasta Alerta/delta):
+    snapshot_000000001234.db          banco completo até a alteração 1234
+    lote_000000001235_000000001240.json   alterações 1235..1240
+
+Reconstrução manual a partir de arquivos locais:
+    python -m utils.database.delta_sync <pasta_com_arquivos> <destino.db>
+"""
+
+import json
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import logging
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .. import compressao
+
+logger = logging.getLogger("CCB-Alerta-Bot.database.delta")
+
+# Tabelas cujas alterações são capturadas
+TABELAS_CAPTURADAS = ("responsaveis", "alertas_enviados", "consentimento_lgpd", "administradores")
+
+SUBPASTA_REMOTA = "delta"
+FORMATO_LOTE = 1
+
+_PADRAO_SNAPSHOT = re.compile(r"^snapshot_(\d{12})\.db$")
+_PADRAO_LOTE = re.compile(r"^lote_(\d{12})_(\d{12})\.json$")
+
+
+def nome_snapshot(seq: int) -> str:
+    return f"snapshot_{seq:012d}.db"
+
+
+def nome_lote(primeiro: int, ultimo: int) -> str:
+    return f"lote_{primeiro:012d}_{ultimo:012d}.json"
+
+
+# ============================================
+# CAPTURA DE ALTERAÇÕES (TRIGGERS)
+# ============================================
+
+def _colunas(conn, tabela: str) -> List[str]:
+    # Só o arquivo principal: tabelas de bancos anexados (ex: histórico) não são capturadas
+    return [linha[1] for linha in conn.execute(f"PRAGMA main.table_info({tabela})").fetchall()]
+
+
+def instalar_captura_alteracoes(conn, tabelas=TABELAS_CAPTURADAS):
+    """
+    Cria o registro de alterações e (re)cria os triggers de captura
+
+    Os triggers são recriados a cada chamada para refletir as colunas
+    atuais de cada tabela (ex: após migrações de schema).
+
+    Args:
+        conn: conexão de escrita (o commit fica a cargo de quem chama)
+        tabelas: tabelas a capturar
+    """
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS registro_alteracoes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        tabela TEXT NOT NULL,
+        operacao TEXT NOT NULL,
+        chave INTEGER NOT NULL,
+        dados TEXT,
+        criado_em TEXT NOT NULL
+    )
+    ''')
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS controle_delta (
+        chave TEXT PRIMARY KEY,
+        valor TEXT
+    )
+    ''')
+
+    agora = "strftime('%Y-%m-%dT%H:%M:%fZ', 'now')"
+
+    for tabela in tabelas:
+        colunas = _colunas(conn, tabela)
+        if not colunas:
+            # Tabela mantida em outro arquivo (ex: alertas no histórico anexado)
+            remover_captura_alteracoes(conn, (tabela,))
+            continue
+        novo = "json_object(" + ", ".join(f"'{c}', NEW.{c}" for c in colunas) + ")"
+
+        for operacao, sufixo, chave, dados in (
+            ("INSERT", "ins", "NEW.rowid", novo),
+            ("UPDATE", "upd", "OLD.rowid", novo),
+            ("DELETE", "del", "OLD.rowid", "NULL"),
+        ):
+            conn.execute(f"DROP TRIGGER IF EXISTS trg_delta_{tabela}_{sufixo}")
+            conn.execute(f'''
+            CREATE TRIGGER trg_delta_{tabela}_{sufixo} AFTER {operacao} ON {tabela}
+            BEGIN
+                INSERT INTO registro_alteracoes (tabela, operacao, chave, dados, criado_em)
+                VALUES ('{tabela}', '{operacao}', {chave}, {dados}, {agora});
+            END
+            ''')
+
+
+def remover_captura_alteracoes(conn, tabelas=TABELAS_CAPTURADAS):
+    """Remove os triggers de captura (o registro existente é mantido)"""
+    for tabela in tabelas:
+        for sufixo in ("ins", "upd", "del"):
+            conn.execute(f"DROP TRIGGER IF EXISTS trg_delta_{tabela}_{sufixo}")
+
+
+def obter_controle(conn, chave: str, padrao: int = 0) -> int:
+    """Lê um contador inteiro de `controle_delta`"""
+    linha = conn.execute("SELECT valor FROM controle_delta WHERE chave = ?", (chave,)).fetchone()
+    return int(linha[0]) if linha and linha[0] is not None else padrao
+
+
+def definir_controle(conn, chave: str, valor: int):
+    """Grava um contador inteiro em `controle_delta`"""
+    conn.execute(
+        "INSERT OR REPLACE INTO controle_delta (chave, valor) VALUES (?, ?)",
+        (chave, str(valor))
+    )
+
+
+def ultimo_seq(conn) -> int:
+    """Maior número de alteração já atribuído neste banco"""
+    linha = conn.execute(
+        "SELECT seq FROM sqlite_sequence WHERE name = 'registro_alteracoes'"
+    ).fetchone()
+    return int(linha[0]) if linha else 0
+
+
+def _definir_ultimo_seq(conn, seq: int):
+    """Faz a numeração local continuar após `seq` (após reconstrução)"""
+    if conn.execute(
+        "UPDATE sqlite_sequence SET seq = ? WHERE name = 'registro_alteracoes'", (seq,)
+    ).rowcount == 0:
+        conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('registro_alteracoes', ?)", (seq,))
+
+
+# ============================================
+# LOTES E REPLAY
+# ============================================
+
+def ler_alteracoes(conn, apos_seq: int, limite: Optional[int] = None) -> List[Dict]:
+    """
+    Alterações registradas depois de `apos_seq`, em ordem
+
+    Returns:
+        List[Dict]: seq, tabela, operacao, chave e dados (dict ou None)
+    """
+    sql = "SELECT seq, tabela, operacao, chave, dados FROM registro_alteracoes WHERE seq > ? ORDER BY seq"
+    parametros = [apos_seq]
+    if limite:
+        sql += " LIMIT ?"
+        parametros.append(limite)
+
+    return [
+        {
+            "seq": seq,
+            "tabela": tabela,
+            "operacao": operacao,
+            "chave": chave,
+            "dados": json.loads(dados) if dados else None,
+        }
+        for seq, tabela, operacao, chave, dados in conn.execute(sql, parametros).fetchall()
+    ]
+
+
+def escrever_lote(caminho: str, alteracoes: List[Dict]):
+    """Grava um lote de alterações em JSON compacto"""
+    lote = {
+        "formato": FORMATO_LOTE,
+        "primeiro_seq": alteracoes[0]["seq"],
+        "ultimo_seq": alteracoes[-1]["seq"],
+        "gerado_em": datetime.now().isoformat(),
+        "alteracoes": alteracoes,
+    }
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(lote, f, ensure_ascii=False, separators=(",", ":"))
+
+
+def aplicar_alteracoes(conn, alteracoes: List[Dict]):
+    """
+    Reaplica alterações em ordem (idempotente)
+
+    INSERT/UPDATE gravam a linha completa; DELETE remove pelo rowid.
+    Tabelas e colunas são validadas contra o schema do banco de destino.
+    A linha anterior é sempre removida com DELETE explícito (o REPLACE
+    implícito não dispara triggers, ex: resumo de alertas).
+    """
+    colunas_por_tabela = {tabela: set(_colunas(conn, tabela)) for tabela in TABELAS_CAPTURADAS}
+
+    for alteracao in alteracoes:
+        tabela = alteracao["tabela"]
+        if tabela not in colunas_por_tabela:
+            raise ValueError(f"Tabela não capturada no lote: {tabela}")
+        if not colunas_por_tabela[tabela]:
+            # Lote anterior à separação do histórico: a linha vive em outro arquivo
+            continue
+
+        conn.execute(f"DELETE FROM {tabela} WHERE rowid = ?", (alteracao["chave"],))
+
+        if alteracao["operacao"] in ("INSERT", "UPDATE"):
+            dados = alteracao["dados"]
+            desconhecidas = set(dados) - colunas_por_tabela[tabela]
+            if desconhecidas:
+                raise ValueError(f"Colunas desconhecidas em {tabela}: {sorted(desconhecidas)}")
+            colunas = list(dados)
+            conn.execute(
+                f"INSERT OR REPLACE INTO {tabela} ({', '.join(colunas)}) "
+                f"VALUES ({', '.join('?' for _ in colunas)})",
+                [dados[c] for c in colunas]
+            )
+
+
+def reconstruir_banco(destino: str, snapshot_path: str, lotes_paths: List[str]) -> int:
+    """
+    Reconstrói um banco a partir de um snapshot e dos lotes seguintes
+
+    Os lotes são aplicados em ordem de seq; lotes já contidos no snapshot
+    são ignorados e uma lacuna na sequência interrompe a reconstrução.
+
+    Args:
+        destino (str): Arquivo do banco reconstruído (sobrescrito)
+        snapshot_path (str): Snapshot base (snapshot_<seq>.db), bruto ou
+            comprimido (cabeçalho CCBZ, como enviado ao OneDrive)
+        lotes_paths (List[str]): Lotes JSON (qualquer ordem)
+
+    Returns:
+        int: seq da última alteração aplicada
+    """
+    encontrado = _PADRAO_SNAPSHOT.match(os.path.basename(snapshot_path))
+    seq_base = int(encontrado.group(1)) if encontrado else 0
+
+    temporario = destino + ".tmp"
+    shutil.copyfile(snapshot_path, temporario)
+
+    try:
+        # Snapshot copiado da pasta do OneDrive pode estar comprimido
+        compressao.descomprimir_se_necessario(temporario)
+        conn = sqlite3.connect(temporario)
+        try:
+            atual = seq_base
+
+            lotes = []
+            for caminho in lotes_paths:
+                with open(caminho, encoding="utf-8") as f:
+                    lotes.append(json.load(f))
+            lotes.sort(key=lambda lote: lote["primeiro_seq"])
+
+            for lote in lotes:
+                if lote["ultimo_seq"] <= atual:
+                    continue
+                if lote["primeiro_seq"] > atual + 1:
+                    raise ValueError(f"Lacuna na sequência: esperado {atual + 1}, lote começa em {lote['primeiro_seq']}")
+                pendentes = [a for a in lote["alteracoes"] if a["seq"] > atual]
+                aplicar_alteracoes(conn, pendentes)
+                atual = lote["ultimo_seq"]
+
+            # Operações reaplicadas não são alterações novas deste banco
+            instalar_captura_alteracoes(conn)
+            conn.execute("DELETE FROM registro_alteracoes")
+            _definir_ultimo_seq(conn, atual)
+            definir_controle(conn, "seq_enviado", atual)
+            definir_controle(conn, "seq_snapshot", seq_base)
+            conn.commit()
+
+            resultado = conn.execute("PRAGMA quick_check").fetchone()[0]
+            if resultado != "ok":
+                raise sqlite3.DatabaseError(f"quick_check do banco reconstruído falhou: {resultado}")
+        finally:
+            conn.close()
+    except Exception:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+    os.replace(temporario, destino)
+    return atual
+
+
+def classificar_arquivos_remotos(nomes: List[str]) -> Tuple[Dict[int, str], Dict[Tuple[int, int], str]]:
+    """Separa snapshots ({seq: nome}) e lotes ({(primeiro, ultimo): nome})"""
+    snapshots, lotes = {}, {}
+    for nome in nomes:
+        snapshot = _PADRAO_SNAPSHOT.match(nome)
+        lote = _PADRAO_LOTE.match(nome)
+        if snapshot:
+            snapshots[int(snapshot.group(1))] = nome
+        elif lote:
+            lotes[(int(lote.group(1)), int(lote.group(2)))] = nome
+    return snapshots, lotes
+
+
+# ============================================
+# SINCRONIZADOR
+# ============================================
+
+class SincronizadorDelta:
+    """
+    Envia lotes de alterações e snapshots compactados ao OneDrive
+
+    Usado pela fila de upload (enviar_pendentes) e pelo atualizador em
+    segundo plano (restaurar). O custo de cada sync é proporcional às
+    alterações novas, não ao tamanho do banco.
+    """
+
+    def __init__(self, manager, get_connection: Callable, criar_snapshot: Callable[[str], str],
+                 compactar_apos: int = 500, db_path_atual: Optional[Callable[[], str]] = None):
+        """
+        Args:
+            manager: OneDriveManager (upload_arquivo/download_arquivo/listar_arquivos/remover_arquivo)
+            get_connection: função(somente_leitura=False) -> conexão do banco em uso
+            criar_snapshot: função(destino) -> snapshot consistente do banco em uso
+            compactar_apos: alterações desde o último snapshot que disparam a compactação
+            db_path_atual: função() -> caminho do banco em uso (para ler o seq local)
+        """
+        self.manager = manager
+        self._get_connection = get_connection
+        self._criar_snapshot = criar_snapshot
+        self.compactar_apos = compactar_apos
+        self._db_path_atual = db_path_atual
+
+        self._metricas = {
+            "lotes_enviados": 0,
+            "alteracoes_enviadas": 0,
+            "bytes_enviados": 0,
+            "compactacoes": 0,
+            "restauracoes": 0,
+            "ultimo_seq_enviado": None,
+            "ultimo_snapshot_seq": None,
+        }
+
+    # ------------------------------------------------------------------
+    # Upload
+    # ------------------------------------------------------------------
+
+    def _estado_local(self) -> Tuple[int, int]:
+        """(seq_enviado, seq_snapshot) do banco em uso; seq_snapshot -1 = nenhum snapshot enviado"""
+        conn = self._get_connection(somente_leitura=True)
+        try:
+            return obter_controle(conn, "seq_enviado"), obter_controle(conn, "seq_snapshot", -1)
+        finally:
+            conn.close()
+
+    def _marcar_enviado(self, seq_enviado: int, seq_snapshot: Optional[int] = None):
+        conn = self._get_connection()
+        try:
+            definir_controle(conn, "seq_enviado", seq_enviado)
+            if seq_snapshot is not None:
+                definir_controle(conn, "seq_snapshot", seq_snapshot)
+                # Alterações já contidas no snapshot remoto não precisam ficar no registro
+                conn.execute("DELETE FROM registro_alteracoes WHERE seq <= ?", (seq_snapshot,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def enviar_pendentes(self) -> bool:
+        """
+        Envia ao OneDrive as alterações ainda não enviadas
+
+        Sem snapshot remoto (primeiro envio) ou com muitas alterações desde
+        o último, compacta em vez de enviar um lote.
+
+        Returns:
+            bool: True se não restou nada pendente
+        """
+        seq_enviado, seq_snapshot = self._estado_local()
+
+        if seq_snapshot < 0 or seq_enviado - seq_snapshot >= self.compactar_apos:
+            return self.compactar()
+
+        conn = self._get_connection(somente_leitura=True)
+        try:
+            alteracoes = ler_alteracoes(conn, seq_enviado)
+        finally:
+            conn.close()
+
+        if not alteracoes:
+            return True
+
+        # Acúmulo grande (ex: OneDrive fora do ar): um snapshot sai mais barato
+        if len(alteracoes) >= self.compactar_apos:
+            return self.compactar()
+
+        pasta = tempfile.mkdtemp(prefix="ccb_delta_")
+        try:
+            primeiro, ultimo = alteracoes[0]["seq"], alteracoes[-1]["seq"]
+            caminho = os.path.join(pasta, nome_lote(primeiro, ultimo))
+            escrever_lote(caminho, alteracoes)
+            tamanho = os.path.getsize(caminho)
+
+            if not self.manager.upload_arquivo(caminho, f"{SUBPASTA_REMOTA}/{nome_lote(primeiro, ultimo)}"):
+                return False
+        finally:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+        self._marcar_enviado(ultimo)
+        self._metricas["lotes_enviados"] += 1
+        self._metricas["alteracoes_enviadas"] += len(alteracoes)
+        self._metricas["bytes_enviados"] += tamanho
+        self._metricas["ultimo_seq_enviado"] = ultimo
+
+        logger.info(f"📤 Lote delta enviado: alterações {primeiro}-{ultimo} ({tamanho} bytes)")
+
+        if ultimo - seq_snapshot >= self.compactar_apos:
+            return self.compactar()
+        return True
+
+    def compactar(self) -> bool:
+        """
+        Envia um snapshot completo e descarta os lotes que ele substitui
+
+        Returns:
+            bool: True se o snapshot foi enviado
+        """
+        pasta = tempfile.mkdtemp(prefix="ccb_delta_")
+        try:
+            temporario = os.path.join(pasta, "snapshot.db")
+            self._criar_snapshot(temporario)
+
+            # O snapshot leva só os dados: registro zerado e seq correspondente
+            conn = sqlite3.connect(temporario)
+            try:
+                seq = ultimo_seq(conn)
+                conn.execute("DELETE FROM registro_alteracoes")
+                definir_controle(conn, "seq_enviado", seq)
+                definir_controle(conn, "seq_snapshot", seq)
+                conn.commit()
+                conn.execute("VACUUM")
+            finally:
+                conn.close()
+
+            caminho = os.path.join(pasta, nome_snapshot(seq))
+            os.replace(temporario, caminho)
+            tamanho = os.path.getsize(caminho)
+
+            remoto = f"{SUBPASTA_REMOTA}/{nome_snapshot(seq)}"
+            if not self.manager.upload_arquivo(caminho, remoto, comprimir=True):
+                return False
+        finally:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+        seq_enviado, _ = self._estado_local()
+        self._marcar_enviado(max(seq_enviado, seq), seq_snapshot=seq)
+        self._remover_remotos_obsoletos(seq)
+
+        self._metricas["compactacoes"] += 1
+        self._metricas["bytes_enviados"] += tamanho
+        self._metricas["ultimo_snapshot_seq"] = seq
+        self._metricas["ultimo_seq_enviado"] = max(seq_enviado, seq)
+
+        logger.info(f"🗜️ Snapshot delta enviado: até alteração {seq} ({tamanho} bytes)")
+        return True
+
+    def _remover_remotos_obsoletos(self, seq_snapshot: int):
+        """Apaga snapshots anteriores e lotes contidos no novo snapshot"""
+        itens = self.manager.listar_arquivos(SUBPASTA_REMOTA)
+        if not itens:
+            return
+
+        snapshots, lotes = classificar_arquivos_remotos([item["name"] for item in itens])
+        obsoletos = [nome for seq, nome in snapshots.items() if seq < seq_snapshot]
+        obsoletos += [nome for (_, ultimo), nome in lotes.items() if ultimo <= seq_snapshot]
+
+        for nome in obsoletos:
+            self.manager.remover_arquivo(f"{SUBPASTA_REMOTA}/{nome}")
+
+    # ------------------------------------------------------------------
+    # Download (reconstrução)
+    # ------------------------------------------------------------------
+
+    def _seq_local(self) -> Optional[int]:
+        caminho = self._db_path_atual() if self._db_path_atual else None
+        if not caminho or not os.path.exists(caminho):
+            return None
+        conn = self._get_connection(somente_leitura=True)
+        try:
+            return ultimo_seq(conn)
+        except sqlite3.Error:
+            return None
+        finally:
+            conn.close()
+
+    def restaurar(self, destino: str) -> Optional[bool]:
+        """
+        Reconstrói o banco remoto (snapshot + lotes) em `destino`
+
+        Returns:
+            bool: True se `destino` foi reconstruído, False em caso de falha
+            None: o banco local já contém todas as alterações remotas
+        """
+        itens = self.manager.listar_arquivos(SUBPASTA_REMOTA)
+        if itens is None:
+            return False
+
+        snapshots, lotes = classificar_arquivos_remotos([item["name"] for item in itens])
+        if not snapshots:
+            # Ainda no modo arquivo (ou primeira execução): banco inteiro
+            logger.info("📁 Nenhum snapshot delta no OneDrive - usando o banco completo")
+            return self.manager.download_database(destino)
+
+        seq_snapshot = max(snapshots)
+        lotes_novos = sorted(faixa for faixa in lotes if faixa[1] > seq_snapshot)
+        seq_remoto = max([seq_snapshot] + [ultimo for _, ultimo in lotes_novos])
+
+        seq_local = self._seq_local()
+        if seq_local is not None and seq_local >= seq_remoto:
+            return None
+
+        pasta = tempfile.mkdtemp(prefix="ccb_delta_")
+        try:
+            snapshot_path = os.path.join(pasta, snapshots[seq_snapshot])
+            if not self.manager.download_arquivo(f"{SUBPASTA_REMOTA}/{snapshots[seq_snapshot]}", snapshot_path):
+                return False
+
+            lotes_paths = []
+            for faixa in lotes_novos:
+                caminho = os.path.join(pasta, lotes[faixa])
+                if not self.manager.download_arquivo(f"{SUBPASTA_REMOTA}/{lotes[faixa]}", caminho):
+                    return False
+                lotes_paths.append(caminho)
+
+            aplicado = reconstruir_banco(destino, snapshot_path, lotes_paths)
+        except (ValueError, sqlite3.Error) as e:
+            logger.error(f"❌ Reconstrução delta falhou: {e}")
+            return False
+        finally:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+        self._metricas["restauracoes"] += 1
+        logger.info(
+            f"🔁 Banco reconstruído do OneDrive: snapshot {seq_snapshot} + "
+            f"{len(lotes_paths)} lote(s), até alteração {aplicado}"
+        )
+        return True
+
+    def metricas(self) -> Dict:
+        """
+        Contadores do sync delta para o /health
+
+        Returns:
+            Dict: lotes, alterações e bytes enviados, compactações e restaurações
+        """
+        return dict(self._metricas)
+
+
+def main():
+    """Reconstrói um banco a partir de snapshot + lotes em uma pasta local"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Reconstrução do banco a partir de snapshot + lotes delta")
+    parser.add_argument("pasta", help="Pasta com snapshot_<seq>.db e lote_<inicio>_<fim>.json")
+    parser.add_argument("destino", help="Arquivo do banco reconstruído")
+    args = parser.parse_args()
+
+    snapshots, lotes = classificar_arquivos_remotos(os.listdir(args.pasta))
+    if not snapshots:
+        parser.error(f"Nenhum snapshot encontrado em {args.pasta}")
+
+    seq_snapshot = max(snapshots)
+    lotes_paths = [os.path.join(args.pasta, nome) for (_, ultimo), nome in lotes.items() if ultimo > seq_snapshot]
+    aplicado = reconstruir_banco(args.destino, os.path.join(args.pasta, snapshots[seq_snapshot]), lotes_paths)
+    print(f"Banco reconstruído em {args.destino}: snapshot {seq_snapshot}, {len(lotes_paths)} lote(s), até alteração {aplicado}")
+
+
+if __name__ == "__main__":
+    main()
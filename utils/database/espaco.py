@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+📁 ARQUIVO: utils/database/espaco.py
+📦 FUNÇÃO: Espaço livre no arquivo do banco (auto_vacuum incremental)
+🔧 DESCRIÇÃO: DELETEs deixam páginas livres dentro do arquivo, e o sync do
+   OneDrive envia o arquivo inteiro - espaço morto é pago a cada upload.
+   Com auto_vacuum=INCREMENTAL (migração v5) as páginas livres podem ser
+   devolvidas aos poucos por PRAGMA incremental_vacuum, sem o VACUUM
+   completo (que reescreve o arquivo inteiro).
+"""
+
+from typing import Dict
+
+# Valores de PRAGMA auto_vacuum
+AUTO_VACUUM_MODOS = {0: "NONE", 1: "FULL", 2: "INCREMENTAL"}
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def estatisticas_espaco(conn, esquema: str = "main") -> Dict:
+    """
+    Tamanho do arquivo x dados vivos de um schema
+
+    Returns:
+        Dict: auto_vacuum, tamanho_pagina, paginas, paginas_livres,
+        bytes_arquivo, bytes_dados e razao_livre (páginas livres / total)
+    """
+    tamanho_pagina = conn.execute(f"PRAGMA {esquema}.page_size").fetchone()[0]
+    paginas = conn.execute(f"PRAGMA {esquema}.page_count").fetchone()[0]
+    livres = conn.execute(f"PRAGMA {esquema}.freelist_count").fetchone()[0]
+    modo = conn.execute(f"PRAGMA {esquema}.auto_vacuum").fetchone()[0]
+    return {
+        "auto_vacuum": AUTO_VACUUM_MODOS.get(modo, str(modo)),
+        "tamanho_pagina": tamanho_pagina,
+        "paginas": paginas,
+        "paginas_livres": livres,
+        "bytes_arquivo": paginas * tamanho_pagina,
+        "bytes_dados": (paginas - livres) * tamanho_pagina,
+        "razao_livre": round(livres / paginas, 4) if paginas else 0.0,
+    }
+
+
+def liberar_paginas(conn, esquema: str = "main", paginas: int = 0) -> int:
+    """
+    Devolve páginas livres ao sistema (PRAGMA incremental_vacuum)
+
+    Só tem efeito em schemas com auto_vacuum=INCREMENTAL.
+
+    Args:
+        conn: conexão de escrita sem transação aberta
+        esquema (str): schema a compactar
+        paginas (int): máximo de páginas a liberar (0 = todas)
+
+    Returns:
+        int: páginas liberadas
+    """
+    antes = conn.execute(f"PRAGMA {esquema}.freelist_count").fetchone()[0]
+    if not antes:
+        return 0
+    # execute() avança o pragma um único passo (uma página); executescript roda até o fim
+    conn.executescript(f"PRAGMA {esquema}.incremental_vacuum({int(paginas)})")
+    return antes - conn.execute(f"PRAGMA {esquema}.freelist_count").fetchone()[0]
@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+📁 ARQUIVO: utils/database/historico.py
+📦 FUNÇÃO: Histórico de alertas em arquivo separado (ATTACH)
+🔧 DESCRIÇÃO: alertas_enviados e o resumo de alertas ficam em
+   <banco>_historico.db, anexado como schema "historico" em cada conexão.
+   O arquivo principal guarda só os dados críticos (responsáveis,
+   administradores, LGPD) e continua pequeno - o upload de cada cadastro
+   não carrega o histórico de alertas, que tem fila de upload própria.
+
+   Consultas sem schema ("FROM alertas_enviados") continuam funcionando:
+   depois da separação a tabela só existe no schema anexado.
+"""
+
+import os
+import logging
+from typing import List, Optional
+
+from .resumo_alertas import RESUMOS, instalar_resumo
+
+logger = logging.getLogger("CCB-Alerta-Bot.database.historico")
+
+ESQUEMA = "historico"
+
+# Nome do arquivo na pasta Alerta do OneDrive
+NOME_REMOTO = "alertas_historico.db"
+
+TABELA = "alertas_enviados"
+
+
+def caminho_historico(db_path: str) -> str:
+    """Arquivo do histórico ao lado do banco principal (ex: alertas_bot_historico.db)"""
+    base, extensao = os.path.splitext(db_path)
+    return f"{base}_historico{extensao or '.db'}"
+
+
+def esquemas_anexados(conn) -> List[str]:
+    return [linha[1] for linha in conn.execute("PRAGMA database_list").fetchall()]
+
+
+def anexar_historico(conn, caminho: str):
+    """ATTACH do arquivo de histórico como schema "historico" (idempotente)"""
+    if ESQUEMA not in esquemas_anexados(conn):
+        conn.execute(f"ATTACH DATABASE ? AS {ESQUEMA}", (caminho,))
+        # Arquivo novo: o auto_vacuum só pode ser escolhido antes do journal_mode e da primeira tabela
+        if not conn.execute(f"PRAGMA {ESQUEMA}.page_count").fetchone()[0]:
+            conn.execute(f"PRAGMA {ESQUEMA}.auto_vacuum = INCREMENTAL")
+
+
+def _tem_tabela(conn, esquema: str, tabela: str) -> bool:
+    return conn.execute(
+        f"SELECT 1 FROM {esquema}.sqlite_master WHERE type = 'table' AND name = ?", (tabela,)
+    ).fetchone() is not None
+
+
+def instalar_historico(conn):
+    """
+    Tabela de alertas, índices e resumo no schema anexado (CREATE IF NOT EXISTS)
+
+    Mesmo formato de alertas_enviados após as migrações v1-v4 do banco principal.
+
+    Args:
+        conn: conexão de escrita com o histórico anexado (commit a cargo de quem chama)
+    """
+    conn.execute(f'''
+    CREATE TABLE IF NOT EXISTS {ESQUEMA}.{TABELA} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        codigo_casa TEXT NOT NULL,
+        tipo_alerta TEXT NOT NULL,
+        mensagem TEXT NOT NULL,
+        data_envio TEXT NOT NULL,
+        user_id INTEGER NOT NULL,
+        pdf_path TEXT,
+        data_envio_ts INTEGER
+    )
+    ''')
+    conn.execute(f'CREATE INDEX IF NOT EXISTS {ESQUEMA}.idx_alertas_casa_ts ON {TABELA}(codigo_casa, data_envio_ts)')
+    conn.execute(f'CREATE INDEX IF NOT EXISTS {ESQUEMA}.idx_alertas_user_ts ON {TABELA}(user_id, data_envio_ts)')
+    conn.execute(f'CREATE INDEX IF NOT EXISTS {ESQUEMA}.idx_alertas_ts ON {TABELA}(data_envio_ts)')
+    instalar_resumo(conn, esquema=ESQUEMA)
+
+
+def _mesclar(conn, origem: str) -> int:
+    """Copia alertas de `origem` para o histórico, ignorando ids já presentes"""
+    colunas_destino = {linha[1] for linha in conn.execute(f"PRAGMA {ESQUEMA}.table_info({TABELA})").fetchall()}
+    colunas = [
+        linha[1] for linha in conn.execute(f"PRAGMA {origem}.table_info({TABELA})").fetchall()
+        if linha[1] in colunas_destino
+    ]
+    lista = ", ".join(colunas)
+    # Os triggers do resumo no histórico contam só as linhas realmente inseridas
+    conn.execute(f"INSERT OR IGNORE INTO {ESQUEMA}.{TABELA} ({lista}) SELECT {lista} FROM {origem}.{TABELA}")
+    # changes() não inclui as alterações feitas pelos triggers
+    return conn.execute("SELECT changes()").fetchone()[0]
+
+
+def separar_historico(conn) -> Optional[int]:
+    """
+    Move os alertas do arquivo principal para o histórico anexado
+
+    Bancos anteriores à separação (ou baixados de uma versão anterior)
+    ainda têm alertas_enviados no arquivo principal: as linhas são
+    copiadas (ids preservados) e a tabela e o resumo saem do principal.
+    Sem alertas no principal, só garante o schema do histórico.
+
+    Args:
+        conn: conexão de escrita com o histórico anexado, sem transação aberta
+
+    Returns:
+        int: alertas copiados para o histórico, ou None se o principal já
+        estava separado (sem páginas liberadas para um VACUUM)
+    """
+    if conn.in_transaction:
+        conn.commit()
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        instalar_historico(conn)
+
+        movidos = None
+        if _tem_tabela(conn, "main", TABELA):
+            movidos = _mesclar(conn, "main")
+            conn.execute(f"DROP TABLE main.{TABELA}")
+            for tabela in RESUMOS:
+                conn.execute(f"DROP TABLE IF EXISTS main.{tabela}")
+            logger.info(f"📦 Histórico de alertas separado do banco principal: {movidos} alertas")
+
+        conn.commit()
+        return movidos
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def mesclar_arquivo(conn, caminho: str) -> int:
+    """
+    Acrescenta ao histórico anexado os alertas de outro arquivo (ex: cópia do OneDrive)
+
+    Args:
+        conn: conexão de escrita com o histórico anexado, sem transação aberta
+        caminho (str): arquivo com alertas_enviados
+
+    Returns:
+        int: alertas acrescentados
+    """
+    conn.execute("ATTACH DATABASE ? AS historico_remoto", (caminho,))
+    try:
+        if not _tem_tabela(conn, "historico_remoto", TABELA):
+            return 0
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            acrescentados = _mesclar(conn, "historico_remoto")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return acrescentados
+    finally:
+        conn.execute("DETACH DATABASE historico_remoto")
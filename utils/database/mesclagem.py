@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+📁 ARQUIVO: utils/database/mesclagem.py
+📦 FUNÇÃO: Mescla linha a linha do banco remoto no cache local
+🔧 DESCRIÇÃO: Duas instâncias com cache baixado da mesma versão (ex: deploy
+   sobreposto no Render) gravam cadastros diferentes. O upload condicionado
+   ao eTag (If-Match) recusa o segundo envio com HTTP 412; a versão remota
+   é baixada e mesclada aqui antes de um novo envio.
+
+   A mescla é de três vias: a última versão sincronizada (enviada ou
+   baixada) é o ancestral comum. Para cada chave natural:
+   - só um lado alterou (inclusão, edição ou remoção): vale a alteração
+   - os dois alteraram de formas diferentes: remoção vence; entre duas
+     edições vence a mais recente pela coluna de data da tabela
+     (empate = local)
+   Sem ancestral as remoções remotas não são detectáveis: as linhas que só
+   existem no remoto são incluídas e as locais mantidas.
+
+Mescla manual de dois arquivos:
+    python -m utils.database.mesclagem <local.db> <remoto.db> [--base <ancestral.db>]
+"""
+
+import os
+import sqlite3
+from typing import Dict, Optional, Tuple
+
+from .migrations import epoch_de_texto
+
+# tabela -> chave natural, colunas fora da comparação (ids locais) e coluna de data
+TABELAS_MESCLADAS = {
+    "responsaveis": {"chave": ("codigo_norm", "nome_norm"), "ignorar": ("id",), "data": "ultima_atualizacao"},
+    "consentimento_lgpd": {"chave": ("user_id",), "ignorar": (), "data": "data_consentimento"},
+    "administradores": {"chave": ("user_id",), "ignorar": (), "data": "data_adicao"},
+}
+
+_REMOTO = "mescla_remoto"
+_BASE = "mescla_base"
+
+
+def _colunas(conn, esquema: str, tabela: str) -> list:
+    return [linha[1] for linha in conn.execute(f"PRAGMA {esquema}.table_info({tabela})").fetchall()]
+
+
+def _linhas(conn, esquema: str, tabela: str, colunas: list, chave: Tuple[str, ...]) -> Dict[tuple, tuple]:
+    posicoes = [colunas.index(coluna) for coluna in chave]
+    return {
+        tuple(linha[i] for i in posicoes): tuple(linha)
+        for linha in conn.execute(f"SELECT {', '.join(colunas)} FROM {esquema}.{tabela}").fetchall()
+    }
+
+
+def _mais_recente(local: tuple, remoto: tuple, posicao_data: Optional[int]) -> tuple:
+    """Edição mais recente entre duas versões da mesma linha (empate = local)"""
+    if posicao_data is None:
+        return local
+    momento_local = epoch_de_texto(local[posicao_data]) or 0
+    momento_remoto = epoch_de_texto(remoto[posicao_data]) or 0
+    return remoto if momento_remoto > momento_local else local
+
+
+def _mesclar_tabela(conn, tabela: str, config: Dict, com_base: bool) -> Dict[str, int]:
+    """Aplica em main as alterações remotas de uma tabela; retorna os contadores"""
+    contadores = {"adicionados": 0, "atualizados": 0, "removidos": 0, "conflitos": 0}
+
+    esquemas = ["main", _REMOTO] + ([_BASE] if com_base else [])
+    existentes = [set(_colunas(conn, esquema, tabela)) for esquema in esquemas]
+    if not all(existentes):
+        return contadores
+    colunas = [
+        coluna for coluna in _colunas(conn, "main", tabela)
+        if coluna not in config["ignorar"] and all(coluna in conjunto for conjunto in existentes)
+    ]
+    chave = config["chave"]
+    posicao_data = colunas.index(config["data"]) if config["data"] in colunas else None
+
+    local = _linhas(conn, "main", tabela, colunas, chave)
+    remoto = _linhas(conn, _REMOTO, tabela, colunas, chave)
+    base = _linhas(conn, _BASE, tabela, colunas, chave) if com_base else {}
+
+    filtro = " AND ".join(f"{coluna} IS ?" for coluna in chave)
+    atribuicoes = ", ".join(f"{coluna} = ?" for coluna in colunas)
+
+    for valor_chave in local.keys() | remoto.keys():
+        linha_local, linha_remota = local.get(valor_chave), remoto.get(valor_chave)
+        if linha_local == linha_remota:
+            continue
+
+        ancestral = base.get(valor_chave)
+        if com_base and linha_remota == ancestral:
+            continue  # só o local alterou
+        if com_base and linha_local == ancestral:
+            escolhida = linha_remota  # só o remoto alterou
+        elif not com_base and linha_remota is None:
+            continue  # sem ancestral: ausência no remoto não é remoção
+        elif not com_base and linha_local is None:
+            escolhida = linha_remota
+        else:
+            contadores["conflitos"] += 1
+            if linha_local is None or linha_remota is None:
+                escolhida = None
+            else:
+                escolhida = _mais_recente(linha_local, linha_remota, posicao_data)
+            if escolhida == linha_local:
+                continue
+
+        if escolhida is None:
+            conn.execute(f"DELETE FROM main.{tabela} WHERE {filtro}", valor_chave)
+            contadores["removidos"] += 1
+        elif linha_local is None:
+            conn.execute(
+                f"INSERT INTO main.{tabela} ({', '.join(colunas)}) VALUES ({', '.join('?' for _ in colunas)})",
+                escolhida
+            )
+            contadores["adicionados"] += 1
+        else:
+            conn.execute(f"UPDATE main.{tabela} SET {atribuicoes} WHERE {filtro}", escolhida + valor_chave)
+            contadores["atualizados"] += 1
+
+    return contadores
+
+
+def mesclar_banco(conn, remoto_path: str, base_path: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+    """
+    Mescla no banco de `conn` as alterações de `remoto_path` (uma transação)
+
+    Args:
+        conn: conexão de escrita sem transação aberta
+        remoto_path (str): versão remota (mesma versão de schema)
+        base_path (str): ancestral comum (última versão sincronizada), se houver
+
+    Returns:
+        Dict: por tabela, linhas adicionadas, atualizadas e removidas e conflitos
+    """
+    if conn.in_transaction:
+        conn.commit()
+
+    com_base = bool(base_path) and os.path.exists(base_path)
+    conn.execute(f"ATTACH DATABASE ? AS {_REMOTO}", (remoto_path,))
+    try:
+        if com_base:
+            conn.execute(f"ATTACH DATABASE ? AS {_BASE}", (base_path,))
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            resultado = {
+                tabela: _mesclar_tabela(conn, tabela, config, com_base)
+                for tabela, config in TABELAS_MESCLADAS.items()
+            }
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return resultado
+    finally:
+        conn.execute(f"DETACH DATABASE {_REMOTO}")
+        if com_base:
+            conn.execute(f"DETACH DATABASE {_BASE}")
+
+
+def main():
+    """Mescla um arquivo remoto em um arquivo local"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Mescla linha a linha de dois bancos do CCB Alerta Bot")
+    parser.add_argument("local", help="Banco que recebe as alterações")
+    parser.add_argument("remoto", help="Banco com as alterações a mesclar")
+    parser.add_argument("--base", help="Ancestral comum (última versão sincronizada)")
+    args = parser.parse_args()
+
+    for caminho in (args.local, args.remoto, args.base):
+        if caminho and not os.path.exists(caminho):
+            parser.error(f"Arquivo não encontrado: {caminho}")
+
+    conn = sqlite3.connect(args.local, timeout=30)
+    try:
+        resultado = mesclar_banco(conn, args.remoto, args.base)
+    finally:
+        conn.close()
+
+    for tabela, contadores in resultado.items():
+        print(f"{tabela}: " + ", ".join(f"{nome}={valor}" for nome, valor in contadores.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,447 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+📁 ARQUIVO: utils/database/migrations.py
+📦 FUNÇÃO: Migrações versionadas do schema do banco
+🔧 DESCRIÇÃO: A versão do schema fica em PRAGMA user_version; cada passo
+   pendente roda em sua própria transação e grava a nova versão no mesmo
+   commit. Os passos são idempotentes: bancos anteriores ao controle de
+   versão (user_version = 0, tabelas já existentes) migram sem erro.
+
+Uso manual (ex: no cache baixado do OneDrive antes de enviá-lo):
+    python -m utils.database.migrations <arquivo.db> [--simular]
+"""
+
+import os
+import functools
+import sqlite3
+import time
+import logging
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import pytz
+
+from handlers.data import normalizar_texto
+from .resumo_alertas import instalar_resumo, reconstruir_resumo
+from .espaco import AUTO_VACUUM_INCREMENTAL
+
+logger = logging.getLogger("CCB-Alerta-Bot.database.migrations")
+
+
+class Migracao(NamedTuple):
+    versao: int
+    descricao: str
+    aplicar: Callable[[sqlite3.Connection], None]
+    # False = passo que não roda dentro de transação (ex: VACUUM); precisa ser idempotente
+    em_transacao: bool = True
+
+
+def chave_responsavel(codigo_casa, nome):
+    """
+    Chave de duplicidade de um cadastro: código e nome sem acentos,
+    minúsculos e com espaços normalizados (colunas codigo_norm/nome_norm)
+    """
+    return normalizar_texto(codigo_casa), normalizar_texto(nome)
+
+
+FUSO_HORARIO = pytz.timezone('America/Sao_Paulo')
+FORMATO_DATA = "%d/%m/%Y %H:%M:%S"
+
+
+@functools.lru_cache(maxsize=65536)
+def _epoch_da_hora(prefixo: str) -> int:
+    # "dd/mm/YYYY HH": o fuso (e o antigo horário de verão) só muda na virada da hora
+    return int(FUSO_HORARIO.localize(datetime.strptime(prefixo, "%d/%m/%Y %H")).timestamp())
+
+
+def epoch_de_texto(texto) -> Optional[int]:
+    """
+    Converte as datas gravadas como texto (dd/mm/YYYY HH:MM:SS, horário de
+    Brasília) em epoch UTC - valor das colunas *_ts ordenáveis e indexadas
+
+    Returns:
+        int ou None se o texto não estiver no formato esperado
+    """
+    try:
+        if len(texto) != 19 or texto[13] != ":" or texto[16] != ":":
+            return None
+        minutos, segundos = int(texto[14:16]), int(texto[17:19])
+        if minutos > 59 or segundos > 59:
+            return None
+        return _epoch_da_hora(texto[:13]) + minutos * 60 + segundos
+    except (TypeError, ValueError):
+        return None
+
+
+def _colunas(conn, tabela: str) -> set:
+    return {linha[1] for linha in conn.execute(f"PRAGMA table_info({tabela})").fetchall()}
+
+
+# ============================================
+# PASSOS
+# ============================================
+
+def _v1_schema_inicial(conn):
+    """Tabelas e índices originais (CREATE IF NOT EXISTS)"""
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS responsaveis (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        codigo_casa TEXT NOT NULL,
+        nome TEXT NOT NULL,
+        funcao TEXT NOT NULL,
+        user_id INTEGER NOT NULL,
+        username TEXT,
+        data_cadastro TEXT NOT NULL,
+        ultima_atualizacao TEXT NOT NULL
+    )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_codigo_casa ON responsaveis(codigo_casa)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_user_id ON responsaveis(user_id)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_nome ON responsaveis(nome)')
+
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS alertas_enviados (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        codigo_casa TEXT NOT NULL,
+        tipo_alerta TEXT NOT NULL,
+        mensagem TEXT NOT NULL,
+        data_envio TEXT NOT NULL,
+        user_id INTEGER NOT NULL,
+        pdf_path TEXT
+    )
+    ''')
+
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS consentimento_lgpd (
+        user_id INTEGER PRIMARY KEY,
+        data_consentimento TEXT NOT NULL,
+        ip_address TEXT,
+        detalhes TEXT
+    )
+    ''')
+
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS administradores (
+        user_id INTEGER PRIMARY KEY,
+        nome TEXT,
+        data_adicao TEXT NOT NULL
+    )
+    ''')
+
+
+def _v2_chaves_normalizadas(conn):
+    """
+    Colunas codigo_norm/nome_norm e índice único idx_responsaveis_chave
+
+    Cadastros que passam a colidir (ex: "João" e "JOAO" na mesma casa) não
+    são removidos: o mais antigo fica com a chave e os demais recebem o
+    sufixo "#<id>" em nome_norm e são registrados em responsaveis_conflitos
+    para revisão pelos administradores (/health).
+    """
+    colunas = _colunas(conn, "responsaveis")
+    for coluna in ("codigo_norm", "nome_norm"):
+        if coluna not in colunas:
+            conn.execute(f"ALTER TABLE responsaveis ADD COLUMN {coluna} TEXT")
+
+    pendentes = conn.execute(
+        "SELECT id, codigo_casa, nome FROM responsaveis WHERE codigo_norm IS NULL OR nome_norm IS NULL"
+    ).fetchall()
+    conn.executemany(
+        "UPDATE responsaveis SET codigo_norm = ?, nome_norm = ? WHERE id = ?",
+        [(*chave_responsavel(codigo_casa, nome), id_registro) for id_registro, codigo_casa, nome in pendentes]
+    )
+
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS responsaveis_conflitos (
+        id_responsavel INTEGER PRIMARY KEY,
+        id_original INTEGER NOT NULL,
+        codigo_norm TEXT NOT NULL,
+        nome_norm TEXT NOT NULL,
+        data_deteccao TEXT NOT NULL
+    )
+    ''')
+
+    # Uma passada ordenada pela chave (sem índice ainda): MIN(id) por chave
+    # é o cadastro mantido, os de id maior são os conflitos
+    duplicados = conn.execute('''
+    SELECT id, codigo_casa, nome, user_id, codigo_norm, nome_norm, id_original FROM (
+        SELECT id, codigo_casa, nome, user_id, codigo_norm, nome_norm,
+            MIN(id) OVER (PARTITION BY codigo_norm, nome_norm) AS id_original
+        FROM responsaveis
+    )
+    WHERE id > id_original
+    ''').fetchall()
+    agora = datetime.now(FUSO_HORARIO).strftime(FORMATO_DATA)
+    for id_registro, codigo_casa, nome, user_id, codigo_norm, nome_norm, id_original in duplicados:
+        logger.warning(
+            f"⚠️ Cadastro em conflito com o ID {id_original} (mantido com sufixo #{id_registro}): "
+            f"{codigo_casa} - {nome} (ID {id_registro}, usuário {user_id})"
+        )
+    conn.executemany(
+        "INSERT OR IGNORE INTO responsaveis_conflitos "
+        "(id_responsavel, id_original, codigo_norm, nome_norm, data_deteccao) VALUES (?, ?, ?, ?, ?)",
+        [(linha[0], linha[6], linha[4], linha[5], agora) for linha in duplicados]
+    )
+    conn.executemany(
+        "UPDATE responsaveis SET nome_norm = nome_norm || '#' || id WHERE id = ?",
+        [(linha[0],) for linha in duplicados]
+    )
+
+    conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_responsaveis_chave ON responsaveis(codigo_norm, nome_norm)')
+
+
+def _v3_colunas_epoch(conn):
+    """
+    Colunas data_envio_ts/data_cadastro_ts (epoch UTC) e índices por período
+
+    As colunas de texto continuam sendo gravadas para exibição; consultas
+    por ordem ou intervalo de datas usam as colunas *_ts.
+    """
+    conn.create_function("epoch_de_texto", 1, epoch_de_texto, deterministic=True)
+
+    for tabela, coluna, origem in (
+        ("alertas_enviados", "data_envio_ts", "data_envio"),
+        ("responsaveis", "data_cadastro_ts", "data_cadastro"),
+    ):
+        if coluna not in _colunas(conn, tabela):
+            conn.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} INTEGER")
+        conn.execute(f"UPDATE {tabela} SET {coluna} = epoch_de_texto({origem}) WHERE {coluna} IS NULL")
+
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_alertas_casa_ts ON alertas_enviados(codigo_casa, data_envio_ts)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_alertas_user_ts ON alertas_enviados(user_id, data_envio_ts)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_alertas_ts ON alertas_enviados(data_envio_ts)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_responsaveis_cadastro_ts ON responsaveis(data_cadastro_ts)')
+
+
+def _v4_resumo_alertas(conn):
+    """Tabelas de resumo de alertas (por tipo, mês e casa) mantidas por triggers"""
+    instalar_resumo(conn)
+    reconstruir_resumo(conn)
+
+
+def _v5_auto_vacuum_incremental(conn):
+    """
+    auto_vacuum=INCREMENTAL no arquivo principal
+
+    Em banco já existente o modo só muda com um VACUUM (fora de
+    transação); depois disso as páginas livres deixadas por DELETEs podem
+    ser devolvidas por PRAGMA incremental_vacuum.
+    """
+    if conn.execute("PRAGMA main.auto_vacuum").fetchone()[0] != AUTO_VACUUM_INCREMENTAL:
+        conn.execute("PRAGMA main.auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM main")
+
+
+# Ordem de aplicação - novos passos entram sempre no final
+MIGRACOES: List[Migracao] = [
+    Migracao(1, "schema inicial", _v1_schema_inicial),
+    Migracao(2, "chaves normalizadas e índice único em responsaveis", _v2_chaves_normalizadas),
+    Migracao(3, "datas em epoch e índices por período", _v3_colunas_epoch),
+    Migracao(4, "resumo materializado de alertas", _v4_resumo_alertas),
+    Migracao(5, "auto_vacuum incremental", _v5_auto_vacuum_incremental, em_transacao=False),
+]
+
+VERSAO_ATUAL = MIGRACOES[-1].versao
+
+
+# ============================================
+# RUNNER
+# ============================================
+
+def versao_schema(conn) -> int:
+    """Versão do schema gravada no arquivo (PRAGMA user_version)"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def _tem_tabelas(conn) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' LIMIT 1").fetchone() is not None
+
+
+def _fazer_backup(conn, pasta_backup: str, versao: int) -> str:
+    os.makedirs(pasta_backup, exist_ok=True)
+    destino = os.path.join(
+        pasta_backup, f"pre_migracao_v{versao}_{datetime.now().strftime('%Y%m%d%H%M%S')}.db"
+    )
+    copia = sqlite3.connect(destino)
+    try:
+        conn.backup(copia)
+    finally:
+        copia.close()
+    return destino
+
+
+def _executar_passo(conn, migracao: Migracao) -> Dict:
+    inicio = time.perf_counter()
+    alteracoes_antes = conn.total_changes
+    migracao.aplicar(conn)
+    return {
+        "versao": migracao.versao,
+        "descricao": migracao.descricao,
+        "linhas": conn.total_changes - alteracoes_antes,
+        "segundos": round(time.perf_counter() - inicio, 3),
+    }
+
+
+def _estimar_passo(conn, migracao: Migracao) -> Dict:
+    """
+    Entrada de relatório para passo fora de transação no modo simulado
+
+    Não há como desfazer um VACUUM: em vez de executá-lo, informa o
+    tamanho do arquivo (páginas em uso são reescritas, as livres descartadas).
+    """
+    paginas = conn.execute("PRAGMA main.page_count").fetchone()[0]
+    paginas_livres = conn.execute("PRAGMA main.freelist_count").fetchone()[0]
+    return {
+        "versao": migracao.versao,
+        "descricao": migracao.descricao,
+        "linhas": None,
+        "segundos": None,
+        "estimado": True,
+        "paginas": paginas,
+        "paginas_livres": paginas_livres,
+    }
+
+
+def _resumo_passo(passo: Dict) -> str:
+    if passo.get("estimado"):
+        return (
+            f"não simulado (fora de transação) - {passo['paginas'] - passo['paginas_livres']} páginas "
+            f"a reescrever, {passo['paginas_livres']} livres"
+        )
+    return f"{passo['linhas']} linhas, {passo['segundos']:.3f}s"
+
+
+def aplicar_migracoes(conn, simular: bool = False, pasta_backup: Optional[str] = None) -> Dict:
+    """
+    Leva o banco até VERSAO_ATUAL aplicando os passos pendentes em ordem
+
+    Cada passo roda em BEGIN IMMEDIATE ... COMMIT junto com o novo
+    user_version: uma falha desfaz apenas o passo em andamento, e a
+    próxima execução continua dali. Passos fora de transação (VACUUM)
+    rodam antes da transação que grava a versão - se forem interrompidos,
+    são repetidos. Em modo simulado os passos são executados e desfeitos
+    (ROLLBACK), medindo tempo e linhas afetadas; os fora de transação não
+    são executados e entram no relatório com estimado=True e o tamanho do
+    arquivo (paginas, paginas_livres).
+
+    Args:
+        conn: conexão de escrita sem transação aberta
+        simular (bool): True = dry run, nada é gravado
+        pasta_backup (str): se informada, uma cópia do banco é feita
+            antes do primeiro passo pendente (exceto em banco vazio)
+
+    Returns:
+        Dict: versao_inicial, versao_final, backup e passos
+        (versao, descricao, linhas, segundos; linhas/segundos None nos
+        passos estimados)
+    """
+    if conn.in_transaction:
+        conn.commit()
+
+    versao_inicial = versao_schema(conn)
+    pendentes = [m for m in MIGRACOES if m.versao > versao_inicial]
+    relatorio = {
+        "versao_inicial": versao_inicial,
+        "versao_final": versao_inicial,
+        "simulado": simular,
+        "backup": None,
+        "passos": [],
+    }
+
+    if versao_inicial > VERSAO_ATUAL:
+        logger.warning(
+            f"⚠️ Banco na versão {versao_inicial}, mais nova que a deste código ({VERSAO_ATUAL}) - sem migrações"
+        )
+        return relatorio
+
+    if not pendentes:
+        return relatorio
+
+    if pasta_backup and not simular and _tem_tabelas(conn):
+        relatorio["backup"] = _fazer_backup(conn, pasta_backup, versao_inicial)
+        logger.info(f"💾 Backup antes das migrações: {relatorio['backup']}")
+
+    if simular:
+        # Todos os passos numa única transação desfeita no final: cada passo
+        # enxerga o schema deixado pelos anteriores, como na execução real
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for migracao in pendentes:
+                if migracao.em_transacao:
+                    relatorio["passos"].append(_executar_passo(conn, migracao))
+                else:
+                    relatorio["passos"].append(_estimar_passo(conn, migracao))
+        finally:
+            conn.rollback()
+        for passo in relatorio["passos"]:
+            logger.info(f"🧪 v{passo['versao']} ({passo['descricao']}): {_resumo_passo(passo)}")
+        return relatorio
+
+    for migracao in pendentes:
+        passo = None
+        if not migracao.em_transacao:
+            try:
+                passo = _executar_passo(conn, migracao)
+            except Exception:
+                logger.error(f"❌ Migração v{migracao.versao} ({migracao.descricao}) falhou")
+                raise
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if passo is None:
+                passo = _executar_passo(conn, migracao)
+            conn.execute(f"PRAGMA user_version = {migracao.versao}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.error(f"❌ Migração v{migracao.versao} ({migracao.descricao}) falhou - desfeita")
+            raise
+
+        relatorio["passos"].append(passo)
+        relatorio["versao_final"] = migracao.versao
+        logger.info(
+            f"🔧 Migração v{migracao.versao} aplicada ({migracao.descricao}): "
+            f"{passo['linhas']} linhas em {passo['segundos']:.2f}s"
+        )
+
+    return relatorio
+
+
+def migrar_arquivo(caminho: str, simular: bool = False, pasta_backup: Optional[str] = None) -> Dict:
+    """
+    Aplica as migrações a um arquivo fora do pool (ex: cache recém-baixado)
+
+    Returns:
+        Dict: relatório de aplicar_migracoes
+    """
+    conn = sqlite3.connect(caminho, timeout=30)
+    try:
+        return aplicar_migracoes(conn, simular=simular, pasta_backup=pasta_backup)
+    finally:
+        conn.close()
+
+
+def main():
+    """Aplica (ou simula) as migrações pendentes em um arquivo local"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Migrações do schema do banco do CCB Alerta Bot")
+    parser.add_argument("arquivo", help="Arquivo .db a migrar")
+    parser.add_argument("--simular", action="store_true", help="Dry run: mede tempo e linhas sem gravar")
+    parser.add_argument("--backup", help="Pasta para cópia do banco antes de migrar")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.arquivo):
+        parser.error(f"Arquivo não encontrado: {args.arquivo}")
+
+    relatorio = migrar_arquivo(args.arquivo, simular=args.simular, pasta_backup=args.backup)
+    print(f"Versão do schema: {relatorio['versao_inicial']} -> {relatorio['versao_final']} (atual: {VERSAO_ATUAL})")
+    for passo in relatorio["passos"]:
+        print(f"  v{passo['versao']} {passo['descricao']}: {_resumo_passo(passo)}")
+    if relatorio["simulado"]:
+        print("Simulação: nenhuma alteração gravada")
+
+
+if __name__ == "__main__":
+    main()
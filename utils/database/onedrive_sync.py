@@ -0,0 +1,363 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+📁 ARQUIVO: utils/database/onedrive_sync.py
+📦 FUNÇÃO: Sincronização do banco de dados com o OneDrive em segundo plano
+🔧 DESCRIÇÃO: Atualizador periódico (download + troca atômica do arquivo),
+   fora do caminho das consultas - handlers nunca tocam na rede
+"""
+
+import os
+import threading
+import time
+import logging
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger("CCB-Alerta-Bot.database.sync")
+
+
+class AtualizadorBancoOneDrive:
+    """
+    Atualiza o cache local do banco a partir do OneDrive em uma thread própria
+
+    O download é feito em um arquivo de staging; só depois de completo o
+    arquivo é trocado atomicamente pelo cache em uso (via `substituir`).
+    """
+
+    def __init__(self, baixar: Callable[[str], Optional[bool]], substituir: Callable[[str], bool],
+                 cache_path: str, intervalo_segundos: float = 180):
+        """
+        Args:
+            baixar: função(caminho_destino) -> bool que baixa o banco remoto
+                (None = remoto inalterado, nada a trocar)
+            substituir: função(caminho_staging) -> bool que troca o cache em uso
+            cache_path: caminho do cache local usado pelo pool de conexões
+            intervalo_segundos: intervalo entre atualizações
+        """
+        self._baixar = baixar
+        self._substituir = substituir
+        self.cache_path = cache_path
+        self.staging_path = cache_path + ".download"
+        self.intervalo_segundos = intervalo_segundos
+
+        self._thread: Optional[threading.Thread] = None
+        self._parar = threading.Event()
+        self._executando = threading.Lock()
+
+        self.ultima_atualizacao: Optional[datetime] = None
+        self.ultima_tentativa: Optional[datetime] = None
+        self.ultima_duracao_segundos: Optional[float] = None
+        self.ultimo_resultado = "nunca executado"
+        self.falhas_consecutivas = 0
+
+    def atualizar_agora(self) -> bool:
+        """
+        Baixa o banco remoto e troca o cache local (execução síncrona)
+
+        Returns:
+            bool: True se um novo arquivo foi colocado em uso
+        """
+        with self._executando:
+            inicio = time.perf_counter()
+            self.ultima_tentativa = datetime.now()
+            trocado = False
+
+            try:
+                baixado = self._baixar(self.staging_path)
+                if baixado is None:
+                    self.ultimo_resultado = "sem alterações remotas"
+                    self.ultima_atualizacao = datetime.now()
+                    self.falhas_consecutivas = 0
+                elif not baixado:
+                    self.ultimo_resultado = "download indisponível"
+                    self.falhas_consecutivas += 1
+                elif self._substituir(self.staging_path):
+                    trocado = True
+                    self.ultimo_resultado = "atualizado"
+                    self.ultima_atualizacao = datetime.now()
+                    self.falhas_consecutivas = 0
+                else:
+                    self.ultimo_resultado = "troca adiada (alterações locais pendentes)"
+                    self.falhas_consecutivas = 0
+            except Exception as e:
+                self.ultimo_resultado = f"erro: {e}"
+                self.falhas_consecutivas += 1
+                logger.warning(f"⚠️ Erro atualizando banco do OneDrive: {e}")
+            finally:
+                self._remover_staging()
+                self.ultima_duracao_segundos = time.perf_counter() - inicio
+
+            logger.debug(
+                f"🔄 Atualização OneDrive: {self.ultimo_resultado} "
+                f"({self.ultima_duracao_segundos:.2f}s)"
+            )
+            return trocado
+
+    def _remover_staging(self):
+        try:
+            os.remove(self.staging_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.debug(f"Staging não removido: {e}")
+
+    def _loop(self):
+        while not self._parar.wait(self.intervalo_segundos):
+            self.atualizar_agora()
+
+    def iniciar(self):
+        """Inicia a thread de atualização periódica (idempotente)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._loop, name="onedrive-refresh", daemon=True)
+        self._thread.start()
+        logger.info(f"⏱️ Atualizador OneDrive iniciado (a cada {self.intervalo_segundos:.0f}s)")
+
+    def parar(self):
+        """Interrompe a thread de atualização"""
+        self._parar.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def status(self) -> Dict:
+        """
+        Estado do atualizador para o /health
+
+        Returns:
+            Dict: idade da última atualização, duração e resultado
+        """
+        idade = None
+        if self.ultima_atualizacao:
+            idade = (datetime.now() - self.ultima_atualizacao).total_seconds()
+
+        return {
+            "ativo": bool(self._thread and self._thread.is_alive()),
+            "intervalo_segundos": self.intervalo_segundos,
+            "ultima_atualizacao": self.ultima_atualizacao,
+            "idade_segundos": idade,
+            "ultima_duracao_segundos": self.ultima_duracao_segundos,
+            "ultimo_resultado": self.ultimo_resultado,
+            "falhas_consecutivas": self.falhas_consecutivas,
+        }
+
+
+class FilaUploadOneDrive:
+    """
+    Fila de upload com debounce: um único worker envia o banco ao OneDrive
+
+    Escritas apenas marcam o banco como alterado (dirty flag). O worker
+    espera `debounce_segundos` sem novas marcações (no máximo
+    `espera_maxima_segundos` desde a primeira) e faz um único upload para
+    toda a rajada. Como só existe um worker, os uploads nunca concorrem
+    entre si e saem sempre na ordem das alterações.
+    """
+
+    def __init__(self, enviar: Callable[[], bool], debounce_segundos: float = 5.0,
+                 espera_maxima_segundos: float = 30.0, backoff_inicial_segundos: float = 2.0,
+                 backoff_maximo_segundos: float = 300.0, nome: str = "banco"):
+        """
+        Args:
+            enviar: função() -> bool que faz o upload do estado atual do banco
+            debounce_segundos: silêncio exigido antes de enviar uma rajada
+            espera_maxima_segundos: atraso máximo desde a primeira alteração
+            backoff_inicial_segundos: espera após a primeira falha (dobra a cada falha)
+            backoff_maximo_segundos: teto do backoff entre tentativas
+            nome: identificação nos logs
+        """
+        self._enviar = enviar
+        self.debounce_segundos = debounce_segundos
+        self.espera_maxima_segundos = max(espera_maxima_segundos, debounce_segundos)
+        self.backoff_inicial_segundos = backoff_inicial_segundos
+        self.backoff_maximo_segundos = backoff_maximo_segundos
+        self.nome = nome
+
+        self._cond = threading.Condition()
+        self._sujo = False
+        self._primeira_marcacao = 0.0
+        self._ultima_marcacao = 0.0
+        self._marcacoes_no_lote = 0
+        self._geracao_marcada = 0
+        self._geracao_enviada = 0
+        self._flush_solicitado = False
+        self._parar = False
+        self._thread: Optional[threading.Thread] = None
+
+        self._metricas = {
+            "enfileirados": 0,
+            "coalescidos": 0,
+            "uploads": 0,
+            "falhas": 0,
+            "ultimo_upload": None,
+            "ultima_duracao_segundos": None,
+        }
+
+    # ------------------------------------------------------------------
+    # API usada pelas funções de escrita
+    # ------------------------------------------------------------------
+
+    def marcar_alterado(self):
+        """Registra que o banco mudou; o upload acontece após o debounce"""
+        agora = time.monotonic()
+        with self._cond:
+            self._metricas["enfileirados"] += 1
+            if self._sujo:
+                self._metricas["coalescidos"] += 1
+            else:
+                self._sujo = True
+                self._primeira_marcacao = agora
+            self._ultima_marcacao = agora
+            self._marcacoes_no_lote += 1
+            self._geracao_marcada += 1
+            self._cond.notify_all()
+
+        self._garantir_worker()
+
+    def tem_pendencias(self) -> bool:
+        """True se há alterações ainda não enviadas"""
+        with self._cond:
+            return self._geracao_enviada < self._geracao_marcada
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Envia imediatamente as alterações pendentes, ignorando o debounce
+
+        Args:
+            timeout: segundos máximos de espera (None = sem limite)
+
+        Returns:
+            bool: True se não restaram alterações pendentes
+        """
+        limite = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            alvo = self._geracao_marcada
+            if self._geracao_enviada >= alvo:
+                return True
+            self._flush_solicitado = True
+            self._cond.notify_all()
+
+            while self._geracao_enviada < alvo:
+                restante = None if limite is None else limite - time.monotonic()
+                if restante is not None and restante <= 0:
+                    return False
+                if not (self._thread and self._thread.is_alive()):
+                    return False
+                self._cond.wait(restante)
+            return True
+
+    def finalizar(self, timeout: float = 30.0) -> bool:
+        """
+        Envia o que estiver pendente e encerra o worker (shutdown do bot)
+
+        Returns:
+            bool: True se tudo foi enviado
+        """
+        enviado = self.flush(timeout)
+        with self._cond:
+            self._parar = True
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+        if not enviado:
+            logger.error(f"❌ Encerrando com alterações não enviadas ao OneDrive ({self.nome})")
+        return enviado
+
+    def metricas(self) -> Dict:
+        """
+        Contadores da fila para o /health
+
+        Returns:
+            Dict: enfileirados, coalescidos, uploads, falhas e pendência
+        """
+        with self._cond:
+            metricas = dict(self._metricas)
+            metricas["pendente"] = self._geracao_enviada < self._geracao_marcada
+        return metricas
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+
+    def _garantir_worker(self):
+        with self._cond:
+            if self._parar or (self._thread and self._thread.is_alive()):
+                return
+            self._thread = threading.Thread(
+                target=self._loop, name=f"onedrive-upload-{self.nome}", daemon=True
+            )
+            self._thread.start()
+
+    def _esperar(self, segundos: float):
+        """Espera interrompível por flush/parada (chamar com o lock)"""
+        limite = time.monotonic() + segundos
+        while not (self._flush_solicitado or self._parar):
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                return
+            self._cond.wait(restante)
+
+    def _loop(self):
+        backoff = self.backoff_inicial_segundos
+
+        while True:
+            with self._cond:
+                while not self._sujo and not self._parar:
+                    self._cond.wait()
+                if not self._sujo:
+                    return
+
+                # Debounce: aguardar a rajada terminar (com teto de espera)
+                while not (self._flush_solicitado or self._parar):
+                    agora = time.monotonic()
+                    fim_debounce = self._ultima_marcacao + self.debounce_segundos
+                    fim_maximo = self._primeira_marcacao + self.espera_maxima_segundos
+                    restante = min(fim_debounce, fim_maximo) - agora
+                    if restante <= 0:
+                        break
+                    self._cond.wait(restante)
+
+                self._sujo = False
+                self._flush_solicitado = False
+                geracao = self._geracao_marcada
+                lote = self._marcacoes_no_lote
+                self._marcacoes_no_lote = 0
+
+            inicio = time.perf_counter()
+            try:
+                sucesso = self._enviar()
+            except Exception as e:
+                logger.error(f"❌ Erro no upload OneDrive ({self.nome}): {e}")
+                sucesso = False
+            duracao = time.perf_counter() - inicio
+
+            with self._cond:
+                if sucesso:
+                    self._geracao_enviada = max(self._geracao_enviada, geracao)
+                    self._metricas["uploads"] += 1
+                    self._metricas["ultimo_upload"] = datetime.now()
+                    self._metricas["ultima_duracao_segundos"] = duracao
+                    backoff = self.backoff_inicial_segundos
+                    self._cond.notify_all()
+                    logger.info(f"📤 Upload OneDrive ({self.nome}): {lote} alteração(ões) em 1 envio ({duracao:.2f}s)")
+                    continue
+
+                # Falha: manter como pendente e tentar de novo após o backoff
+                self._metricas["falhas"] += 1
+                if not self._sujo:
+                    self._sujo = True
+                    self._primeira_marcacao = self._ultima_marcacao = time.monotonic()
+                self._marcacoes_no_lote += lote
+                self._cond.notify_all()
+
+                if self._parar:
+                    logger.error(f"❌ Upload OneDrive ({self.nome}) falhou durante o encerramento")
+                    return
+
+                logger.warning(
+                    f"⚠️ Upload OneDrive ({self.nome}) falhou - nova tentativa em {backoff:.0f}s "
+                    "(dados seguros localmente)"
+                )
+                self._esperar(backoff)
+                backoff = min(backoff * 2, self.backoff_maximo_segundos)
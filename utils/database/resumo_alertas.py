@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+📁 ARQUIVO: utils/database/resumo_alertas.py
+📦 FUNÇÃO: Estatísticas materializadas de alertas_enviados
+🔧 DESCRIÇÃO: Contagens por tipo, por mês e por casa mantidas por triggers
+   a cada INSERT/UPDATE/DELETE em alertas_enviados - obter_estatisticas_alertas
+   lê só as tabelas de resumo, sem varrer o histórico. Os triggers também
+   cobrem alterações reaplicadas pelo sync delta.
+
+Verificação/reconstrução manual:
+    python -m utils.database.resumo_alertas <arquivo.db> [--verificar]
+"""
+
+import os
+import sqlite3
+from typing import Dict
+
+# Mês no mesmo formato do relatório anterior (YYYY-MM, horário de Brasília)
+_MES = "substr({linha}.data_envio, 7, 4) || '-' || substr({linha}.data_envio, 4, 2)"
+
+# tabela -> (coluna da chave, expressão sobre a linha de alertas_enviados)
+RESUMOS = {
+    "resumo_alertas_tipo": ("tipo_alerta", "{linha}.tipo_alerta"),
+    "resumo_alertas_mes": ("mes_ano", _MES),
+    "resumo_alertas_casa": ("codigo_casa", "{linha}.codigo_casa"),
+}
+
+
+def _incrementar(tabela: str, coluna: str, expressao: str) -> str:
+    valor = expressao.format(linha="NEW")
+    return (
+        f"INSERT INTO {tabela} ({coluna}, contagem) VALUES ({valor}, 1) "
+        f"ON CONFLICT({coluna}) DO UPDATE SET contagem = contagem + 1;"
+    )
+
+
+def _decrementar(tabela: str, coluna: str, expressao: str) -> str:
+    valor = expressao.format(linha="OLD")
+    return (
+        f"UPDATE {tabela} SET contagem = contagem - 1 WHERE {coluna} = {valor};\n"
+        f"                DELETE FROM {tabela} WHERE {coluna} = {valor} AND contagem <= 0;"
+    )
+
+
+def instalar_resumo(conn, esquema: str = "main"):
+    """
+    Cria as tabelas de resumo e (re)cria os triggers que as mantêm
+
+    Args:
+        conn: conexão de escrita (o commit fica a cargo de quem chama)
+        esquema (str): schema de alertas_enviados (ex: histórico anexado)
+    """
+    for tabela, (coluna, _) in RESUMOS.items():
+        conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {esquema}.{tabela} (
+            {coluna} TEXT PRIMARY KEY,
+            contagem INTEGER NOT NULL
+        )
+        ''')
+
+    incrementos = "\n                ".join(_incrementar(t, c, e) for t, (c, e) in RESUMOS.items())
+    decrementos = "\n                ".join(_decrementar(t, c, e) for t, (c, e) in RESUMOS.items())
+
+    for operacao, sufixo, corpo in (
+        ("INSERT", "ins", incrementos),
+        ("DELETE", "del", decrementos),
+        ("UPDATE OF tipo_alerta, codigo_casa, data_envio", "upd", decrementos + "\n                " + incrementos),
+    ):
+        conn.execute(f"DROP TRIGGER IF EXISTS {esquema}.trg_resumo_alertas_{sufixo}")
+        conn.execute(f'''
+            CREATE TRIGGER {esquema}.trg_resumo_alertas_{sufixo} AFTER {operacao} ON alertas_enviados
+            BEGIN
+                {corpo}
+            END
+        ''')
+
+
+def _contagens_reais(conn, tabela: str) -> Dict[str, int]:
+    coluna, expressao = RESUMOS[tabela]
+    valor = expressao.format(linha="alertas_enviados")
+    return {
+        chave: contagem for chave, contagem in conn.execute(
+            f"SELECT {valor}, COUNT(*) FROM alertas_enviados GROUP BY 1"
+        ).fetchall()
+    }
+
+
+def reconstruir_resumo(conn, verificar: bool = False) -> Dict[str, int]:
+    """
+    Recalcula as tabelas de resumo a partir de alertas_enviados (varredura completa)
+
+    Args:
+        conn: conexão de escrita (o commit fica a cargo de quem chama)
+        verificar (bool): True = só compara, sem regravar
+
+    Returns:
+        Dict: chaves divergentes por tabela de resumo (0 = consistente)
+    """
+    divergencias = {}
+    for tabela, (coluna, _) in RESUMOS.items():
+        reais = _contagens_reais(conn, tabela)
+        gravadas = {
+            chave: contagem for chave, contagem in conn.execute(f"SELECT {coluna}, contagem FROM {tabela}").fetchall()
+        }
+        divergencias[tabela] = sum(
+            1 for chave in reais.keys() | gravadas.keys() if reais.get(chave) != gravadas.get(chave)
+        )
+
+        if not verificar:
+            conn.execute(f"DELETE FROM {tabela}")
+            conn.executemany(f"INSERT INTO {tabela} ({coluna}, contagem) VALUES (?, ?)", reais.items())
+
+    return divergencias
+
+
+def ler_resumo(conn) -> Dict:
+    """
+    Estatísticas a partir das tabelas de resumo (custo independe do histórico)
+
+    Returns:
+        Dict: total, por_tipo (maior contagem primeiro), por_periodo (mês
+        mais recente primeiro) e por_casa
+    """
+    por_tipo = dict(conn.execute(
+        "SELECT tipo_alerta, contagem FROM resumo_alertas_tipo ORDER BY contagem DESC"
+    ).fetchall())
+    por_periodo = dict(conn.execute(
+        "SELECT mes_ano, contagem FROM resumo_alertas_mes ORDER BY mes_ano DESC"
+    ).fetchall())
+    por_casa = dict(conn.execute(
+        "SELECT codigo_casa, contagem FROM resumo_alertas_casa ORDER BY contagem DESC"
+    ).fetchall())
+    return {
+        'total': sum(por_tipo.values()),
+        'por_tipo': por_tipo,
+        'por_periodo': por_periodo,
+        'por_casa': por_casa,
+    }
+
+
+def main():
+    """Verifica (ou reconstrói) as tabelas de resumo de um arquivo local"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Resumo de alertas do banco do CCB Alerta Bot")
+    parser.add_argument("arquivo", help="Arquivo .db")
+    parser.add_argument("--verificar", action="store_true", help="Só compara com alertas_enviados, sem regravar")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.arquivo):
+        parser.error(f"Arquivo não encontrado: {args.arquivo}")
+
+    conn = sqlite3.connect(args.arquivo, timeout=30)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        divergencias = reconstruir_resumo(conn, verificar=args.verificar)
+        conn.commit()
+    finally:
+        conn.close()
+
+    for tabela, quantidade in divergencias.items():
+        print(f"{tabela}: {'ok' if not quantidade else f'{quantidade} divergências'}")
+    if not args.verificar:
+        print("Resumo reconstruído")
+
+
+if __name__ == "__main__":
+    main()
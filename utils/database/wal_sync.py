@@ -0,0 +1,813 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+📁 ARQUIVO: utils/database/wal_sync.py
+📦 FUNÇÃO: Replicação do banco por frames do WAL (envio contínuo + restauração no tempo)
+🔧 DESCRIÇÃO: Com DB_WAL_ENABLED cada commit grava as páginas alteradas no
+   arquivo -wal. O replicador lê os frames commitados ainda não enviados
+   (validando salts e checksums como a recuperação do SQLite) e os envia em
+   segmentos pequenos; periodicamente envia uma base completa. O custo de
+   cada envio é proporcional às páginas alteradas, não ao tamanho do banco.
+
+   O checkpoint automático fica desligado (wal_autocheckpoint=0): o WAL só
+   recomeça depois de um checkpoint feito pelo replicador com todos os
+   frames enviados. Um recomeço fora disso (ex: arquivo trocado, processo
+   reiniciado) força uma nova base.
+
+Layout remoto (pasta Alerta/wal):
+    base_000000000042_1760700000000.db         banco completo (seq 42, epoch ms)
+    segmento_000000000043_1760700005000.wal    frames seguintes à base 42
+
+Restauração (até o fim ou até um momento) a partir de arquivos locais:
+    python -m utils.database.wal_sync <pasta_com_arquivos> <destino.db> [--ate "17/10/2026 14:30"] [--seq N]
+"""
+
+import os
+import re
+import shutil
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+import zlib
+import logging
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .. import compressao
+
+logger = logging.getLogger("CCB-Alerta-Bot.database.wal")
+
+SUBPASTA_REMOTA = "wal"
+
+# Formato do -wal (https://www.sqlite.org/fileformat2.html#walformat)
+_MAGIAS_WAL = {0x377F0682: False, 0x377F0683: True}  # magia -> checksum big-endian
+_CABECALHO_WAL = struct.Struct(">8I")
+_CABECALHO_FRAME = struct.Struct(">6I")
+
+# Segmento: b"CCBW" + versão + tamanho da página + seq + frames + epoch ms + crc32 do corpo,
+# seguido de (página, tamanho após commit ou 0, conteúdo) por frame
+MAGIA_SEGMENTO = b"CCBW"
+FORMATO_SEGMENTO = 1
+_CABECALHO_SEGMENTO = struct.Struct(">4sBIQIQI")
+_FRAME_SEGMENTO = struct.Struct(">II")
+
+_PADRAO_BASE = re.compile(r"^base_(\d{12})_(\d{13})\.db$")
+_PADRAO_SEGMENTO = re.compile(r"^segmento_(\d{12})_(\d{13})\.wal$")
+
+# (página, tamanho do banco após o commit ou 0, conteúdo)
+Frame = Tuple[int, int, bytes]
+
+
+def nome_base(seq: int, momento_ms: int) -> str:
+    return f"base_{seq:012d}_{momento_ms:013d}.db"
+
+
+def nome_segmento(seq: int, momento_ms: int) -> str:
+    return f"segmento_{seq:012d}_{momento_ms:013d}.wal"
+
+
+def _agora_ms() -> int:
+    return int(time.time() * 1000)
+
+
+# ============================================
+# LEITURA DO -WAL
+# ============================================
+
+class WALReiniciado(Exception):
+    """O -wal recomeçou (salts novos ou arquivo zerado) desde a última posição lida"""
+
+
+class PosicaoWAL(NamedTuple):
+    """Ponto do -wal logo após o último commit lido"""
+    salts: Tuple[int, int]
+    offset: int
+    checksum: Tuple[int, int]
+    tamanho_pagina: int
+    big_endian: bool
+
+
+def _checksum(dados: bytes, s1: int, s2: int, big_endian: bool) -> Tuple[int, int]:
+    """Checksum cumulativo do WAL (pares de palavras de 32 bits)"""
+    palavras = struct.unpack(f"{'>' if big_endian else '<'}{len(dados) // 4}I", dados)
+    for i in range(0, len(palavras), 2):
+        s1 = (s1 + palavras[i] + s2) & 0xFFFFFFFF
+        s2 = (s2 + palavras[i + 1] + s1) & 0xFFFFFFFF
+    return s1, s2
+
+
+def _ler_cabecalho_wal(dados: bytes) -> Optional[PosicaoWAL]:
+    """Posição do primeiro frame, ou None se o cabeçalho está ausente/inválido"""
+    if len(dados) < _CABECALHO_WAL.size:
+        return None
+    magia, _, tamanho_pagina, _, salt1, salt2, ck1, ck2 = _CABECALHO_WAL.unpack_from(dados)
+    if magia not in _MAGIAS_WAL:
+        return None
+    big_endian = _MAGIAS_WAL[magia]
+    if _checksum(dados[:24], 0, 0, big_endian) != (ck1, ck2):
+        return None
+    return PosicaoWAL((salt1, salt2), _CABECALHO_WAL.size, (ck1, ck2), tamanho_pagina, big_endian)
+
+
+def ler_frames_commitados(caminho: str, posicao: Optional[PosicaoWAL] = None
+                          ) -> Tuple[Optional[PosicaoWAL], List[Frame]]:
+    """
+    Frames válidos do -wal após `posicao`, até o último commit
+
+    Frames de uma transação ainda aberta (sem frame de commit depois deles)
+    ficam para a próxima leitura.
+
+    Args:
+        caminho (str): arquivo -wal
+        posicao (PosicaoWAL): retorno da leitura anterior (None = início do WAL)
+
+    Raises:
+        WALReiniciado: o WAL recomeçou depois de `posicao`
+
+    Returns:
+        Tuple: (nova posição, frames); posição None se não há WAL
+    """
+    try:
+        with open(caminho, "rb") as f:
+            cabecalho = _ler_cabecalho_wal(f.read(_CABECALHO_WAL.size))
+            if cabecalho is None:
+                if posicao is not None:
+                    raise WALReiniciado("WAL zerado")
+                return None, []
+            if posicao is not None and posicao.salts != cabecalho.salts:
+                raise WALReiniciado("salts do WAL mudaram")
+
+            atual = posicao or cabecalho
+            f.seek(atual.offset)
+            dados = f.read()
+    except FileNotFoundError:
+        if posicao is not None:
+            raise WALReiniciado("WAL removido")
+        return None, []
+
+    tamanho_frame = _CABECALHO_FRAME.size + atual.tamanho_pagina
+    checksum = atual.checksum
+    frames: List[Frame] = []
+    commitados = 0
+    fim = atual
+
+    inicio = 0
+    while inicio + tamanho_frame <= len(dados):
+        pagina, commit, salt1, salt2, ck1, ck2 = _CABECALHO_FRAME.unpack_from(dados, inicio)
+        if (salt1, salt2) != atual.salts:
+            break
+        conteudo = dados[inicio + _CABECALHO_FRAME.size:inicio + tamanho_frame]
+        checksum = _checksum(dados[inicio:inicio + 8] + conteudo, *checksum, atual.big_endian)
+        if checksum != (ck1, ck2):
+            break
+
+        frames.append((pagina, commit, conteudo))
+        inicio += tamanho_frame
+        if commit:
+            commitados = len(frames)
+            fim = atual._replace(offset=atual.offset + inicio, checksum=checksum)
+
+    return fim, frames[:commitados]
+
+
+# ============================================
+# SEGMENTOS E RECONSTRUÇÃO
+# ============================================
+
+def consolidar_frames(frames: List[Frame]) -> List[Frame]:
+    """
+    Última versão de cada página, como o checkpoint do SQLite grava
+
+    Uma página reescrita por vários commits do mesmo segmento vai uma vez
+    só; páginas além do tamanho final do banco são descartadas. O último
+    frame leva o tamanho do banco após o último commit.
+    """
+    tamanho = frames[-1][1]
+    ultimas = {pagina: conteudo for pagina, _, conteudo in frames}
+    paginas = sorted(pagina for pagina in ultimas if pagina <= tamanho)
+    if not paginas:
+        return frames
+    return [(pagina, 0, ultimas[pagina]) for pagina in paginas[:-1]] + [(paginas[-1], tamanho, ultimas[paginas[-1]])]
+
+
+def escrever_segmento(caminho: str, seq: int, tamanho_pagina: int, frames: List[Frame], momento_ms: int) -> int:
+    """
+    Grava frames do WAL em um segmento
+
+    Returns:
+        int: tamanho do arquivo gravado
+    """
+    corpo = b"".join(_FRAME_SEGMENTO.pack(pagina, commit) + conteudo for pagina, commit, conteudo in frames)
+    with open(caminho, "wb") as f:
+        f.write(_CABECALHO_SEGMENTO.pack(
+            MAGIA_SEGMENTO, FORMATO_SEGMENTO, tamanho_pagina, seq, len(frames), momento_ms, zlib.crc32(corpo)
+        ))
+        f.write(corpo)
+        return f.tell()
+
+
+def ler_segmento(caminho: str) -> Tuple[Dict, List[Frame]]:
+    """
+    Lê um segmento gravado por escrever_segmento
+
+    Raises:
+        ValueError: formato desconhecido, arquivo truncado ou crc divergente
+
+    Returns:
+        Tuple: (seq, tamanho_pagina e momento_ms, frames)
+    """
+    with open(caminho, "rb") as f:
+        dados = f.read()
+    if len(dados) < _CABECALHO_SEGMENTO.size:
+        raise ValueError(f"Segmento truncado: {caminho}")
+
+    magia, versao, tamanho_pagina, seq, quantidade, momento_ms, crc = _CABECALHO_SEGMENTO.unpack_from(dados)
+    if magia != MAGIA_SEGMENTO or versao != FORMATO_SEGMENTO:
+        raise ValueError(f"Formato de segmento não suportado: {caminho}")
+    corpo = dados[_CABECALHO_SEGMENTO.size:]
+    tamanho_frame = _FRAME_SEGMENTO.size + tamanho_pagina
+    if len(corpo) != quantidade * tamanho_frame or zlib.crc32(corpo) != crc:
+        raise ValueError(f"Segmento {seq} corrompido")
+
+    frames = []
+    for inicio in range(0, len(corpo), tamanho_frame):
+        pagina, commit = _FRAME_SEGMENTO.unpack_from(corpo, inicio)
+        frames.append((pagina, commit, corpo[inicio + _FRAME_SEGMENTO.size:inicio + tamanho_frame]))
+    return {"seq": seq, "tamanho_pagina": tamanho_pagina, "momento_ms": momento_ms}, frames
+
+
+def _tamanho_pagina_arquivo(caminho: str) -> int:
+    with open(caminho, "rb") as f:
+        cabecalho = f.read(100)
+    tamanho = struct.unpack_from(">H", cabecalho, 16)[0]
+    return 65536 if tamanho == 1 else tamanho
+
+
+def contador_alteracoes(caminho: str) -> int:
+    """Contador de alterações do cabeçalho do arquivo (muda a cada commit fora do WAL)"""
+    with open(caminho, "rb") as f:
+        cabecalho = f.read(100)
+    return struct.unpack_from(">I", cabecalho, 24)[0]
+
+
+def _ler_segmento_descomprimido(caminho: str, temporario: str) -> Tuple[Dict, List[Frame]]:
+    """ler_segmento de um arquivo bruto ou comprimido (cabeçalho CCBZ, como enviado ao OneDrive)"""
+    if compressao.ler_cabecalho(caminho) is None:
+        return ler_segmento(caminho)
+    compressao.descomprimir_arquivo(caminho, temporario)
+    try:
+        return ler_segmento(temporario)
+    finally:
+        os.remove(temporario)
+
+
+def reconstruir_banco(destino: str, base_path: str, segmentos_paths: List[str]) -> Tuple[int, int]:
+    """
+    Aplica segmentos sobre uma base, na ordem, como um checkpoint do SQLite
+
+    Cada página é gravada na sua posição e o arquivo é cortado no tamanho
+    de cada commit. Os segmentos precisam continuar a sequência da base sem
+    lacunas. O resultado é convertido para journal DELETE e validado com
+    PRAGMA quick_check antes de ser colocado em `destino`. Base e segmentos
+    podem estar comprimidos (cabeçalho CCBZ) como são enviados ao OneDrive.
+
+    Args:
+        destino (str): arquivo do banco reconstruído (sobrescrito)
+        base_path (str): base (base_<seq>_<ms>.db)
+        segmentos_paths (List[str]): segmentos seguintes à base, em ordem de seq
+
+    Returns:
+        Tuple: (seq do último segmento aplicado ou da base, frames aplicados)
+    """
+    encontrado = _PADRAO_BASE.match(os.path.basename(base_path))
+    atual = int(encontrado.group(1)) if encontrado else 0
+
+    temporario = destino + ".tmp"
+    shutil.copyfile(base_path, temporario)
+    aplicados = 0
+
+    try:
+        compressao.descomprimir_se_necessario(temporario)
+        tamanho_pagina = _tamanho_pagina_arquivo(temporario)
+
+        with open(temporario, "r+b") as f:
+            for caminho in segmentos_paths:
+                info, frames = _ler_segmento_descomprimido(caminho, temporario + ".segmento")
+                if info["seq"] != atual + 1:
+                    raise ValueError(f"Lacuna na sequência: esperado {atual + 1}, segmento {info['seq']}")
+                if info["tamanho_pagina"] != tamanho_pagina:
+                    raise ValueError(f"Segmento {info['seq']} com páginas de {info['tamanho_pagina']} bytes")
+
+                for pagina, commit, conteudo in frames:
+                    f.seek((pagina - 1) * tamanho_pagina)
+                    f.write(conteudo)
+                    if commit:
+                        f.truncate(commit * tamanho_pagina)
+                aplicados += len(frames)
+                atual = info["seq"]
+            f.flush()
+            os.fsync(f.fileno())
+
+        conn = sqlite3.connect(temporario)
+        try:
+            conn.execute("PRAGMA journal_mode=DELETE")
+            resultado = conn.execute("PRAGMA quick_check").fetchone()[0]
+            if resultado != "ok":
+                raise sqlite3.DatabaseError(f"quick_check do banco reconstruído falhou: {resultado}")
+        finally:
+            conn.close()
+    except Exception:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+    os.replace(temporario, destino)
+    return atual, aplicados
+
+
+def classificar_arquivos_remotos(nomes: List[str]) -> Tuple[Dict[int, Tuple[int, str]], Dict[int, Tuple[int, str]]]:
+    """Separa bases e segmentos ({seq: (epoch ms, nome)})"""
+    bases, segmentos = {}, {}
+    for nome in nomes:
+        base = _PADRAO_BASE.match(nome)
+        segmento = _PADRAO_SEGMENTO.match(nome)
+        if base:
+            bases[int(base.group(1))] = (int(base.group(2)), nome)
+        elif segmento:
+            segmentos[int(segmento.group(1))] = (int(segmento.group(2)), nome)
+    return bases, segmentos
+
+
+def planejar_restauracao(bases: Dict[int, Tuple[int, str]], segmentos: Dict[int, Tuple[int, str]],
+                         ate_ms: Optional[int] = None, ate_seq: Optional[int] = None
+                         ) -> Optional[Tuple[int, List[int]]]:
+    """
+    Base e segmentos necessários para chegar ao estado pedido
+
+    Usa a base mais recente anterior ao limite e os segmentos contíguos
+    seguintes enviados até o limite (momento do envio, epoch ms, ou seq).
+
+    Returns:
+        Tuple: (seq da base, seqs dos segmentos), ou None se nenhuma base
+        é anterior ao limite
+    """
+    def dentro(seq: int, momento_ms: int) -> bool:
+        return (ate_ms is None or momento_ms <= ate_ms) and (ate_seq is None or seq <= ate_seq)
+
+    candidatas = [seq for seq, (momento_ms, _) in bases.items() if dentro(seq, momento_ms)]
+    if not candidatas:
+        return None
+
+    seq_base = max(candidatas)
+    seqs = []
+    seq = seq_base + 1
+    while seq in segmentos and dentro(seq, segmentos[seq][0]):
+        seqs.append(seq)
+        seq += 1
+    return seq_base, seqs
+
+
+# ============================================
+# ARMAZENAMENTO LOCAL (TESTES / RÉPLICA EM DISCO)
+# ============================================
+
+class ArmazenamentoLocal:
+    """
+    Pasta local com a mesma interface usada do OneDriveManager
+
+    upload_arquivo/download_arquivo/listar_arquivos/remover_arquivo com
+    caminhos remotos relativos a `raiz` (ex: "wal/base_...db").
+    """
+
+    def __init__(self, raiz: str):
+        self.raiz = raiz
+        os.makedirs(raiz, exist_ok=True)
+
+    def _caminho(self, caminho_remoto: str) -> str:
+        return os.path.join(self.raiz, *caminho_remoto.split("/"))
+
+    def upload_arquivo(self, local_path: str, caminho_remoto: str, comprimir: bool = False) -> bool:
+        destino = self._caminho(caminho_remoto)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        shutil.copyfile(local_path, destino + ".tmp")
+        os.replace(destino + ".tmp", destino)
+        return True
+
+    def download_arquivo(self, caminho_remoto: str, local_path: str) -> bool:
+        origem = self._caminho(caminho_remoto)
+        if not os.path.exists(origem):
+            return False
+        shutil.copyfile(origem, local_path)
+        return True
+
+    def download_database(self, local_db_path: str) -> bool:
+        return False
+
+    def listar_arquivos(self, subpasta: str) -> Optional[List[Dict]]:
+        pasta = self._caminho(subpasta)
+        if not os.path.isdir(pasta):
+            return []
+        return [
+            {"name": nome, "size": os.path.getsize(os.path.join(pasta, nome))}
+            for nome in sorted(os.listdir(pasta)) if not nome.endswith(".tmp")
+        ]
+
+    def remover_arquivo(self, caminho_remoto: str) -> bool:
+        try:
+            os.remove(self._caminho(caminho_remoto))
+        except FileNotFoundError:
+            pass
+        return True
+
+
+# ============================================
+# REPLICADOR
+# ============================================
+
+class ReplicadorWAL:
+    """
+    Envia frames do WAL em segmentos e bases periódicas ao armazenamento
+
+    Usado pela fila de upload (enviar_pendentes), pelo agendador de
+    checkpoint (checkpoint) e pelo atualizador em segundo plano (restaurar).
+    A posição enviada fica em memória: todo processo novo começa com uma
+    base (ou continua a sequência do banco que acabou de restaurar).
+    """
+
+    def __init__(self, manager, get_connection: Callable, db_path_atual: Callable[[], str],
+                 base_a_cada: int = 200, bases_mantidas: int = 3):
+        """
+        Args:
+            manager: OneDriveManager ou ArmazenamentoLocal
+            get_connection: função(somente_leitura=False) -> conexão do banco em uso
+            db_path_atual: função() -> caminho do banco em uso (o WAL fica ao lado)
+            base_a_cada: segmentos enviados que disparam uma nova base
+            bases_mantidas: bases (e seus segmentos) mantidas no armazenamento
+        """
+        self.manager = manager
+        self._get_connection = get_connection
+        self._db_path_atual = db_path_atual
+        self.base_a_cada = base_a_cada
+        self.bases_mantidas = max(1, bases_mantidas)
+
+        self._lock = threading.Lock()
+        self._pasta = tempfile.mkdtemp(prefix="ccb_wal_")
+
+        self._seq: Optional[int] = None          # último seq enviado (base ou segmento)
+        self._posicao: Optional[PosicaoWAL] = None
+        self._reinicio_seguro = False            # WAL pode recomeçar sem perder frames
+        self._segmentos_desde_base = 0
+        self._pendente: Optional[Dict] = None    # segmento gravado cujo upload falhou
+        self._restaurado: Optional[Tuple[int, int]] = None  # (seq, contador) do último restaurar()
+
+        self._metricas = {
+            "segmentos_enviados": 0,
+            "frames_enviados": 0,
+            "bytes_enviados": 0,
+            "bases_enviadas": 0,
+            "bytes_bases": 0,
+            "checkpoints": 0,
+            "reinicios_inesperados": 0,
+            "restauracoes": 0,
+            "ultimo_seq": None,
+        }
+
+    def _caminho_wal(self) -> str:
+        return self._db_path_atual() + "-wal"
+
+    # ------------------------------------------------------------------
+    # Upload
+    # ------------------------------------------------------------------
+
+    def enviar_pendentes(self) -> bool:
+        """
+        Envia os frames commitados desde o último envio
+
+        Sem posição conhecida (processo novo, WAL recomeçado fora de um
+        checkpoint do replicador) ou após `base_a_cada` segmentos, envia
+        uma base no lugar.
+
+        Returns:
+            bool: True se não restou nada pendente
+        """
+        with self._lock:
+            if self._pendente and not self._reenviar_pendente():
+                return False
+
+            if self._seq is None:
+                return self._enviar_base()
+
+            # Conexão de escrita retida: nenhum commit pela metade durante a leitura
+            reinicio = None
+            conn = self._get_connection()
+            try:
+                try:
+                    posicao, frames = ler_frames_commitados(self._caminho_wal(), self._posicao)
+                except WALReiniciado as e:
+                    if self._reinicio_seguro:
+                        posicao, frames = ler_frames_commitados(self._caminho_wal(), None)
+                    else:
+                        reinicio = e
+            finally:
+                conn.close()
+
+            if reinicio:
+                self._metricas["reinicios_inesperados"] += 1
+                logger.warning(f"⚠️ WAL recomeçou com frames possivelmente não enviados ({reinicio}) - enviando base")
+                return self._enviar_base()
+
+            if posicao != self._posicao:
+                self._reinicio_seguro = False
+
+            if frames:
+                frames = consolidar_frames(frames)
+                seq = self._seq + 1
+                momento_ms = _agora_ms()
+                caminho = os.path.join(self._pasta, nome_segmento(seq, momento_ms))
+                tamanho = escrever_segmento(caminho, seq, posicao.tamanho_pagina, frames, momento_ms)
+                self._pendente = {
+                    "seq": seq, "caminho": caminho, "posicao": posicao,
+                    "frames": len(frames), "tamanho": tamanho,
+                }
+                if not self._reenviar_pendente():
+                    return False
+            else:
+                self._posicao = posicao
+
+            if self._segmentos_desde_base >= self.base_a_cada:
+                return self._enviar_base()
+            return True
+
+    def _reenviar_pendente(self) -> bool:
+        """Upload do segmento pendente (sempre o mesmo arquivo, mesmo nome)"""
+        pendente = self._pendente
+        remoto = f"{SUBPASTA_REMOTA}/{os.path.basename(pendente['caminho'])}"
+        if not self.manager.upload_arquivo(pendente["caminho"], remoto, comprimir=True):
+            return False
+
+        os.remove(pendente["caminho"])
+        self._pendente = None
+        self._seq = pendente["seq"]
+        self._posicao = pendente["posicao"]
+        self._segmentos_desde_base += 1
+
+        self._metricas["segmentos_enviados"] += 1
+        self._metricas["frames_enviados"] += pendente["frames"]
+        self._metricas["bytes_enviados"] += pendente["tamanho"]
+        self._metricas["ultimo_seq"] = pendente["seq"]
+        logger.info(f"📤 Segmento WAL {pendente['seq']} enviado: {pendente['frames']} frames ({pendente['tamanho']} bytes)")
+        return True
+
+    def _proximo_seq_base(self) -> Optional[int]:
+        itens = self.manager.listar_arquivos(SUBPASTA_REMOTA)
+        if itens is None:
+            return None
+        bases, segmentos = classificar_arquivos_remotos([item["name"] for item in itens])
+        return max([self._seq or 0] + list(bases) + list(segmentos)) + 1
+
+    def _enviar_base(self) -> bool:
+        """
+        Envia uma base completa e fixa a posição do WAL correspondente
+
+        A cópia é feita com a conexão de escrita retida: nenhum commit entra
+        entre a base e a posição de onde os próximos segmentos continuam.
+        """
+        seq = self._proximo_seq_base()
+        if seq is None:
+            return False
+
+        momento_ms = _agora_ms()
+        caminho = os.path.join(self._pasta, nome_base(seq, momento_ms))
+        retida = self._get_connection()
+        try:
+            modo = retida.execute("PRAGMA main.journal_mode").fetchone()[0]
+            if modo.lower() != "wal":
+                logger.error(f"❌ Replicação WAL requer journal_mode=WAL (atual: {modo})")
+                return False
+            destino = sqlite3.connect(caminho)
+            try:
+                retida.backup(destino, name="main")
+            finally:
+                destino.close()
+            posicao, _ = ler_frames_commitados(self._caminho_wal(), None)
+        finally:
+            retida.close()
+
+        try:
+            tamanho = os.path.getsize(caminho)
+            if not self.manager.upload_arquivo(caminho, f"{SUBPASTA_REMOTA}/{os.path.basename(caminho)}", comprimir=True):
+                return False
+        finally:
+            os.remove(caminho)
+
+        self._seq = seq
+        self._posicao = posicao
+        # Sem WAL no momento da base, o próximo WAL começa depois dela
+        self._reinicio_seguro = posicao is None
+        self._segmentos_desde_base = 0
+
+        self._metricas["bases_enviadas"] += 1
+        self._metricas["bytes_bases"] += tamanho
+        self._metricas["ultimo_seq"] = seq
+        logger.info(f"🗜️ Base WAL {seq} enviada ({tamanho} bytes)")
+
+        self._remover_remotos_obsoletos()
+        return True
+
+    def _remover_remotos_obsoletos(self):
+        """Mantém as `bases_mantidas` bases mais recentes e os segmentos posteriores à mais antiga delas"""
+        itens = self.manager.listar_arquivos(SUBPASTA_REMOTA)
+        if not itens:
+            return
+
+        bases, segmentos = classificar_arquivos_remotos([item["name"] for item in itens])
+        mantidas = sorted(bases)[-self.bases_mantidas:]
+        if not mantidas:
+            return
+
+        obsoletos = [nome for seq, (_, nome) in bases.items() if seq < mantidas[0]]
+        obsoletos += [nome for seq, (_, nome) in segmentos.items() if seq < mantidas[0]]
+        for nome in obsoletos:
+            self.manager.remover_arquivo(f"{SUBPASTA_REMOTA}/{nome}")
+
+    # ------------------------------------------------------------------
+    # Checkpoint
+    # ------------------------------------------------------------------
+
+    def checkpoint(self) -> Optional[tuple]:
+        """
+        Checkpoint PASSIVE do banco principal, só com todos os frames enviados
+
+        Depois dele o SQLite pode recomeçar o WAL na próxima escrita; como
+        nada ficou para trás, o replicador segue no WAL novo sem outra base.
+
+        Returns:
+            tuple: (busy, frames_log, frames_copiados) ou None se adiado
+        """
+        with self._lock:
+            if self._seq is None or self._pendente:
+                return None
+
+            conn = self._get_connection()
+            try:
+                try:
+                    posicao, frames = ler_frames_commitados(self._caminho_wal(), self._posicao)
+                except WALReiniciado:
+                    return None
+                if frames or posicao != self._posicao:
+                    return None
+                resultado = tuple(conn.execute("PRAGMA main.wal_checkpoint(PASSIVE)").fetchone())
+            finally:
+                conn.close()
+
+            self._reinicio_seguro = True
+            self._metricas["checkpoints"] += 1
+            return resultado
+
+    # ------------------------------------------------------------------
+    # Download (restauração)
+    # ------------------------------------------------------------------
+
+    def arquivo_substituido(self):
+        """
+        O banco em uso foi trocado pelo arquivo do último restaurar()
+
+        Se o arquivo não foi alterado depois da restauração (ex: migração de
+        schema), a sequência continua dele; senão o próximo envio é uma base.
+        """
+        with self._lock:
+            restaurado, self._restaurado = self._restaurado, None
+            self._posicao = None
+            self._segmentos_desde_base = 0
+            if restaurado and contador_alteracoes(self._db_path_atual()) == restaurado[1]:
+                self._seq = restaurado[0]
+                self._reinicio_seguro = True
+            else:
+                self._seq = None
+
+    def restaurar(self, destino: str, ate: Optional[datetime] = None, seq: Optional[int] = None) -> Optional[bool]:
+        """
+        Reconstrói em `destino` o banco remoto (base + segmentos)
+
+        Args:
+            destino (str): arquivo reconstruído
+            ate (datetime): restaurar o estado enviado até este momento
+            seq (int): restaurar até este seq (inclusive)
+
+        Returns:
+            bool: True se `destino` foi reconstruído, False em caso de falha
+            None: o banco local já contém tudo o que está no armazenamento
+        """
+        itens = self.manager.listar_arquivos(SUBPASTA_REMOTA)
+        if itens is None:
+            return False
+
+        bases, segmentos = classificar_arquivos_remotos([item["name"] for item in itens])
+        ponto_no_tempo = ate is not None or seq is not None
+        if not bases:
+            if ponto_no_tempo:
+                logger.error("❌ Nenhuma base WAL no armazenamento para restauração no tempo")
+                return False
+            # Ainda no modo arquivo (ou primeira execução): banco inteiro
+            logger.info("📁 Nenhuma base WAL no OneDrive - usando o banco completo")
+            return self.manager.download_database(destino)
+
+        ate_ms = int(ate.timestamp() * 1000) if ate is not None else None
+        plano = planejar_restauracao(bases, segmentos, ate_ms, seq)
+        if plano is None:
+            logger.error(f"❌ Nenhuma base WAL anterior a {ate or seq}")
+            return False
+
+        seq_base, seqs = plano
+        seq_remoto = seqs[-1] if seqs else seq_base
+        if not ponto_no_tempo and self._seq is not None and self._seq >= seq_remoto:
+            return None
+
+        pasta = tempfile.mkdtemp(prefix="ccb_wal_restauracao_")
+        try:
+            base_path = os.path.join(pasta, bases[seq_base][1])
+            if not self.manager.download_arquivo(f"{SUBPASTA_REMOTA}/{bases[seq_base][1]}", base_path):
+                return False
+
+            segmentos_paths = []
+            for seq_segmento in seqs:
+                nome = segmentos[seq_segmento][1]
+                caminho = os.path.join(pasta, nome)
+                if not self.manager.download_arquivo(f"{SUBPASTA_REMOTA}/{nome}", caminho):
+                    return False
+                segmentos_paths.append(caminho)
+
+            aplicado, frames = reconstruir_banco(destino, base_path, segmentos_paths)
+        except (ValueError, sqlite3.Error) as e:
+            logger.error(f"❌ Reconstrução WAL falhou: {e}")
+            return False
+        finally:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+        if not ponto_no_tempo:
+            with self._lock:
+                self._restaurado = (aplicado, contador_alteracoes(destino))
+
+        self._metricas["restauracoes"] += 1
+        logger.info(
+            f"🔁 Banco reconstruído do WAL: base {seq_base} + {len(segmentos_paths)} segmento(s) "
+            f"({frames} frames), até seq {aplicado}"
+        )
+        return True
+
+    def metricas(self) -> Dict:
+        """
+        Contadores da replicação WAL para o /health
+
+        Returns:
+            Dict: segmentos, frames e bytes enviados, bases, checkpoints,
+            recomeços inesperados do WAL e restaurações
+        """
+        with self._lock:
+            return dict(self._metricas)
+
+    def fechar(self):
+        """Remove a pasta temporária (segmento pendente é descartado)"""
+        shutil.rmtree(self._pasta, ignore_errors=True)
+
+
+def main():
+    """Restaura um banco a partir de bases + segmentos em uma pasta local"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Restauração do banco a partir de bases + segmentos WAL")
+    parser.add_argument("pasta", help="Pasta com base_<seq>_<ms>.db e segmento_<seq>_<ms>.wal")
+    parser.add_argument("destino", help="Arquivo do banco restaurado")
+    parser.add_argument("--ate", help="Momento limite (dd/mm/aaaa HH:MM[:SS], horário local)")
+    parser.add_argument("--seq", type=int, help="Último seq a aplicar")
+    args = parser.parse_args()
+
+    ate = None
+    if args.ate:
+        for formato in ("%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M"):
+            try:
+                ate = datetime.strptime(args.ate, formato)
+                break
+            except ValueError:
+                continue
+        else:
+            parser.error(f"Data inválida: {args.ate}")
+
+    bases, segmentos = classificar_arquivos_remotos(os.listdir(args.pasta))
+    plano = planejar_restauracao(bases, segmentos, int(ate.timestamp() * 1000) if ate else None, args.seq)
+    if plano is None:
+        parser.error(f"Nenhuma base anterior ao limite em {args.pasta}")
+
+    seq_base, seqs = plano
+    aplicado, frames = reconstruir_banco(
+        args.destino,
+        os.path.join(args.pasta, bases[seq_base][1]),
+        [os.path.join(args.pasta, segmentos[seq][1]) for seq in seqs]
+    )
+    print(f"Banco restaurado em {args.destino}: base {seq_base}, {len(seqs)} segmento(s), {frames} frames, até seq {aplicado}")
+
+
+if __name__ == "__main__":
+    main()
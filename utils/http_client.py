@@ -0,0 +1,339 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+📁 ARQUIVO: utils/http_client.py
+📦 FUNÇÃO: Transporte HTTP compartilhado (Microsoft Graph e Telegram)
+🔧 DESCRIÇÃO: Uma requests.Session por processo (keep-alive e pool de
+   conexões), novas tentativas com backoff + jitter em 429/5xx respeitando
+   Retry-After e histograma de latência por endpoint. Variante assíncrona
+   (httpx.AsyncClient) com a mesma política, para uso no event loop do bot.
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+import logging
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger("CCB-Alerta-Bot.http")
+
+# Configuração (variáveis de ambiente)
+_pool_maxsize = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))
+_tentativas_padrao = int(os.getenv("HTTP_RETRY_ATTEMPTS", "4"))
+_backoff_inicial_segundos = float(os.getenv("HTTP_RETRY_BACKOFF_SECONDS", "0.5"))
+_backoff_maximo_segundos = float(os.getenv("HTTP_RETRY_BACKOFF_MAX_SECONDS", "30"))
+
+# Status que indicam falha transitória
+STATUS_REPETIR = {429, 500, 502, 503, 504}
+# Para métodos não idempotentes, só repetir quando o servidor recusou sem processar
+STATUS_REPETIR_NAO_IDEMPOTENTE = {429, 503}
+METODOS_IDEMPOTENTES = {"GET", "HEAD", "PUT", "DELETE", "OPTIONS"}
+
+# Limites superiores (ms) das faixas do histograma de latência
+FAIXAS_LATENCIA_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float("inf"))
+
+_sessao: Optional[requests.Session] = None
+_sessao_lock = threading.Lock()
+
+_cliente_async: Optional[httpx.AsyncClient] = None
+_cliente_async_loop = None
+
+_metricas: Dict[str, Dict] = {}
+_metricas_lock = threading.Lock()
+
+
+def obter_sessao() -> requests.Session:
+    """
+    Sessão HTTP compartilhada pelo processo (criada na primeira chamada)
+
+    Returns:
+        requests.Session: sessão com pool de conexões keep-alive
+    """
+    global _sessao
+
+    if _sessao is None:
+        with _sessao_lock:
+            if _sessao is None:
+                sessao = requests.Session()
+                # Retentativas são feitas em requisitar() (com Retry-After e métricas)
+                adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=_pool_maxsize, max_retries=0)
+                sessao.mount("https://", adaptador)
+                sessao.mount("http://", adaptador)
+                _sessao = sessao
+    return _sessao
+
+
+def fechar_sessao():
+    """Fecha a sessão compartilhada (shutdown)"""
+    global _sessao
+
+    with _sessao_lock:
+        if _sessao is not None:
+            _sessao.close()
+            _sessao = None
+
+
+def _espera_retry_after(response) -> Optional[float]:
+    """Segundos pedidos pelo servidor em Retry-After (segundos ou data HTTP)"""
+    valor = response.headers.get("Retry-After")
+    if not valor:
+        return None
+    try:
+        return max(0.0, float(valor))
+    except ValueError:
+        pass
+    try:
+        data = parsedate_to_datetime(valor)
+        return max(0.0, (data - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def _espera_backoff(tentativa: int) -> float:
+    """Backoff exponencial com jitter ("equal jitter")"""
+    teto = min(_backoff_maximo_segundos, _backoff_inicial_segundos * (2 ** tentativa))
+    return teto / 2 + random.uniform(0, teto / 2)
+
+
+def _nome_endpoint(metodo: str, url: str) -> str:
+    return f"{metodo} {urlsplit(url).netloc}"
+
+
+def _registrar(endpoint: str, duracao_ms: float, status: Optional[int], tentativas_extras: int):
+    with _metricas_lock:
+        metrica = _metricas.get(endpoint)
+        if metrica is None:
+            metrica = _metricas[endpoint] = {
+                "chamadas": 0,
+                "erros": 0,
+                "retentativas": 0,
+                "tempo_total_ms": 0.0,
+                "tempo_maximo_ms": 0.0,
+                "faixas": [0] * len(FAIXAS_LATENCIA_MS),
+            }
+
+        metrica["chamadas"] += 1
+        metrica["retentativas"] += tentativas_extras
+        metrica["tempo_total_ms"] += duracao_ms
+        metrica["tempo_maximo_ms"] = max(metrica["tempo_maximo_ms"], duracao_ms)
+        if status is None or status >= 400:
+            metrica["erros"] += 1
+
+        for indice, limite in enumerate(FAIXAS_LATENCIA_MS):
+            if duracao_ms <= limite:
+                metrica["faixas"][indice] += 1
+                break
+
+
+def requisitar(metodo: str, url: str, endpoint: Optional[str] = None,
+               tentativas: Optional[int] = None, **kwargs) -> requests.Response:
+    """
+    Executa uma requisição pela sessão compartilhada, com novas tentativas
+
+    Repete em falhas de conexão/timeout e em 429/5xx (métodos não
+    idempotentes só em 429/503), esperando Retry-After quando informado
+    ou backoff exponencial com jitter. Corpos em arquivo são rebobinados
+    antes de cada nova tentativa.
+
+    Args:
+        metodo (str): GET, PUT, POST, DELETE...
+        url (str): URL completa
+        endpoint (str): Nome do endpoint nas métricas (padrão: método + host)
+        tentativas (int): Total de tentativas (padrão: HTTP_RETRY_ATTEMPTS)
+        **kwargs: repassados para requests.Session.request
+
+    Returns:
+        requests.Response: última resposta obtida
+
+    Raises:
+        requests.RequestException: se a última tentativa falhar sem resposta
+    """
+    metodo = metodo.upper()
+    endpoint = endpoint or _nome_endpoint(metodo, url)
+    tentativas = max(1, tentativas or _tentativas_padrao)
+    idempotente = metodo in METODOS_IDEMPOTENTES
+    repetir_status = STATUS_REPETIR if idempotente else STATUS_REPETIR_NAO_IDEMPOTENTE
+
+    corpo = kwargs.get("data")
+    posicao_corpo = corpo.tell() if hasattr(corpo, "seek") and hasattr(corpo, "tell") else None
+
+    sessao = obter_sessao()
+    inicio = time.perf_counter()
+    tentativa = 0
+
+    while True:
+        if tentativa and posicao_corpo is not None:
+            corpo.seek(posicao_corpo)
+
+        try:
+            response = sessao.request(metodo, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if not idempotente or tentativa + 1 >= tentativas:
+                _registrar(endpoint, (time.perf_counter() - inicio) * 1000, None, tentativa)
+                raise
+            espera = _espera_backoff(tentativa)
+            logger.debug(f"🔁 {endpoint}: {e.__class__.__name__} - nova tentativa em {espera:.1f}s")
+        else:
+            if response.status_code not in repetir_status or tentativa + 1 >= tentativas:
+                _registrar(endpoint, (time.perf_counter() - inicio) * 1000, response.status_code, tentativa)
+                return response
+
+            espera = _espera_retry_after(response)
+            if espera is None:
+                espera = _espera_backoff(tentativa)
+            espera = min(espera, _backoff_maximo_segundos)
+            logger.debug(f"🔁 {endpoint}: HTTP {response.status_code} - nova tentativa em {espera:.1f}s")
+            response.close()
+
+        time.sleep(espera)
+        tentativa += 1
+
+
+# ============================================
+# CLIENTE ASSÍNCRONO (httpx)
+# ============================================
+
+def obter_cliente_async() -> httpx.AsyncClient:
+    """
+    Cliente httpx compartilhado do event loop atual
+
+    Um AsyncClient fica preso ao loop em que foi criado; se o loop mudar
+    (ex: asyncio.run em scripts), um novo cliente é criado.
+
+    Returns:
+        httpx.AsyncClient: cliente com pool de conexões keep-alive
+    """
+    global _cliente_async, _cliente_async_loop
+
+    loop = asyncio.get_running_loop()
+    if _cliente_async is None or _cliente_async_loop is not loop:
+        _cliente_async = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=_pool_maxsize, max_keepalive_connections=_pool_maxsize),
+            follow_redirects=True
+        )
+        _cliente_async_loop = loop
+    return _cliente_async
+
+
+async def fechar_cliente_async():
+    """Fecha o cliente assíncrono do loop atual (shutdown)"""
+    global _cliente_async, _cliente_async_loop
+
+    if _cliente_async is not None and _cliente_async_loop is asyncio.get_running_loop():
+        await _cliente_async.aclose()
+    _cliente_async = None
+    _cliente_async_loop = None
+
+
+async def requisitar_async(metodo: str, url: str, endpoint: Optional[str] = None,
+                           tentativas: Optional[int] = None, stream: bool = False,
+                           **kwargs) -> httpx.Response:
+    """
+    Versão assíncrona de requisitar() - mesma política de novas tentativas
+
+    Args:
+        metodo (str): GET, PUT, POST, DELETE...
+        url (str): URL completa
+        endpoint (str): Nome do endpoint nas métricas (padrão: método + host)
+        tentativas (int): Total de tentativas (padrão: HTTP_RETRY_ATTEMPTS)
+        stream (bool): Não ler o corpo (usar aiter_bytes() e aclose())
+        **kwargs: repassados para httpx.AsyncClient.build_request
+            (content= deve ser bytes para poder ser reenviado)
+
+    Returns:
+        httpx.Response: última resposta obtida
+
+    Raises:
+        httpx.TransportError: se a última tentativa falhar sem resposta
+    """
+    metodo = metodo.upper()
+    endpoint = endpoint or _nome_endpoint(metodo, url)
+    tentativas = max(1, tentativas or _tentativas_padrao)
+    idempotente = metodo in METODOS_IDEMPOTENTES
+    repetir_status = STATUS_REPETIR if idempotente else STATUS_REPETIR_NAO_IDEMPOTENTE
+
+    cliente = obter_cliente_async()
+    inicio = time.perf_counter()
+    tentativa = 0
+
+    while True:
+        try:
+            requisicao = cliente.build_request(metodo, url, **kwargs)
+            response = await cliente.send(requisicao, stream=stream)
+        except httpx.TransportError as e:
+            if not idempotente or tentativa + 1 >= tentativas:
+                _registrar(endpoint, (time.perf_counter() - inicio) * 1000, None, tentativa)
+                raise
+            espera = _espera_backoff(tentativa)
+            logger.debug(f"🔁 {endpoint}: {e.__class__.__name__} - nova tentativa em {espera:.1f}s")
+        else:
+            if response.status_code not in repetir_status or tentativa + 1 >= tentativas:
+                _registrar(endpoint, (time.perf_counter() - inicio) * 1000, response.status_code, tentativa)
+                return response
+
+            espera = _espera_retry_after(response)
+            if espera is None:
+                espera = _espera_backoff(tentativa)
+            espera = min(espera, _backoff_maximo_segundos)
+            logger.debug(f"🔁 {endpoint}: HTTP {response.status_code} - nova tentativa em {espera:.1f}s")
+            await response.aclose()
+
+        await asyncio.sleep(espera)
+        tentativa += 1
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return requisitar("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return requisitar("POST", url, **kwargs)
+
+
+def put(url: str, **kwargs) -> requests.Response:
+    return requisitar("PUT", url, **kwargs)
+
+
+def delete(url: str, **kwargs) -> requests.Response:
+    return requisitar("DELETE", url, **kwargs)
+
+
+def obter_metricas_http() -> Dict[str, Dict]:
+    """
+    Latência por endpoint para o /health
+
+    Returns:
+        Dict: por endpoint - chamadas, erros, retentativas, média, máximo,
+              p50/p95 (limite superior da faixa do histograma) e faixas
+    """
+    with _metricas_lock:
+        copia = {nome: dict(m, faixas=list(m["faixas"])) for nome, m in _metricas.items()}
+
+    for metrica in copia.values():
+        chamadas = metrica["chamadas"]
+        metrica["media_ms"] = round(metrica["tempo_total_ms"] / chamadas, 1) if chamadas else 0.0
+        metrica["histograma"] = {
+            ("+inf" if limite == float("inf") else f"<={limite}ms"): quantidade
+            for limite, quantidade in zip(FAIXAS_LATENCIA_MS, metrica["faixas"])
+        }
+
+        for rotulo, quantil in (("p50_ms", 0.50), ("p95_ms", 0.95)):
+            alvo = quantil * chamadas
+            acumulado = 0
+            metrica[rotulo] = None
+            for limite, quantidade in zip(FAIXAS_LATENCIA_MS, metrica["faixas"]):
+                acumulado += quantidade
+                if chamadas and acumulado >= alvo:
+                    metrica[rotulo] = limite
+                    break
+
+    return copia
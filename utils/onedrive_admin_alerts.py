@@ -7,13 +7,10 @@
 """
 
 import os
-import requests
 from datetime import datetime
 
-def get_admin_ids():
-    """Obter IDs dos administradores da variável ADMIN_IDS"""
-    admin_ids_str = os.getenv("ADMIN_IDS", "")
-    return [admin_id.strip() for admin_id in admin_ids_str.split(',') if admin_id.strip()]
+from utils import http_client
+from utils.database import obter_ids_admins
 
 def send_telegram_to_admin(admin_id, message):
     """Enviar mensagem Telegram para admin específico"""
@@ -29,7 +26,7 @@ def send_telegram_to_admin(admin_id, message):
             'parse_mode': 'Markdown'
         }
         
-        response = requests.post(url, data=data, timeout=10)
+        response = http_client.post(url, endpoint="telegram.sendMessage", data=data, timeout=10)
         return response.status_code == 200
     except Exception as e:
         print(f"❌ Erro enviando Telegram para admin {admin_id}: {e}")
@@ -37,7 +34,7 @@ def send_telegram_to_admin(admin_id, message):
 
 def alert_onedrive_failure(error_details):
     """Alertar todos os admins sobre falha do OneDrive"""
-    admin_ids = get_admin_ids()
+    admin_ids = [str(admin_id) for admin_id in sorted(obter_ids_admins())]
     if not admin_ids:
         print("❌ Nenhum admin configurado para alertas OneDrive")
         return False
@@ -74,7 +71,7 @@ _Cadastros serão rejeitados até normalização_
 
 def alert_onedrive_recovery():
     """Alertar recuperação do OneDrive"""
-    admin_ids = get_admin_ids()
+    admin_ids = [str(admin_id) for admin_id in sorted(obter_ids_admins())]
     if not admin_ids:
         return False
         
@@ -16,11 +16,22 @@ import shutil
 from datetime import datetime
 import pytz
 import logging
-from typing import Optional, Dict, Tuple
+from typing import Optional, Dict, List, Tuple
+
+from . import http_client
+from . import compressao
 
 # Logger específico
 logger = logging.getLogger("CCB-Alerta-Bot.onedrive")
 
+# Status do Graph para upload condicional recusado (eTag mudou / arquivo já existe)
+STATUS_CONFLITO = (409, 412)
+
+
+class ConflitoVersaoRemota(Exception):
+    """O arquivo remoto mudou desde a versão usada como condição do upload"""
+
+
 class OneDriveManager:
     """
     Gerenciador OneDrive para banco de dados compartilhado
@@ -32,6 +43,9 @@ class OneDriveManager:
     - Sincronização bidirecional (OneDrive ↔ Local)
     """
     
+    # Granularidade exigida pelo Graph para os chunks de uma upload session
+    TAMANHO_BLOCO_UPLOAD = 320 * 1024
+    
     def __init__(self, auth_manager):
         """
         Inicializar gerenciador OneDrive
@@ -43,7 +57,7 @@ class OneDriveManager:
         
         # Configurações OneDrive
         self.alerta_folder_id = os.getenv("ONEDRIVE_ALERTA_ID")
-        self.base_url = "https://graph.microsoft.com/v1.0"
+        self.base_url = os.getenv("ONEDRIVE_BASE_URL", "https://graph.microsoft.com/v1.0").rstrip("/")
         
         # Caminhos locais (fallback)
         self.local_storage_path = "/opt/render/project/storage"
@@ -59,6 +73,26 @@ class OneDriveManager:
         # NOVO: Timeouts reduzidos para melhor performance
         self.timeout_download = 8   # Era 30s, agora 8s
         self.timeout_upload = 15    # Era 60s, agora 15s    
+        
+        # Upload em sessão (arquivos grandes): Graph exige blocos múltiplos de 320 KiB
+        self.limite_upload_simples = int(os.getenv("ONEDRIVE_UPLOAD_SESSION_THRESHOLD", str(4 * 1024 * 1024)))
+        blocos = max(1, int(os.getenv("ONEDRIVE_UPLOAD_CHUNK_SIZE", str(10 * self.TAMANHO_BLOCO_UPLOAD))) // self.TAMANHO_BLOCO_UPLOAD)
+        self.tamanho_chunk_upload = blocos * self.TAMANHO_BLOCO_UPLOAD
+        self.tentativas_chunk_upload = 5
+        
+        # Compressão no envio (none/gzip/zstd); downloads detectam o formato pelo cabeçalho
+        self.compressao_upload = compressao.resolver_algoritmo(os.getenv("ONEDRIVE_COMPRESSION", "none"))
+        nivel = os.getenv("ONEDRIVE_COMPRESSION_LEVEL")
+        self.nivel_compressao = int(nivel) if nivel else None
+        
+        # Versão remota correspondente ao nosso cache (eTag/cTag do último download/upload)
+        self._versao_remota: Dict = {}
+        self._metricas_download = {
+            "verificacoes": 0,
+            "inalterados": 0,
+            "completos": 0,
+            "bytes_baixados": 0,
+        }
 
     def _obter_headers(self) -> Dict[str, str]:
         """Obter headers autenticados para requisições"""
@@ -84,7 +118,7 @@ class OneDriveManager:
             url = f"{self.base_url}/me/drive/root/children"
             params = {"$filter": "name eq 'Alerta' and folder ne null"}
             
-            response = requests.get(url, headers=headers, params=params, timeout=30)
+            response = http_client.get(url, endpoint="graph.pastas", headers=headers, params=params, timeout=30)
             
             if response.status_code == 200:
                 data = response.json()
@@ -124,7 +158,7 @@ class OneDriveManager:
                 "@microsoft.graph.conflictBehavior": "fail"
             }
             
-            response = requests.post(url, headers=headers, json=data, timeout=30)
+            response = http_client.post(url, endpoint="graph.pastas", headers=headers, json=data, timeout=30)
             
             if response.status_code == 201:
                 pasta_data = response.json()
@@ -163,7 +197,7 @@ class OneDriveManager:
                 return False
             
             # Criar subpastas
-            subpastas = ["backup", "logs"]
+            subpastas = ["backup", "logs", "delta"]
             
             for pasta in subpastas:
                 self._criar_subpasta(pasta)
@@ -190,7 +224,7 @@ class OneDriveManager:
                 "@microsoft.graph.conflictBehavior": "replace"
             }
             
-            response = requests.post(url, headers=headers, json=data, timeout=30)
+            response = http_client.post(url, endpoint="graph.pastas", headers=headers, json=data, timeout=30)
             
             if response.status_code in [201, 200]:
                 pasta_data = response.json()
@@ -204,15 +238,24 @@ class OneDriveManager:
             logger.warning(f"⚠️ Erro criando subpasta '{nome_pasta}': {e}")
             return None
     
-    def upload_database(self, local_db_path: str) -> bool:
+    def upload_database(self, local_db_path: str, condicional: bool = False,
+                        etag: Optional[str] = None) -> Optional[bool]:
         """
         Upload do banco SQLite para OneDrive
         
+        Com `condicional`, o upload só substitui a versão remota de `etag`
+        (If-Match) - sem eTag, só cria o arquivo se ele ainda não existir.
+        Assim uma segunda instância com cache antigo não sobrescreve os
+        cadastros enviados por outra.
+        
         Args:
             local_db_path (str): Caminho do arquivo local
+            condicional (bool): Recusar o upload se o remoto mudou
+            etag (str): eTag da versão remota que o cache local conhece
             
         Returns:
-            bool: True se upload bem-sucedido
+            bool: True se upload bem-sucedido, False se falhar, None se o
+            upload condicional foi recusado (versão remota diferente)
         """
         try:
             if not os.path.exists(local_db_path):
@@ -224,44 +267,316 @@ class OneDriveManager:
                 logger.error("❌ Não é possível fazer upload sem autenticação/pasta")
                 return False
             
-            # Ler arquivo local
-            with open(local_db_path, 'rb') as f:
-                file_content = f.read()
-            
-            # URL para upload
             filename = "alertas_bot.db"
-            url = f"{self.base_url}/me/drive/items/{self.alerta_folder_id}:/{filename}:/content"
-            
-            # Headers para upload de arquivo
-            upload_headers = {
-                'Authorization': headers['Authorization'],
-                'Content-Type': 'application/octet-stream'
-            }
-            
-            response = requests.put(url, headers=upload_headers, data=file_content, timeout=self.timeout_upload)
-            
-            if response.status_code in [200, 201]:
-                file_data = response.json()
-                logger.info(f"✅ Database enviado para OneDrive: {filename}")
-                logger.info(f"   Tamanho: {len(file_content)} bytes")
-                return True
-            else:
-                logger.error(f"❌ Erro no upload: HTTP {response.status_code}")
+            condicao = self._condicao_upload(condicional, etag)
+            try:
+                item = self._enviar_comprimido(local_db_path, filename, headers, condicao)
+            except ConflitoVersaoRemota as e:
+                logger.warning(f"⚠️ Upload recusado, database remoto mudou: {e}")
+                return None
+            if item is None:
                 return False
+            
+            self._registrar_versao_remota(item)
+            logger.info(f"✅ Database enviado para OneDrive: {filename}")
+            logger.info(f"   Tamanho: {os.path.getsize(local_db_path)} bytes ({item.get('size')} enviados)")
+            return True
                 
         except Exception as e:
             logger.error(f"❌ Erro fazendo upload do database: {e}")
             return False
     
-    def download_database(self, local_db_path: str) -> bool:
+    def upload_arquivo(self, local_path: str, caminho_remoto: str, comprimir: bool = False) -> bool:
+        """
+        Upload de um arquivo qualquer para dentro da pasta Alerta
+        
+        Args:
+            local_path (str): Caminho do arquivo local
+            caminho_remoto (str): Caminho relativo à pasta Alerta (ex: "delta/lote.json")
+            comprimir (bool): Aplicar a compressão configurada (ONEDRIVE_COMPRESSION)
+            
+        Returns:
+            bool: True se upload bem-sucedido
+        """
+        try:
+            headers = self._obter_headers()
+            if not headers or not self.alerta_folder_id:
+                logger.error("❌ Não é possível fazer upload sem autenticação/pasta")
+                return False
+            
+            if comprimir:
+                return self._enviar_comprimido(local_path, caminho_remoto, headers) is not None
+            return self._enviar_arquivo(local_path, caminho_remoto, headers) is not None
+            
+        except Exception as e:
+            logger.error(f"❌ Erro enviando {caminho_remoto}: {e}")
+            return False
+    
+    @staticmethod
+    def _condicao_upload(condicional: bool, etag: Optional[str]) -> Optional[Dict[str, str]]:
+        """
+        Headers da condição de upload
+        
+        Returns:
+            Dict: {"If-Match": eTag}, {} para "só se não existir" ou None
+            (upload incondicional, substitui o remoto)
+        """
+        if not condicional:
+            return None
+        return {"If-Match": etag} if etag else {}
+    
+    def _enviar_comprimido(self, local_path: str, caminho_remoto: str, headers: Dict[str, str],
+                           condicao: Optional[Dict[str, str]] = None) -> Optional[Dict]:
+        """
+        Comprime num temporário ao lado do arquivo (se configurado) e envia
+        
+        Returns:
+            Dict: driveItem do arquivo enviado ou None se falhar
+        """
+        enviado = compressao.preparar_envio(local_path, self.compressao_upload, self.nivel_compressao)
+        try:
+            if enviado != local_path:
+                logger.info(
+                    f"🗜️ {caminho_remoto}: {os.path.getsize(local_path)} → "
+                    f"{os.path.getsize(enviado)} bytes ({self.compressao_upload})"
+                )
+            return self._enviar_arquivo(enviado, caminho_remoto, headers, condicao)
+        finally:
+            if enviado != local_path:
+                os.remove(enviado)
+    
+    def _enviar_arquivo(self, local_path: str, caminho_remoto: str, headers: Dict[str, str],
+                        condicao: Optional[Dict[str, str]] = None) -> Optional[Dict]:
+        """
+        Envia o arquivo por PUT simples ou, acima do limite, por upload session
+        
+        Returns:
+            Dict: driveItem do arquivo enviado ou None se falhar
+            
+        Raises:
+            ConflitoVersaoRemota: upload condicional recusado (HTTP 409/412)
+        """
+        tamanho = os.path.getsize(local_path)
+        
+        # Acima do limite do PUT simples: upload em sessão, por chunks
+        if tamanho > self.limite_upload_simples:
+            return self._upload_em_sessao(local_path, caminho_remoto, headers, condicao)
+        
+        url = f"{self.base_url}/me/drive/items/{self.alerta_folder_id}:/{caminho_remoto}:/content"
+        
+        # Headers para upload de arquivo
+        upload_headers = {
+            'Authorization': headers['Authorization'],
+            'Content-Type': 'application/octet-stream',
+            'Content-Length': str(tamanho)
+        }
+        params = None
+        if condicao is not None:
+            upload_headers.update(condicao)
+            if not condicao:
+                params = {"@microsoft.graph.conflictBehavior": "fail"}
+        
+        # Streaming direto do disco (arquivo não é carregado em memória)
+        with open(local_path, 'rb') as f:
+            response = http_client.put(
+                url, endpoint="graph.upload", headers=upload_headers, params=params,
+                data=f, timeout=self.timeout_upload
+            )
+        
+        if response.status_code in [200, 201]:
+            return response.json()
+        
+        if condicao is not None and response.status_code in STATUS_CONFLITO:
+            raise ConflitoVersaoRemota(f"{caminho_remoto}: HTTP {response.status_code}")
+        
+        logger.error(f"❌ Erro no upload de {caminho_remoto}: HTTP {response.status_code}")
+        return None
+    
+    def _upload_em_sessao(self, local_path: str, caminho_remoto: str, headers: Dict[str, str],
+                          condicao: Optional[Dict[str, str]] = None) -> Optional[Dict]:
+        """
+        Upload por upload session do Graph (arquivos grandes)
+        
+        O arquivo é lido do disco um chunk por vez. Se um chunk falhar,
+        consulta a sessão (nextExpectedRanges) e retoma do ponto que o
+        servidor realmente recebeu, sem reenviar o que já chegou.
+        
+        Args:
+            local_path (str): Caminho do arquivo local
+            caminho_remoto (str): Caminho relativo à pasta Alerta
+            headers (Dict): Headers autenticados
+            condicao (Dict): Headers de upload condicional (ver _condicao_upload)
+            
+        Returns:
+            Dict: driveItem do arquivo enviado ou None se falhar
+            
+        Raises:
+            ConflitoVersaoRemota: upload condicional recusado (HTTP 409/412)
+        """
+        url = f"{self.base_url}/me/drive/items/{self.alerta_folder_id}:/{caminho_remoto}:/createUploadSession"
+        comportamento = "fail" if condicao == {} else "replace"
+        corpo = {"item": {"@microsoft.graph.conflictBehavior": comportamento}}
+        sessao_headers = dict(headers, **(condicao or {}))
+        
+        response = http_client.post(url, endpoint="graph.upload_sessao", headers=sessao_headers, json=corpo, timeout=30)
+        if condicao is not None and response.status_code in STATUS_CONFLITO:
+            raise ConflitoVersaoRemota(f"{caminho_remoto}: HTTP {response.status_code}")
+        if response.status_code != 200:
+            logger.error(f"❌ Erro criando sessão de upload: HTTP {response.status_code}")
+            return None
+        
+        upload_url = response.json()["uploadUrl"]
+        tamanho = os.path.getsize(local_path)
+        offset = 0
+        falhas = 0
+        
+        with open(local_path, 'rb') as f:
+            while offset < tamanho:
+                f.seek(offset)
+                chunk = f.read(self.tamanho_chunk_upload)
+                fim = offset + len(chunk) - 1
+                
+                # uploadUrl já é pré-autenticada: não enviar Authorization
+                chunk_headers = {
+                    'Content-Length': str(len(chunk)),
+                    'Content-Range': f"bytes {offset}-{fim}/{tamanho}"
+                }
+                
+                try:
+                    resposta = http_client.put(
+                        upload_url, endpoint="graph.upload_chunk", headers=chunk_headers,
+                        data=chunk, timeout=self.timeout_upload
+                    )
+                except requests.RequestException as e:
+                    resposta = None
+                    logger.warning(f"⚠️ Chunk {offset}-{fim} falhou: {e}")
+                
+                if resposta is not None and resposta.status_code in [200, 201]:
+                    logger.info(f"📦 Upload em sessão concluído: {caminho_remoto} ({tamanho} bytes)")
+                    return resposta.json()
+                
+                if resposta is not None and resposta.status_code == 202:
+                    offset = self._proximo_offset(resposta.json(), fim + 1)
+                    falhas = 0
+                    continue
+                
+                # A condição é conferida de novo ao gravar o último chunk
+                if condicao is not None and resposta is not None and resposta.status_code in STATUS_CONFLITO:
+                    self._cancelar_sessao_upload(upload_url)
+                    raise ConflitoVersaoRemota(f"{caminho_remoto}: HTTP {resposta.status_code}")
+                
+                if resposta is not None:
+                    logger.warning(f"⚠️ Chunk {offset}-{fim} recusado: HTTP {resposta.status_code}")
+                
+                falhas += 1
+                if falhas > self.tentativas_chunk_upload:
+                    logger.error("❌ Upload em sessão abandonado após falhas consecutivas")
+                    self._cancelar_sessao_upload(upload_url)
+                    return None
+                
+                # Retomar de onde o servidor parou
+                status = self._status_sessao_upload(upload_url)
+                if status is None:
+                    logger.error("❌ Sessão de upload expirada ou inválida")
+                    return None
+                offset = self._proximo_offset(status, offset)
+        
+        # Todos os bytes enviados sem resposta final: confirmar pelo status
+        status = self._status_sessao_upload(upload_url)
+        if status is None or status.get("nextExpectedRanges"):
+            return None
+        return self._obter_metadados(caminho_remoto, headers) or None
+    
+    @staticmethod
+    def _proximo_offset(status: Dict, padrao: int) -> int:
+        """Primeiro byte pendente segundo nextExpectedRanges ("inicio-fim" ou "inicio-")"""
+        faixas = status.get("nextExpectedRanges") or []
+        if not faixas:
+            return padrao
+        return int(faixas[0].split("-")[0])
+    
+    def _status_sessao_upload(self, upload_url: str) -> Optional[Dict]:
+        """Consulta os bytes pendentes de uma sessão de upload"""
+        try:
+            response = http_client.get(upload_url, endpoint="graph.upload_sessao", timeout=30)
+            if response.status_code == 200:
+                return response.json()
+            logger.warning(f"⚠️ Status da sessão de upload: HTTP {response.status_code}")
+        except requests.RequestException as e:
+            logger.warning(f"⚠️ Erro consultando sessão de upload: {e}")
+        return None
+    
+    def _cancelar_sessao_upload(self, upload_url: str):
+        """Descarta a sessão no servidor (libera os bytes já enviados)"""
+        try:
+            http_client.delete(upload_url, endpoint="graph.upload_sessao", tentativas=1, timeout=30)
+        except requests.RequestException:
+            pass
+    
+    def _registrar_versao_remota(self, item: Dict):
+        """Guarda eTag/cTag/lastModified do item que corresponde ao cache local"""
+        self._versao_remota = {
+            chave: item.get(chave)
+            for chave in ("eTag", "cTag", "lastModifiedDateTime", "size")
+        }
+    
+    def obter_versao_remota(self) -> Dict:
+        """eTag/cTag/lastModified/size da versão remota do último upload/download"""
+        return dict(self._versao_remota)
+    
+    def _obter_metadados(self, caminho_remoto: str, headers: Dict[str, str]) -> Optional[Dict]:
+        """Metadados de um item da pasta Alerta ({} se não existe, None se erro)"""
+        url = f"{self.base_url}/me/drive/items/{self.alerta_folder_id}:/{caminho_remoto}"
+        params = {"$select": "id,name,eTag,cTag,lastModifiedDateTime,size"}
+        
+        response = http_client.get(
+            url, endpoint="graph.metadados", headers=headers, params=params, timeout=self.timeout_download
+        )
+        
+        if response.status_code == 200:
+            return response.json()
+        elif response.status_code == 404:
+            return {}
+        
+        logger.error(f"❌ Erro consultando metadados de {caminho_remoto}: HTTP {response.status_code}")
+        return None
+    
+    def obter_metadados_database(self) -> Optional[Dict]:
+        """
+        Metadados do banco no OneDrive (sem baixar o conteúdo)
+        
+        Returns:
+            Dict: eTag, cTag, lastModifiedDateTime e size; {} se o arquivo
+                  não existe; None em caso de erro
+        """
+        try:
+            headers = self._obter_headers()
+            if not headers or not self.alerta_folder_id:
+                return None
+            
+            self._metricas_download["verificacoes"] += 1
+            return self._obter_metadados("alertas_bot.db", headers)
+                
+        except Exception as e:
+            logger.error(f"❌ Erro consultando metadados do database: {e}")
+            return None
+    
+    def download_database(self, local_db_path: str, somente_se_alterado: bool = False) -> Optional[bool]:
         """
         Download do banco SQLite do OneDrive
         
+        Consulta os metadados antes: com `somente_se_alterado`, o conteúdo
+        só é baixado se o cTag/eTag remoto mudou desde o último download ou
+        upload. O arquivo é gravado em streaming num temporário e renomeado
+        atomicamente para `local_db_path`.
+        
         Args:
             local_db_path (str): Caminho onde salvar o arquivo
+            somente_se_alterado (bool): Pular o download se o remoto não mudou
             
         Returns:
             bool: True se download bem-sucedido
+            None: remoto inalterado (nada foi baixado)
         """
         try:
             headers = self._obter_headers()
@@ -269,35 +584,186 @@ class OneDriveManager:
                 logger.error("❌ Não é possível fazer download sem autenticação/pasta")
                 return False
             
-            # URL para download
+            metadados = self.obter_metadados_database()
+            if metadados == {}:
+                logger.info("📁 Arquivo não existe no OneDrive - será criado")
+                return False
+            
+            if somente_se_alterado and metadados:
+                chave = "cTag" if self._versao_remota.get("cTag") else "eTag"
+                if self._versao_remota.get(chave) and metadados.get(chave) == self._versao_remota[chave]:
+                    self._metricas_download["inalterados"] += 1
+                    logger.debug("📁 Database no OneDrive inalterado - download pulado")
+                    return None
+            
             filename = "alertas_bot.db"
-            url = f"{self.base_url}/me/drive/items/{self.alerta_folder_id}:/{filename}:/content"
+            tamanho = self._baixar_arquivo(filename, local_db_path, headers)
+            if tamanho is None:
+                return False
             
-            response = requests.get(url, headers=headers, timeout=self.timeout_download)
+            if metadados:
+                self._registrar_versao_remota(metadados)
+            self._metricas_download["completos"] += 1
+            self._metricas_download["bytes_baixados"] += tamanho
             
-            if response.status_code == 200:
+            logger.info(f"✅ Database baixado do OneDrive: {filename}")
+            logger.info(f"   Tamanho: {tamanho} bytes")
+            logger.info(f"   Salvo em: {local_db_path}")
+            return True
+                
+        except Exception as e:
+            logger.error(f"❌ Erro fazendo download do database: {e}")
+            return False
+    
+    def download_arquivo(self, caminho_remoto: str, local_path: str) -> bool:
+        """
+        Download de um arquivo qualquer da pasta Alerta
+        
+        Args:
+            caminho_remoto (str): Caminho relativo à pasta Alerta
+            local_path (str): Caminho onde salvar o arquivo
+            
+        Returns:
+            bool: True se download bem-sucedido
+        """
+        try:
+            headers = self._obter_headers()
+            if not headers or not self.alerta_folder_id:
+                logger.error("❌ Não é possível fazer download sem autenticação/pasta")
+                return False
+            
+            return self._baixar_arquivo(caminho_remoto, local_path, headers) is not None
+            
+        except Exception as e:
+            logger.error(f"❌ Erro baixando {caminho_remoto}: {e}")
+            return False
+    
+    def _baixar_arquivo(self, caminho_remoto: str, local_path: str, headers: Dict[str, str]) -> Optional[int]:
+        """
+        Baixa em streaming para um temporário e renomeia atomicamente
+        
+        Returns:
+            int: bytes baixados ou None se falhar
+        """
+        url = f"{self.base_url}/me/drive/items/{self.alerta_folder_id}:/{caminho_remoto}:/content"
+        temporario = local_path + ".part"
+        
+        try:
+            with http_client.get(
+                url, endpoint="graph.download", headers=headers, timeout=self.timeout_download, stream=True
+            ) as response:
+                if response.status_code == 404:
+                    logger.info(f"📁 Arquivo não existe no OneDrive: {caminho_remoto}")
+                    return None
+                if response.status_code != 200:
+                    logger.error(f"❌ Erro no download de {caminho_remoto}: HTTP {response.status_code}")
+                    return None
+                
                 # Garantir que diretório existe
-                os.makedirs(os.path.dirname(local_db_path), exist_ok=True)
+                os.makedirs(os.path.dirname(local_path) or ".", exist_ok=True)
                 
-                # Salvar arquivo
-                with open(local_db_path, 'wb') as f:
-                    f.write(response.content)
+                # Streaming para temporário (nunca grava sobre o destino pela metade)
+                tamanho = 0
+                with open(temporario, 'wb') as f:
+                    for bloco in response.iter_content(chunk_size=1024 * 1024):
+                        f.write(bloco)
+                        tamanho += len(bloco)
+                    f.flush()
+                    os.fsync(f.fileno())
                 
-                logger.info(f"✅ Database baixado do OneDrive: {filename}")
-                logger.info(f"   Tamanho: {len(response.content)} bytes")
-                logger.info(f"   Salvo em: {local_db_path}")
-                return True
-            elif response.status_code == 404:
-                logger.info("📁 Arquivo não existe no OneDrive - será criado")
-                return False
-            else:
-                logger.error(f"❌ Erro no download: HTTP {response.status_code}")
-                return False
+                esperado = response.headers.get("Content-Length")
+                if esperado is not None and int(esperado) != tamanho:
+                    logger.error(f"❌ Download incompleto: {tamanho} de {esperado} bytes")
+                    return None
+            
+            # Arquivos enviados comprimidos têm cabeçalho; os brutos passam direto
+            compressao.descomprimir_se_necessario(temporario)
+            os.replace(temporario, local_path)
+            return tamanho
+        finally:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+    
+    def listar_arquivos(self, subpasta: str) -> Optional[List[Dict]]:
+        """
+        Lista os arquivos de uma subpasta da pasta Alerta
+        
+        Args:
+            subpasta (str): Nome da subpasta (ex: "delta")
+            
+        Returns:
+            List[Dict]: itens com name, size e eTag ([] se a subpasta não existe),
+                        None em caso de erro
+        """
+        try:
+            headers = self._obter_headers()
+            if not headers or not self.alerta_folder_id:
+                return None
+            
+            url = f"{self.base_url}/me/drive/items/{self.alerta_folder_id}:/{subpasta}:/children"
+            params = {"$select": "name,size,eTag", "$top": "1000"}
+            itens = []
+            
+            while url:
+                response = http_client.get(url, endpoint="graph.listagem", headers=headers, params=params, timeout=30)
+                if response.status_code == 404:
+                    return []
+                if response.status_code != 200:
+                    logger.error(f"❌ Erro listando {subpasta}: HTTP {response.status_code}")
+                    return None
                 
+                dados = response.json()
+                itens.extend(dados.get("value", []))
+                
+                # Paginação: nextLink já carrega os parâmetros
+                url = dados.get("@odata.nextLink")
+                params = None
+            
+            return itens
+            
         except Exception as e:
-            logger.error(f"❌ Erro fazendo download do database: {e}")
+            logger.error(f"❌ Erro listando {subpasta}: {e}")
+            return None
+    
+    def remover_arquivo(self, caminho_remoto: str) -> bool:
+        """
+        Remove um arquivo da pasta Alerta
+        
+        Args:
+            caminho_remoto (str): Caminho relativo à pasta Alerta
+            
+        Returns:
+            bool: True se removido (ou já inexistente)
+        """
+        try:
+            headers = self._obter_headers()
+            if not headers or not self.alerta_folder_id:
+                return False
+            
+            url = f"{self.base_url}/me/drive/items/{self.alerta_folder_id}:/{caminho_remoto}"
+            response = http_client.delete(url, endpoint="graph.remocao", headers=headers, timeout=30)
+            
+            if response.status_code in [204, 404]:
+                return True
+            
+            logger.warning(f"⚠️ Erro removendo {caminho_remoto}: HTTP {response.status_code}")
+            return False
+            
+        except Exception as e:
+            logger.warning(f"⚠️ Erro removendo {caminho_remoto}: {e}")
             return False
     
+    def metricas_download(self) -> Dict:
+        """
+        Contadores de download para o /health
+        
+        Returns:
+            Dict: verificações de metadados, downloads pulados e completos
+        """
+        metricas = dict(self._metricas_download)
+        metricas["versao_remota"] = dict(self._versao_remota)
+        return metricas
+    
     def obter_caminho_database_hibrido(self) -> str:
         """
         Obter caminho do database usando estratégia híbrida
@@ -0,0 +1,512 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+📁 ARQUIVO: utils/onedrive_manager_async.py
+💾 ONDE SALVAR: ccb-alerta-bot/utils/onedrive_manager_async.py
+📦 FUNÇÃO: Variante assíncrona do OneDriveManager (httpx)
+🔧 DESCRIÇÃO: Mesmas operações do gerenciador síncrono, aguardáveis no
+   event loop do bot - nenhuma chamada ao Graph bloqueia os handlers
+👨‍💼 ADAPTADO PARA: CCB Alerta Bot
+"""
+
+import os
+import asyncio
+import logging
+from typing import Optional, Dict, List
+
+import httpx
+
+from . import http_client
+from . import compressao
+from .onedrive_manager import OneDriveManager, ConflitoVersaoRemota, STATUS_CONFLITO
+
+# Logger específico
+logger = logging.getLogger("CCB-Alerta-Bot.onedrive.async")
+
+
+def _ler_bytes(caminho: str, offset: int = 0, tamanho: int = -1) -> bytes:
+    with open(caminho, 'rb') as f:
+        f.seek(offset)
+        return f.read(tamanho)
+
+
+class OneDriveManagerAsync:
+    """
+    Fachada assíncrona sobre um OneDriveManager
+
+    Compartilha com o gerenciador síncrono a configuração (pasta Alerta,
+    limites de upload, timeouts) e o estado de versão remota/métricas, de
+    forma que as threads de sincronização e os handlers enxerguem o mesmo
+    eTag/cTag. Leitura e escrita de arquivos locais vão para uma thread.
+    """
+
+    def __init__(self, manager: OneDriveManager, auth_async=None):
+        """
+        Args:
+            manager: OneDriveManager já configurado (fachada síncrona)
+            auth_async: MicrosoftAuthAsync (padrão: criado sobre manager.auth)
+        """
+        if auth_async is None:
+            from auth.microsoft_auth import MicrosoftAuthAsync
+            auth_async = MicrosoftAuthAsync(manager.auth)
+
+        self.sync = manager
+        self.auth = auth_async
+
+    def __getattr__(self, nome):
+        # Configuração e operações locais (status_onedrive, metricas_download...) vêm do síncrono
+        return getattr(self.sync, nome)
+
+    async def _obter_headers(self) -> Dict[str, str]:
+        """Obter headers autenticados para requisições"""
+        try:
+            return await self.auth.obter_headers_autenticados()
+        except Exception as e:
+            logger.error(f"❌ Erro obtendo headers: {e}")
+            return {}
+
+    def _url_item(self, caminho_remoto: str, sufixo: str = "") -> str:
+        return f"{self.sync.base_url}/me/drive/items/{self.sync.alerta_folder_id}:/{caminho_remoto}{sufixo}"
+
+    # ------------------------------------------------------------------
+    # Metadados / download
+    # ------------------------------------------------------------------
+
+    async def _obter_metadados(self, caminho_remoto: str, headers: Dict[str, str]) -> Optional[Dict]:
+        """Metadados de um item da pasta Alerta ({} se não existe, None se erro)"""
+        params = {"$select": "id,name,eTag,cTag,lastModifiedDateTime,size"}
+
+        response = await http_client.requisitar_async(
+            "GET", self._url_item(caminho_remoto), endpoint="graph.metadados",
+            headers=headers, params=params, timeout=self.sync.timeout_download
+        )
+
+        if response.status_code == 200:
+            return response.json()
+        elif response.status_code == 404:
+            return {}
+
+        logger.error(f"❌ Erro consultando metadados de {caminho_remoto}: HTTP {response.status_code}")
+        return None
+
+    async def obter_metadados_database(self) -> Optional[Dict]:
+        """
+        Metadados do banco no OneDrive (sem baixar o conteúdo)
+
+        Returns:
+            Dict: eTag, cTag, lastModifiedDateTime e size; {} se o arquivo
+                  não existe; None em caso de erro
+        """
+        try:
+            headers = await self._obter_headers()
+            if not headers or not self.sync.alerta_folder_id:
+                return None
+
+            self.sync._metricas_download["verificacoes"] += 1
+            return await self._obter_metadados("alertas_bot.db", headers)
+
+        except Exception as e:
+            logger.error(f"❌ Erro consultando metadados do database: {e}")
+            return None
+
+    async def download_database(self, local_db_path: str, somente_se_alterado: bool = False) -> Optional[bool]:
+        """
+        Download do banco SQLite do OneDrive (ver OneDriveManager.download_database)
+
+        Returns:
+            bool: True se download bem-sucedido
+            None: remoto inalterado (nada foi baixado)
+        """
+        try:
+            headers = await self._obter_headers()
+            if not headers or not self.sync.alerta_folder_id:
+                logger.error("❌ Não é possível fazer download sem autenticação/pasta")
+                return False
+
+            metadados = await self.obter_metadados_database()
+            if metadados == {}:
+                logger.info("📁 Arquivo não existe no OneDrive - será criado")
+                return False
+
+            versao = self.sync._versao_remota
+            if somente_se_alterado and metadados:
+                chave = "cTag" if versao.get("cTag") else "eTag"
+                if versao.get(chave) and metadados.get(chave) == versao[chave]:
+                    self.sync._metricas_download["inalterados"] += 1
+                    logger.debug("📁 Database no OneDrive inalterado - download pulado")
+                    return None
+
+            filename = "alertas_bot.db"
+            tamanho = await self._baixar_arquivo(filename, local_db_path, headers)
+            if tamanho is None:
+                return False
+
+            if metadados:
+                self.sync._registrar_versao_remota(metadados)
+            self.sync._metricas_download["completos"] += 1
+            self.sync._metricas_download["bytes_baixados"] += tamanho
+
+            logger.info(f"✅ Database baixado do OneDrive: {filename} ({tamanho} bytes)")
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Erro fazendo download do database: {e}")
+            return False
+
+    async def download_arquivo(self, caminho_remoto: str, local_path: str) -> bool:
+        """
+        Download de um arquivo qualquer da pasta Alerta
+
+        Returns:
+            bool: True se download bem-sucedido
+        """
+        try:
+            headers = await self._obter_headers()
+            if not headers or not self.sync.alerta_folder_id:
+                logger.error("❌ Não é possível fazer download sem autenticação/pasta")
+                return False
+
+            return await self._baixar_arquivo(caminho_remoto, local_path, headers) is not None
+
+        except Exception as e:
+            logger.error(f"❌ Erro baixando {caminho_remoto}: {e}")
+            return False
+
+    async def _baixar_arquivo(self, caminho_remoto: str, local_path: str, headers: Dict[str, str]) -> Optional[int]:
+        """
+        Baixa em streaming para um temporário e renomeia atomicamente
+
+        Returns:
+            int: bytes baixados ou None se falhar
+        """
+        temporario = local_path + ".part"
+
+        response = await http_client.requisitar_async(
+            "GET", self._url_item(caminho_remoto, ":/content"), endpoint="graph.download",
+            headers=headers, timeout=self.sync.timeout_download, stream=True
+        )
+        try:
+            if response.status_code == 404:
+                logger.info(f"📁 Arquivo não existe no OneDrive: {caminho_remoto}")
+                return None
+            if response.status_code != 200:
+                logger.error(f"❌ Erro no download de {caminho_remoto}: HTTP {response.status_code}")
+                return None
+
+            os.makedirs(os.path.dirname(local_path) or ".", exist_ok=True)
+
+            # Escrita em disco fora do event loop (um bloco por vez)
+            f = await asyncio.to_thread(open, temporario, 'wb')
+            tamanho = 0
+            try:
+                async for bloco in response.aiter_bytes(chunk_size=1024 * 1024):
+                    await asyncio.to_thread(f.write, bloco)
+                    tamanho += len(bloco)
+                await asyncio.to_thread(f.flush)
+                await asyncio.to_thread(os.fsync, f.fileno())
+            finally:
+                f.close()
+
+            esperado = response.headers.get("Content-Length")
+            if esperado is not None and int(esperado) != tamanho:
+                logger.error(f"❌ Download incompleto: {tamanho} de {esperado} bytes")
+                return None
+
+            # Arquivos enviados comprimidos têm cabeçalho; os brutos passam direto
+            await asyncio.to_thread(compressao.descomprimir_se_necessario, temporario)
+            os.replace(temporario, local_path)
+            return tamanho
+        finally:
+            await response.aclose()
+            if os.path.exists(temporario):
+                os.remove(temporario)
+
+    # ------------------------------------------------------------------
+    # Upload
+    # ------------------------------------------------------------------
+
+    async def upload_database(self, local_db_path: str, condicional: bool = False,
+                              etag: Optional[str] = None) -> Optional[bool]:
+        """
+        Upload do banco SQLite para OneDrive (condição: ver OneDriveManager.upload_database)
+
+        Returns:
+            bool: True se upload bem-sucedido, False se falhar, None se o
+            upload condicional foi recusado (versão remota diferente)
+        """
+        try:
+            if not os.path.exists(local_db_path):
+                logger.error(f"❌ Arquivo local não encontrado: {local_db_path}")
+                return False
+
+            headers = await self._obter_headers()
+            if not headers or not self.sync.alerta_folder_id:
+                logger.error("❌ Não é possível fazer upload sem autenticação/pasta")
+                return False
+
+            filename = "alertas_bot.db"
+            condicao = OneDriveManager._condicao_upload(condicional, etag)
+            try:
+                item = await self._enviar_comprimido(local_db_path, filename, headers, condicao)
+            except ConflitoVersaoRemota as e:
+                logger.warning(f"⚠️ Upload recusado, database remoto mudou: {e}")
+                return None
+            if item is None:
+                return False
+
+            self.sync._registrar_versao_remota(item)
+            logger.info(f"✅ Database enviado para OneDrive: {filename}")
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Erro fazendo upload do database: {e}")
+            return False
+
+    async def upload_arquivo(self, local_path: str, caminho_remoto: str, comprimir: bool = False) -> bool:
+        """
+        Upload de um arquivo qualquer para dentro da pasta Alerta (ver OneDriveManager.upload_arquivo)
+
+        Returns:
+            bool: True se upload bem-sucedido
+        """
+        try:
+            headers = await self._obter_headers()
+            if not headers or not self.sync.alerta_folder_id:
+                logger.error("❌ Não é possível fazer upload sem autenticação/pasta")
+                return False
+
+            if comprimir:
+                return await self._enviar_comprimido(local_path, caminho_remoto, headers) is not None
+            return await self._enviar_arquivo(local_path, caminho_remoto, headers) is not None
+
+        except Exception as e:
+            logger.error(f"❌ Erro enviando {caminho_remoto}: {e}")
+            return False
+
+    async def _enviar_comprimido(self, local_path: str, caminho_remoto: str, headers: Dict[str, str],
+                                 condicao: Optional[Dict[str, str]] = None) -> Optional[Dict]:
+        """
+        Comprime numa thread (se configurado) e envia o temporário
+
+        Returns:
+            Dict: driveItem do arquivo enviado ou None se falhar
+        """
+        enviado = await asyncio.to_thread(
+            compressao.preparar_envio, local_path, self.sync.compressao_upload, self.sync.nivel_compressao
+        )
+        try:
+            return await self._enviar_arquivo(enviado, caminho_remoto, headers, condicao)
+        finally:
+            if enviado != local_path:
+                os.remove(enviado)
+
+    async def _enviar_arquivo(self, local_path: str, caminho_remoto: str, headers: Dict[str, str],
+                              condicao: Optional[Dict[str, str]] = None) -> Optional[Dict]:
+        """
+        Envia o arquivo por PUT simples ou, acima do limite, por upload session
+
+        Returns:
+            Dict: driveItem do arquivo enviado ou None se falhar
+
+        Raises:
+            ConflitoVersaoRemota: upload condicional recusado (HTTP 409/412)
+        """
+        tamanho = os.path.getsize(local_path)
+
+        if tamanho > self.sync.limite_upload_simples:
+            return await self._upload_em_sessao(local_path, caminho_remoto, headers, condicao)
+
+        # Abaixo do limite o corpo cabe em memória (e pode ser reenviado numa nova tentativa)
+        conteudo = await asyncio.to_thread(_ler_bytes, local_path)
+        upload_headers = {
+            'Authorization': headers['Authorization'],
+            'Content-Type': 'application/octet-stream'
+        }
+        params = None
+        if condicao is not None:
+            upload_headers.update(condicao)
+            if not condicao:
+                params = {"@microsoft.graph.conflictBehavior": "fail"}
+
+        response = await http_client.requisitar_async(
+            "PUT", self._url_item(caminho_remoto, ":/content"), endpoint="graph.upload",
+            headers=upload_headers, params=params, content=conteudo, timeout=self.sync.timeout_upload
+        )
+
+        if response.status_code in [200, 201]:
+            return response.json()
+
+        if condicao is not None and response.status_code in STATUS_CONFLITO:
+            raise ConflitoVersaoRemota(f"{caminho_remoto}: HTTP {response.status_code}")
+
+        logger.error(f"❌ Erro no upload de {caminho_remoto}: HTTP {response.status_code}")
+        return None
+
+    async def _upload_em_sessao(self, local_path: str, caminho_remoto: str, headers: Dict[str, str],
+                                condicao: Optional[Dict[str, str]] = None) -> Optional[Dict]:
+        """
+        Upload por upload session do Graph, retomando por nextExpectedRanges
+
+        Returns:
+            Dict: driveItem do arquivo enviado ou None se falhar
+
+        Raises:
+            ConflitoVersaoRemota: upload condicional recusado (HTTP 409/412)
+        """
+        comportamento = "fail" if condicao == {} else "replace"
+        corpo = {"item": {"@microsoft.graph.conflictBehavior": comportamento}}
+        response = await http_client.requisitar_async(
+            "POST", self._url_item(caminho_remoto, ":/createUploadSession"),
+            endpoint="graph.upload_sessao", headers=dict(headers, **(condicao or {})), json=corpo, timeout=30
+        )
+        if condicao is not None and response.status_code in STATUS_CONFLITO:
+            raise ConflitoVersaoRemota(f"{caminho_remoto}: HTTP {response.status_code}")
+        if response.status_code != 200:
+            logger.error(f"❌ Erro criando sessão de upload: HTTP {response.status_code}")
+            return None
+
+        upload_url = response.json()["uploadUrl"]
+        tamanho = os.path.getsize(local_path)
+        offset = 0
+        falhas = 0
+
+        while offset < tamanho:
+            chunk = await asyncio.to_thread(_ler_bytes, local_path, offset, self.sync.tamanho_chunk_upload)
+            fim = offset + len(chunk) - 1
+
+            # uploadUrl já é pré-autenticada: não enviar Authorization
+            chunk_headers = {'Content-Range': f"bytes {offset}-{fim}/{tamanho}"}
+
+            try:
+                resposta = await http_client.requisitar_async(
+                    "PUT", upload_url, endpoint="graph.upload_chunk", headers=chunk_headers,
+                    content=chunk, timeout=self.sync.timeout_upload
+                )
+            except httpx.HTTPError as e:
+                resposta = None
+                logger.warning(f"⚠️ Chunk {offset}-{fim} falhou: {e}")
+
+            if resposta is not None and resposta.status_code in [200, 201]:
+                logger.info(f"📦 Upload em sessão concluído: {caminho_remoto} ({tamanho} bytes)")
+                return resposta.json()
+
+            if resposta is not None and resposta.status_code == 202:
+                offset = OneDriveManager._proximo_offset(resposta.json(), fim + 1)
+                falhas = 0
+                continue
+
+            # A condição é conferida de novo ao gravar o último chunk
+            if condicao is not None and resposta is not None and resposta.status_code in STATUS_CONFLITO:
+                await self._cancelar_sessao_upload(upload_url)
+                raise ConflitoVersaoRemota(f"{caminho_remoto}: HTTP {resposta.status_code}")
+
+            if resposta is not None:
+                logger.warning(f"⚠️ Chunk {offset}-{fim} recusado: HTTP {resposta.status_code}")
+
+            falhas += 1
+            if falhas > self.sync.tentativas_chunk_upload:
+                logger.error("❌ Upload em sessão abandonado após falhas consecutivas")
+                await self._cancelar_sessao_upload(upload_url)
+                return None
+
+            status = await self._status_sessao_upload(upload_url)
+            if status is None:
+                logger.error("❌ Sessão de upload expirada ou inválida")
+                return None
+            offset = OneDriveManager._proximo_offset(status, offset)
+
+        status = await self._status_sessao_upload(upload_url)
+        if status is None or status.get("nextExpectedRanges"):
+            return None
+        return await self._obter_metadados(caminho_remoto, headers) or None
+
+    async def _status_sessao_upload(self, upload_url: str) -> Optional[Dict]:
+        """Consulta os bytes pendentes de uma sessão de upload"""
+        try:
+            response = await http_client.requisitar_async(
+                "GET", upload_url, endpoint="graph.upload_sessao", timeout=30
+            )
+            if response.status_code == 200:
+                return response.json()
+            logger.warning(f"⚠️ Status da sessão de upload: HTTP {response.status_code}")
+        except httpx.HTTPError as e:
+            logger.warning(f"⚠️ Erro consultando sessão de upload: {e}")
+        return None
+
+    async def _cancelar_sessao_upload(self, upload_url: str):
+        """Descarta a sessão no servidor (libera os bytes já enviados)"""
+        try:
+            await http_client.requisitar_async(
+                "DELETE", upload_url, endpoint="graph.upload_sessao", tentativas=1, timeout=30
+            )
+        except httpx.HTTPError:
+            pass
+
+    # ------------------------------------------------------------------
+    # Listagem / remoção
+    # ------------------------------------------------------------------
+
+    async def listar_arquivos(self, subpasta: str) -> Optional[List[Dict]]:
+        """
+        Lista os arquivos de uma subpasta da pasta Alerta
+
+        Returns:
+            List[Dict]: itens com name, size e eTag ([] se a subpasta não existe),
+                        None em caso de erro
+        """
+        try:
+            headers = await self._obter_headers()
+            if not headers or not self.sync.alerta_folder_id:
+                return None
+
+            url = self._url_item(subpasta, ":/children")
+            params = {"$select": "name,size,eTag", "$top": "1000"}
+            itens = []
+
+            while url:
+                response = await http_client.requisitar_async(
+                    "GET", url, endpoint="graph.listagem", headers=headers, params=params, timeout=30
+                )
+                if response.status_code == 404:
+                    return []
+                if response.status_code != 200:
+                    logger.error(f"❌ Erro listando {subpasta}: HTTP {response.status_code}")
+                    return None
+
+                dados = response.json()
+                itens.extend(dados.get("value", []))
+                url = dados.get("@odata.nextLink")
+                params = None
+
+            return itens
+
+        except Exception as e:
+            logger.error(f"❌ Erro listando {subpasta}: {e}")
+            return None
+
+    async def remover_arquivo(self, caminho_remoto: str) -> bool:
+        """
+        Remove um arquivo da pasta Alerta
+
+        Returns:
+            bool: True se removido (ou já inexistente)
+        """
+        try:
+            headers = await self._obter_headers()
+            if not headers or not self.sync.alerta_folder_id:
+                return False
+
+            response = await http_client.requisitar_async(
+                "DELETE", self._url_item(caminho_remoto), endpoint="graph.remocao",
+                headers=headers, timeout=30
+            )
+
+            if response.status_code in [204, 404]:
+                return True
+
+            logger.warning(f"⚠️ Erro removendo {caminho_remoto}: HTTP {response.status_code}")
+            return False
+
+        except Exception as e:
+            logger.warning(f"⚠️ Erro removendo {caminho_remoto}: {e}")
+            return False